@@ -0,0 +1,101 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Wall time of StorageClient.clone_all_experiment_files, file by file vs as a single zip archive.
+
+The experiment cache is disabled, so that every file is transferred.
+Use --request-delay to emulate the round trip time to a remote storage server.
+
+Usage::
+
+    python benchmarks/bench_clone_modes.py --files 10 100 1000 --request-delay 0.002
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_storage_server import FakeStorageServer, create_experiment
+
+__author__ = 'NRP software team'
+
+MODES = ("files", "archive")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 100, 1000],
+                        help="numbers of experiment files")
+    parser.add_argument("--file-size", type=int, default=1024, help="size of each file in bytes")
+    parser.add_argument("--folders", type=int, default=5, help="number of experiment folders")
+    parser.add_argument("--request-delay", type=float, default=0.,
+                        help="seconds added by the server to every request")
+    parser.add_argument("--repeat", type=int, default=3, help="clones per measure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        with FakeStorageServer(root_dir, request_delay=args.request_delay) as server:
+            # Settings are read on import, configure them before importing the client
+            os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+            os.environ["STORAGE_PORT"] = str(server.port)
+            os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(root_dir, "sim_dir"))
+            os.environ["NRP_EXPERIMENT_CACHE_SIZE"] = "0"
+            # pylint: disable=import-outside-toplevel
+            from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+            from hbp_nrp_commons.workspace.settings import Settings
+
+            client = StorageClient()
+            print(f"files of {args.file_size} bytes in {args.folders + 1} folders, "
+                  f"request delay {args.request_delay * 1e3:.1f} ms, "
+                  f"{Settings.storage_clone_workers} workers")
+            print(f"{'files':>6}{'mode':>9}{'requests':>10}{'median s':>10}")
+
+            for files_count in args.files:
+                experiment = f"experiment_{files_count}"
+                create_experiment(root_dir, experiment, files_count, args.file_size,
+                                  args.folders)
+
+                for mode in MODES:
+                    Settings.storage_clone_mode = mode
+                    timings = []
+                    for _ in range(args.repeat):
+                        dest_dir = tempfile.mkdtemp(dir=root_dir)
+                        server.reset_counters()
+                        start = time.perf_counter()
+                        client.clone_all_experiment_files("token", experiment, dest_dir)
+                        timings.append(time.perf_counter() - start)
+                        shutil.rmtree(dest_dir)
+
+                    print(f"{files_count:>6}{mode:>9}{server.requests_count:>10}"
+                          f"{statistics.median(timings):>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Cost of cloning the same experiment twice, with and without the experiment cache.
+
+Usage::
+
+    python benchmarks/bench_experiment_cache.py --files 500 --folders 10 --file-size 65536
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from fake_storage_server import FakeStorageServer, create_experiment
+
+__author__ = 'NRP software team'
+
+EXPERIMENT = "bench_experiment"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500, help="number of experiment files")
+    parser.add_argument("--folders", type=int, default=10, help="number of experiment folders")
+    parser.add_argument("--file-size", type=int, default=64 * 1024,
+                        help="size of each file in bytes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        create_experiment(root_dir, EXPERIMENT, args.files, args.file_size, args.folders)
+
+        with FakeStorageServer(root_dir) as server:
+            # Settings are read on import, configure them before importing the client
+            os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+            os.environ["STORAGE_PORT"] = str(server.port)
+            os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(root_dir, "sim_dir"))
+            os.environ["NRP_EXPERIMENT_CACHE_DIR"] = os.path.join(root_dir, "cache")
+            # pylint: disable=import-outside-toplevel
+            from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+            from hbp_nrp_commons.workspace.settings import Settings
+
+            client = StorageClient()
+            results = []
+            runs = [("no cache", 0), ("cold cache", 1024), ("warm cache", 1024)]
+            for i, (label, cache_size) in enumerate(runs):
+                Settings.experiment_cache_size = cache_size
+                server.reset_counters()
+                start = time.perf_counter()
+                client.clone_all_experiment_files("token", EXPERIMENT,
+                                                  os.path.join(root_dir, f"clone_{i}"))
+                results.append((label, time.perf_counter() - start, server.requests_count))
+
+    print(f"{args.files} files of {args.file_size} bytes in {args.folders + 1} folders")
+    print(f"{'run':<12}{'requests':>10}{'time s':>9}")
+    for label, elapsed, requests_count in results:
+        print(f"{label:<12}{requests_count:>10}{elapsed:>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Time to list, then to clone, an experiment with deep folder trees, with and without the
+storage server providing recursive manifests.
+
+Without manifests, every folder is listed by a request of its own: nested folders can only
+be listed once their parent listing has been received, hence the cost of deep trees.
+Use --request-delay to emulate the round trip time to a remote storage server.
+
+Usage::
+
+    python benchmarks/bench_experiment_manifest.py --depth 10 --request-delay 0.005
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_storage_server import FakeStorageServer, create_experiment
+
+__author__ = 'NRP software team'
+
+EXPERIMENT = "bench_experiment"
+
+
+def _median_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="number of experiment files")
+    parser.add_argument("--folders", type=int, default=4, help="number of top level folders")
+    parser.add_argument("--depth", type=int, default=10, help="depth of the folder trees")
+    parser.add_argument("--request-delay", type=float, default=0.005,
+                        help="seconds added by the server to every request")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measure")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        create_experiment(root_dir, EXPERIMENT, args.files, 1024, args.folders, args.depth)
+
+        with FakeStorageServer(root_dir, request_delay=args.request_delay) as server:
+            # Settings are read on import, configure them before importing the client
+            os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+            os.environ["STORAGE_PORT"] = str(server.port)
+            os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(root_dir, "sim_dir"))
+            os.environ["NRP_EXPERIMENT_CACHE_SIZE"] = "0"
+            # pylint: disable=import-outside-toplevel
+            from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+
+            client = StorageClient()
+            exclude = ["*.log", "logs/"]
+
+            def clone():
+                dest_dir = tempfile.mkdtemp(dir=root_dir)
+                client.clone_all_experiment_files("token", EXPERIMENT, dest_dir, exclude)
+                shutil.rmtree(dest_dir)
+
+            print(f"{args.files} files in {args.folders} trees of depth {args.depth}, "
+                  f"request delay {args.request_delay * 1e3:.1f} ms")
+            print(f"{'server manifest':<17}{'requests':>10}{'manifest s':>12}{'clone s':>9}")
+            for manifest_support in (False, True):
+                server.manifest_support = manifest_support
+                server.reset_counters()
+                client.get_experiment_manifest("token", EXPERIMENT, exclude)
+                requests_count = server.requests_count
+
+                manifest_time = _median_time(
+                    lambda: client.get_experiment_manifest("token", EXPERIMENT, exclude),
+                    args.repeat)
+                clone_time = _median_time(clone, args.repeat)
+
+                print(f"{'yes' if manifest_support else 'no':<17}{requests_count:>10}"
+                      f"{manifest_time:>12.3f}{clone_time:>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
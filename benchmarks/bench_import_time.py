@@ -0,0 +1,119 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Import time of the entry points of the backend (runserver.py) and of the simulation server
+(simulation_server.py), as reported by the interpreter's -X importtime option.
+
+Each entry point module is imported by a new interpreter, --runs times; the median self and
+cumulative import times of each module are reported for the modules taking the most time.
+The "eager" rows import as well the modules now imported on first use, i.e. the nrp-core client
+and the SCM versions of the component packages, as both entry points formerly did.
+
+Usage::
+
+    python benchmarks/bench_import_time.py --runs 5 --top 15
+"""
+
+import argparse
+import collections
+import os
+import statistics
+import subprocess
+import sys
+
+__author__ = 'NRP software team'
+
+ENTRY_POINTS = {"runserver": "hbp_nrp_backend.runserver",
+                "simulation_server": "hbp_nrp_simserver.server.simulation_server"}
+
+# the modules formerly imported along with the entry points
+LAZY_MODULES = ["nrp_client", "hbp_nrp_commons.version", "hbp_nrp_simserver.version",
+                "hbp_nrp_backend.version"]
+
+
+def _import_times(modules):
+    """
+    :return: The self and cumulative import times, in microseconds, of each module imported
+             by a new interpreter importing modules, and the total import time
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                              "; ".join(f"import {module}" for module in modules)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    times = {}
+    prefix = "import time:"
+    for line in process.stderr.decode().splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith(prefix):
+            continue
+        fields = line[len(prefix):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times, sum(self_time for self_time, _ in times.values())
+
+
+def _median_times(modules, runs):
+    samples = collections.defaultdict(list)
+    totals = []
+    for _ in range(runs):
+        times, total = _import_times(modules)
+        totals.append(total)
+        for module, module_times in times.items():
+            samples[module].append(module_times)
+    medians = {module: (statistics.median(s for s, _ in module_samples),
+                        statistics.median(c for _, c in module_samples))
+               for module, module_samples in samples.items()}
+    return medians, statistics.median(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of imports per entry point")
+    parser.add_argument("--top", type=int, default=15,
+                        help="number of modules listed, by cumulative import time")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+
+    totals = {}
+    for name, entry_module in ENTRY_POINTS.items():
+        medians, totals[(name, "lazy")] = _median_times([entry_module], args.runs)
+        _, totals[(name, "eager")] = _median_times([entry_module] + LAZY_MODULES, args.runs)
+
+        print(f"{name} ({entry_module}), median of {args.runs} imports")
+        print(f"{'module':<64}{'self ms':>10}{'cumul. ms':>11}")
+        top = sorted(medians.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+        for module, (self_time, cumulative_time) in top:
+            print(f"{module:<64}{self_time / 1e3:>10.1f}{cumulative_time / 1e3:>11.1f}")
+        print()
+
+    print(f"{'entry point':<20}{'imports':<8}{'total ms':>10}")
+    for (name, imports), total in totals.items():
+        print(f"{name:<20}{imports:<8}{total / 1e3:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
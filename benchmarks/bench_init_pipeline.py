@@ -0,0 +1,120 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Time-to-ready of a simulation initialized by BackendSimulationLifecycle, with and without
+overlapping the start of the simulation server with the clone of the experiment files.
+
+The storage server and the simulation server process are simulated: downloading the
+configuration and cloning the experiment take --prefetch-time and --clone-time seconds, the
+simulation server warms up (i.e. imports, parses the configuration and connects to the MQTT
+broker) in --warm-up-time seconds after being spawned.
+A simulation is ready when both its files are cloned and its server has warmed up, nrp-core is
+then initialized.
+The "sequential" case reproduces the former behaviour, i.e. the server spawned after the clone.
+
+Usage::
+
+    python benchmarks/bench_init_pipeline.py --clone-time 2 --warm-up-time 1.5
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+__author__ = 'NRP software team'
+
+
+class _FakeSimulationServer:
+    """
+    A simulation server warming up in the background once spawned
+    """
+    warm_up_time = 0.
+    ready_at = None
+
+    def __init__(self, *_args):
+        pass
+
+    def initialize(self):
+        _FakeSimulationServer.ready_at = time.perf_counter() + self.warm_up_time
+
+
+def _time_to_ready(lifecycle_class, args, pipelined):
+    storage = MagicMock()
+    storage.download_file.side_effect = lambda *_args, **_kwargs: time.sleep(args.prefetch_time)
+    storage.clone_all_experiment_files.side_effect = \
+        lambda *_args, **_kwargs: time.sleep(args.clone_time)
+    if not pipelined:
+        storage.download_file.side_effect = ConnectionError
+
+    simulation = MagicMock(sim_id=0, private=True, mqtt_topics_prefix="",
+                           experiment_configuration="simulation_config.json")
+
+    base_path = 'hbp_nrp_backend.simulation_control.backend_simulation_lifecycle'
+    with patch(f'{base_path}.storage_client.StorageClient', return_value=storage), \
+            patch(f'{base_path}.SimulationServerInstance', _FakeSimulationServer), \
+            patch(f'{base_path}.SimUtil'), \
+            patch("hbp_nrp_commons.simulation_lifecycle.mqtt"):
+        lifecycle = lifecycle_class(simulation)
+
+        start = time.perf_counter()
+        lifecycle.initialize(None)
+        files_ready_at = time.perf_counter()
+
+    return max(files_ready_at, _FakeSimulationServer.ready_at) - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefetch-time", type=float, default=0.05,
+                        help="seconds spent downloading the experiment configuration")
+    parser.add_argument("--clone-time", type=float, default=2.,
+                        help="seconds spent cloning the experiment files")
+    parser.add_argument("--warm-up-time", type=float, default=1.5,
+                        help="seconds spent by the simulation server to warm up")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.simulation_control.backend_simulation_lifecycle import \
+        BackendSimulationLifecycle
+
+    _FakeSimulationServer.warm_up_time = args.warm_up_time
+
+    results = {label: _time_to_ready(BackendSimulationLifecycle, args, pipelined)
+               for label, pipelined in (("sequential", False), ("pipelined", True))}
+
+    print(f"clone {args.clone_time:.2f} s, server warm-up {args.warm_up_time:.2f} s, "
+          f"configuration prefetch {args.prefetch_time:.2f} s")
+    print(f"{'mode':<12}{'time-to-ready s':>16}")
+    for label, seconds in results.items():
+        print(f"{label:<12}{seconds:>16.2f}")
+    print(f"speed-up: {results['sequential'] / results['pipelined']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Time and peak RSS of uploading zipped simulation logs to the storage server.
+
+"temp file" reproduces the former behaviour of BackendSimulationLifecycle._save_log_to_user_storage,
+i.e. the logs are zipped into a temporary file which is then read and uploaded as a whole;
+"streamed" uploads zip_util.stream_from_filelist as a chunked request body.
+Each upload is run in a fresh process, whose peak RSS is reported.
+
+Usage::
+
+    python benchmarks/bench_log_upload.py --sizes 16 64 256
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_storage_server import FakeStorageServer
+
+__author__ = 'NRP software team'
+
+EXPERIMENT = "bench_experiment"
+MODES = ("temp file", "streamed")
+
+
+
+def _peak_rss() -> int:
+    """
+    :return: the peak RSS, in KiB, of the current process.
+             Unlike getrusage's ru_maxrss, VmHWM isn't inherited from the forking process.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM not found in /proc/self/status")
+
+def _upload(mode: str, port: int, logs_dir: str):
+    """
+    Uploads the logs in logs_dir to the fake server listening on port
+    and prints "<seconds> <peak RSS KiB>"
+    """
+    os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+    os.environ["STORAGE_PORT"] = str(port)
+    os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(logs_dir, "sim"))
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+    from hbp_nrp_commons import zip_util
+
+    client = StorageClient()
+    logs = glob.glob(os.path.join(logs_dir, "*.log"))
+
+    start = time.perf_counter()
+    if mode == "streamed":
+        client.create_or_update("token", EXPERIMENT, "logs.zip",
+                                zip_util.stream_from_filelist(logs, preserve_path=False),
+                                "application/octet-stream")
+    else:
+        temp_dest = os.path.join(tempfile.gettempdir(), "bench_logs.zip")
+        zip_util.create_from_filelist(logs, temp_dest, preserve_path=False)
+        try:
+            with open(temp_dest, "rb") as zipped_logs:
+                client.create_or_update("token", EXPERIMENT, "logs.zip", zipped_logs.read(),
+                                        "application/octet-stream")
+        finally:
+            os.remove(temp_dest)
+    elapsed = time.perf_counter() - start
+
+    print(elapsed, _peak_rss())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="total sizes of the log files in MiB")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "PORT", "LOGS_DIR"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, port, logs_dir = args.child
+        _upload(mode, int(port), logs_dir)
+        return 0
+
+    print(f"{'size MiB':>9}{'mode':>11}{'time s':>9}{'peak RSS MiB':>14}")
+    with tempfile.TemporaryDirectory() as root_dir:
+        logs_dir = os.path.join(root_dir, "logs")
+        os.makedirs(logs_dir)
+
+        with FakeStorageServer(root_dir) as server:
+            for size in args.sizes:
+                # hex digits compress roughly as text logs do
+                for i in range(4):
+                    with open(os.path.join(logs_dir, f"process_{i}.log"), "w") as f:
+                        for _ in range(size // 4):
+                            f.write(os.urandom(512 * 1024).hex())
+
+                for mode in MODES:
+                    out = subprocess.run([sys.executable, __file__, "--child", mode,
+                                          str(server.port), logs_dir],
+                                         check=True, capture_output=True, text=True).stdout
+                    elapsed, max_rss = out.split()
+                    print(f"{size:>9}{mode:>11}{float(elapsed):>9.3f}"
+                          f"{int(max_rss) / 1024:>14.1f}")
+                    server.uploads.clear()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Per-request authentication overhead of a PUT /simulation/<id>/state request.
+
+Such a request resolves the user in can_modify, then reads the token again when the simulation
+gets initialized.
+The "parser" case reproduces the former behaviour of UserAuthentication, i.e. a new
+reqparse.RequestParser per header read; the "context" case uses the request-scoped
+authentication context. The token owner is served from the authentication cache in both cases.
+
+Usage::
+
+    python benchmarks/bench_request_auth.py --requests 20000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask, request
+from flask_restful import reqparse
+
+__author__ = 'NRP software team'
+
+OWNER = "owner-id"
+HEADERS = {"Authorization": "Bearer a-token", "Content-Type": "application/json"}
+
+
+def _parser_header(header_name, default_value):
+    request_parser = reqparse.RequestParser()
+    request_parser.add_argument(header_name, type=str, location='headers')
+    header_value = request_parser.parse_args(request)[header_name]
+    return header_value if header_value is not None else default_value
+
+
+def _parser_token():
+    token_field = _parser_header("Authorization", "no_token")
+    return token_field.split()[1] if token_field != "no_token" else token_field
+
+
+def _parser_put_state(user_auth):
+    # can_modify
+    username = _parser_header("X-User-Name", "default-owner")
+    if username == "default-owner":
+        username = user_auth.get_token_owner(_parser_token()) or username
+    assert username == OWNER
+    # simulation initialization
+    return _parser_token()
+
+
+def _context_put_state(user_auth):
+    # can_modify
+    assert user_auth.get_user() == OWNER
+    # simulation initialization
+    return user_auth.get_header_token()
+
+
+def _timed_requests(app, handle, user_auth, requests_count):
+    latencies = []
+    for _ in range(requests_count):
+        with app.test_request_context("/simulation/0/state", method="PUT", headers=HEADERS):
+            start = time.perf_counter()
+            handle(user_auth)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="number of requests")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.user_authentication import UserAuthentication
+
+    UserAuthentication.client = MagicMock()
+    UserAuthentication.client.get_user.return_value = {'id': OWNER}
+    app = Flask(__name__)
+
+    results = {}
+    for label, handle in (("parser", _parser_put_state), ("context", _context_put_state)):
+        _timed_requests(app, handle, UserAuthentication, 100)  # warm up
+        results[label] = _timed_requests(app, handle, UserAuthentication, args.requests)
+
+    print(f"{args.requests} PUT /simulation/<id>/state requests")
+    print(f"{'mode':<10}{'mean us':>10}{'median us':>11}{'p99 us':>9}")
+    for label, latencies in results.items():
+        p99 = statistics.quantiles(latencies, n=100)[-1]
+        print(f"{label:<10}{statistics.mean(latencies) * 1e6:>10.1f}"
+              f"{statistics.median(latencies) * 1e6:>11.1f}{p99 * 1e6:>9.1f}")
+
+    print(f"speed-up: "
+          f"{statistics.mean(results['parser']) / statistics.mean(results['context']):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Throughput of GET /simulation/<id>/state under a mixed read/write load, through RestSyncMiddleware.
+
+Reader threads poll the state of random simulations while writer threads apply slow state
+changes (e.g. a stop) to random simulations.
+The "global lock" case reproduces the former behaviour of RestSyncMiddleware, i.e. a single
+lock serializing all the requests; the "per simulation" case uses reader/writer locks keyed by
+simulation id.
+
+Usage::
+
+    python benchmarks/bench_rest_sync.py --duration 3 --readers 8 --writers 2 --write-time 0.05
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+
+from flask import Flask
+from flask_restful import Api, Resource
+
+__author__ = 'NRP software team'
+
+
+def _create_app(read_time, write_time):
+    class State(Resource):
+        def get(self, sim_id):
+            time.sleep(read_time)
+            return {'state': 'started'}, 200
+
+        def put(self, sim_id):
+            time.sleep(write_time)
+            return {'state': 'stopped'}, 200
+
+    app = Flask(__name__)
+    Api(app).add_resource(State, '/simulation/<int:sim_id>/state')
+    return app
+
+
+def _global_lock_middleware(middleware_class):
+    """
+    :return: a RestSyncMiddleware serializing all the requests behind a single lock
+    """
+    global_lock = threading.Lock()
+
+    class GlobalLockMiddleware(middleware_class):
+        def thread_safe_contextmanager(self, view_fn, method, view_args):
+            return global_lock
+
+    return GlobalLockMiddleware
+
+
+def _run_load(app, args):
+    stop = threading.Event()
+    latencies = {'GET': [], 'PUT': []}
+
+    def client(method):
+        test_client = app.test_client()
+        rand = random.Random()
+        samples = []
+        while not stop.is_set():
+            sim_id = rand.randrange(args.simulations)
+            start = time.perf_counter()
+            test_client.open(f'/simulation/{sim_id}/state', method=method)
+            samples.append(time.perf_counter() - start)
+        latencies[method].extend(samples)
+
+    threads = [threading.Thread(target=client, args=("GET",)) for _ in range(args.readers)]
+    threads += [threading.Thread(target=client, args=("PUT",)) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3., help="seconds of load per mode")
+    parser.add_argument("--simulations", type=int, default=8, help="number of simulations")
+    parser.add_argument("--readers", type=int, default=8, help="number of polling clients")
+    parser.add_argument("--writers", type=int, default=2, help="number of writing clients")
+    parser.add_argument("--read-time", type=float, default=0.0005,
+                        help="seconds spent handling a GET")
+    parser.add_argument("--write-time", type=float, default=0.05,
+                        help="seconds spent handling a PUT")
+    args = parser.parse_args()
+
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.rest_server.RestSyncMiddleware import RestSyncMiddleware
+
+    results = {}
+    for label, middleware in (("global lock", _global_lock_middleware(RestSyncMiddleware)),
+                              ("per simulation", RestSyncMiddleware)):
+        app = _create_app(args.read_time, args.write_time)
+        app.wsgi_app = middleware(app.wsgi_app, app)
+        results[label] = _run_load(app, args)
+
+    print(f"{args.readers} readers, {args.writers} writers on {args.simulations} simulations, "
+          f"GET {args.read_time * 1e3:.1f} ms, PUT {args.write_time * 1e3:.1f} ms, "
+          f"{args.duration:.0f} s per mode")
+    print(f"{'mode':<16}{'GET/s':>9}{'GET p50 ms':>12}{'GET p99 ms':>12}{'PUT/s':>8}")
+    for label, latencies in results.items():
+        gets = latencies['GET']
+        p99 = statistics.quantiles(gets, n=100)[-1]
+        print(f"{label:<16}{len(gets) / args.duration:>9.0f}"
+              f"{statistics.median(gets) * 1e3:>12.2f}{p99 * 1e3:>12.2f}"
+              f"{len(latencies['PUT']) / args.duration:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
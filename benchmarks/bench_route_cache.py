@@ -0,0 +1,89 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Per-request routing overhead of RestSyncMiddleware, with and without its route cache.
+
+The middleware wraps a no-op WSGI application and routes GET /simulation/<id>/state requests
+with the URL map of the backend, so that only the middleware itself is measured.
+Without the route cache, the middleware binds the URL map and matches every request, as it
+formerly did; Flask then matched the same request a second time.
+
+Usage::
+
+    python benchmarks/bench_route_cache.py --requests 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+__author__ = 'NRP software team'
+
+
+def _no_op_app(_environ, start_response):
+    start_response("200 OK", [])
+    return [b""]
+
+
+def _time_requests(middleware, requests_count, simulations_count):
+    environs = [{"PATH_INFO": f"/simulation/{i % simulations_count}/state",
+                 "REQUEST_METHOD": "GET"} for i in range(requests_count)]
+    start_response = lambda *_args: None  # pylint: disable=unnecessary-lambda-assignment
+
+    start = time.perf_counter()
+    for environ in environs:
+        middleware(environ, start_response)
+    return (time.perf_counter() - start) / requests_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000, help="number of requests")
+    parser.add_argument("--simulations", type=int, default=10,
+                        help="number of distinct simulation ids polled")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.rest_server import app
+    from hbp_nrp_backend.rest_server.RestSyncMiddleware import RestSyncMiddleware
+
+    results = {}
+    for label, route_cache in (("no cache", False), ("cache", True)):
+        middleware = RestSyncMiddleware(_no_op_app, app, route_cache=route_cache)
+        _time_requests(middleware, 1000, args.simulations)  # warm up
+        results[label] = _time_requests(middleware, args.requests, args.simulations)
+
+    print(f"{args.requests} GET /simulation/<id>/state requests on {args.simulations} simulations")
+    print(f"{'mode':<10}{'us/request':>12}")
+    for label, latency in results.items():
+        print(f"{label:<10}{latency * 1e6:>12.2f}")
+    print(f"speed-up: {results['no cache'] / results['cache']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
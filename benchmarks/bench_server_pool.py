@@ -0,0 +1,141 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Time-to-ready of a simulation server process, spawned for the simulation, taken from a
+SimulationServerPool or forked by a SimulationServerZygote.
+
+The time-to-ready is measured from the request of a simulation server process, as in
+SimulationServerInstance.initialize, to the server starting the initialization of the
+simulation, i.e. logging its simulation directory. A spawned process first starts the
+interpreter and imports the simulation server modules (nrp_client, paho, transitions, ...),
+a pooled one has done it ahead of the simulation, a forked one inherits them from the zygote.
+
+Usage::
+
+    python benchmarks/bench_server_pool.py --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+__author__ = 'NRP software team'
+
+
+def _wait_for_log(log_path, process, timeout=60.):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(log_path, encoding="utf-8", errors="replace") as log:
+            if "Path is" in log.read():
+                return
+        if process.poll() is not None:
+            break
+        time.sleep(0.001)
+    raise RuntimeError(f"The simulation server did not start, see {log_path}")
+
+
+def _time_to_ready(sim_dir, run, command, pool=None, zygote=None):
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_simserver.server.simulation_server_pool import SimulationServerPool
+
+    log_path = os.path.join(sim_dir, f"simulation_{run}.log")
+    # a missing configuration makes the server exit once it starts the initialization
+    args = ["--dir", sim_dir, "--id", str(run), "--script", "main_script.py",
+            "--config", "missing_configuration.json"]
+
+    with open(log_path, "x", encoding="utf-8") as log:
+        start = time.perf_counter()
+        process = pool.acquire() if pool is not None else None
+        if process is not None:
+            SimulationServerPool.run(process, args, log_path)
+        elif zygote is not None:
+            process = zygote.fork(args, log_path)
+        else:
+            process = subprocess.Popen(command + args, stdout=log, stderr=subprocess.STDOUT,
+                                       close_fds=True, env=os.environ.copy())
+        _wait_for_log(log_path, process)
+        elapsed = time.perf_counter() - start
+    process.wait()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of simulations per mode")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+    # the simulation server processes import the packages as this process does
+    os.environ["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_simserver.server.simulation_server_instance import SimulationServerInstance
+    from hbp_nrp_simserver.server.simulation_server_pool import SimulationServerPool
+    from hbp_nrp_simserver.server.simulation_server_zygote import SimulationServerZygote
+
+    command = SimulationServerInstance._sim_server_command()  # pylint: disable=protected-access
+    results = {}
+    with tempfile.TemporaryDirectory() as sim_dir:
+        results["spawned"] = [_time_to_ready(sim_dir, run, command)
+                              for run in range(args.runs)]
+
+        pool = SimulationServerPool(1, command)
+        pool.start()
+        samples = []
+        try:
+            for run in range(args.runs):
+                # the pool is refilled between the simulations
+                while not len(pool):
+                    time.sleep(0.01)
+                samples.append(_time_to_ready(sim_dir, args.runs + run, command, pool))
+        finally:
+            pool.shutdown()
+        results["pooled"] = samples
+
+        zygote = SimulationServerZygote(command)
+        zygote.start()
+        try:
+            results["forked"] = [_time_to_ready(sim_dir, 2 * args.runs + run, command,
+                                                zygote=zygote)
+                                 for run in range(args.runs)]
+        finally:
+            zygote.shutdown()
+
+    print(f"time-to-ready of a simulation server process, {args.runs} runs per mode")
+    print(f"{'mode':<10}{'mean ms':>10}{'min ms':>10}{'max ms':>10}")
+    for label, samples in results.items():
+        print(f"{label:<10}{statistics.fmean(samples) * 1e3:>10.1f}"
+              f"{min(samples) * 1e3:>10.1f}{max(samples) * 1e3:>10.1f}")
+    for label in ("pooled", "forked"):
+        print(f"{label} speed-up: "
+              f"{statistics.fmean(results['spawned']) / statistics.fmean(results[label]):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
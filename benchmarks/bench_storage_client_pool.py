@@ -0,0 +1,112 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Per-file download latency of StorageClient.get_file, with and without connection pooling.
+
+The "no pool" case reproduces the former behaviour of StorageClient, i.e. a bare requests.get
+per file, hence a new TCP connection per file.
+Use --handshake-delay to emulate the connection set up cost (TCP + TLS) of a remote storage server.
+
+Usage::
+
+    python benchmarks/bench_storage_client_pool.py --files 200 --handshake-delay 0.002
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import requests
+
+from fake_storage_server import FakeStorageServer, create_experiment
+
+__author__ = 'NRP software team'
+
+EXPERIMENT = "bench_experiment"
+
+
+def _timed_downloads(download, file_names):
+    latencies = []
+    for name in file_names:
+        start = time.perf_counter()
+        download(name)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="number of files to download")
+    parser.add_argument("--file-size", type=int, default=4096, help="size of each file in bytes")
+    parser.add_argument("--handshake-delay", type=float, default=0.,
+                        help="seconds added by the server to every new connection")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        create_experiment(root_dir, EXPERIMENT, args.files, args.file_size)
+        file_names = [f"file_{i}.dat" for i in range(args.files)]
+
+        with FakeStorageServer(root_dir, handshake_delay=args.handshake_delay) as server:
+            # Settings are read on import, configure them before importing the client
+            os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+            os.environ["STORAGE_PORT"] = str(server.port)
+            os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(root_dir, "sim_dir"))
+            # pylint: disable=import-outside-toplevel
+            from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+
+            def unpooled_download(name):
+                res = requests.get(f"{server.storage_uri}/storage/{EXPERIMENT}/{name}?byname=true",
+                                   headers={'Authorization': 'Bearer token'})
+                res.raise_for_status()
+                return res.content
+
+            client = StorageClient()
+
+            def pooled_download(name):
+                return client.get_file("token", EXPERIMENT, name, by_name=True)
+
+            results = {}
+            for label, download in (("no pool", unpooled_download), ("pool", pooled_download)):
+                server.reset_counters()
+                latencies = _timed_downloads(download, file_names)
+                results[label] = (latencies, server.connections_count)
+
+    print(f"{args.files} files of {args.file_size} bytes, "
+          f"handshake delay {args.handshake_delay * 1e3:.1f} ms")
+    print(f"{'mode':<10}{'connections':>12}{'mean ms':>10}{'median ms':>11}{'total s':>9}")
+    for label, (latencies, connections) in results.items():
+        print(f"{label:<10}{connections:>12}{statistics.mean(latencies) * 1e3:>10.3f}"
+              f"{statistics.median(latencies) * 1e3:>11.3f}{sum(latencies):>9.3f}")
+
+    saved = statistics.mean(results["no pool"][0]) - statistics.mean(results["pool"][0])
+    print(f"per-file latency saved by pooling: {saved * 1e3:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Peak RSS of a process downloading a large experiment file, buffered vs streamed.
+
+"buffered" reproduces the former behaviour of StorageClient, i.e. get_file (the whole content in
+memory) followed by a write, "streamed" uses StorageClient.download_file.
+Each download is run in a fresh process, whose peak RSS is reported.
+
+Usage::
+
+    python benchmarks/bench_streaming_download.py --sizes 16 64 256
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_storage_server import FakeStorageServer
+
+__author__ = 'NRP software team'
+
+EXPERIMENT = "bench_experiment"
+FILE_NAME = "weights.bin"
+MODES = ("buffered", "streamed")
+
+
+
+def _peak_rss() -> int:
+    """
+    :return: the peak RSS, in KiB, of the current process.
+             Unlike getrusage's ru_maxrss, VmHWM isn't inherited from the forking process.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmHWM not found in /proc/self/status")
+
+def _download(mode: str, port: int, dest_path: str):
+    """
+    Downloads FILE_NAME from the fake server listening on port and prints "<seconds> <peak RSS KiB>"
+    """
+    os.environ["STORAGE_ADDRESS"] = "127.0.0.1"
+    os.environ["STORAGE_PORT"] = str(port)
+    os.environ.setdefault("NRP_SIMULATION_DIR", os.path.join(os.path.dirname(dest_path), "sim"))
+    # pylint: disable=import-outside-toplevel
+    from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+
+    client = StorageClient()
+    start = time.perf_counter()
+    if mode == "buffered":
+        with open(dest_path, "wb") as f:
+            f.write(client.get_file("token", EXPERIMENT, FILE_NAME, by_name=True))
+    else:
+        client.download_file("token", EXPERIMENT, FILE_NAME, dest_path, by_name=True)
+    elapsed = time.perf_counter() - start
+
+    print(elapsed, _peak_rss())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="sizes of the downloaded file in MiB")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "PORT", "DEST"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, port, dest_path = args.child
+        _download(mode, int(port), dest_path)
+        return 0
+
+    print(f"{'size MiB':>9}{'mode':>10}{'time s':>9}{'peak RSS MiB':>14}")
+    with tempfile.TemporaryDirectory() as root_dir:
+        exp_dir = os.path.join(root_dir, EXPERIMENT)
+        os.makedirs(exp_dir)
+
+        with FakeStorageServer(root_dir) as server:
+            for size in args.sizes:
+                with open(os.path.join(exp_dir, FILE_NAME), "wb") as f:
+                    for _ in range(size):
+                        f.write(os.urandom(1024 * 1024))
+
+                for mode in MODES:
+                    dest_path = os.path.join(root_dir, f"{mode}_{size}.bin")
+                    out = subprocess.run([sys.executable, __file__, "--child", mode,
+                                          str(server.port), dest_path],
+                                         check=True, capture_output=True, text=True).stdout
+                    elapsed, max_rss = out.split()
+                    print(f"{size:>9}{mode:>10}{float(elapsed):>9.3f}"
+                          f"{int(max_rss) / 1024:>14.1f}")
+                    os.remove(dest_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
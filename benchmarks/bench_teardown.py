@@ -0,0 +1,204 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Teardown latency of a simulation, stopped while idle (i.e. initialized, never started) or while
+its main script runs, with fakes of nrp-core and of the MQTT broker.
+
+A backend-side SimulationLifecycle spawns the simulation server process, as
+BackendSimulationLifecycle does, and initializes the simulation. The simulation server runs
+with a fake nrp-core client, whose run_loop takes 1 ms. The stop is measured from the request of
+the "stopped" state change to:
+
+    - "stop request": the return of the state change, i.e. the response to the REST request
+    - "teardown": the exit of the simulation server process, i.e. the start of the cleanup
+
+Usage::
+
+    cd benchmarks
+    python bench_teardown.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_mqtt_broker import FakeMqttBroker
+
+__author__ = 'NRP software team'
+
+# the simulation server, with the nrp-core client replaced by a fake
+FAKE_NRP_CORE_SIMULATION_SERVER = """
+import sys
+import time
+
+import hbp_nrp_simserver.server as simserver
+
+
+class FakeNrpCore:
+    def __init__(self, address, config_file, args):
+        pass
+
+    def initialize(self):
+        pass
+
+    def run_loop(self, num_iterations, json_data=None):
+        time.sleep(0.001 * num_iterations)
+
+    def shutdown(self):
+        pass
+
+
+simserver.NrpCoreClientClass = FakeNrpCore
+
+from hbp_nrp_simserver.server.simulation_server import main
+
+sys.exit(main())
+"""
+
+MAIN_SCRIPT = """
+while True:
+    nrp.run_loop(1)
+"""
+
+
+def _create_lifecycle_class():
+    # pylint: disable=import-outside-toplevel
+    import hbp_nrp_simserver.server as simserver
+    from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+    from hbp_nrp_simserver.server.simulation_server_instance import SimulationServerInstance
+
+    class FakeNrpCoreServerInstance(SimulationServerInstance):
+        command = None
+
+        @classmethod
+        def _sim_server_command(cls):
+            return cls.command
+
+    class BackendLifecycle(SimulationLifecycle):
+        """
+        The lifecycle of the simulation in the backend, spawning its simulation server
+        """
+
+        def __init__(self, sim_id, sim_dir):
+            super().__init__(simserver.TOPIC_LIFECYCLE(sim_id),
+                             mqtt_client_id=f"nrp_backend_{sim_id}",
+                             propagated_destinations=SimulationLifecycle.RUNNING_STATES,
+                             clear_synchronization_topic=True)
+            self.server = FakeNrpCoreServerInstance(self, sim_id, sim_dir, "main_script.py",
+                                                    "simulation_config.json")
+
+        def initialize(self, _state_change):
+            self.server.initialize()
+
+        def start(self, _state_change):
+            pass
+
+        def pause(self, _state_change):
+            pass
+
+        def stop(self, _state_change):
+            self.server.terminate()
+
+        def fail(self, _state_change):
+            self.server.terminate()
+
+    return FakeNrpCoreServerInstance, BackendLifecycle
+
+
+def _wait_for_log(log_path, text, timeout=30.):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(log_path, encoding="utf-8", errors="replace") as log:
+            if text in log.read():
+                return
+        time.sleep(0.005)
+    raise RuntimeError(f"'{text}' not logged, see {log_path}")
+
+
+def _time_teardown(lifecycle_class, root_dir, sim_id, running):
+    sim_dir = os.path.join(root_dir, str(sim_id))
+    os.mkdir(sim_dir)
+    with open(os.path.join(sim_dir, "simulation_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"SimulationTimeout": 3600, "SimulationTimestep": 0.01,
+                   "EngineConfigs": [{"EngineType": "datatransfer_grpc_engine"}]}, f)
+    with open(os.path.join(sim_dir, "main_script.py"), "w", encoding="utf-8") as f:
+        f.write(MAIN_SCRIPT)
+
+    lifecycle = lifecycle_class(sim_id, sim_dir)
+    log_path = os.path.join(sim_dir, f"simulation_{sim_id}.log")
+    lifecycle.initialized()
+    _wait_for_log(log_path, "Simulation server initialized")
+    if running:
+        lifecycle.started()
+        _wait_for_log(log_path, "Executing main script")
+        time.sleep(0.1)
+
+    start = time.perf_counter()
+    lifecycle.stopped()
+    stop_request = time.perf_counter() - start
+    lifecycle.server.wait_termination()
+    teardown = time.perf_counter() - start
+    lifecycle.server.shutdown()
+    return stop_request, teardown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of simulations per case")
+    args = parser.parse_args()
+
+    with FakeMqttBroker() as broker, tempfile.TemporaryDirectory() as root_dir:
+        os.environ["NRP_MQTT_BROKER_ADDRESS"] = broker.address
+        os.environ.setdefault("NRP_SIMULATION_DIR", "/tmp/nrp-simulation-dir")
+        # the simulation server processes import the packages as this process does
+        os.environ["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+
+        server_path = os.path.join(root_dir, "simulation_server.py")
+        with open(server_path, "w", encoding="utf-8") as f:
+            f.write(FAKE_NRP_CORE_SIMULATION_SERVER)
+        server_instance_class, lifecycle_class = _create_lifecycle_class()
+        server_instance_class.command = [sys.executable, server_path]
+
+        results = {}
+        for case, running in (("idle", False), ("running", True)):
+            results[case] = [_time_teardown(lifecycle_class, root_dir,
+                                            run if not running else args.runs + run, running)
+                             for run in range(args.runs)]
+
+    print(f"teardown latency of a stopped simulation, {args.runs} runs per case")
+    print(f"{'case':<10}{'stop request ms':>17}{'teardown ms':>13}{'max teardown ms':>17}")
+    for case, samples in results.items():
+        print(f"{case:<10}{statistics.fmean(s for s, _ in samples) * 1e3:>17.1f}"
+              f"{statistics.fmean(t for _, t in samples) * 1e3:>13.1f}"
+              f"{max(t for _, t in samples) * 1e3:>17.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
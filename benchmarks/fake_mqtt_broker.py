@@ -0,0 +1,234 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+A local stand-in for the MQTT broker the simulation lifecycles and notifiers connect to.
+
+Only the subset of MQTT 3.1.1 used by the paho clients of the NRP is implemented:
+CONNECT, PUBLISH (QoS 0 and 1, retained messages included), SUBSCRIBE, UNSUBSCRIBE, PINGREQ
+and DISCONNECT. Messages are forwarded with QoS 0 to the subscribers of a matching topic filter.
+As the actual broker, a client connecting with the id of a connected one kicks it off.
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+
+__author__ = 'NRP software team'
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 0x10, 0x20, 0x30, 0x40
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 0x80, 0x90, 0xA0, 0xB0
+PINGREQ, PINGRESP, DISCONNECT = 0xC0, 0xD0, 0xE0
+
+
+def _topic_matches(topic_filter: str, topic: str) -> bool:
+    filter_levels, topic_levels = topic_filter.split("/"), topic.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels) or (level != "+" and level != topic_levels[i]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _packet(packet_type: int, body: bytes) -> bytes:
+    length, remaining = bytearray(), len(body)
+    while True:
+        remaining, digit = divmod(remaining, 128)
+        length.append(digit | (0x80 if remaining else 0))
+        if not remaining:
+            return bytes([packet_type]) + bytes(length) + body
+
+
+def _string(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2:offset + 2 + length].decode(), offset + 2 + length
+
+
+class _MqttClientHandler(socketserver.BaseRequestHandler):
+    """
+    Handles the connection of a client to a FakeMqttBroker
+    """
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.client_id: Optional[str] = None
+        self.subscriptions = set()
+
+    def send(self, data: bytes) -> None:
+        with self.send_lock:
+            try:
+                self.request.sendall(data)
+            except OSError:
+                pass
+
+    def read_packet(self) -> Optional[Tuple[int, bytes]]:
+        header = self.request.recv(1)
+        if not header:
+            return None
+        length, multiplier = 0, 1
+        while True:
+            digit = self.request.recv(1)
+            if not digit:
+                return None
+            length += (digit[0] & 0x7F) * multiplier
+            multiplier *= 128
+            if not digit[0] & 0x80:
+                break
+        body = b""
+        while len(body) < length:
+            chunk = self.request.recv(length - len(body))
+            if not chunk:
+                return None
+            body += chunk
+        return header[0], body
+
+    def handle(self):
+        broker: FakeMqttBroker = self.server.broker
+        try:
+            while (packet := self.read_packet()) is not None:
+                packet_type, body = packet
+                command = packet_type & 0xF0
+                if command == CONNECT:
+                    _protocol, offset = _string(body, 0)
+                    self.client_id, _ = _string(body, offset + 4)
+                    broker.connect(self)
+                    self.send(_packet(CONNACK, b"\x00\x00"))
+                elif command == PUBLISH:
+                    topic, offset = _string(body, 0)
+                    qos = (packet_type >> 1) & 0x03
+                    if qos:
+                        self.send(_packet(PUBACK, body[offset:offset + 2]))
+                        offset += 2
+                    broker.publish(topic, body[offset:], retain=bool(packet_type & 0x01))
+                elif command == SUBSCRIBE:
+                    offset, topic_filters = 2, []
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        topic_filters.append(topic_filter)
+                        offset += 1  # requested QoS
+                    self.send(_packet(SUBACK, body[:2] + bytes(len(topic_filters))))
+                    broker.subscribe(self, topic_filters)
+                elif command == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        self.subscriptions.discard(topic_filter)
+                    self.send(_packet(UNSUBACK, body[:2]))
+                elif command == PINGREQ:
+                    self.send(_packet(PINGRESP, b""))
+                elif command == DISCONNECT:
+                    break
+        except OSError:
+            pass
+        finally:
+            broker.disconnect(self)
+
+    def deliver(self, topic: str, payload: bytes, retain: bool = False) -> None:
+        encoded_topic = topic.encode()
+        self.send(_packet(PUBLISH | (0x01 if retain else 0x00),
+                          struct.pack("!H", len(encoded_topic)) + encoded_topic + payload))
+
+
+class _QuietThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class FakeMqttBroker:
+    """
+    A MQTT broker listening on localhost, on a free port unless given one
+    """
+
+    def __init__(self, port: int = 0):
+        self.__lock = threading.Lock()
+        self.__clients: Dict[str, _MqttClientHandler] = {}
+        self.__retained: Dict[str, bytes] = {}
+
+        self.__server = _QuietThreadingTCPServer(("localhost", port), _MqttClientHandler)
+        self.__server.broker = self
+        self.__thread = threading.Thread(target=self.__server.serve_forever,
+                                         name="FakeMqttBroker", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.__server.server_address[1]
+
+    @property
+    def address(self) -> str:
+        """
+        :return: The broker address, i.e. "host:port", as in NRP_MQTT_BROKER_ADDRESS
+        """
+        return f"localhost:{self.port}"
+
+    def connect(self, client: _MqttClientHandler) -> None:
+        with self.__lock:
+            kicked_off = self.__clients.get(client.client_id)
+            self.__clients[client.client_id] = client
+        if kicked_off is not None:
+            kicked_off.request.shutdown(socket.SHUT_RDWR)
+
+    def disconnect(self, client: _MqttClientHandler) -> None:
+        with self.__lock:
+            if self.__clients.get(client.client_id) is client:
+                del self.__clients[client.client_id]
+
+    def publish(self, topic: str, payload: bytes, retain: bool = False) -> None:
+        with self.__lock:
+            if retain and payload:
+                self.__retained[topic] = payload
+            elif retain:
+                self.__retained.pop(topic, None)
+            subscribers = [client for client in self.__clients.values()
+                           if any(_topic_matches(f, topic) for f in client.subscriptions)]
+        for client in subscribers:
+            client.deliver(topic, payload)
+
+    def subscribe(self, client: _MqttClientHandler, topic_filters) -> None:
+        with self.__lock:
+            client.subscriptions.update(topic_filters)
+            retained = [(topic, payload) for topic, payload in self.__retained.items()
+                        if any(_topic_matches(f, topic) for f in topic_filters)]
+        for topic, payload in retained:
+            client.deliver(topic, payload, retain=True)
+
+    def start(self) -> "FakeMqttBroker":
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
@@ -0,0 +1,370 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+A local stand-in for the NRP storage server, serving the experiments found in a directory.
+
+Only the subset of the storage API used by :class:`.StorageClient` is implemented:
+
+    - :code:`GET /storage/identity/me`
+    - :code:`GET /storage/storage/<experiment or folder uuid>` (listing)
+    - :code:`GET /storage/storage/<experiment>?type=zip&exclude=<rule>` (zip archive, streamed)
+    - :code:`GET /storage/storage/<experiment>?recursive=true&exclude=<rule>` (manifest)
+    - :code:`GET /storage/storage/<experiment or folder uuid>/<file name>` (download)
+    - :code:`POST /storage/storage/<experiment>/<file name>` (upload, chunked bodies included)
+
+Folder uuids are the folder paths relative to the served directory.
+The server speaks HTTP/1.1, so that clients can keep their connections alive.
+A handshake delay can be configured to emulate the connection set up cost of a remote server,
+and a request delay to emulate its round trip time.
+"""
+
+import datetime
+import fnmatch
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import zipfile
+
+__author__ = 'NRP software team'
+
+
+def _is_excluded(name: str, is_dir: bool, exclude_rules) -> bool:
+    """
+    :return: whether a top level entry of an experiment matches one of the exclude rules
+    """
+    return any(fnmatch.fnmatch(name, rule.rstrip("/")) for rule in exclude_rules
+               if rule.endswith("/") == is_dir)
+
+
+class _StorageRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handles the requests to a FakeStorageServer
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.storage.count_connection()
+        if self.server.storage.handshake_delay:
+            time.sleep(self.server.storage.handshake_delay)
+
+    def log_message(self, *_args):  # pylint: disable=arguments-differ
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, file_path: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(file_path)))
+        self.end_headers()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                self.wfile.write(chunk)
+
+    def _send_archive(self, folder_path: str, exclude_rules):
+        """
+        Streams a zip of folder_path, excluding the top level entries matching exclude_rules,
+        with a chunked transfer encoding
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        wfile = self.wfile
+
+        class ChunkedWriter:  # unseekable, thus zipfile writes data descriptors
+            @staticmethod
+            def write(data):
+                if data:
+                    wfile.write(b"%x\r\n%s\r\n" % (len(data), bytes(data)))
+                return len(data)
+
+            @staticmethod
+            def flush():
+                pass
+
+        with zipfile.ZipFile(ChunkedWriter(), "w", zipfile.ZIP_DEFLATED) as zf:
+            for entry in sorted(os.scandir(folder_path), key=lambda e: e.name):
+                if _is_excluded(entry.name, entry.is_dir(), exclude_rules):
+                    continue
+                if entry.is_file():
+                    zf.write(entry.path, arcname=entry.name)
+                    continue
+                for root, _, files in os.walk(entry.path):
+                    for f in sorted(files):
+                        path = os.path.join(root, f)
+                        zf.write(path, arcname=os.path.relpath(path, folder_path))
+        wfile.write(b"0\r\n\r\n")
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while (size := int(self.rfile.readline().split(b";")[0], 16)) > 0:
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()  # CRLF closing the chunk
+            self.rfile.readline()  # CRLF closing the body
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _storage_path(self):
+        """
+        :return: the (path segments, query) of the request, stripped of the /storage/storage prefix,
+                 None if the request isn't addressed to the storage API
+        """
+        url = urllib.parse.urlsplit(self.path)
+        segments = [urllib.parse.unquote_plus(s) for s in url.path.split("/") if s]
+        if segments[:2] != ["storage", "storage"]:
+            return None, None
+        return segments[2:], urllib.parse.parse_qs(url.query)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        storage = self.server.storage
+        storage.count_request()
+
+        if self.path.startswith("/storage/identity/me"):
+            self._send(200, json.dumps({"id": "fake-user"}).encode())
+            return
+
+        segments, query = self._storage_path()
+        if not segments:
+            self._send(404)
+            return
+
+        if len(segments) == 1 and query.get("type") == ["zip"]:
+            folder_path = storage.local_path(segments[0])
+            if not storage.archive_support:
+                self._send(501)
+            elif folder_path is None or not os.path.isdir(folder_path):
+                self._send(404)
+            else:
+                self._send_archive(folder_path, query.get("exclude", []))
+            return
+
+        if len(segments) == 1 and query.get("recursive") == ["true"]:
+            manifest = storage.manifest(segments[0], query.get("exclude", []))
+            if not storage.manifest_support:
+                self._send(501)
+            elif manifest is None:
+                self._send(404)
+            else:
+                self._send(200, json.dumps(manifest).encode())
+            return
+
+        if len(segments) == 1:
+            entries = storage.list_folder(segments[0])
+            if entries is None:
+                self._send(404)
+            else:
+                self._send(200, json.dumps(entries).encode())
+            return
+
+        file_path = storage.local_path(os.path.join(segments[0], segments[1]))
+        if file_path is None or not os.path.isfile(file_path):
+            self._send(404)
+            return
+        self._send_file(file_path)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        storage = self.server.storage
+        storage.count_request()
+
+        segments, _query = self._storage_path()
+        body = self._read_body()
+        if not segments or len(segments) != 2:
+            self._send(404)
+            return
+
+        storage.uploads[segments[1]] = body
+        self._send(200, b"{}")
+
+
+class _QuietThreadingHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    Doesn't report the connections closed by the clients
+    """
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeStorageServer:
+    """
+    A threaded HTTP server emulating the storage server on localhost
+    """
+
+    def __init__(self, root_dir: str, handshake_delay: float = 0., request_delay: float = 0.,
+                 archive_support: bool = True, manifest_support: bool = True):
+        """
+        :param root_dir: the directory containing the experiments folders
+        :param handshake_delay: seconds to wait on every new connection before serving it
+        :param request_delay: seconds to wait on every request before serving it
+        :param archive_support: whether experiment zip archives are served, 501 is replied otherwise
+        :param manifest_support: whether experiment manifests are served, 501 is replied otherwise
+        """
+        self.root_dir = os.path.realpath(root_dir)
+        self.handshake_delay = handshake_delay
+        self.request_delay = request_delay
+        self.archive_support = archive_support
+        self.manifest_support = manifest_support
+        self.uploads = {}
+
+        self.connections_count = 0
+        self.requests_count = 0
+        self.__counters_lock = threading.Lock()
+
+        self.__httpd = _QuietThreadingHTTPServer(("127.0.0.1", 0), _StorageRequestHandler)
+        self.__httpd.daemon_threads = True
+        self.__httpd.storage = self
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, daemon=True,
+                                         name="FakeStorageServer")
+
+    @property
+    def port(self) -> int:
+        return self.__httpd.server_address[1]
+
+    @property
+    def storage_uri(self) -> str:
+        """
+        :return: the URI to be used as Settings.storage_uri
+        """
+        return f"http://127.0.0.1:{self.port}/storage"
+
+    def count_connection(self):
+        with self.__counters_lock:
+            self.connections_count += 1
+
+    def count_request(self):
+        with self.__counters_lock:
+            self.requests_count += 1
+        if self.request_delay:
+            time.sleep(self.request_delay)
+
+    def reset_counters(self):
+        with self.__counters_lock:
+            self.connections_count = 0
+            self.requests_count = 0
+
+    def local_path(self, rel_path: str):
+        """
+        :return: the absolute path of rel_path, None if it's outside root_dir
+        """
+        path = os.path.realpath(os.path.join(self.root_dir, rel_path))
+        return path if path.startswith(self.root_dir + os.sep) else None
+
+    def list_folder(self, folder_uuid: str):
+        """
+        :return: the storage listing of the folder, None if it does not exist
+        """
+        folder_path = self.local_path(folder_uuid)
+        if folder_path is None or not os.path.isdir(folder_path):
+            return None
+
+        entries = []
+        for entry in sorted(os.scandir(folder_path), key=lambda e: e.name):
+            stat = entry.stat()
+            entries.append({
+                "uuid": os.path.relpath(entry.path, self.root_dir),
+                "name": entry.name,
+                "parent": folder_uuid,
+                "type": "folder" if entry.is_dir() else "file",
+                "contentType": "application/octet-stream",
+                "size": stat.st_size,
+                "modifiedOn": datetime.datetime.fromtimestamp(
+                    stat.st_mtime, tz=datetime.timezone.utc).isoformat(),
+            })
+        return entries
+
+    def manifest(self, experiment: str, exclude_rules):
+        """
+        :return: the recursive listing of the experiment, None if it does not exist
+        """
+        entries = self.list_folder(experiment)
+        if entries is None:
+            return None
+
+        manifest = []
+        folders = [e for e in entries if not _is_excluded(e["name"], e["type"] == "folder",
+                                                          exclude_rules)]
+        while folders:
+            entry = folders.pop()
+            entry["path"] = os.path.relpath(entry["uuid"], experiment)
+            manifest.append(entry)
+            if entry["type"] == "folder":
+                folders.extend(self.list_folder(entry["uuid"]))
+        return manifest
+
+    def start(self) -> "FakeStorageServer":
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+        self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+
+def create_experiment(root_dir: str, name: str, files_count: int, file_size: int = 1024,
+                      folders_count: int = 0, depth: int = 1) -> str:
+    """
+    Creates an experiment made of files_count files, evenly distributed among the experiment
+    root folder and folders_count sub-folders trees.
+    Each tree is a chain of depth nested folders.
+
+    :return: the experiment directory
+    """
+    exp_dir = os.path.join(root_dir, name)
+    folders = [exp_dir]
+    for i in range(folders_count):
+        folder = os.path.join(exp_dir, f"folder_{i}")
+        for level in range(depth):
+            folders.append(folder)
+            folder = os.path.join(folder, f"level_{level + 1}")
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    for i in range(files_count):
+        with open(os.path.join(folders[i % len(folders)], f"file_{i}.dat"), "wb") as f:
+            f.write(os.urandom(file_size))
+
+    return exp_dir
@@ -7,8 +7,6 @@ It leverages the Flask REST and Flask-restful frameworks.
 
 import time
 
-from .version import VERSION as __version__   # pylint: disable=W0611
-
 __author__ = 'NRP software team, Georg Hinkel, Ugo Albanese'
 
 
@@ -82,3 +80,15 @@ def get_date_and_time_string():
         YYYY-mm-dd_HH-MM-SS
     """
     return '_'.join([time.strftime("%Y-%m-%d"), time.strftime("%H-%M-%S")])
+
+
+def __getattr__(name):
+    """
+    Computes __version__ on first use, rather than on import
+    """
+    if name == "__version__":
+        # pylint: disable=import-outside-toplevel
+        from .version import VERSION
+        globals()[name] = VERSION
+        return VERSION
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
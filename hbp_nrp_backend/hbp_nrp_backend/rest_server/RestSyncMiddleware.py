@@ -23,29 +23,108 @@
 # ---LICENSE-END
 """
 This module makes some rest requests multi-threadable.
-By default, all rest requests are considered not thread safe and are therefore synchronized.
+By default, all rest requests are considered not thread safe and are therefore synchronized
+per simulation: requests on the same simulation take a reader/writer lock keyed by its id
+(the sim_id URL parameter), reads (GET, HEAD, OPTIONS) sharing it and writes holding it
+exclusively. Requests not addressed to a simulation (e.g. /simulation) are synchronized
+the same way, on a collection-wide key.
 Requests that are known to be thread-safe, are executed concurrently.
 To mark a rest request as thread-safe, decorate the Resource function handling the request
 (get, post, delete, put) with the decorator @RestSyncMiddleware.threadsafe
+
+The routes resolved by the middleware are cached, keyed by method and path pattern (i.e. the
+path with its integer segments, such as simulation ids, replaced by a placeholder), and
+handed over to the Flask application, which reuses them through a ResolvedRouteAdapter instead
+of matching the request again.
 """
 import contextlib
-from threading import Lock
 import logging
+import re
+from typing import NamedTuple
+
+from werkzeug.exceptions import HTTPException, NotFound
 
-from werkzeug.exceptions import NotFound
+from .. import simulation_control
 
 logger = logging.getLogger(__name__)
 
 
+class _Route(NamedTuple):
+    """
+    A route resolved by RestSyncMiddleware
+    """
+    rule: object  # werkzeug.routing.Rule
+    int_args: tuple  # the names of the integer URL parameters, in path order
+    is_resource: bool  # whether the request is handled by a Resource
+    is_threadsafe: bool
+
+
+class ResolvedRouteAdapter:
+    """
+    A werkzeug MapAdapter whose matching of the current request returns the route already
+    resolved by RestSyncMiddleware. Everything else is delegated to the wrapped adapter.
+    """
+
+    def __init__(self, adapter, rule, view_args: dict):
+        """
+        :param adapter: the MapAdapter created by Flask for the request
+        :param rule: the rule matching the request
+        :param view_args: the URL parameters of the request
+        """
+        self.__adapter = adapter
+        self.__rule = rule
+        self.__view_args = view_args
+
+    def match(self, path_info=None, method=None, return_rule=False, **kwargs):
+        """
+        See werkzeug.routing.MapAdapter.match
+        """
+        if path_info is None and method is None and not kwargs:
+            return (self.__rule if return_rule else self.__rule.endpoint), dict(self.__view_args)
+        return self.__adapter.match(path_info, method, return_rule, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.__adapter, name)
+
+
 class RestSyncMiddleware:
     """
     Middleware that allows thread-safe requests to be executed concurrently
     """
 
-    def __init__(self, wsgi_app, app):
+    # The URL parameter identifying the simulation a request is addressed to
+    LOCK_KEY_ARG = "sim_id"
+    # The lock key of the requests not addressed to a simulation
+    COLLECTION_KEY = None
+    # The methods that only read the resources, hence can run concurrently
+    READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+    # The WSGI environment key under which the resolved (rule, URL parameters) are handed over
+    ROUTE_ENVIRON_KEY = "hbp_nrp_backend.route"
+    # The placeholder of the integer segments in the path patterns keying the route cache
+    INT_SEGMENT = "<int>"
+    __INT_ARG_RE = re.compile(r"<int(?:\([^)]*\))?:(\w+)>")
+
+    # The locks of the simulations, shared with the resources that must synchronize with the
+    # requests on a simulation they are modifying (e.g. the one they create) and with the
+    # standby stopping its idle simulations
+    simulation_locks = simulation_control.simulation_locks
+
+    def __init__(self, wsgi_app, app, route_cache: bool = True):
+        """
+        :param wsgi_app: the WSGI application wrapped by the middleware
+        :param app: the Flask application
+        :param route_cache: whether the resolved routes are cached
+        """
         self.wsgi_app = wsgi_app
         self.app = app
-        self.threadLock = Lock()
+
+        # (method, path pattern) -> _Route
+        self.__routes = {}
+        # a pattern can't be told apart from a rule with integer literals, e.g. /v/1
+        self.__route_cache = route_cache and not any(
+            segment.isascii() and segment.isdigit()
+            for rule in app.url_map.iter_rules() for segment in rule.rule.split("/"))
 
     @staticmethod
     def threadsafe(func):
@@ -59,18 +138,19 @@ class RestSyncMiddleware:
         pathinfo = environ.get("PATH_INFO")
         method = environ.get("REQUEST_METHOD")
 
-        viewfunction, _ = self.app.url_map.bind(
-            'localhost', default_method=method).match(pathinfo)
-
         try:
-            viewclass = self.app.view_functions[viewfunction].view_class
-        except AttributeError as e:
+            route, view_args = self.resolve(method, pathinfo)
+        except HTTPException:
+            # Not found, method not allowed, redirections: the application replies
+            return self.wsgi_app(environ, start_response)
+
+        if not route.is_resource:
             # Ignore unregistered path
             return NotFound()(environ, start_response)
-        
-        viewfn = getattr(viewclass, method.lower())
 
-        with self.thread_safe_contextmanager(viewfn):
+        environ[self.ROUTE_ENVIRON_KEY] = (route.rule, view_args)
+
+        with self.thread_safe_contextmanager(route, method, view_args):
             try:
                 return self.wsgi_app(environ, start_response)
             # pylint: disable=broad-except
@@ -78,13 +158,54 @@ class RestSyncMiddleware:
                 logger.exception(e)
                 raise
 
-    @contextlib.contextmanager
-    def thread_safe_contextmanager(self, view_fn):
+    def resolve(self, method: str, path: str):
+        """
+        Resolves the route of a request, from the route cache if possible
 
-        if (must_lock := not hasattr(view_fn, "is_threadsafe")):
-            self.threadLock.acquire()
-        try:
-            yield
-        finally:
-            if must_lock:
-                self.threadLock.release()
+        :param method: the HTTP method of the request
+        :param path: the path of the request
+        :return: the resolved route and the URL parameters of the request
+        :raise HTTPException: when the request can't be routed
+        """
+        segments = path.split("/")
+        int_values = []
+        for i, segment in enumerate(segments):
+            if segment.isascii() and segment.isdigit():
+                int_values.append(int(segment))
+                segments[i] = self.INT_SEGMENT
+        key = (method, "/".join(segments))
+
+        route = self.__routes.get(key)
+        if route is not None:
+            return route, dict(zip(route.int_args, int_values))
+
+        rule, view_args = self.app.url_map.bind(
+            'localhost', default_method=method).match(path, return_rule=True)
+
+        view_class = getattr(self.app.view_functions[rule.endpoint], "view_class", None)
+        view_fn = getattr(view_class, method.lower(), None)
+        if view_fn is None and method == "HEAD":
+            view_fn = getattr(view_class, "get", None)
+        # requests not handled by the resource (e.g. OPTIONS) are answered by Flask itself
+        route = _Route(rule, tuple(self.__INT_ARG_RE.findall(rule.rule)), view_class is not None,
+                       view_fn is None or hasattr(view_fn, "is_threadsafe"))
+
+        # only the routes whose parameters are all integers can be resolved from their pattern
+        if self.__route_cache and dict(zip(route.int_args, int_values)) == (view_args or {}):
+            self.__routes[key] = route
+        return route, view_args
+
+    def thread_safe_contextmanager(self, route, method, view_args):
+        """
+        :param route: the resolved route of the request
+        :param method: the HTTP method of the request
+        :param view_args: the URL parameters of the request
+        :return: the context manager synchronizing the request
+        """
+        if route.is_threadsafe:
+            return contextlib.nullcontext()
+
+        key = (view_args or {}).get(self.LOCK_KEY_ARG, self.COLLECTION_KEY)
+        if method in self.READ_METHODS:
+            return self.simulation_locks.read(key)
+        return self.simulation_locks.write(key)
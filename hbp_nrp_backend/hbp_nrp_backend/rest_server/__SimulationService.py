@@ -29,18 +29,23 @@ This module contains the REST services to create simulations
 __author__ = 'NRP software team, GeorgHinkel, Ugo Albanese'
 
 
+import contextlib
+import json
 import logging
-import threading
 
-from flask import request
-from flask_restful import Resource, marshal_with
+from flask import request, Response
+from flask_restful import Resource, marshal, marshal_with
+
 from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+from hbp_nrp_commons.workspace.settings import Settings
 
 from . import ErrorMessages, docstring_parameter
 from . import SimulationControl
 from . import api
+from .RestSyncMiddleware import RestSyncMiddleware
 from .. import NRPServicesClientErrorException
-from ..simulation_control import simulations, Simulation, sim_id_type
+from ..simulation_control import (simulations, initializer, simulation_queue, standby,
+                                  Simulation, SimulationLimitError, StandbyKey)
 from ..user_authentication import UserAuthentication
 
 # pylint: disable=R0201
@@ -53,16 +58,47 @@ class SimulationService(Resource):
     The service to create simulations
     """
 
-    comm_lock = threading.Lock()
+    # preference of the clients asking for the simulation to be initialized in the background
+    RESPOND_ASYNC = "respond-async"
+
+    # header giving the cursor of the next page of a listing
+    NEXT_CURSOR_HEADER = "X-Next-Cursor"
+    # listings of more simulations are streamed rather than built in memory
+    STREAMING_THRESHOLD = 100
 
+    # the new simulation is guarded by its own lock while being created and initialized,
+    # the collection isn't locked meanwhile, so that it can still be listed
+    @RestSyncMiddleware.threadsafe
     @docstring_parameter(ErrorMessages.SIMULATION_ANOTHER_RUNNING_409,
-                         ErrorMessages.SIMULATION_CREATED_201)
+                         ErrorMessages.SIMULATION_CREATED_201,
+                         ErrorMessages.SIMULATION_ACCEPTED_202,
+                         ErrorMessages.SIMULATION_QUEUED_202)
     @marshal_with(Simulation.resource_fields)
     def post(self):
         # pylint: disable=R0914
         """
         Creates a new simulation in the specified state.
 
+        The simulation is initialized before replying, unless the server is configured to create
+        simulations asynchronously or the request has a "Prefer: respond-async" header.
+        In that case, the reply is sent right away while the simulation is 'created';
+        it becomes 'paused' once initialized or 'failed', with its error, otherwise.
+
+        Up to Settings.max_simulations simulations run at the same time, as long as the host has
+        the cores, memory and disk space each of them needs (see Settings.simulation_cores,
+        Settings.simulation_memory and Settings.simulation_disk). Otherwise, the new simulation
+        waits in the admission queue, if not full (see Settings.simulation_queue_depth): the reply
+        is sent right away with its 'queued' admission and its position in the queue. It is
+        initialized in the background once admitted, when the simulations ahead of it have
+        reached a final state.
+
+        The simulations of the standby experiments (see Settings.standby_experiments) are kept
+        initialized and paused ahead of the requests of each user: a request in the default state
+        takes one of the user's, if idle and if the user can still access its experiment, and
+        the reply is sent right away with the 'paused' simulation. The standby of the experiment
+        is filled again in the background. The idle standby simulations are stopped to make room
+        for the queued or rejected ones.
+
         :< json string experimentID: The experiment ID of the experiment
         :< json string experimentConfiguration: The file describing the experiment configuration
         :< json string mainScript: The main script of the experiment
@@ -77,26 +113,19 @@ class SimulationService(Resource):
         :> json string owner: The simulation owner (ebrains username or 'hbp-default')
         :> json string creationDate: Date of creation of this simulation
         :> json string experimentID: The experiment ID of the experiment
+        :> json string admission: 'queued' while waiting in the admission queue, then 'admitted'
+        :> json integer queuePosition: The position in the admission queue, while queued
+        :> json number queueWaitTime: The seconds waited in the admission queue, once admitted
 
         :status 409: {0}
         :status 201: {1}
+        :status 202: {2} / {3}
         """
-        # Use context manager to lock access to simulations while a new simulation is created
-        with SimulationService.comm_lock:
-            body = request.get_json(force=True)
+        body = request.get_json(force=True)
 
-            # check request fields
-            if missing_fields := [f for f in Simulation.required_request_fields if f not in body]:
-                raise NRPServicesClientErrorException(f'{" ".join(missing_fields)} not given.')
-
-            # check if another sim is running (i.e. any sim not in a final state)
-            if [s for s in simulations if not SimulationLifecycle.is_final_state(s.state)]:
-                raise NRPServicesClientErrorException(
-                    ErrorMessages.SIMULATION_ANOTHER_RUNNING_409, error_code=409)
-
-            # TODO better simulation IDs
-            # sim_id: uuid.UUID = uuid.uuid4() # then simulations must be a dict
-            sim_id: sim_id_type = len(simulations)
+        # check request fields
+        if missing_fields := [f for f in Simulation.required_request_fields if f not in body]:
+            raise NRPServicesClientErrorException(f'{" ".join(missing_fields)} not given.')
 
         sim_experiment_id = body.get('experimentID', None)
         sim_experiment_configuration = body.get('experimentConfiguration',
@@ -106,30 +135,161 @@ class SimulationService(Resource):
         sim_owner = UserAuthentication.get_user()
         ctx_id = body.get('ctxId', None)
         token = UserAuthentication.get_header_token()
+        respond_async = self.__respond_async()
+        standby_key = StandbyKey(sim_experiment_id, sim_experiment_configuration, sim_main_script,
+                                 ctx_id, sim_owner)
+
+        # an idle standby simulation is already initialized, it's handed over as it is
+        if sim_state == Simulation.DEFAULT_STATE and standby.is_standby(standby_key):
+            sim = standby.take(standby_key, token, can_take=UserAuthentication.can_view)
+            if sim is not None:
+                standby.fill(standby_key, token)
+                return sim, 201, {'Location': api.url_for(SimulationControl, sim_id=sim.sim_id)}
+
+        # rejects right away the requests that can be neither admitted nor queued,
+        # unless an idle standby simulation makes room
+        if simulation_queue.is_full() and not standby.evict(wait=True):
+            raise self.__rejected()
 
-        sim = Simulation(sim_id,
-                         sim_experiment_id,
-                         sim_owner,
-                         experiment_configuration=sim_experiment_configuration,
-                         main_script=sim_main_script,
-                         state=sim_state,
-                         ctx_id=ctx_id,
-                         token=token)
-        simulations.append(sim)
+        # sim_id -> whether the new simulation has been admitted (True) or queued (False)
+        admitted = {}
 
-        sim.state = "initialized"  # initialized transition
+        # the requests on the new simulation wait for its initialization
+        with contextlib.ExitStack() as new_simulation_lock:
+
+            def create_simulation(sim_id):
+                new_simulation_lock.enter_context(
+                    RestSyncMiddleware.simulation_locks.write(sim_id))
+                new_sim = Simulation(sim_id,
+                                     sim_experiment_id,
+                                     sim_owner,
+                                     experiment_configuration=sim_experiment_configuration,
+                                     main_script=sim_main_script,
+                                     state=sim_state,
+                                     ctx_id=ctx_id,
+                                     token=token)
+                # the next queued simulation is admitted once this one reaches a final state
+                new_sim.lifecycle.add_final_state_callback(simulation_queue.release)
+
+                # the new simulation is registered only if admitted or queued
+                try:
+                    admitted[new_sim.sim_id] = simulation_queue.admit(new_sim)
+                except SimulationLimitError:
+                    new_sim.lifecycle.shutdown(None)
+                    raise
+                return new_sim
+
+            try:
+                sim = simulations.create(create_simulation)
+            except SimulationLimitError as e:
+                raise self.__rejected() from e
+
+            # a queued simulation is initialized in the background once admitted,
+            # the idle standby simulations make room for it
+            if not admitted[sim.sim_id]:
+                standby.evict()
+            elif respond_async:
+                initializer.submit(sim)
+            else:
+                initializer.initialize(sim)  # initialized transition
+
+        standby.fill(standby_key, token)
 
         # 'Location' is the URL at which the newly created resource is available
-        return sim, 201, {'Location': api.url_for(SimulationControl, sim_id=sim_id)} 
+        headers = {'Location': api.url_for(SimulationControl, sim_id=sim.sim_id)}
+        if respond_async:
+            headers['Preference-Applied'] = self.RESPOND_ASYNC
+        if respond_async or not admitted[sim.sim_id]:
+            return sim, 202, headers
+        return sim, 201, headers
 
-    @docstring_parameter(ErrorMessages.SIMULATIONS_RETRIEVED_200)
-    @marshal_with(Simulation.resource_fields)
+    @staticmethod
+    def __rejected():
+        """
+        :return: The error rejecting a simulation that can be neither admitted nor queued
+        """
+        message = ErrorMessages.SIMULATION_QUEUE_FULL_409 if Settings.simulation_queue_depth \
+            else ErrorMessages.SIMULATION_ANOTHER_RUNNING_409
+        return NRPServicesClientErrorException(message, error_code=409)
+
+    def __respond_async(self):
+        """
+        :return: Whether the simulation being created is to be initialized in the background
+        """
+        if Settings.simulation_creation_mode == 'async':
+            return True
+        # e.g. "Prefer: respond-async, wait=10"
+        preferences = request.headers.get('Prefer', '').split(',')
+        return any(p.split(';')[0].strip().lower() == self.RESPOND_ASYNC for p in preferences)
+
+    @docstring_parameter(ErrorMessages.SIMULATIONS_RETRIEVED_200,
+                         ErrorMessages.SIMULATIONS_QUERY_INVALID_400)
     def get(self):
         """
-        Gets the list of simulations on this server.
+        Gets the list of simulations on this server, in id order.
+
+        :query state: Lists only the simulations in this state (can be repeated)
+        :query owner: Lists only the simulations of this owner
+        :query experimentID: Lists only the simulations of this experiment
+        :query limit: The maximum number of simulations listed
+        :query cursor: Lists the simulations following the previous page, given its next cursor
+
+        :>header X-Next-Cursor: The cursor of the next page, only when more simulations match
 
         :status 200: {0}
+        :status 400: {1}
+        """
+        states = request.args.getlist('state') or None
+        if states is not None and not all(SimulationLifecycle.is_state(s) for s in states):
+            raise NRPServicesClientErrorException(
+                f"{ErrorMessages.SIMULATIONS_QUERY_INVALID_400}: unknown state")
+
+        limit = self.__int_arg('limit', min_value=1)
+        cursor = self.__int_arg('cursor', min_value=0)
+
+        # the fields of the selected simulations are copied under the registry lock,
+        # they are serialized out of it
+        selected, more = simulations.select(owner=request.args.get('owner'),
+                                            states=states,
+                                            experiment_id=request.args.get('experimentID'),
+                                            after=cursor,
+                                            limit=limit,
+                                            snapshot=lambda sim: marshal(
+                                                sim, Simulation.resource_fields))
+
+        headers = {self.NEXT_CURSOR_HEADER: str(selected[-1]['simulationID'])} if more else {}
+        body = self.__json_array(selected)
+        if len(selected) <= self.STREAMING_THRESHOLD:
+            body = b"".join(body)
+        return Response(body, status=200, headers=headers, mimetype='application/json')
+
+    @staticmethod
+    def __int_arg(name, min_value):
+        """
+        :param name: The name of the query argument
+        :param min_value: The minimum value of the argument
+        :return: The integer value of the query argument, None when it is not given
+        :raise NRPServicesClientErrorException: When the value is not a valid integer
+        """
+        value = request.args.get(name)
+        if value is None:
+            return None
+        if not value.isdecimal() or int(value) < min_value:
+            raise NRPServicesClientErrorException(
+                f"{ErrorMessages.SIMULATIONS_QUERY_INVALID_400}: invalid {name}")
+        return int(value)
+
+    @staticmethod
+    def __json_array(selected):
+        """
+        Serializes the simulations one by one as a JSON array.
+
+        :param selected: The marshalled fields of the simulations to be serialized
+        :return: A generator of the chunks of the JSON array
         """
-        # Acquire lock before getting simulation
-        with SimulationService.comm_lock:
-            return simulations, 200
+        yield b"["
+        for i, sim_fields in enumerate(selected):
+            if i:
+                yield b","
+            yield json.dumps(sim_fields).encode()
+        yield b"]\n"
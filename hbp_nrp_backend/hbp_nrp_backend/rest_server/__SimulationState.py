@@ -35,7 +35,7 @@ from . import ErrorMessages
 from . import docstring_parameter
 from .. import NRPServicesClientErrorException
 from .. import NRPServicesStateException, NRPServicesWrongUserException
-from ..simulation_control import get_simulation
+from ..simulation_control import get_simulation, initializer, simulation_queue
 from ..user_authentication import UserAuthentication
 
 
@@ -59,7 +59,8 @@ class SimulationState(Resource):
         """
 
         resource_fields = {
-            'state': fields.String()
+            'state': fields.String(),
+            'error': fields.String()
         }
         required = ['state']
         required_request_fields = ["state"]
@@ -76,6 +77,7 @@ class SimulationState(Resource):
         :param sim_id: The simulation id
 
         :> json string state: The state of the simulation
+        :> json string error: The error that made the simulation fail, if known
 
         :status 404: {0}
         :status 401: {1}
@@ -98,23 +100,33 @@ class SimulationState(Resource):
     @docstring_parameter(ErrorMessages.SIMULATION_NOT_FOUND_404,
                          ErrorMessages.SIMULATION_PERMISSION_401,
                          ErrorMessages.INVALID_STATE_TRANSITION_400,
-                         ErrorMessages.STATE_APPLIED_200)
+                         ErrorMessages.SIMULATION_INITIALIZING_409,
+                         ErrorMessages.SIMULATION_QUEUED_409,
+                         ErrorMessages.STATE_APPLIED_200,
+                         ErrorMessages.STATE_ACCEPTED_202)
     @marshal_with(_State.resource_fields)
     def put(self, sim_id: str):
         """
         Sets the simulation with the given name into a new state. Allowed values are:
         created, initialized, started, paused, stopped
 
+        A simulation waiting in the admission queue can only be stopped, i.e. removed from it.
+        A simulation being initialized in the background can only be stopped or failed:
+        its initialization is cancelled and the new state is applied once it has returned.
+
         :param sim_id: The simulation id
 
         :< json string state: The state of the simulation to set
 
         :> json string state: The state of the simulation
+        :> json string error: The error that made the simulation fail, if known
 
         :status 404: {0}
         :status 401: {1}
         :status 400: {2}
-        :status 200: {3}
+        :status 409: {3} / {4}
+        :status 200: {5}
+        :status 202: {6}
         """
         try:
             simulation = get_simulation(sim_id)
@@ -143,6 +155,17 @@ class SimulationState(Resource):
         if not SimulationLifecycle.is_state(requested_state):
             raise NRPServicesStateException(f"Invalid state requested: ({requested_state})")
 
+        if initializer.is_initializing(simulation.sim_id):
+            if requested_state not in SimulationLifecycle.FINAL_STATES:
+                raise NRPServicesClientErrorException(
+                    ErrorMessages.SIMULATION_INITIALIZING_409, error_code=409)
+            if initializer.cancel(simulation, requested_state):
+                return simulation, 202
+
+        if requested_state != 'stopped' and simulation_queue.is_queued(simulation.sim_id):
+            raise NRPServicesClientErrorException(
+                ErrorMessages.SIMULATION_QUEUED_409, error_code=409)
+
         try:
             simulation.state = requested_state
         except ValueError:
@@ -28,6 +28,7 @@ for retrieving the versions of all NRP python component packages.
 
 __author__ = 'NRP software team'
 
+import functools
 import importlib
 
 from flask_restful import Resource
@@ -36,11 +37,18 @@ from . import ErrorMessages, docstring_parameter
 from .RestSyncMiddleware import RestSyncMiddleware
 
 COMPONENTS_PACKAGES_NAMES = ['hbp_nrp_backend', 'hbp_nrp_simserver']
-COMPONENTS_PACKAGES = {c_p_name: importlib.import_module(c_p_name)
-                       for c_p_name in COMPONENTS_PACKAGES_NAMES}
 
-VERSIONS = {name: getattr(module, "__version__")
-            for name, module in COMPONENTS_PACKAGES.items()}
+
+@functools.lru_cache(maxsize=None)
+def get_versions():
+    """
+    Imports the COMPONENTS_PACKAGES_NAMES on first call, rather than when the backend starts.
+
+    :return: A dict mapping the name of each component package to its version
+    """
+    return {c_p_name: getattr(importlib.import_module(c_p_name), "__version__")
+            for c_p_name in COMPONENTS_PACKAGES_NAMES}
+
 
 class Version(Resource):
     """
@@ -59,4 +67,4 @@ class Version(Resource):
         :status 200: {0}
         """
 
-        return VERSIONS, 200
+        return get_versions(), 200
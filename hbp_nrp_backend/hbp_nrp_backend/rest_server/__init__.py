@@ -7,6 +7,8 @@ __author__ = 'NRP software team, Georg Hinkel, Ugo Albanese'
 from flask import Flask
 from flask_restful import Api
 
+from .RestSyncMiddleware import RestSyncMiddleware, ResolvedRouteAdapter
+
 
 def docstring_parameter(*sub):
     """
@@ -45,6 +47,26 @@ class NRPServicesExtendedApi(Api):
         return original_handler(e)
 
 
+class NRPServicesFlask(Flask):
+    """
+    Flask application reusing the routes resolved by RestSyncMiddleware, rather than
+    matching the requests a second time
+    """
+
+    def create_url_adapter(self, request):
+        """
+        Creates the URL adapter of request
+
+        :param request: The request, None when no request is being handled
+        """
+        adapter = super().create_url_adapter(request)
+        if request is not None and adapter is not None:
+            route = request.environ.get(RestSyncMiddleware.ROUTE_ENVIRON_KEY)
+            if route is not None:
+                return ResolvedRouteAdapter(adapter, *route)
+        return adapter
+
+
 class ErrorMessages:
     """
     Definition of error strings
@@ -63,17 +85,28 @@ class ErrorMessages:
                                 " by simulation owner"
     SIMULATION_RETRIEVED_200 = "Simulation retrieved successfully"
     SIMULATIONS_RETRIEVED_200 = "Simulations retrieved successfully"
+    SIMULATIONS_QUERY_INVALID_400 = "The simulations query is invalid"
     SIMULATION_CREATED_201 = "Simulation created successfully"
+    SIMULATION_ACCEPTED_202 = "Simulation created successfully, it is being initialized"
+    SIMULATION_INITIALIZING_409 = "The simulation is being initialized, it can only be stopped " \
+                                  "or failed"
     SIMULATION_ANOTHER_RUNNING_409 = "Another simulation is already running on the server"
+    SIMULATION_QUEUE_FULL_409 = "Another simulation is already running on the server " \
+                                "and the simulations queue is full"
+    SIMULATION_QUEUED_202 = "Simulation created successfully, it is queued until another " \
+                            "simulation completes"
+    SIMULATION_QUEUED_409 = "The simulation is queued, it can only be stopped"
 
     INVALID_STATE_TRANSITION_400 = "The state transition is invalid"
     STATE_APPLIED_200 = "Success. The new state has been correctly applied"
+    STATE_ACCEPTED_202 = "The initialization of the simulation has been cancelled, the new state " \
+                         "will be applied once it has returned"
     STATE_RETRIEVED_200 = "Success. The simulation state has been retrieved"
 
     VERSIONS_RETRIEVED_200 = "Success. Components versions has been retrieved"
 
 
-app = Flask(__name__, static_folder='')
+app = NRPServicesFlask(__name__, static_folder='')
 api = NRPServicesExtendedApi(app)
 
 # Import REST APIs
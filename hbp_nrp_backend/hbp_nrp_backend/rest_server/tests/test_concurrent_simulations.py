@@ -0,0 +1,311 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Stress test of several simulations running at the same time on the backend: the simulation
+servers are replaced by fake nrp-core clients, the rest of the backend is the actual one
+"""
+
+__author__ = 'NRP software team'
+
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from hbp_nrp_backend.rest_server import app
+from hbp_nrp_backend.rest_server.RestSyncMiddleware import RestSyncMiddleware
+from hbp_nrp_backend.rest_server.tests import RestTest
+from hbp_nrp_backend.simulation_control import (simulations, SimulationQueue,
+                                                SimulationInitializer)
+from hbp_nrp_backend.simulation_control.backend_simulation_lifecycle import \
+    BackendSimulationLifecycle
+from hbp_nrp_backend.simulation_control.simulation_teardown import SimulationTeardown
+
+_lifecycle_path = 'hbp_nrp_backend.simulation_control.backend_simulation_lifecycle'
+
+
+class FakeStorageClient:
+    """
+    Writes the experiment files and records the uploaded logs
+    """
+    uploads = {}
+
+    def download_file(self, _token, _experiment, filename, dest_path, by_name=False):
+        with open(dest_path, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+    def clone_all_experiment_files(self, token, experiment, destination_dir, exclude=()):
+        with open(os.path.join(destination_dir, "main_script.py"), "w", encoding="utf-8") as f:
+            f.write("")
+
+    def create_or_update(self, _token, _experiment, filename, content, _content_type):
+        self.uploads[filename] = b"".join(content)
+
+
+class FakeSimulationServer:
+    """
+    Runs, in its own thread, a fake nrp-core client stepping the simulation and logging each
+    step in the simulation directory, until terminated
+    """
+    running = set()
+    running_lock = threading.Lock()
+    # the initializations wait for the gate to be open
+    gate = threading.Event()
+    initializing = set()
+
+    def __init__(self, _lifecycle, sim_id, sim_dir, _main_script, exp_config):
+        self.sim_id = sim_id
+        self.sim_dir = sim_dir
+        self.exp_config = exp_config
+        self.steps = 0
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run_nrp_core_client,
+                                         name=f"FakeNrpCoreClient-{sim_id}")
+
+    @property
+    def is_running(self):
+        return self.__thread.is_alive()
+
+    def initialize(self):
+        # the configuration has been prefetched
+        assert os.path.isfile(os.path.join(self.sim_dir, self.exp_config))
+        with self.running_lock:
+            self.initializing.add(self.sim_id)
+        self.gate.wait()
+        with self.running_lock:
+            self.initializing.discard(self.sim_id)
+            self.running.add(self.sim_id)
+        self.__thread.start()
+
+    def __run_nrp_core_client(self):
+        with open(os.path.join(self.sim_dir, "nrp-core.log"), "w", encoding="utf-8") as log:
+            while not self.__stop.wait(0.001):
+                self.steps += 1
+                log.write(f"simulation {self.sim_id} step {self.steps}\n")
+        with self.running_lock:
+            self.running.discard(self.sim_id)
+
+    def terminate(self):
+        self.__stop.set()
+
+    def wait_termination(self):
+        self.__thread.join()
+
+
+class TestConcurrentSimulations(RestTest):
+
+    MAX_SIMULATIONS = 3
+    QUEUE_DEPTH = 2
+    TIMEOUT = 10.
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        FakeStorageClient.uploads = {}
+        FakeSimulationServer.running = set()
+        FakeSimulationServer.initializing = set()
+        FakeSimulationServer.gate = threading.Event()
+        FakeSimulationServer.gate.set()
+        self.addCleanup(FakeSimulationServer.gate.set)
+
+        self.initializer = initializer = SimulationInitializer(self.MAX_SIMULATIONS)
+        self.addCleanup(initializer.shutdown)
+        self.queue = SimulationQueue(max_active=self.MAX_SIMULATIONS, depth=self.QUEUE_DEPTH,
+                                     on_admitted=initializer.submit)
+        teardowns = SimulationTeardown(self.MAX_SIMULATIONS, 2, retry_delay=0)
+        self.addCleanup(teardowns.shutdown)
+
+        sim_util_settings = mock.MagicMock(
+            sim_dir_symlink=os.path.join(self.tmp_dir, "nrp-simulation-dir"))
+
+        for target, new in (
+                # no MQTT broker and no delay before shutting the lifecycles down
+                ('hbp_nrp_commons.simulation_lifecycle.mqtt', mock.MagicMock()),
+                ('hbp_nrp_commons.workspace.sim_util.Settings', sim_util_settings),
+                ('hbp_nrp_commons.workspace.sim_util.tempfile.tempdir', self.tmp_dir),
+                (f'{_lifecycle_path}.storage_client.StorageClient', FakeStorageClient),
+                (f'{_lifecycle_path}.SimulationServerInstance', FakeSimulationServer),
+                (f'{_lifecycle_path}.BackendSimulationLifecycle.teardowns', teardowns),
+                ('hbp_nrp_backend.rest_server.__SimulationService.simulation_queue', self.queue),
+                ('hbp_nrp_backend.rest_server.__SimulationService.initializer', initializer),
+                ('hbp_nrp_backend.rest_server.__SimulationState.simulation_queue', self.queue),
+                ('hbp_nrp_backend.rest_server.__SimulationState.initializer', initializer),
+                ('hbp_nrp_backend.user_authentication.UserAuthentication.can_modify',
+                 mock.MagicMock(return_value=True))):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # the requests are synchronized as by the server
+        patcher = mock.patch.object(app, 'wsgi_app', RestSyncMiddleware(app.wsgi_app, app))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        simulations.clear()
+
+    def wait_until(self, condition, what):
+        deadline = time.monotonic() + self.TIMEOUT
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail(f"Timed out waiting for {what}")
+            time.sleep(0.005)
+
+    def post_simulations(self, count, respond_async=True):
+        responses = [None] * count
+        headers = {"Prefer": "respond-async"} if respond_async else {}
+
+        def post(i):
+            responses[i] = self.client.post('/simulation',
+                                            data=json.dumps({"experimentID": f"experiment_{i}"}),
+                                            headers=headers)
+
+        threads = [threading.Thread(target=post, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        # the synchronous creations are all initialized at the same time
+        if not respond_async and not FakeSimulationServer.gate.is_set():
+            self.wait_until(lambda: len(FakeSimulationServer.initializing) == count,
+                            "the simulations to be initialized concurrently")
+            FakeSimulationServer.gate.set()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def is_initialized(self, sim):
+        # the state is set before the initialization has returned
+        return sim.state == 'paused' and not self.initializer.is_initializing(sim.sim_id)
+
+    def put_state(self, sim, state):
+        response = self.client.put(f'/simulation/{sim.sim_id}/state',
+                                   data=json.dumps({"state": state}))
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_concurrent_simulations(self):
+        count = self.MAX_SIMULATIONS + self.QUEUE_DEPTH
+        responses = self.post_simulations(count)
+
+        self.assertEqual([r.status_code for r in responses], [202] * count)
+        admissions = [json.loads(r.data)['admission'] for r in responses]
+        self.assertEqual(admissions.count('admitted'), self.MAX_SIMULATIONS)
+        self.assertEqual(admissions.count('queued'), self.QUEUE_DEPTH)
+
+        # the queue is full
+        response = self.client.post('/simulation', data=json.dumps({"experimentID": "full"}))
+        self.assertEqual(response.status_code, 409)
+
+        admitted = [sim for sim in simulations if sim.admission == 'admitted']
+        # the concurrent requests are queued in any order
+        queued = sorted((sim for sim in simulations if sim.admission == 'queued'),
+                        key=lambda sim: sim.queue_position)
+        self.wait_until(lambda: all(self.is_initialized(sim) for sim in admitted),
+                        "the admitted simulations to be initialized")
+        for sim in admitted:
+            self.put_state(sim, 'started')
+
+        # each simulation runs in its own directory
+        sim_dirs = {sim.sim_id: sim.lifecycle.sim_dir for sim in admitted}
+        self.assertEqual(len(set(sim_dirs.values())), self.MAX_SIMULATIONS)
+        self.assertEqual(FakeSimulationServer.running, set(sim_dirs))
+        self.wait_until(lambda: all(sim.simulation_server.steps > 10 for sim in admitted),
+                        "the simulations to run")
+        self.assertTrue(all(sim.state == 'started' for sim in admitted))
+
+        # stopping a simulation tears only its own directory down and admits a queued one
+        stopped = admitted.pop(0)
+        self.put_state(stopped, 'stopped')
+        self.assertTrue(BackendSimulationLifecycle.teardowns.wait(stopped.sim_id, self.TIMEOUT))
+        self.assertFalse(os.path.exists(sim_dirs[stopped.sim_id]))
+        for sim in admitted:
+            self.assertTrue(os.path.isfile(os.path.join(sim_dirs[sim.sim_id], "nrp-core.log")))
+
+        self.wait_until(lambda: self.is_initialized(queued[0]),
+                        "a queued simulation to be admitted")
+        self.assertEqual(queued[0].admission, 'admitted')
+        self.assertTrue(queued[1].admission == 'queued' and queued[1].queue_position == 1)
+
+        # stop all the simulations, the last queued one gets admitted meanwhile
+        admitted.append(queued[0])
+        for sim in admitted:
+            self.put_state(sim, 'stopped')
+        self.wait_until(lambda: self.is_initialized(queued[1]), "the last queued simulation")
+        self.put_state(queued[1], 'stopped')
+
+        for sim in simulations:
+            self.assertTrue(BackendSimulationLifecycle.teardowns.wait(sim.sim_id, self.TIMEOUT))
+            self.assertEqual(sim.state, 'stopped')
+        self.assertEqual(glob.glob(os.path.join(self.tmp_dir, "nrp.*")), [])
+        self.assertEqual(FakeSimulationServer.running, set())
+
+        # the logs of every simulation have been uploaded
+        self.assertEqual(len(FakeStorageClient.uploads), count)
+        self.assertEqual(self.queue.stats()['active'], 0)
+        self.assertEqual(self.queue.stats()['admitted'], self.QUEUE_DEPTH)
+
+    def test_concurrent_synchronous_creations(self):
+        FakeSimulationServer.gate.clear()
+        responses = self.post_simulations(self.MAX_SIMULATIONS, respond_async=False)
+
+        self.assertEqual([r.status_code for r in responses], [201] * self.MAX_SIMULATIONS)
+        self.assertTrue(all(json.loads(r.data)['state'] == 'paused' for r in responses))
+        self.assertEqual(len(FakeSimulationServer.running), self.MAX_SIMULATIONS)
+
+        for sim in simulations:
+            self.put_state(sim, 'stopped')
+        for sim in simulations:
+            self.assertTrue(BackendSimulationLifecycle.teardowns.wait(sim.sim_id, self.TIMEOUT))
+        self.assertEqual(FakeSimulationServer.running, set())
+
+    def test_list_while_creating(self):
+        FakeSimulationServer.gate.clear()
+        created = []
+        creation = threading.Thread(target=lambda: created.append(self.client.post(
+            '/simulation', data=json.dumps({"experimentID": "experiment"}))))
+        creation.start()
+        self.wait_until(lambda: FakeSimulationServer.initializing,
+                        "the simulation to be initialized")
+
+        # the simulations are listed while the new one is being initialized
+        listed = []
+        listing = threading.Thread(target=lambda: listed.append(self.client.get('/simulation')))
+        listing.start()
+        listing.join(self.TIMEOUT)
+        listed_while_creating = bool(listed)
+        FakeSimulationServer.gate.set()
+        listing.join()
+        creation.join()
+
+        self.assertTrue(listed_while_creating, "the listing waited for the simulation creation")
+        self.assertEqual(listed[0].status_code, 200)
+        self.assertEqual([sim['state'] for sim in json.loads(listed[0].data)], ['created'])
+        self.assertEqual(created[0].status_code, 201)
+        self.assertEqual(json.loads(created[0].data)['state'], 'paused')
+
+        sim = next(iter(simulations))
+        self.put_state(sim, 'stopped')
+        self.assertTrue(BackendSimulationLifecycle.teardowns.wait(sim.sim_id, self.TIMEOUT))
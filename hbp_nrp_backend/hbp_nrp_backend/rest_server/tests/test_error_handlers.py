@@ -38,7 +38,8 @@ from hbp_nrp_backend.simulation_control import simulations, Simulation
 class TestErrorHandlers(RestTest):
 
     def setUp(self):
-        del simulations[:]
+        simulations.clear()
+        self.addCleanup(simulations.clear)
 
         # patch BackendSimulationLifecycle in simulation
         self.patcher_backend_lifecycle = mock.patch(
@@ -46,12 +47,12 @@ class TestErrorHandlers(RestTest):
         self.mock_backend_lifecycle = self.patcher_backend_lifecycle.start()
         self.addCleanup(self.patcher_backend_lifecycle.stop)
 
-        simulations.append(Simulation(
+        simulations.register(Simulation(
             0, 'experiment1', 'default-owner', state='paused'))
 
     def test_general_500_error(self):
-        simulations[0]._Simulation__lifecycle = mock.MagicMock()
-        simulations[0]._Simulation__lifecycle.accept_command = \
+        simulations.get(0)._Simulation__lifecycle = mock.MagicMock()
+        simulations.get(0)._Simulation__lifecycle.accept_command = \
             mock.Mock(side_effect=Exception("I am a general Exception"))
 
         response = self.client.put(
@@ -62,8 +63,8 @@ class TestErrorHandlers(RestTest):
         self.assertEqual("General error", response_object['type'])
 
     def test_nrp_services_general_exception(self):
-        simulations[0]._Simulation__lifecycle = mock.MagicMock()
-        simulations[0]._Simulation__lifecycle.accept_command = \
+        simulations.get(0)._Simulation__lifecycle = mock.MagicMock()
+        simulations.get(0)._Simulation__lifecycle.accept_command = \
             mock.Mock(side_effect=NRPServicesGeneralException(
                 "I am a NRPServicesGeneralException message",
                 "I am a NRPServicesGeneralException type",
@@ -82,8 +83,8 @@ class TestErrorHandlers(RestTest):
                          response_object['data'])
 
     def test_nrp_services_client_error(self):
-        simulations[0]._Simulation__lifecycle = mock.MagicMock()
-        simulations[0]._Simulation__lifecycle.accept_command = \
+        simulations.get(0)._Simulation__lifecycle = mock.MagicMock()
+        simulations.get(0)._Simulation__lifecycle.accept_command = \
             mock.Mock(side_effect=NRPServicesClientErrorException(
                 "I am a NRPServicesClientErrorException message"))
 
@@ -25,7 +25,12 @@
 Code for testing all classes in hbp_nrp_backend.rest_server.__init__
 """
 
+import os
+import subprocess
+import sys
 import unittest
+from unittest import mock
+
 from hbp_nrp_backend import NRPServicesGeneralException, NRPServicesStateException
 
 
@@ -48,6 +53,21 @@ class TestInit(unittest.TestCase):
         nsge = NRPServicesStateException("StringA")
         self.assertEqual(nsge.__str__(), "'StringA' (State Transition error)")
 
+    @mock.patch.dict(os.environ, {"PYTHONPATH": os.pathsep.join(sys.path)})
+    def test_lazy_imports(self):
+        """
+        This method tests that importing the REST server loads neither the nrp-core client
+        nor the versions of the component packages
+        """
+        loaded = subprocess.run(
+            [sys.executable, "-c",
+             "import sys; import hbp_nrp_backend.rest_server; "
+             "print(' '.join(m for m in ('nrp_client', 'hbp_nrp_backend.version', "
+             "'hbp_nrp_simserver.version', 'hbp_nrp_commons.version') if m in sys.modules))"],
+            stdout=subprocess.PIPE, check=True, timeout=60).stdout.decode().strip()
+
+        self.assertEqual(loaded, "")
+
 
 if __name__ == '__main__':
     unittest.main()
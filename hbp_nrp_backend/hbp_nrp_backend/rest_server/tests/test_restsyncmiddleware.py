@@ -25,10 +25,20 @@
 Tests for RestSyncMiddleware.py
 """
 
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
+
+from flask import Flask, request
+from flask_restful import Api, Resource
+from werkzeug.routing import MapAdapter
+
+from hbp_nrp_backend.rest_server import NRPServicesFlask
 from hbp_nrp_backend.rest_server.RestSyncMiddleware import RestSyncMiddleware
 
+TIMEOUT = 5.
+SHORT_WAIT = 0.1
+
 
 class TestRestSyncMiddleWare(unittest.TestCase):
 
@@ -38,8 +48,9 @@ class TestRestSyncMiddleWare(unittest.TestCase):
         self.mock_app = MagicMock()
         viewfunction = "viewfunction"
         self.mock_map_adapter = MagicMock()
+        self.mock_rule = MagicMock(rule="/path", endpoint=viewfunction)
         self.mock_map_adapter.match = MagicMock(
-            return_value=(viewfunction, None))
+            return_value=(self.mock_rule, None))
         self.mock_app.url_map.bind = MagicMock(
             return_value=self.mock_map_adapter)
 
@@ -53,8 +64,8 @@ class TestRestSyncMiddleWare(unittest.TestCase):
         self.mock_env.get = MagicMock(side_effect=self.env_list)
         self.mock_response = MagicMock()
 
-    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.Lock')
-    def test_raises_exception(self, _patch_lock):
+    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.RestSyncMiddleware.simulation_locks')
+    def test_raises_exception(self, _patch_locks):
         mock_wsgi = MagicMock(side_effect=KeyError)
         self.create_mocks()
         # call the class
@@ -68,8 +79,8 @@ class TestRestSyncMiddleWare(unittest.TestCase):
 
         self.assertTrue(new_func.is_threadsafe)
 
-    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.Lock')
-    def test_call_works_correctly(self, patch_lock):
+    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.RestSyncMiddleware.simulation_locks')
+    def test_call_works_correctly(self, patch_locks):
         self.create_mocks()
         # call the class
         rest = RestSyncMiddleware(self.mock_wsgi, self.mock_app)
@@ -77,13 +88,28 @@ class TestRestSyncMiddleWare(unittest.TestCase):
 
         self.mock_app.url_map.bind.assert_called_with(
             'localhost', default_method=self.env_list[1])
-        self.mock_map_adapter.match.assert_called_with(self.env_list[0])
-        self.assertTrue(rest.threadLock.acquire.called)
+        self.mock_map_adapter.match.assert_called_with(self.env_list[0], return_rule=True)
+        patch_locks.write.assert_called_once_with(RestSyncMiddleware.COLLECTION_KEY)
+        self.assertTrue(patch_locks.write.return_value.__enter__.called)
         self.mock_wsgi.assert_called_with(self.mock_env, self.mock_response)
-        self.assertTrue(rest.threadLock.release.called)
+        self.assertTrue(patch_locks.write.return_value.__exit__.called)
+
+    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.RestSyncMiddleware.simulation_locks')
+    def test_call_locks_simulation(self, patch_locks):
+        self.create_mocks()
+        self.mock_rule.rule = "/simulation/<int:sim_id>/state"
+        self.mock_map_adapter.match.return_value = (self.mock_rule, {"sim_id": 42})
+        self.env_list[1] = "GET"
+        self.mock_app.view_functions["viewfunction"].view_class.get = MagicMock(spec=[])
 
-    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.Lock')
-    def test_call_is_threadsafe(self, patch_lock):
+        rest = RestSyncMiddleware(self.mock_wsgi, self.mock_app)
+        rest(self.mock_env, self.mock_response)
+
+        patch_locks.read.assert_called_once_with(42)
+        patch_locks.write.assert_not_called()
+
+    @patch('hbp_nrp_backend.rest_server.RestSyncMiddleware.RestSyncMiddleware.simulation_locks')
+    def test_call_is_threadsafe(self, patch_locks):
         mock_function = MagicMock()
         mock_function.is_threadsafe = True
         self.create_mocks(mock_function)
@@ -93,10 +119,143 @@ class TestRestSyncMiddleWare(unittest.TestCase):
 
         self.mock_app.url_map.bind.assert_called_with(
             'localhost', default_method=self.env_list[1])
-        self.mock_map_adapter.match.assert_called_with(self.env_list[0])
-        self.assertFalse(rest.threadLock.acquire.called)
+        self.mock_map_adapter.match.assert_called_with(self.env_list[0], return_rule=True)
+        patch_locks.read.assert_not_called()
+        patch_locks.write.assert_not_called()
         self.mock_wsgi.assert_called_with(self.mock_env, self.mock_response)
-        self.assertFalse(rest.threadLock.release.called)
+
+
+class TestRestSyncMiddleWareRouteCache(unittest.TestCase):
+
+    def setUp(self):
+        test = self
+        self.handled = []
+
+        class State(Resource):
+            def get(self, sim_id):
+                test.handled.append((sim_id, request.url_rule.rule))
+                return {'sim_id': sim_id}, 200
+
+        class File(Resource):
+            def get(self, name):
+                return {'name': name}, 200
+
+        self.app = NRPServicesFlask(__name__)
+        api = Api(self.app)
+        api.add_resource(State, '/simulation/<int:sim_id>/state')
+        api.add_resource(File, '/files/<string:name>')
+        self.app.url_map.bind = MagicMock(wraps=self.app.url_map.bind)
+        self.app.wsgi_app = RestSyncMiddleware(self.app.wsgi_app, self.app)
+        self.client = self.app.test_client()
+
+    def test_cached_route(self):
+        with patch.object(MapAdapter, 'match', autospec=True,
+                          side_effect=MapAdapter.match) as match:
+            for sim_id in (1, 2, 1):
+                res = self.client.get(f'/simulation/{sim_id}/state')
+                self.assertEqual(res.status_code, 200)
+                self.assertEqual(res.json, {'sim_id': sim_id})
+
+        # resolved once by the middleware, never by Flask
+        self.app.url_map.bind.assert_called_once()
+        self.assertEqual(match.call_count, 1)
+        self.assertEqual(self.handled, [(1, '/simulation/<int:sim_id>/state'),
+                                        (2, '/simulation/<int:sim_id>/state'),
+                                        (1, '/simulation/<int:sim_id>/state')])
+
+    def test_uncached_route(self):
+        for name in ("a", "b", "42"):
+            res = self.client.get(f'/files/{name}')
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.json, {'name': name})
+
+        self.assertEqual(self.app.url_map.bind.call_count, 3)
+
+    def test_unroutable_requests(self):
+        self.assertEqual(self.client.get('/unknown').status_code, 404)
+        self.assertEqual(self.client.post('/simulation/1/state').status_code, 405)
+        self.assertEqual(self.client.head('/simulation/1/state').status_code, 200)
+
+    def test_disabled_cache(self):
+        self.app.wsgi_app = RestSyncMiddleware(self.app.wsgi_app.wsgi_app, self.app,
+                                               route_cache=False)
+        for _ in range(2):
+            self.assertEqual(self.client.get('/simulation/1/state').status_code, 200)
+        self.assertEqual(self.app.url_map.bind.call_count, 2)
+
+
+class TestRestSyncMiddleWareConcurrency(unittest.TestCase):
+    """
+    Runs concurrent requests through a Flask application, whose handlers block until released
+    """
+
+    def setUp(self):
+        self.entered = {}  # (method, sim_id) -> Event, set when the handler is running
+        self.release = {}  # (method, sim_id) -> Event, set to let the handler return
+        self.lock = threading.Lock()
+        test = self
+
+        class BlockingState(Resource):
+            def get(self, sim_id):
+                return test.block("GET", sim_id)
+
+            def put(self, sim_id):
+                return test.block("PUT", sim_id)
+
+        app = Flask(__name__)
+        Api(app).add_resource(BlockingState, '/simulation/<int:sim_id>/state')
+        app.wsgi_app = RestSyncMiddleware(app.wsgi_app, app)
+        self.app = app
+
+    def events(self, method, sim_id):
+        with self.lock:
+            return (self.entered.setdefault((method, sim_id), threading.Event()),
+                    self.release.setdefault((method, sim_id), threading.Event()))
+
+    def block(self, method, sim_id):
+        entered, release = self.events(method, sim_id)
+        entered.set()
+        release.wait(TIMEOUT)
+        return {}, 200
+
+    def request(self, method, sim_id):
+        thread = threading.Thread(target=self.app.test_client().open, daemon=True,
+                                  args=(f'/simulation/{sim_id}/state',), kwargs={'method': method})
+        thread.start()
+        return thread
+
+    def tearDown(self):
+        with self.lock:
+            for release in self.release.values():
+                release.set()
+
+    def test_concurrent_reads(self):
+        self.request("GET", 0)
+        self.assertTrue(self.events("GET", 0)[0].wait(TIMEOUT))
+
+        # the same GET, run on another thread
+        self.events("GET", 0)[0].clear()
+        self.request("GET", 0)
+        self.assertTrue(self.events("GET", 0)[0].wait(TIMEOUT))
+
+    def test_write_excludes_reads_on_same_simulation(self):
+        self.request("PUT", 0)
+        self.assertTrue(self.events("PUT", 0)[0].wait(TIMEOUT))
+
+        self.request("GET", 0)
+        self.assertFalse(self.events("GET", 0)[0].wait(SHORT_WAIT))
+
+        self.events("PUT", 0)[1].set()
+        self.assertTrue(self.events("GET", 0)[0].wait(TIMEOUT))
+
+    def test_write_does_not_block_other_simulations(self):
+        self.request("PUT", 0)
+        self.assertTrue(self.events("PUT", 0)[0].wait(TIMEOUT))
+
+        self.request("GET", 1)
+        self.assertTrue(self.events("GET", 1)[0].wait(TIMEOUT))
+        self.request("PUT", 2)
+        self.assertTrue(self.events("PUT", 2)[0].wait(TIMEOUT))
 
 
 if __name__ == '__main__':
@@ -61,11 +61,11 @@ class TestSimulationControl(RestTest):
         self.mock_can_view.return_value = True
         self.addCleanup(self.patcher_can_view.stop)
 
-        simulations.append(Simulation(self.SIM_ID, 'some_experiment_id', 'default-owner',
+        simulations.register(Simulation(self.SIM_ID, 'some_experiment_id', 'default-owner',
                                       state=self.INITIAL_STATE))
 
     def tearDown(self):
-        del simulations[:]
+        simulations.clear()
 
     def test_ok(self):
         resp = self.client.get(f'/simulation/{self.SIM_ID}')
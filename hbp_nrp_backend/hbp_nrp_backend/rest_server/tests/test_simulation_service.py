@@ -34,9 +34,8 @@ import datetime
 from hbp_nrp_backend.rest_server import ErrorMessages
 from hbp_nrp_backend.rest_server.__SimulationService import SimulationService
 import unittest
-import threading
 from unittest import mock
-from hbp_nrp_backend.simulation_control import simulations, Simulation
+from hbp_nrp_backend.simulation_control import simulations, Simulation, SimulationQueue
 from hbp_nrp_backend.rest_server.tests import RestTest
 from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
 
@@ -63,15 +62,23 @@ class TestSimulationService(RestTest):
         self.mock_backend_lifecycle = self.patcher_backend_lifecycle.start()
         self.addCleanup(self.patcher_backend_lifecycle.stop)
 
-        self.patcher_comm_lock = mock.patch(
-            'hbp_nrp_backend.rest_server.__SimulationService.SimulationService.comm_lock', wraps=threading.Lock())
-        self.mock_comm_lock = self.patcher_comm_lock.start()
-        self.mock_comm_lock.__enter__ = mock.MagicMock()
-        self.mock_comm_lock.__exit__ = mock.MagicMock()
-        self.addCleanup(self.patcher_comm_lock.stop)
+        # a fresh admission queue, without queueing
+        self.queue = SimulationQueue(max_active=1, depth=0, on_admitted=mock.MagicMock())
+        self.patcher_queue = mock.patch(
+            'hbp_nrp_backend.rest_server.__SimulationService.simulation_queue', self.queue)
+        self.patcher_queue.start()
+        self.addCleanup(self.patcher_queue.stop)
+
+        # no standby simulation
+        self.patcher_standby = mock.patch(
+            'hbp_nrp_backend.rest_server.__SimulationService.standby')
+        self.mock_standby = self.patcher_standby.start()
+        self.mock_standby.is_standby.return_value = False
+        self.mock_standby.evict.return_value = False
+        self.addCleanup(self.patcher_standby.stop)
 
     def tearDown(self):
-        del simulations[:]
+        simulations.clear()
 
     # GET
     def test_get_simulation_ok(self):  # , _mock_state_property):
@@ -81,17 +88,15 @@ class TestSimulationService(RestTest):
             return Simulation.resource_fields[field_name].attribute
 
         # create a simulation
-        simulations.append(Simulation(
+        simulations.register(Simulation(
             sim_id=0, experiment_id='some_experiment_id', owner='default-owner', state="paused"))
         self.mock_state.return_value = "paused"
 
         self._get_service()
         response_object = json.loads(self.response.data)
 
-        # comm_lock should have been used as context manager
-        self.assertTrue(self.mock_comm_lock.__enter__.called)
-        self.assertTrue(self.mock_comm_lock.__exit__.called)
         self.assertEqual(self.response.status_code, 200)
+        self.assertEqual(len(response_object), len(simulations))
 
         # for any simulation test response fields
         for i, sim in enumerate(simulations):
@@ -104,8 +109,72 @@ class TestSimulationService(RestTest):
                 self.assertEqual(response_object[i][required_response_field],
                                  getattr(sim, sim_field_to_attribute(required_response_field)))
 
-    def _get_service(self):
-        self.response = self.client.get('/simulation')
+    def _register_simulations(self, count):
+        for sim_id in range(count):
+            simulations.register(Simulation(
+                sim_id=sim_id, experiment_id=f'experiment_{sim_id % 2}',
+                owner=f'owner_{sim_id % 3}', state="paused"))
+        self.mock_state.return_value = "paused"
+
+    def _listed_ids(self):
+        return [sim['simulationID'] for sim in json.loads(self.response.data)]
+
+    def test_get_simulation_filters(self):
+        self._register_simulations(6)
+
+        self._get_service(owner='owner_1')
+        self.assertEqual(self.response.status_code, 200)
+        self.assertEqual(self._listed_ids(), [1, 4])
+
+        self._get_service(experimentID='experiment_0', owner='owner_0')
+        self.assertEqual(self._listed_ids(), [0])
+
+        self._get_service(state='paused')
+        self.assertEqual(self._listed_ids(), list(range(6)))
+
+        self._get_service(state=['stopped', 'failed'])
+        self.assertEqual(self._listed_ids(), [])
+
+    def test_get_simulation_pagination(self):
+        self._register_simulations(5)
+
+        listed = []
+        cursors = []
+        self._get_service(limit=2)
+        while True:
+            self.assertEqual(self.response.status_code, 200)
+            listed += self._listed_ids()
+            cursor = self.response.headers.get(SimulationService.NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+            cursors.append(cursor)
+            self._get_service(limit=2, cursor=cursor)
+
+        self.assertEqual(listed, list(range(5)))
+        self.assertEqual(cursors, ['1', '3'])
+
+    @mock.patch.object(SimulationService, 'STREAMING_THRESHOLD', 2)
+    def test_get_simulation_streamed(self):
+        self._register_simulations(5)
+
+        # the length of a streamed response is unknown
+        self._get_service()
+        self.assertNotIn('Content-Length', self.response.headers)
+        self.assertEqual(self._listed_ids(), list(range(5)))
+
+        self._get_service(limit=2)
+        self.assertIn('Content-Length', self.response.headers)
+        self.assertEqual(self._listed_ids(), [0, 1])
+
+    def test_get_simulation_invalid_query(self):
+        for query in ({'limit': '0'}, {'limit': 'ten'}, {'cursor': '-1'}, {'state': 'running'}):
+            self._get_service(**query)
+            self.assertEqual(self.response.status_code, 400)
+            self.assertIn(ErrorMessages.SIMULATIONS_QUERY_INVALID_400,
+                          json.loads(self.response.data)['message'])
+
+    def _get_service(self, **query):
+        self.response = self.client.get('/simulation', query_string=query)
 
     # POST
     def _postService(self):
@@ -113,14 +182,12 @@ class TestSimulationService(RestTest):
                                          data=json.dumps({"experimentID": "my_cloned_experiment"}))
 
     def test_post_missing_field(self):
-        self.patcher_comm_lock.stop()
         resp = self.client.post(
             '/simulation', data=json.dumps({"WRONG_FIELD": "WRONG_VALUE"}))
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(len(simulations), 0)
 
     def test_post_another_sim_running(self):
-        self.patcher_comm_lock.stop()
 
         # for any running state
         for running_state in SimulationLifecycle.RUNNING_STATES:
@@ -130,7 +197,8 @@ class TestSimulationService(RestTest):
             sim = Simulation(sim_id=sim_id, experiment_id='some_experiment_id', owner='default-owner',
                              state=running_state)
 
-            simulations.append(sim)
+            simulations.register(sim)
+            self.queue.admit(sim)
             sim.state.return_value = running_state
 
             resp = self.client.post(
@@ -141,7 +209,125 @@ class TestSimulationService(RestTest):
             self.assertIn(
                 ErrorMessages.SIMULATION_ANOTHER_RUNNING_409, response_obj["message"])
 
-            del simulations[sim_id]
+            self.assertEqual(len(simulations), 1)
+            simulations.remove(sim_id)
+            self.queue.release(sim)
+
+    def _queue_behind_running_simulation(self, depth):
+        self.queue = SimulationQueue(max_active=1, depth=depth, on_admitted=mock.MagicMock())
+        self.patcher_queue.stop()
+        self.patcher_queue = mock.patch(
+            'hbp_nrp_backend.rest_server.__SimulationService.simulation_queue', self.queue)
+        self.patcher_queue.start()
+
+        running = Simulation(sim_id=0, experiment_id='some_experiment_id', owner='default-owner')
+        simulations.register(running)
+        self.queue.admit(running)
+        return running
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.initializer')
+    def test_post_queued(self, mock_initializer):
+        self.mock_state.return_value = "created"
+        running = self._queue_behind_running_simulation(depth=1)
+
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 202)
+        self.assertEqual(self.response.headers['Location'], '/simulation/1')
+        response_obj = json.loads(self.response.data)
+        self.assertEqual(response_obj['admission'], 'queued')
+        self.assertEqual(response_obj['queuePosition'], 1)
+        self.assertIsNone(response_obj['queueWaitTime'])
+
+        # the queued simulation is initialized once admitted
+        mock_initializer.submit.assert_not_called()
+        mock_initializer.initialize.assert_not_called()
+        queued = simulations.get(1)
+        queued.lifecycle.add_final_state_callback.assert_called_once_with(self.queue.release)
+
+        self.queue.release(running)
+        self.assertEqual(queued.admission, 'admitted')
+
+    def test_post_queued_evicts_standby(self):
+        self.mock_state.return_value = "created"
+        self._queue_behind_running_simulation(depth=1)
+
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 202)
+        self.mock_standby.evict.assert_called_once_with()
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.initializer')
+    def test_post_rejected_evicts_standby(self, mock_initializer):
+        running = self._queue_behind_running_simulation(depth=0)
+
+        def evict(wait):
+            self.assertTrue(wait)
+            running.lifecycle.state = "stopped"
+            self.queue.release(running)
+            return True
+
+        self.mock_standby.evict.side_effect = evict
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 201)
+        mock_initializer.initialize.assert_called_once_with(simulations.get(1))
+
+    def test_post_standby(self):
+        standby_sim = Simulation(sim_id=3, experiment_id='demo_0', owner='alice', state="paused")
+        simulations.register(standby_sim)
+        self.mock_state.return_value = "paused"
+        self.mock_standby.is_standby.return_value = True
+        self.mock_standby.take.return_value = standby_sim
+
+        self.response = self.client.post('/simulation', data=json.dumps({"experimentID": "demo_0"}))
+
+        self.assertEqual(self.response.status_code, 201)
+        self.assertEqual(self.response.headers['Location'], '/simulation/3')
+        self.assertEqual(json.loads(self.response.data)['state'], "paused")
+
+        key = self.mock_standby.take.call_args.args[0]
+        self.assertEqual(key, ('demo_0', Simulation.DEFAULT_EXP_CONF,
+                               Simulation.DEFAULT_MAIN_SCRIPT, None, 'default-owner'))
+        self.assertEqual(self.mock_standby.take.call_args.args[1:], ('no_token',))
+        # no simulation is created, the standby is filled again
+        self.assertEqual(len(simulations), 1)
+        self.mock_standby.fill.assert_called_once_with(key, 'no_token')
+
+    def test_post_standby_empty(self):
+        self.mock_state.return_value = "paused"
+        self.mock_standby.is_standby.return_value = True
+        self.mock_standby.take.return_value = None
+
+        self.response = self.client.post('/simulation', data=json.dumps({"experimentID": "demo_0"}))
+
+        # created as usual, then the standby is filled
+        self.assertEqual(self.response.status_code, 201)
+        self.assertEqual(simulations.get(0).owner, 'default-owner')
+        self.mock_standby.fill.assert_called_once()
+
+    def test_post_standby_other_state(self):
+        self.mock_state.return_value = "paused"
+        self.mock_standby.is_standby.return_value = True
+
+        self.response = self.client.post('/simulation', data=json.dumps(
+            {"experimentID": "demo_0", "state": "paused"}))
+
+        self.mock_standby.take.assert_not_called()
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.Settings')
+    def test_post_queue_full(self, mock_settings):
+        mock_settings.simulation_queue_depth = 1
+        mock_settings.simulation_creation_mode = 'sync'
+        self._queue_behind_running_simulation(depth=1)
+        self._postService()
+
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 409)
+        self.assertEqual(json.loads(self.response.data)["message"],
+                         ErrorMessages.SIMULATION_QUEUE_FULL_409)
+        self.assertEqual(len(simulations), 2)
 
     @mock.patch('hbp_nrp_backend.simulation_control.simulation.datetime')
     def test_simulation_service_post(self, mocked_date_time):
@@ -152,11 +338,8 @@ class TestSimulationService(RestTest):
         self.response = self.client.post('/simulation',
                                          data=json.dumps({"experimentID": "my_cloned_experiment"}))
 
-        # comm_lock should have been used as context manager
-        self.assertTrue(self.mock_comm_lock.__enter__.called)
-        self.assertTrue(self.mock_comm_lock.__exit__.called)
-
         self.assertEqual(self.response.status_code, 201)
+        self.assertEqual(simulations.get(0).owner, 'default-owner')
         self.assertEqual(self.response.headers['Location'], '/simulation/0')
 
         expected_response_data = {
@@ -168,13 +351,55 @@ class TestSimulationService(RestTest):
             'owner': 'default-owner',
             'experimentID': "my_cloned_experiment",
             'ctxId': None,
-            'MQTTPrefix': ""
+            'MQTTPrefix': "",
+            'error': None,
+            'admission': 'admitted',
+            'queuePosition': None,
+            'queueWaitTime': 0.,
+            'teardown': None
         }
 
         self.assertDictEqual(
             json.loads(self.response.data.strip().decode()),
             expected_response_data)
 
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.initializer')
+    def test_simulation_service_post_async(self, mock_initializer):
+        self.mock_state.return_value = "created"
+
+        for prefer in ('respond-async', 'return=minimal, Respond-Async; wait=10'):
+            self.response = self.client.post('/simulation', headers={'Prefer': prefer},
+                                             data=json.dumps({"experimentID": "my_experiment"}))
+
+            self.assertEqual(self.response.status_code, 202)
+            self.assertEqual(self.response.headers['Preference-Applied'], 'respond-async')
+            self.assertEqual(json.loads(self.response.data)['state'], "created")
+
+            sim = mock_initializer.submit.call_args.args[0]
+            self.assertEqual(self.response.headers['Location'], f'/simulation/{sim.sim_id}')
+            mock_initializer.initialize.assert_not_called()
+
+            simulations.clear()
+            self.queue.release(sim)
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.Settings')
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationService.initializer')
+    def test_simulation_service_post_async_mode(self, mock_initializer, mock_settings):
+        mock_settings.simulation_creation_mode = 'async'
+
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 202)
+        mock_initializer.submit.assert_called_once_with(simulations.get(0))
+
+    def test_simulation_service_post_failed(self):
+        self.mock_state.side_effect = [None, Exception("initialization failed"), "failed"]
+
+        self._postService()
+
+        self.assertEqual(self.response.status_code, 500)
+        self.assertEqual(simulations.get(0).error, repr(Exception("initialization failed")))
+
     def test_simulation_service_wrong_method(self):
         rqdata = {
             "experimentID": "my_cloned_experiment",
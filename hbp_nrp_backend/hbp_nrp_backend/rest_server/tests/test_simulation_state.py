@@ -76,11 +76,11 @@ class TestSimulationStateService(RestTest):
         self.mock_is_final_state = self.patcher_is_final_state.start()
         self.mock_is_final_state.return_value = False
         self.addCleanup(self.patcher_is_final_state.stop)
-        simulations.append(Simulation(self.SIM_ID, 'some_experiment_id', 'default-owner',
+        simulations.register(Simulation(self.SIM_ID, 'some_experiment_id', 'default-owner',
                                       state=self.INITIAL_STATE))
 
     def tearDown(self):
-        del simulations[:]
+        simulations.clear()
     # GET
 
     def test_get_state(self):
@@ -88,7 +88,7 @@ class TestSimulationStateService(RestTest):
         response = self.client.get(f'/simulation/{self.SIM_ID}/state')
         self.assertIsInstance(response, Response)
         self.assertEqual(response.status_code, 200)
-        self.assertEqual({"state": "foobar"}, json.loads(response.data))
+        self.assertEqual({"state": "foobar", "error": None}, json.loads(response.data))
 
     def test_get_sim_not_found(self):
         NON_EXISTENT_SIM_ID = 42
@@ -115,6 +115,52 @@ class TestSimulationStateService(RestTest):
         self.assertIsInstance(response, Response)
         self.assertEqual(response.status_code, 200)
 
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationState.initializer')
+    def test_put_state_initializing(self, mock_initializer):
+        mock_initializer.is_initializing.return_value = True
+        resp = self.client.put(
+            f'/simulation/{self.SIM_ID}/state', data='{"state": "started"}')
+        response_obj = json.loads(resp.data)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(ErrorMessages.SIMULATION_INITIALIZING_409, response_obj["message"])
+        mock_initializer.is_initializing.assert_called_once_with(self.SIM_ID)
+        mock_initializer.cancel.assert_not_called()
+        self.mock_state.__set__.assert_not_called()
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationState.initializer')
+    def test_put_state_initializing_cancelled(self, mock_initializer):
+        mock_initializer.is_initializing.return_value = True
+        mock_initializer.cancel.return_value = True
+        for state in ("stopped", "failed"):
+            mock_initializer.cancel.reset_mock()
+            resp = self.client.put(
+                f'/simulation/{self.SIM_ID}/state', data=json.dumps({"state": state}))
+            # applied once the initialization has returned
+            self.assertEqual(resp.status_code, 202)
+            self.assertEqual(mock_initializer.cancel.call_args.args[1], state)
+            self.mock_state.__set__.assert_not_called()
+
+        # the initialization returned meanwhile, the state is applied right away
+        mock_initializer.cancel.return_value = False
+        resp = self.client.put(
+            f'/simulation/{self.SIM_ID}/state', data='{"state": "stopped"}')
+        self.assertEqual(resp.status_code, 200)
+        self.mock_state.__set__.assert_called_once()
+
+    @mock.patch('hbp_nrp_backend.rest_server.__SimulationState.simulation_queue')
+    def test_put_state_queued(self, mock_queue):
+        mock_queue.is_queued.return_value = True
+        resp = self.client.put(
+            f'/simulation/{self.SIM_ID}/state', data='{"state": "initialized"}')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(ErrorMessages.SIMULATION_QUEUED_409, json.loads(resp.data)["message"])
+        self.mock_state.__set__.assert_not_called()
+
+        # a queued simulation can be stopped, i.e. removed from the queue
+        resp = self.client.put(
+            f'/simulation/{self.SIM_ID}/state', data='{"state": "stopped"}')
+        self.assertEqual(resp.status_code, 200)
+
     def test_put_sim_not_found(self):
         NON_EXISTENT_SIM_ID = 42
         resp = self.client.put(
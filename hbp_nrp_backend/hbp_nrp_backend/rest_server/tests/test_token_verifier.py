@@ -0,0 +1,201 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Unit tests for the JWKS token verifier
+"""
+
+__author__ = 'NRP software team'
+
+import base64
+import json
+import os
+import tempfile
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+from hbp_nrp_backend.token_verifier import (JWKSTokenVerifier, InvalidTokenError,
+                                            TokenUnverifiableError)
+
+NOW = 1700000000
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64url_int(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def rsa_jwk(private_key, kid):
+    numbers = private_key.public_key().public_numbers()
+    return {"kty": "RSA", "kid": kid, "use": "sig",
+            "n": _b64url_int(numbers.n), "e": _b64url_int(numbers.e)}
+
+
+def ec_jwk(private_key, kid):
+    numbers = private_key.public_key().public_numbers()
+    return {"kty": "EC", "kid": kid, "crv": "P-256",
+            "x": _b64url(numbers.x.to_bytes(32, "big")), "y": _b64url(numbers.y.to_bytes(32, "big"))}
+
+
+def make_token(private_key, alg, kid, claims):
+    header = _b64url(json.dumps({"alg": alg, "kid": kid, "typ": "JWT"}).encode())
+    payload = _b64url(json.dumps(claims).encode())
+    signing_input = f"{header}.{payload}".encode()
+
+    if alg == "RS256":
+        signature = private_key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+    elif alg == "PS256":
+        signature = private_key.sign(signing_input,
+                                     padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
+                                                 salt_length=32),
+                                     hashes.SHA256())
+    else:
+        r, s = decode_dss_signature(private_key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        signature = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+class TestJWKSTokenVerifier(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                               backend=default_backend())
+        cls.ec_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.jwks_file = os.path.join(tmp_dir.name, "jwks.json")
+        self.write_jwks([rsa_jwk(self.rsa_key, "rsa"), ec_jwk(self.ec_key, "ec")])
+
+        self.verifier = JWKSTokenVerifier(self.jwks_file, issuer="https://issuer",
+                                          clock=lambda: NOW)
+        self.claims = {"sub": "user-id", "iss": "https://issuer", "exp": NOW + 60}
+
+    def write_jwks(self, keys):
+        with open(self.jwks_file, "w") as f:
+            json.dump({"keys": keys}, f)
+
+    def test_valid_tokens(self):
+        for alg, key, kid in (("RS256", self.rsa_key, "rsa"), ("PS256", self.rsa_key, "rsa"),
+                              ("ES256", self.ec_key, "ec")):
+            token = make_token(key, alg, kid, self.claims)
+            self.assertEqual(self.verifier.get_user_id(token), "user-id")
+
+    def test_user_id_claim(self):
+        verifier = JWKSTokenVerifier(self.jwks_file, user_id_claim="preferred_username",
+                                     clock=lambda: NOW)
+        self.claims["preferred_username"] = "user-name"
+        token = make_token(self.rsa_key, "RS256", "rsa", self.claims)
+        self.assertEqual(verifier.get_user_id(token), "user-name")
+
+        del self.claims["preferred_username"]
+        token = make_token(self.rsa_key, "RS256", "rsa", self.claims)
+        self.assertRaises(TokenUnverifiableError, verifier.get_user_id, token)
+
+    def test_invalid_signature(self):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                             backend=default_backend())
+        token = make_token(other_key, "RS256", "rsa", self.claims)
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id, token)
+
+        header, _, signature = make_token(self.rsa_key, "RS256", "rsa", self.claims).split(".")
+        tampered = _b64url(json.dumps(dict(self.claims, sub="admin")).encode())
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id,
+                          f"{header}.{tampered}.{signature}")
+
+    def test_validity_period(self):
+        expired = dict(self.claims, exp=NOW - JWKSTokenVerifier.LEEWAY)
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "rsa", expired))
+
+        within_leeway = dict(self.claims, exp=NOW - 1)
+        self.assertEqual(self.verifier.get_user_id(
+            make_token(self.rsa_key, "RS256", "rsa", within_leeway)), "user-id")
+
+        not_yet_valid = dict(self.claims, nbf=NOW + 3600)
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "rsa", not_yet_valid))
+
+        never_expiring = dict(self.claims)
+        del never_expiring["exp"]
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "rsa", never_expiring))
+
+    def test_wrong_issuer(self):
+        claims = dict(self.claims, iss="https://other")
+        self.assertRaises(InvalidTokenError, self.verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "rsa", claims))
+
+    def test_unverifiable_tokens(self):
+        for token in ("opaque-token", "a.b.c", "e30.e30.", _b64url(b"[]") + ".e30.e30"):
+            self.assertRaises(TokenUnverifiableError, self.verifier.get_user_id, token)
+
+        # unsupported algorithm
+        header = _b64url(json.dumps({"alg": "HS256"}).encode())
+        self.assertRaises(TokenUnverifiableError, self.verifier.get_user_id,
+                          f"{header}.e30.c2ln")
+
+        # unknown signing key
+        self.assertRaises(TokenUnverifiableError, self.verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "unknown", self.claims))
+
+    def test_key_rotation(self):
+        new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                           backend=default_backend())
+        token = make_token(new_key, "RS256", "new", self.claims)
+        self.assertRaises(TokenUnverifiableError, self.verifier.get_user_id, token)
+
+        self.write_jwks([rsa_jwk(new_key, "new")])
+        os.utime(self.jwks_file, ns=(0, 0))  # the file changed, whatever the fs time resolution
+
+        self.assertEqual(self.verifier.get_user_id(token), "user-id")
+
+    def test_malformed_jwks(self):
+        with open(self.jwks_file, "w") as f:
+            f.write("[]")
+        self.assertRaises(ValueError, JWKSTokenVerifier, self.jwks_file)
+        self.assertRaises(OSError, JWKSTokenVerifier, self.jwks_file + ".missing")
+
+        # malformed and encryption keys are ignored
+        self.write_jwks([{"kty": "RSA", "kid": "malformed"}, {"kty": "oct", "k": "AAAA"},
+                         dict(rsa_jwk(self.rsa_key, "enc"), use="enc"),
+                         rsa_jwk(self.rsa_key, "rsa")])
+        verifier = JWKSTokenVerifier(self.jwks_file, clock=lambda: NOW)
+        self.assertEqual(verifier.get_user_id(make_token(self.rsa_key, "RS256", "rsa",
+                                                         self.claims)), "user-id")
+        self.assertRaises(TokenUnverifiableError, verifier.get_user_id,
+                          make_token(self.rsa_key, "RS256", "enc", self.claims))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,6 +32,7 @@ import unittest
 from unittest.mock import patch, MagicMock
 from flask import Flask
 
+from hbp_nrp_backend.token_verifier import InvalidTokenError, TokenUnverifiableError
 from hbp_nrp_backend.user_authentication import UserAuthentication
 
 
@@ -46,6 +47,8 @@ class TestUserAuthentication(unittest.TestCase):
 
     def setUp(self):
         self.__app = Flask(__name__)
+        UserAuthentication.clear_caches()
+        self.addCleanup(UserAuthentication.clear_caches)
 
     def test_get_x_user_name_header(self):
         # ensure 'X-User-Name' header is used if available
@@ -108,6 +111,88 @@ class TestUserAuthentication(unittest.TestCase):
                 client.can_access_experiment.side_effect = Exception('Test')
                 self.assertFalse(UserAuthentication.can_view(sim))
 
+    def test_get_token_owner_cached(self):
+        with patch("hbp_nrp_backend.user_authentication.UserAuthentication.client") as client:
+            client.get_user = MagicMock(return_value={'id': 'myid'})
+
+            self.assertEqual(UserAuthentication.get_token_owner('my_token'), 'myid')
+            self.assertEqual(UserAuthentication.get_token_owner('my_token'), 'myid')
+            client.get_user.assert_called_once_with('my_token')
+
+            stats = UserAuthentication.cache_stats()['token_owner']
+            self.assertEqual(stats['hits'], 1)
+            self.assertEqual(stats['misses'], 1)
+
+    def test_get_token_owner_failure_not_cached_for_long(self):
+        with patch("hbp_nrp_backend.user_authentication.UserAuthentication.client") as client:
+            client.get_user = MagicMock(side_effect=ConnectionError)
+            self.assertIsNone(UserAuthentication.get_token_owner('my_token'))
+
+            # the failure expired, i.e. the token owner is fetched again
+            UserAuthentication.token_owner_cache.invalidate('my_token')
+            client.get_user = MagicMock(return_value={'id': 'myid'})
+            self.assertEqual(UserAuthentication.get_token_owner('my_token'), 'myid')
+
+    def test_can_view_cached(self):
+        sim = FakeSimulation('Test')
+        sim.ctx_id = 'ctx'
+        sim.experiment_id = 'exp'
+        with self.__app.test_request_context('/test', headers={'Authorization': 'bearer my_token'}):
+            with patch("hbp_nrp_backend.user_authentication.UserAuthentication.client") as client:
+                client.can_access_experiment = MagicMock(return_value=True)
+
+                self.assertTrue(UserAuthentication.can_view(sim))
+                self.assertTrue(UserAuthentication.can_view(sim))
+                client.can_access_experiment.assert_called_once_with('my_token', 'ctx', 'exp')
+
+                sim.experiment_id = 'other_exp'
+                self.assertTrue(UserAuthentication.can_view(sim))
+                self.assertEqual(client.can_access_experiment.call_count, 2)
+
+        self.assertEqual(UserAuthentication.cache_stats()['experiment_access']['size'], 2)
+
+    def test_context_per_request(self):
+        with self.__app.test_request_context('/test'):
+            context = UserAuthentication.get_context()
+            self.assertIs(UserAuthentication.get_context(), context)
+
+        with self.__app.test_request_context('/test'):
+            self.assertIsNot(UserAuthentication.get_context(), context)
+
+    def test_context_memoizes_user(self):
+        with patch("hbp_nrp_backend.user_authentication.UserAuthentication.client") as client:
+            client.get_user = MagicMock(return_value={'id': 'myid'})
+            with self.__app.test_request_context('/test', headers={'Authorization': 'bearer my_token'}):
+                self.assertEqual(UserAuthentication.get_user(), 'myid')
+
+                # resolved once per request, even when the cache doesn't hold it anymore
+                UserAuthentication.clear_caches()
+                self.assertEqual(UserAuthentication.get_user(), 'myid')
+                self.assertTrue(UserAuthentication.can_modify(FakeSimulation('myid')))
+                client.get_user.assert_called_once_with('my_token')
+
+    @patch("hbp_nrp_backend.user_authentication.UserAuthentication.token_verifier")
+    @patch("hbp_nrp_backend.user_authentication.UserAuthentication.client")
+    def test_get_token_owner_verified_locally(self, client, verifier):
+        verifier.get_user_id = MagicMock(return_value='local_id')
+
+        self.assertEqual(UserAuthentication.get_token_owner('my_token'), 'local_id')
+        client.get_user.assert_not_called()
+
+        # invalid (e.g. expired) tokens are rejected without asking the storage server
+        verifier.get_user_id.side_effect = InvalidTokenError('expired')
+        self.assertIsNone(UserAuthentication.get_token_owner('my_token'))
+        client.get_user.assert_not_called()
+
+    @patch("hbp_nrp_backend.user_authentication.UserAuthentication.token_verifier")
+    @patch("hbp_nrp_backend.user_authentication.UserAuthentication.client")
+    def test_get_token_owner_verified_remotely(self, client, verifier):
+        verifier.get_user_id = MagicMock(side_effect=TokenUnverifiableError('unknown key'))
+        client.get_user = MagicMock(return_value={'id': 'remote_id'})
+
+        self.assertEqual(UserAuthentication.get_token_owner('my_token'), 'remote_id')
+        client.get_user.assert_called_once_with('my_token')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -29,6 +29,7 @@ import os
 
 __author__ = 'NRP software team, Georg Hinkel, Ugo Albanese'
 
+import atexit
 import logging
 import sys
 import argparse
@@ -37,6 +38,8 @@ from hbp_nrp_backend.rest_server import app
 # from hbp_nrp_backend.rest_server.cleanup import clean_simulations
 from hbp_nrp_backend.rest_server.RestSyncMiddleware import RestSyncMiddleware
 from hbp_nrp_commons import get_python_interpreter, set_up_logger
+from hbp_nrp_commons.workspace.settings import Settings
+from hbp_nrp_simserver.server.simulation_server_instance import SimulationServerInstance
 
 
 DEFAULT_PORT = 5000
@@ -98,6 +101,21 @@ def __process_args():  # pragma: no cover
     return args
 
 
+def __start_simulation_server_pool():  # pragma: no cover
+    """
+    Starts the idle simulation server processes the simulations run in and the zygote
+    forking them, if configured.
+    Each uWSGI worker starts its own, once forked.
+    """
+    if Settings.simulation_server_pool_size:
+        SimulationServerInstance.start_pool(Settings.simulation_server_pool_size)
+        atexit.register(SimulationServerInstance.pool.shutdown)
+
+    if Settings.simulation_server_launcher == 'zygote':
+        SimulationServerInstance.start_zygote()
+        atexit.register(SimulationServerInstance.zygote.shutdown)
+
+
 # Detect uwsgi, and initialize multithreading support
 if __name__.find("uwsgi_file") == 0:  # pragma: no cover
     app.wsgi_app = RestSyncMiddleware(app.wsgi_app, app)
@@ -109,6 +127,20 @@ if __name__.find("uwsgi_file") == 0:  # pragma: no cover
     logger.warning("Application started with uWSGI or any other framework. logging "
                    "to console by default!")
 
+    # the idle processes and the threads refilling the pool belong to the worker using them:
+    # unless loaded in the worker (e.g. lazy-apps), they are started after the fork
+    try:
+        # pylint: disable=import-error
+        import uwsgi
+        from uwsgidecorators import postfork
+    except ImportError:
+        __start_simulation_server_pool()
+    else:
+        if uwsgi.worker_id() > 0:
+            __start_simulation_server_pool()
+        else:
+            postfork(__start_simulation_server_pool)
+
 
 # This is executed in local install mode without uwsgi
 if __name__ == '__main__':  # pragma: no cover
@@ -134,6 +166,8 @@ if __name__ == '__main__':  # pragma: no cover
         logger.warning(
             "Could not parse port, will use default port: %s", str(DEFAULT_PORT))
 
+    __start_simulation_server_pool()
+
     logger.info("Starting the REST backend server now ...")
     app.run(port=port, host=DEFAULT_HOST, threaded=True)
     logger.info("REST backend server terminated.")
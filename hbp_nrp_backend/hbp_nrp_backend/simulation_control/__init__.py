@@ -4,17 +4,56 @@ This package controls the simulations
 
 __author__ = 'NRP software team, Georg Hinkel, Ugo Albanese'
 
-from typing import List
+import tempfile
+
 import pytz
 
+from hbp_nrp_commons.rw_lock import KeyedReadWriteLock
+from hbp_nrp_commons.workspace.settings import Settings
+
 timezone = pytz.timezone('Europe/Zurich')
 
 sim_id_type = int # before importing Simulation
 
 from hbp_nrp_backend.simulation_control.simulation import Simulation
+from hbp_nrp_backend.simulation_control.simulation_registry import (SimulationRegistry,
+                                                                    SimulationLimitError)
+from hbp_nrp_backend.simulation_control.simulation_initializer import SimulationInitializer
+from hbp_nrp_backend.simulation_control.simulation_queue import (SimulationQueue,
+                                                                  SimulationQueueFullError)
+from hbp_nrp_backend.simulation_control.host_resources import ResourceAdmission
+from hbp_nrp_backend.simulation_control.simulation_standby import SimulationStandby, StandbyKey
+
+# the registry of the simulations created by this server
+simulations: SimulationRegistry = SimulationRegistry()
+
+# the initializer of the simulations created by this server
+initializer: SimulationInitializer = SimulationInitializer(Settings.simulation_init_workers)
+
+# the admission queue of the simulations created by this server, up to Settings.max_simulations
+# of them run at a time, given the resources of the host.
+# The queued simulations are initialized in the background once admitted.
+simulation_queue: SimulationQueue = SimulationQueue(
+    max_active=Settings.max_simulations,
+    depth=Settings.simulation_queue_depth,
+    on_admitted=initializer.submit,
+    can_admit=ResourceAdmission(cores=Settings.simulation_cores,
+                                memory=Settings.simulation_memory,
+                                disk=Settings.simulation_disk,
+                                disk_path=tempfile.gettempdir()))
+
+# the locks of the simulations, keyed by their id, held by the requests on them
+# (see RestSyncMiddleware) and by the standby while stopping its idle simulations
+simulation_locks: KeyedReadWriteLock = KeyedReadWriteLock()
 
-# the list of simulations created by this server
-simulations: List[Simulation] = []
+# the simulations of the standby experiments created ahead of the users' requests, each one
+# handed over to the next user creating a simulation of its experiment
+standby: SimulationStandby = SimulationStandby(experiments=Settings.standby_experiments,
+                                               capacity=Settings.standby_capacity,
+                                               idle_timeout=Settings.standby_idle_timeout,
+                                               registry=simulations,
+                                               queue=simulation_queue,
+                                               simulation_locks=simulation_locks)
 
 def get_simulation(sim_id: sim_id_type) -> Simulation:
     """
@@ -24,8 +63,5 @@ def get_simulation(sim_id: sim_id_type) -> Simulation:
     :returns: The simulation object with the given sim_id, None otherwise
     :raises ValueError: When sim_id simulation doesn't exist
     """
-    # NOTE change in case of different type of simulation ID
-    if sim_id < 0 or sim_id >= len(simulations):
-        raise ValueError
-    return simulations[sim_id]
+    return simulations.get(sim_id)
 
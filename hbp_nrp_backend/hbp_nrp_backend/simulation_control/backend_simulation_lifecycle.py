@@ -28,24 +28,28 @@ This module contains the implementation of the backend simulation lifecycle
 # use "import module.submodule as subm" and subm.Class
 from __future__ import annotations
 
+import functools
 import glob
 import itertools
 import logging
 import os
-import tempfile
+import threading
 import time
-from typing import Optional, List, AnyStr
+from typing import AnyStr, Callable, Dict, List, Optional
 
 import hbp_nrp_backend.simulation_control.simulation as sim
 import hbp_nrp_backend.storage_client_api.storage_client as storage_client
-import hbp_nrp_backend.user_authentication as user_auth
 import hbp_nrp_simserver.server as simserver
 from hbp_nrp_backend import NRPServicesGeneralException
 from hbp_nrp_commons import zip_util
 from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+from hbp_nrp_commons.stage_timer import StageTimer
+from hbp_nrp_commons.workspace.settings import Settings
 from hbp_nrp_commons.workspace.sim_util import SimUtil
 from hbp_nrp_simserver.server.simulation_server_instance import SimulationServerInstance
 
+from .simulation_teardown import SimulationTeardown
+
 __author__ = 'NRP software team, Georg Hinkel, Ugo Albanese'
 
 logger = logging.getLogger(__name__)
@@ -61,6 +65,9 @@ class BackendSimulationLifecycle(SimulationLifecycle):
     # In fact, Backend can't make a simulation fail.
     propagated_destinations = SimulationLifecycle.RUNNING_STATES  # anything but final states
 
+    # tears the stopped simulations down in the background
+    teardowns = SimulationTeardown(Settings.teardown_workers, Settings.teardown_attempts)
+
     def __init__(self,
                  simulation: sim.Simulation,
                  initial_state: str = SimulationLifecycle.INITIAL_STATE):
@@ -72,7 +79,7 @@ class BackendSimulationLifecycle(SimulationLifecycle):
         super(BackendSimulationLifecycle, self).__init__(
             simserver.TOPIC_LIFECYCLE(simulation.sim_id),
             initial_state=initial_state,
-            mqtt_client_id=self.DEFAULT_MQTT_CLIENT_ID,
+            mqtt_client_id=f"{self.DEFAULT_MQTT_CLIENT_ID}_{simulation.sim_id}",
             mqtt_topics_prefix = simulation.mqtt_topics_prefix,
             propagated_destinations=BackendSimulationLifecycle.propagated_destinations,
             clear_synchronization_topic=True)
@@ -81,6 +88,12 @@ class BackendSimulationLifecycle(SimulationLifecycle):
         self._sim_dir: Optional[str] = None  # sim_dir created by initialize method
         self.__experiment_path: Optional[str] = None
         self.__storage_client: storage_client.StorageClient = storage_client.StorageClient()
+        # the duration of the initialization stages, set by initialize
+        self.__initialization_timer: Optional[StageTimer] = None
+        # set to make initialize skip its remaining stages, see cancel_initialization
+        self.__initialization_cancelled = threading.Event()
+        # called with the simulation once it has reached a final state
+        self.__final_state_callbacks: List[Callable[[sim.Simulation], None]] = []
 
     @property
     def simulation(self) -> sim.Simulation:
@@ -115,13 +128,42 @@ class BackendSimulationLifecycle(SimulationLifecycle):
         """
         return self._sim_dir
 
+    @property
+    def initialization_timings(self) -> Dict[str, float]:
+        """
+        :return: The duration, in seconds, of the stages of the initialization,
+                 empty if not initialized
+        """
+        return self.__initialization_timer.durations() if self.__initialization_timer else {}
+
+    def cancel_initialization(self) -> None:
+        """
+        Makes the initialization in progress, if any, skip its remaining stages.
+        The simulation is then 'paused' and has to be stopped (or failed) to be torn down.
+        """
+        self.__initialization_cancelled.set()
+
     def initialize(self, _state_change) -> None:
         """
-        Initializes the simulation
+        Initializes the simulation, overlapping the start of the simulation server with the
+        download of the experiment files:
+        - prefetches the experiment configuration, the only file read by the simulation server
+          on startup
+        - spawns the simulation server, which then warms up (i.e. imports, parses the
+          configuration and connects to the MQTT broker)
+        - clones the rest of the experiment files, the main script included
+
+        The simulation server initializes nrp-core once this method returns, i.e. once the files
+        have been cloned, when it receives the 'initialized' state change.
+        If the configuration can't be prefetched, the server is spawned after the clone.
+
+        The remaining stages are skipped once the initialization is cancelled
+        (see cancel_initialization).
 
         :param _state_change: The state change that caused the simulation to be initialized
         """
         sim = self.simulation
+        timer = self.__initialization_timer = StageTimer()
         self._sim_dir = SimUtil.init_simulation_dir(str(sim.sim_id))
 
         try:
@@ -133,27 +175,42 @@ class BackendSimulationLifecycle(SimulationLifecycle):
             # in the experiment folder to ignore in cloning
             exclude_list = ["*.log", "*.log.zip", "logs/", '__pycache__/']
 
+            with timer.stage("prefetch"):
+                prefetched = self.__prefetch(sim.experiment_configuration)
+
+            if self.__is_initialization_cancelled():
+                return
+
+            if prefetched:
+                # the server warms up while the rest of the files is downloaded
+                with timer.stage("spawn"):
+                    self.__spawn_simulation_server()
+                exclude_list.append(glob.escape(sim.experiment_configuration))
+
+                if self.__is_initialization_cancelled():
+                    return
+
             # clone the experiment files in local temporary directory
-            self.__storage_client.clone_all_experiment_files(
-                token=user_auth.UserAuthentication.get_header_token(),
-                experiment=sim.experiment_id,
-                destination_dir=self._sim_dir,
-                exclude=exclude_list
-            )
+            with timer.stage("clone"):
+                self.__storage_client.clone_all_experiment_files(
+                    token=sim.token,
+                    experiment=sim.experiment_id,
+                    destination_dir=self._sim_dir,
+                    exclude=exclude_list
+                )
 
             self.__experiment_path = os.path.join(self._sim_dir,
                                                   sim.experiment_configuration)
 
-            sim.simulation_server = SimulationServerInstance(
-                self,
-                sim.sim_id,
-                self._sim_dir,
-                sim.main_script,
-                sim.experiment_configuration)
+            if self.__is_initialization_cancelled():
+                return
 
-            sim.simulation_server.initialize()
+            if not prefetched:
+                with timer.stage("spawn"):
+                    self.__spawn_simulation_server()
 
-            logger.info("Simulation initialized. Simulation ID: '%s'", str(sim.sim_id))
+            logger.info("Simulation initialized: %s. Simulation ID: '%s'",
+                        timer.report(), str(sim.sim_id))
         # pylint: disable=broad-except
         except Exception as ex:
             raise NRPServicesGeneralException(
@@ -161,6 +218,56 @@ class BackendSimulationLifecycle(SimulationLifecycle):
                 error_type="Server Error",
                 data=ex) from ex
 
+    def __is_initialization_cancelled(self) -> bool:
+        """
+        :return: Whether the initialization has been cancelled, logging it if so
+        """
+        if not self.__initialization_cancelled.is_set():
+            return False
+
+        logger.info("Simulation initialization cancelled: %s. Simulation ID: '%s'",
+                    self.__initialization_timer.report(), str(self.simulation.sim_id))
+        return True
+
+    def __prefetch(self, filename: str) -> bool:
+        """
+        Downloads an experiment file, located in the experiment root folder,
+        to the simulation directory ahead of the clone
+
+        :param filename: The name of the file
+        :return: True if the file has been downloaded, False otherwise
+        """
+        sim = self.simulation
+        if '/' in filename:
+            return False
+
+        try:
+            self.__storage_client.download_file(sim.token, sim.experiment_id, filename,
+                                                os.path.join(self._sim_dir, filename),
+                                                by_name=True)
+        # pylint: disable=broad-except
+        except Exception as ex:
+            # the clone will download it
+            logger.warning("Prefetching '%s' failed, the simulation server will be started after "
+                           "the clone: %s. Simulation ID: '%s'", filename, repr(ex),
+                           str(sim.sim_id))
+            return False
+        return True
+
+    def __spawn_simulation_server(self) -> None:
+        """
+        Spawns the simulation server of the simulation
+        """
+        sim = self.simulation
+        sim.simulation_server = SimulationServerInstance(
+            self,
+            sim.sim_id,
+            self._sim_dir,
+            sim.main_script,
+            sim.experiment_configuration)
+
+        sim.simulation_server.initialize()
+
     def start(self, _state_change):
         """
         Starts the simulation
@@ -173,31 +280,58 @@ class BackendSimulationLifecycle(SimulationLifecycle):
 
     def stop(self, _state_change):
         """
-        Stops the simulation:
-        - uploads logs to storage
-        - cleans the simulation directory up
+        Stops the simulation: requests the simulation server to terminate and schedules
+        the teardown of the simulation (see _teardown), so that the stop doesn't wait for it.
         """
         sim_id_str: str = str(self.simulation.sim_id)
 
-        if self.simulation.simulation_server is None:
+        simulation_server = self.simulation.simulation_server
+        if simulation_server is None:
             logger.debug("Simulation Server uninitialized, can't stop it."
                          "Simulation ID: '%s'", sim_id_str)
+            # e.g. the initialization has been cancelled before spawning the server
+            if self._sim_dir is not None:
+                SimUtil.delete_simulation_dir(self._sim_dir)
             return
 
+        try:
+            simulation_server.terminate()
+        finally:
+            # the simulation directory is cleaned up even if the termination request fails
+            self.teardowns.submit(self.simulation,
+                                  functools.partial(self._teardown, simulation_server))
+
+        logger.info("Stopping requested, teardown scheduled. Simulation ID: '%s'", sim_id_str)
+
+    def _teardown(self, simulation_server: SimulationServerInstance):
+        """
+        Tears the stopped simulation down, retrying the failed steps:
+        - waits for the simulation server to terminate
+        - uploads logs to storage
+        - cleans the simulation directory up
+
+        :param simulation_server: The simulation server requested to terminate
+        """
+        sim_id_str: str = str(self.simulation.sim_id)
+
         try:
             # NOTE
-            # shutdown can't rely on simulation server's lifecycle for shutting down the simulation;
-            # we must synchronously call simulation_server.shutdown(),
-            # so that we are sure that the files to be persisted in the storage are available
-            # in the simulation directory.
-            self.simulation.simulation_server.shutdown()
+            # the files to be persisted in the storage are available in the simulation directory
+            # only once the simulation server has terminated.
+            simulation_server.wait_termination()
+
+            if self.simulation.standby:
+                # nobody ran it, the storage is the one of the user whose request filled the standby
+                logger.debug("Standby simulation, logs not uploaded. Simulation ID: '%s'",
+                             sim_id_str)
+                return
 
             # uploads logs to storage
             try:
                 # NOTE
                 # save here any simulation-related file we are interested in persisting into
-                # the user storage 
-                self._save_log_to_user_storage()
+                # the user storage
+                self.teardowns.retry("Logs upload", self._save_log_to_user_storage)
             except Exception:
                 logger.debug("Logs upload to storage failed. Simulation ID: '%s'", sim_id_str)
                 # NOTE TODO what to do of simulation data in the case of a failed storage upload?
@@ -206,7 +340,8 @@ class BackendSimulationLifecycle(SimulationLifecycle):
                 logger.debug("Uploaded logs to storage. Simulation ID: '%s'", sim_id_str)
         finally:
             # Clean up simulation directory
-            SimUtil.delete_simulation_dir(self._sim_dir)
+            self.teardowns.retry("Simulation dir removal",
+                                 SimUtil.delete_simulation_dir, self._sim_dir)
             logger.debug("Deleted simulation dir '%s'. Simulation ID: '%s'", str(self._sim_dir),
                          sim_id_str)
 
@@ -234,6 +369,32 @@ class BackendSimulationLifecycle(SimulationLifecycle):
         finally:
             logger.info("Simulation has Failed. Simulation ID: '%s'", str(self.simulation.sim_id))
 
+    def add_final_state_callback(self, callback: Callable[[sim.Simulation], None]) -> None:
+        """
+        Registers a function to be called once the simulation has reached a final state
+
+        :param callback: The function, called with the simulation
+        """
+        self.__final_state_callbacks.append(callback)
+
+    def shutdown(self, shutdown_event):
+        """
+        Shuts this lifecycle down, once the simulation has reached a final state,
+        and calls the final state callbacks
+
+        :param shutdown_event: The event that caused the shutdown
+        """
+        try:
+            super().shutdown(shutdown_event)
+        finally:
+            for callback in self.__final_state_callbacks:
+                # pylint: disable=broad-except
+                try:
+                    callback(self.simulation)
+                except Exception:
+                    logger.exception("Final state callback failed. Simulation ID: '%s'",
+                                     str(self.simulation.sim_id))
+
     def reset(self, _state_change):
         """
         Resets the simulation
@@ -262,20 +423,17 @@ class BackendSimulationLifecycle(SimulationLifecycle):
 
         logs_filename = f"{timestamp_str}_simulation_{sim_id_str}.log.zip"
 
-        temp_dest = os.path.join(tempfile.gettempdir(), logs_filename)
-
-        zip_util.create_from_filelist(itertools.chain(*logs_file_lists),
-                                      temp_dest,
-                                      preserve_path=False)  # flat file hierarchy
+        # the zip is uploaded, as a chunked request body, while being compressed
+        zipped_logs = zip_util.stream_from_filelist(itertools.chain(*logs_file_lists),
+                                                    preserve_path=False)  # flat file hierarchy
 
         # upload zip to user storage
         try:
-            with open(temp_dest, 'rb') as zipped_logs:
-                self.__storage_client.create_or_update(
-                    self.simulation.token,
-                    self.simulation.experiment_id,
-                    logs_filename,
-                    zipped_logs.read(),
-                    "application/octet-stream")
+            self.__storage_client.create_or_update(
+                self.simulation.token,
+                self.simulation.experiment_id,
+                logs_filename,
+                zipped_logs,
+                "application/octet-stream")
         finally:
-            os.remove(temp_dest)
+            zipped_logs.close()
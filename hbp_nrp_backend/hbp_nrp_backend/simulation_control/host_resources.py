@@ -0,0 +1,137 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the admission of simulations based on the resources of the host
+"""
+
+__author__ = 'NRP software team'
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+MiB = 1024 * 1024
+
+
+@dataclass
+class HostResources:
+    """
+    cores: the CPU cores usable by this process
+    load: the 1-minute load average of the host, i.e. the number of busy cores
+    memory_available: the memory available for starting new processes, in bytes
+    disk_free: the free disk space of the simulation directories' file system, in bytes
+    """
+    cores: int
+    load: float
+    memory_available: int
+    disk_free: int
+
+
+def read_host_resources(disk_path: str, proc_dir: str = "/proc") -> HostResources:
+    """
+    Reads the resources of the host: the load and the available memory from /proc,
+    the usable cores from the CPU affinity of this process and the free disk space of disk_path.
+
+    :param disk_path: A path on the file system whose free space is read
+    :param proc_dir: The mount point of the proc file system
+    :return: The resources of the host
+    :raise OSError: When a resource can't be read
+    """
+    with open(os.path.join(proc_dir, "loadavg"), encoding="ascii") as loadavg:
+        load = float(loadavg.read().split()[0])
+
+    memory_available = None
+    with open(os.path.join(proc_dir, "meminfo"), encoding="ascii") as meminfo:
+        for line in meminfo:
+            # e.g. "MemAvailable:    8010516 kB"
+            if line.startswith("MemAvailable:"):
+                memory_available = int(line.split()[1]) * 1024
+                break
+    if memory_available is None:
+        raise OSError("MemAvailable not found in meminfo")
+
+    disk = os.statvfs(disk_path)
+
+    return HostResources(cores=len(os.sched_getaffinity(0)),
+                         load=load,
+                         memory_available=memory_available,
+                         disk_free=disk.f_bavail * disk.f_frsize)
+
+
+class ResourceAdmission:
+    """
+    Decides whether the host has the resources to run one more simulation, given the cores,
+    the memory and the disk space a simulation needs.
+
+    The load and the memory usage of the simulations admitted last may not show yet:
+    the cores needed by all the active simulations are reserved too.
+    When no simulation is active, one is always admitted, whatever the resources.
+    """
+
+    def __init__(self, cores: int, memory: int, disk: int, disk_path: str,
+                 read_resources: Callable[[str], HostResources] = read_host_resources):
+        """
+        :param cores: The CPU cores needed by a simulation, 0 to ignore them
+        :param memory: The memory, in MiB, needed by a simulation, 0 to ignore it
+        :param disk: The disk space, in MiB, needed by a simulation, 0 to ignore it
+        :param disk_path: A path on the file system of the simulation directories
+        :param read_resources: Reads the resources of the host
+        """
+        self.__cores = cores
+        self.__memory = memory * MiB
+        self.__disk = disk * MiB
+        self.__disk_path = disk_path
+        self.__read_resources = read_resources
+
+    def __call__(self, active: int) -> bool:
+        """
+        :param active: The number of active simulations
+        :return: Whether one more simulation can be admitted
+        """
+        if not active or not (self.__cores or self.__memory or self.__disk):
+            return True
+
+        try:
+            resources = self.__read_resources(self.__disk_path)
+        except (OSError, ValueError) as e:
+            # e.g. not on Linux, the concurrency limit applies alone
+            logger.warning("The host resources can't be read, admitting the simulation: %s", e)
+            return True
+
+        missing = []
+        if self.__cores and (resources.cores - resources.load < self.__cores or
+                             resources.cores < (active + 1) * self.__cores):
+            missing.append(f"cores ({resources.cores} cores, load {resources.load:.2f})")
+        if resources.memory_available < self.__memory:
+            missing.append(f"memory ({resources.memory_available // MiB} MiB available)")
+        if resources.disk_free < self.__disk:
+            missing.append(f"disk ({resources.disk_free // MiB} MiB free)")
+
+        if missing:
+            logger.info("Not enough resources to run %s simulations: %s",
+                        active + 1, ", ".join(missing))
+        return not missing
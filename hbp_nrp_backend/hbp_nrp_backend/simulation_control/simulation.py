@@ -107,6 +107,20 @@ class Simulation:
         # simulation_server created during initialization in Lifecycle
         self.__simulation_server_instance: Optional[simserver.SimulationServerInstance] = None
 
+        # the error that made the simulation fail, if known
+        self.__error: Optional[str] = None
+
+        # the progress of the teardown of the stopped simulation, see SimulationTeardown
+        self.__teardown: Optional[str] = None
+
+        # whether the simulation waits in standby for its user, see SimulationStandby
+        self.__standby: bool = False
+
+        # the admission of the simulation to run, see SimulationQueue
+        self.__admission: Optional[str] = None
+        self.__queue_position: Optional[int] = None
+        self.__queue_wait_time: Optional[float] = None
+
         self.__lifecycle: SimulationLifecycle = BackendSimulationLifecycle(self, state)
 
     @property
@@ -168,6 +182,15 @@ class Simulation:
         """
         return self.__owner
 
+    @owner.setter
+    def owner(self, new_value: str) -> None:
+        """
+        Hands the simulation over to a new owner, see SimulationRegistry.change_owner
+
+        :param new_value: The new owner name
+        """
+        self.__owner = new_value
+
     @property
     def creation_datetime(self) -> datetime.datetime:
         """
@@ -238,6 +261,104 @@ class Simulation:
         """
         self.__lifecycle.accept_command(new_state)
 
+    @property
+    def error(self) -> Optional[str]:
+        """
+        :return: The error that made the simulation fail, None if unknown or not failed
+        """
+        return self.__error
+
+    @error.setter
+    def error(self, new_value: Optional[str]) -> None:
+        """
+        Records the error that made the simulation fail
+
+        :param new_value: The error message
+        """
+        self.__error = new_value
+
+    @property
+    def teardown(self) -> Optional[str]:
+        """
+        :return: The progress of the teardown of the stopped simulation, None if not stopped
+        """
+        return self.__teardown
+
+    @teardown.setter
+    def teardown(self, new_value: Optional[str]) -> None:
+        """
+        Records the progress of the teardown of the stopped simulation
+
+        :param new_value: The progress of the teardown
+        """
+        self.__teardown = new_value
+
+    @property
+    def standby(self) -> bool:
+        """
+        :return: Whether the simulation waits in standby, i.e. it has not been handed over
+                 to a user yet
+        """
+        return self.__standby
+
+    @standby.setter
+    def standby(self, new_value: bool) -> None:
+        """
+        Records whether the simulation waits in standby
+
+        :param new_value: True while in standby
+        """
+        self.__standby = new_value
+
+    @property
+    def admission(self) -> Optional[str]:
+        """
+        :return: Whether the simulation is 'queued' or has been 'admitted' to run,
+                 None if not submitted to the admission queue
+        """
+        return self.__admission
+
+    @admission.setter
+    def admission(self, new_value: Optional[str]) -> None:
+        """
+        Records the admission of the simulation to run
+
+        :param new_value: The admission status
+        """
+        self.__admission = new_value
+
+    @property
+    def queue_position(self) -> Optional[int]:
+        """
+        :return: The 1-based position of the simulation in the admission queue, None if not queued
+        """
+        return self.__queue_position
+
+    @queue_position.setter
+    def queue_position(self, new_value: Optional[int]) -> None:
+        """
+        Records the position of the simulation in the admission queue
+
+        :param new_value: The 1-based position
+        """
+        self.__queue_position = new_value
+
+    @property
+    def queue_wait_time(self) -> Optional[float]:
+        """
+        :return: The seconds the simulation waited in the admission queue, None until admitted
+        """
+        return self.__queue_wait_time
+
+    @queue_wait_time.setter
+    def queue_wait_time(self, new_value: Optional[float]) -> None:
+        """
+        Records the seconds the simulation waited in the admission queue
+
+        :param new_value: The waiting time, in seconds
+        """
+        self.__queue_wait_time = new_value
+
     @property
     def mqtt_topics_prefix(self) -> str:
         """
@@ -259,6 +380,11 @@ class Simulation:
         'experimentID': fields.String(attribute='experiment_id'),
         'ctxId': fields.String(attribute='ctx_id'),
         'MQTTPrefix': fields.String(attribute='mqtt_topics_prefix'),
+        'error': fields.String(attribute='error'),
+        'admission': fields.String(attribute='admission'),
+        'queuePosition': fields.Integer(attribute='queue_position', default=None),
+        'queueWaitTime': fields.Float(attribute='queue_wait_time'),
+        'teardown': fields.String(attribute='teardown'),
     }
 
     required = ['state',
@@ -0,0 +1,195 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the initializer of the simulations created by this server
+"""
+
+__author__ = 'NRP software team'
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+
+from hbp_nrp_backend import NRPServicesGeneralException
+
+from . import sim_id_type
+from .simulation import Simulation
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationInitializer:
+    """
+    Initializes simulations, either in the calling thread or in the background on a bounded
+    pool of threads.
+
+    A simulation being initialized stays 'created'; it becomes 'paused' once initialized or
+    'failed' otherwise, the error being recorded in Simulation.error.
+
+    A background initialization can be cancelled (see cancel): the simulation is set in the
+    requested final state once its initialization has returned.
+    """
+
+    INITIALIZED_TRIGGER = "initialized"
+
+    def __init__(self, max_workers: int):
+        """
+        :param max_workers: The maximum number of simulations initialized concurrently
+                            in the background
+        """
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers,
+                                             thread_name_prefix="nrp_simulation_init")
+        self.__lock = threading.Lock()
+        # the background initializations not completed yet
+        self.__pending: Dict[sim_id_type, Future] = {}
+        # sim_id -> the final state requested while the simulation was being initialized
+        self.__cancelled: Dict[sim_id_type, str] = {}
+
+    @classmethod
+    def initialize(cls, simulation: Simulation) -> None:
+        """
+        Initializes the simulation in the calling thread.
+
+        :param simulation: The simulation to be initialized
+        :raise Exception: Any error raised by the initialization, the simulation has failed
+        """
+        try:
+            simulation.state = cls.INITIALIZED_TRIGGER
+        except Exception as ex:
+            simulation.error = ex.message if isinstance(ex, NRPServicesGeneralException) \
+                else repr(ex)
+            raise
+
+    def submit(self, simulation: Simulation) -> Future:
+        """
+        Schedules the initialization of the simulation in the background.
+
+        :param simulation: The simulation to be initialized
+        :return: The future result of the initialization
+        """
+        sim_id = simulation.sim_id
+        with self.__lock:
+            future = self.__executor.submit(self.__initialize, simulation)
+            self.__pending[sim_id] = future
+        future.add_done_callback(lambda _: self.__done(sim_id, future))
+        return future
+
+    def is_initializing(self, sim_id: sim_id_type) -> bool:
+        """
+        :param sim_id: The simulation id
+        :return: Whether the simulation is being initialized in the background
+        """
+        with self.__lock:
+            return sim_id in self.__pending
+
+    def cancel(self, simulation: Simulation, final_state: str) -> bool:
+        """
+        Cancels the background initialization of the simulation, if any: its remaining stages
+        are skipped and the simulation is set in final_state once the initialization has returned.
+
+        :param simulation: The simulation being initialized
+        :param final_state: The final state to set the simulation in, i.e. 'stopped' or 'failed'
+        :return: True if the initialization has been cancelled,
+                 False if the simulation is not being initialized
+        """
+        sim_id = simulation.sim_id
+        with self.__lock:
+            future = self.__pending.get(sim_id)
+            if future is None:
+                return False
+            self.__cancelled[sim_id] = final_state
+
+        # cancelling the future runs its done callback, taking the lock
+        if future.cancel():
+            # not started, nothing to wait for
+            with self.__lock:
+                self.__cancelled.pop(sim_id, None)
+            self.__set_final_state(simulation, final_state)
+        else:
+            simulation.lifecycle.cancel_initialization()
+
+        logger.info("Initialization cancelled, the simulation will be %s. Simulation ID: '%s'",
+                    final_state, str(sim_id))
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting initializations
+
+        :param wait: Whether to wait for the pending initializations to complete
+        """
+        self.__executor.shutdown(wait=wait)
+
+    def __initialize(self, simulation: Simulation) -> None:
+        """
+        Initializes the simulation in a background thread, logging any error.
+        The simulation is then set in the final state requested meanwhile, if any.
+
+        :param simulation: The simulation to be initialized
+        """
+        sim_id = simulation.sim_id
+        try:
+            self.initialize(simulation)
+        # pylint: disable=broad-except
+        except Exception:
+            logger.exception("Initialization failed. Simulation ID: '%s'", str(sim_id))
+
+        # no cancellation can be requested once the initialization is not pending anymore
+        with self.__lock:
+            final_state = self.__cancelled.pop(sim_id, None)
+            self.__pending.pop(sim_id, None)
+
+        if final_state is not None:
+            self.__set_final_state(simulation, final_state)
+
+    @staticmethod
+    def __set_final_state(simulation: Simulation, final_state: str) -> None:
+        """
+        Sets the simulation in final_state, unless it has already reached a final state
+
+        :param simulation: The simulation
+        :param final_state: The final state
+        """
+        if SimulationLifecycle.is_final_state(simulation.state):
+            return
+        # pylint: disable=broad-except
+        try:
+            simulation.state = final_state
+        except Exception:
+            logger.exception("Setting the simulation %s failed. Simulation ID: '%s'",
+                             final_state, str(simulation.sim_id))
+
+    def __done(self, sim_id: sim_id_type, future: Future) -> None:
+        """
+        Forgets a completed initialization
+
+        :param sim_id: The simulation id
+        :param future: The completed initialization
+        """
+        with self.__lock:
+            if self.__pending.get(sim_id) is future:
+                del self.__pending[sim_id]
@@ -0,0 +1,311 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the admission queue of the simulations created by this server
+"""
+
+__author__ = 'NRP software team'
+
+import collections
+import itertools
+import logging
+import statistics
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+
+from . import sim_id_type
+from .simulation import Simulation
+from .simulation_registry import SimulationLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationQueueFullError(SimulationLimitError):
+    """
+    The maximum number of active simulations has been reached and the admission queue is full
+    """
+
+
+class SimulationQueue:
+    """
+    Admits simulations to run, up to max_active at the same time and as long as can_admit
+    agrees, and queues the others, up to depth, until an active simulation reaches a final state.
+
+    The queued simulations are admitted in round-robin order across their owners, each owner's
+    simulations in creation order, so that an owner queueing many simulations doesn't hold the
+    others' back. The admission status, the queue position and the waiting time of a simulation
+    are recorded in Simulation.admission, Simulation.queue_position and
+    Simulation.queue_wait_time.
+    """
+
+    QUEUED = "queued"
+    ADMITTED = "admitted"
+
+    # the number of recent waiting times the statistics are computed on
+    WAIT_TIME_SAMPLES = 1000
+
+    def __init__(self, max_active: int, depth: int,
+                 on_admitted: Callable[[Simulation], Any],
+                 clock: Callable[[], float] = time.monotonic,
+                 can_admit: Optional[Callable[[int], bool]] = None):
+        """
+        :param max_active: The maximum number of active simulations
+        :param depth: The maximum number of queued simulations, 0 disables queueing
+        :param on_admitted: Called, out of the calling thread's locks, with every queued
+                            simulation once it gets admitted (e.g. to initialize it)
+        :param clock: The clock measuring the waiting times, in seconds
+        :param can_admit: Called with the number of active simulations, whether one more can be
+                          admitted (e.g. given the resources of the host), always if None
+        """
+        self.__max_active = max_active
+        self.__depth = depth
+        self.__on_admitted = on_admitted
+        self.__clock = clock
+        self.__can_admit = can_admit
+
+        self.__lock = threading.Lock()
+        self.__active: Dict[sim_id_type, Simulation] = {}
+        # owner -> the queued simulations of owner and their enqueuing time, in creation order.
+        # The owners are in round-robin order: the next simulation admitted is the first owner's.
+        self.__queues: Dict[str, Deque[Tuple[Simulation, float]]] = collections.OrderedDict()
+        self.__queued_count = 0
+
+        self.__admitted_count = 0
+        self.__rejected_count = 0
+        self.__wait_times: Deque[float] = collections.deque(maxlen=self.WAIT_TIME_SAMPLES)
+
+    def __len__(self):
+        return self.__queued_count
+
+    def admit(self, simulation: Simulation) -> bool:
+        """
+        Admits the simulation to run if less than max_active simulations are active, can_admit
+        agrees and none is queued, queues it otherwise.
+
+        :param simulation: The simulation
+        :return: True if admitted, False if queued
+        :raise SimulationQueueFullError: When the simulation can be neither admitted nor queued
+        """
+        with self.__lock:
+            admitted = self.__admit_queued()
+            if not self.__queued_count and self.__has_room(len(self.__active)):
+                self.__activate(simulation, wait_time=0.)
+                queued = False
+            elif self.__queued_count < self.__depth:
+                self.__queues.setdefault(simulation.owner, collections.deque()).append(
+                    (simulation, self.__clock()))
+                self.__queued_count += 1
+                simulation.admission = self.QUEUED
+                self.__update_positions()
+                queued = True
+            else:
+                self.__rejected_count += 1
+                queued = None
+
+        self.__notify(admitted)
+
+        if queued is None:
+            raise SimulationQueueFullError(
+                f"{self.__max_active} simulations are already active "
+                f"and {self.__depth} are queued")
+        if queued:
+            logger.info("Simulation queued at position %s. Simulation ID: '%s'",
+                        simulation.queue_position, str(simulation.sim_id))
+        return not queued
+
+    def try_admit(self, simulation: Simulation) -> bool:
+        """
+        Admits the simulation to run as admit does, but never queues it, e.g. for a simulation
+        nobody waits for.
+
+        :param simulation: The simulation
+        :return: True if admitted, False if it would have been queued
+        """
+        with self.__lock:
+            admitted = self.__admit_queued()
+            has_room = not self.__queued_count and self.__has_room(len(self.__active))
+            if has_room:
+                self.__activate(simulation, wait_time=0.)
+
+        self.__notify(admitted)
+        return has_room
+
+    def release(self, simulation: Simulation) -> None:
+        """
+        Releases the place of a simulation that has reached a final state, either active or
+        queued (i.e. cancelled), admitting the next queued simulations
+
+        :param simulation: The simulation
+        """
+        sim_id = simulation.sim_id
+        with self.__lock:
+            if self.__active.pop(sim_id, None) is None:
+                self.__dequeue(sim_id)
+            admitted = self.__admit_queued()
+
+        self.__notify(admitted)
+
+    def is_full(self) -> bool:
+        """
+        :return: Whether a new simulation would be rejected, i.e. no more simulation can be
+                 active and depth simulations are queued. It's a hint, admit has the last word.
+        """
+        with self.__lock:
+            if self.__queued_count < self.__depth:
+                return False
+            active = sum(not SimulationLifecycle.is_final_state(simulation.state)
+                         for simulation in self.__active.values())
+            return self.__queued_count > 0 or not self.__has_room(active)
+
+    def is_queued(self, sim_id: sim_id_type) -> bool:
+        """
+        :param sim_id: The simulation id
+        :return: Whether the simulation is waiting in the queue
+        """
+        with self.__lock:
+            return any(s.sim_id == sim_id for s, _ in itertools.chain(*self.__queues.values()))
+
+    def stats(self) -> dict:
+        """
+        :return: The number of active and queued simulations, of the simulations admitted after
+                 waiting and of the rejected ones, and the mean, 95th percentile and maximum
+                 waiting time (in seconds) of the last WAIT_TIME_SAMPLES admitted simulations
+        """
+        with self.__lock:
+            wait_times = list(self.__wait_times)
+            stats = {'active': len(self.__active),
+                     'queued': self.__queued_count,
+                     'admitted': self.__admitted_count,
+                     'rejected': self.__rejected_count}
+
+        stats['wait_mean'] = statistics.fmean(wait_times) if wait_times else 0.
+        stats['wait_p95'] = statistics.quantiles(wait_times, n=20, method='inclusive')[-1] \
+            if len(wait_times) > 1 else stats['wait_mean']
+        stats['wait_max'] = max(wait_times, default=0.)
+        return stats
+
+    def __admit_queued(self) -> List[Simulation]:
+        """
+        Admits the queued simulations while more simulations can be active.
+        The lock has to be held by the caller.
+
+        :return: The admitted simulations
+        """
+        # forget the simulations that reached a final state without being released
+        for sim_id in [sim_id for sim_id, simulation in self.__active.items()
+                       if SimulationLifecycle.is_final_state(simulation.state)]:
+            del self.__active[sim_id]
+
+        admitted = []
+        while self.__queues and self.__has_room(len(self.__active)):
+            owner, queue = next(iter(self.__queues.items()))
+            simulation, enqueued_at = queue.popleft()
+            self.__queued_count -= 1
+            # the owner takes its turn again after the others
+            if queue:
+                self.__queues.move_to_end(owner)
+            else:
+                del self.__queues[owner]
+
+            if SimulationLifecycle.is_final_state(simulation.state):
+                simulation.queue_position = None
+                continue
+
+            wait_time = self.__clock() - enqueued_at
+            self.__activate(simulation, wait_time)
+            self.__admitted_count += 1
+            self.__wait_times.append(wait_time)
+            admitted.append(simulation)
+
+        if admitted:
+            self.__update_positions()
+        return admitted
+
+    def __has_room(self, active: int) -> bool:
+        """
+        :param active: The number of active simulations
+        :return: Whether one more simulation can be active
+        """
+        return active < self.__max_active and \
+            (self.__can_admit is None or self.__can_admit(active))
+
+    def __dequeue(self, sim_id: sim_id_type) -> None:
+        """
+        Removes a simulation from the queue, if queued.
+        The lock has to be held by the caller.
+
+        :param sim_id: The simulation id
+        """
+        for owner, queue in self.__queues.items():
+            for entry in queue:
+                if entry[0].sim_id == sim_id:
+                    queue.remove(entry)
+                    self.__queued_count -= 1
+                    if not queue:
+                        del self.__queues[owner]
+                    entry[0].queue_position = None
+                    self.__update_positions()
+                    return
+
+    def __activate(self, simulation: Simulation, wait_time: float) -> None:
+        """
+        Records a simulation as active.
+        The lock has to be held by the caller.
+
+        :param simulation: The admitted simulation
+        :param wait_time: The seconds it waited in the queue
+        """
+        self.__active[simulation.sim_id] = simulation
+        simulation.admission = self.ADMITTED
+        simulation.queue_position = None
+        simulation.queue_wait_time = wait_time
+
+    def __update_positions(self) -> None:
+        """
+        Records the position of the queued simulations, i.e. their round-robin order.
+        The lock has to be held by the caller.
+        """
+        rounds = itertools.zip_longest(*self.__queues.values())
+        entries = (entry for entry in itertools.chain.from_iterable(rounds) if entry is not None)
+        for position, (simulation, _) in enumerate(entries, start=1):
+            simulation.queue_position = position
+
+    def __notify(self, admitted: List[Simulation]) -> None:
+        """
+        Calls on_admitted with the simulations admitted from the queue
+
+        :param admitted: The admitted simulations
+        """
+        for simulation in admitted:
+            logger.info("Simulation admitted after waiting %.2f s in the queue. "
+                        "Simulation ID: '%s'. Queue stats: %s",
+                        simulation.queue_wait_time, str(simulation.sim_id), self.stats())
+            # pylint: disable=broad-except
+            try:
+                self.__on_admitted(simulation)
+            except Exception:
+                logger.exception("Admission failed. Simulation ID: '%s'", str(simulation.sim_id))
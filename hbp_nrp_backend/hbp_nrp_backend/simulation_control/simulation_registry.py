@@ -0,0 +1,312 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the registry of the simulations created by this server
+"""
+
+__author__ = 'NRP software team'
+
+import bisect
+import heapq
+import threading
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
+
+from . import sim_id_type
+from .simulation import Simulation
+
+
+class SimulationLimitError(Exception):
+    """
+    The maximum number of active simulations has been reached
+    """
+
+
+class SimulationRegistry:
+    """
+    A thread-safe registry of simulations, indexed by id, by state (active or final) and by owner.
+
+    Simulation ids are allocated by the registry. The simulations are listed in id order,
+    i.e. creation order.
+
+    A simulation is active until it reaches a final state. Final states being terminal, the
+    active simulations are moved to the final index when they are looked up, so that only the
+    active ones are ever checked.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__next_id: sim_id_type = 0
+
+        self.__by_id: Dict[sim_id_type, Simulation] = {}
+        # the ids of the registered simulations, sorted, to select them after a given id
+        self.__ids: List[sim_id_type] = []
+        self.__active: Dict[sim_id_type, Simulation] = {}
+        self.__final: Dict[sim_id_type, Simulation] = {}
+        self.__by_owner: Dict[str, Dict[sim_id_type, Simulation]] = {}
+        # ids allocated to simulations being created
+        self.__reserved = set()
+
+    def __len__(self):
+        return len(self.__by_id)
+
+    def __contains__(self, sim_id: sim_id_type):
+        return sim_id in self.__by_id
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def get(self, sim_id: sim_id_type) -> Simulation:
+        """
+        Gets the simulation with the given simulation id
+
+        :param sim_id: The simulation id
+        :return: The simulation
+        :raise ValueError: When sim_id simulation doesn't exist
+        """
+        try:
+            return self.__by_id[sim_id]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"No simulation with id {sim_id}") from e
+
+    def create(self, create_simulation: Callable[[sim_id_type], Simulation],
+               max_active: Optional[int] = None) -> Simulation:
+        """
+        Allocates a new id, creates the simulation with it and registers it.
+        The simulations being created count as active ones.
+
+        :param create_simulation: Creates the simulation given its id
+        :param max_active: The maximum number of active simulations, unbounded if None
+        :return: The new simulation
+        :raise SimulationLimitError: When max_active simulations are already active
+        """
+        with self.__lock:
+            if max_active is not None and \
+                    len(self.__refresh_active()) + len(self.__reserved) >= max_active:
+                raise SimulationLimitError(f"{max_active} simulations are already active")
+            sim_id = self.__next_id
+            self.__next_id += 1
+            self.__reserved.add(sim_id)
+
+        try:
+            simulation = create_simulation(sim_id)
+        finally:
+            with self.__lock:
+                self.__reserved.discard(sim_id)
+
+        self.register(simulation)
+        return simulation
+
+    def register(self, simulation: Simulation) -> None:
+        """
+        Registers a simulation created with an id not allocated by create
+
+        :param simulation: The simulation
+        :raise ValueError: When a simulation with the same id is already registered
+        """
+        sim_id = simulation.sim_id
+        with self.__lock:
+            if sim_id in self.__by_id:
+                raise ValueError(f"A simulation with id {sim_id} is already registered")
+            self.__next_id = max(self.__next_id, sim_id + 1)
+
+            self.__by_id[sim_id] = simulation
+            # ids are allocated in increasing order, but for the ones given to register
+            if self.__ids and self.__ids[-1] > sim_id:
+                bisect.insort(self.__ids, sim_id)
+            else:
+                self.__ids.append(sim_id)
+            self.__by_owner.setdefault(simulation.owner, {})[sim_id] = simulation
+            if SimulationLifecycle.is_final_state(simulation.state):
+                self.__final[sim_id] = simulation
+            else:
+                self.__active[sim_id] = simulation
+
+    def remove(self, sim_id: sim_id_type) -> Simulation:
+        """
+        Removes the simulation with the given id from the registry
+
+        :param sim_id: The simulation id
+        :return: The removed simulation
+        :raise ValueError: When sim_id simulation doesn't exist
+        """
+        with self.__lock:
+            simulation = self.get(sim_id)
+            del self.__by_id[sim_id]
+            del self.__ids[bisect.bisect_left(self.__ids, sim_id)]
+            self.__active.pop(sim_id, None)
+            self.__final.pop(sim_id, None)
+            owned = self.__by_owner[simulation.owner]
+            del owned[sim_id]
+            if not owned:
+                del self.__by_owner[simulation.owner]
+        return simulation
+
+    def change_owner(self, sim_id: sim_id_type, owner: str) -> Simulation:
+        """
+        Hands the simulation with the given id over to a new owner
+
+        :param sim_id: The simulation id
+        :param owner: The new owner of the simulation
+        :return: The simulation
+        :raise ValueError: When sim_id simulation doesn't exist
+        """
+        with self.__lock:
+            simulation = self.get(sim_id)
+            owned = self.__by_owner[simulation.owner]
+            del owned[sim_id]
+            if not owned:
+                del self.__by_owner[simulation.owner]
+            simulation.owner = owner
+            self.__by_owner.setdefault(owner, {})[sim_id] = simulation
+        return simulation
+
+    def clear(self) -> None:
+        """
+        Removes all the simulations and restarts the ids allocation
+        """
+        with self.__lock:
+            self.__by_id.clear()
+            self.__ids.clear()
+            self.__active.clear()
+            self.__final.clear()
+            self.__by_owner.clear()
+            self.__next_id = 0
+
+    def all(self) -> List[Simulation]:
+        """
+        :return: All the simulations, in id order
+        """
+        with self.__lock:
+            return sorted(self.__by_id.values(), key=lambda s: s.sim_id)
+
+    def active(self) -> List[Simulation]:
+        """
+        :return: The simulations not in a final state, in id order
+        """
+        with self.__lock:
+            return sorted(self.__refresh_active().values(), key=lambda s: s.sim_id)
+
+    def final(self) -> List[Simulation]:
+        """
+        :return: The simulations in a final state, in id order
+        """
+        with self.__lock:
+            self.__refresh_active()
+            return sorted(self.__final.values(), key=lambda s: s.sim_id)
+
+    def owned_by(self, owner: str) -> List[Simulation]:
+        """
+        :param owner: The owner of the simulations
+        :return: The simulations of owner, in id order
+        """
+        with self.__lock:
+            return sorted(self.__by_owner.get(owner, {}).values(), key=lambda s: s.sim_id)
+
+    def select(self, owner: Optional[str] = None,
+               states: Optional[Collection[str]] = None,
+               experiment_id: Optional[str] = None,
+               after: Optional[sim_id_type] = None,
+               limit: Optional[int] = None,
+               snapshot: Optional[Callable[[Simulation], Any]] = None) -> Tuple[List[Any], bool]:
+        """
+        Selects the simulations matching all the given criteria, in id order.
+        The owner and state indexes are used to narrow the simulations to be checked.
+        Unless they narrow them further, the simulations are checked in id order from the one
+        following after, found by bisection, until limit of them have been selected.
+
+        :param owner: The owner of the simulations, any if None
+        :param states: The states of the simulations, any if None
+        :param experiment_id: The experiment id of the simulations, any if None
+        :param after: Selects only the simulations with a greater id, if not None
+        :param limit: The maximum number of simulations selected, unbounded if None
+        :param snapshot: Copies what is needed of a selected simulation (e.g. its marshalled
+                         fields), called under the lock, the simulations are returned if None
+        :return: The selected simulations, or their snapshots, and whether more simulations match
+        """
+        def matches(simulation: Simulation) -> bool:
+            return ((states is None or simulation.state in states)
+                    and (experiment_id is None or simulation.experiment_id == experiment_id))
+
+        with self.__lock:
+            if owner is not None:
+                candidates = self.__by_owner.get(owner, {})
+            elif states is not None and all(SimulationLifecycle.is_final_state(state)
+                                            for state in states):
+                self.__refresh_active()
+                candidates = self.__final
+            elif states is not None and not any(SimulationLifecycle.is_final_state(state)
+                                                for state in states):
+                candidates = self.__refresh_active()
+            else:
+                candidates = self.__by_id
+
+            selected, more = self.__select(candidates, matches, after, limit)
+            if snapshot is not None:
+                selected = [snapshot(simulation) for simulation in selected]
+        return selected, more
+
+    def __select(self, candidates: Dict[sim_id_type, Simulation],
+                 matches: Callable[[Simulation], bool],
+                 after: Optional[sim_id_type],
+                 limit: Optional[int]) -> Tuple[List[Simulation], bool]:
+        """
+        Selects the candidate simulations matching, in id order, see select.
+        The lock has to be held by the caller.
+
+        :param candidates: The index of the simulations to be checked
+        :param matches: Whether a simulation is selected
+        :param after: Selects only the simulations with a greater id, if not None
+        :param limit: The maximum number of simulations selected, unbounded if None
+        :return: The selected simulations and whether more simulations match
+        """
+        start = 0 if after is None else bisect.bisect_right(self.__ids, after)
+        if len(self.__ids) - start <= len(candidates):
+            selected = []
+            for i in range(start, len(self.__ids)):
+                simulation = candidates.get(self.__ids[i])
+                if simulation is not None and matches(simulation):
+                    if limit is not None and len(selected) == limit:
+                        return selected, True
+                    selected.append(simulation)
+            return selected, False
+
+        matching = [simulation for sim_id, simulation in candidates.items()
+                    if (after is None or sim_id > after) and matches(simulation)]
+        if limit is None or len(matching) <= limit:
+            return sorted(matching, key=lambda s: s.sim_id), False
+        return heapq.nsmallest(limit, matching, key=lambda s: s.sim_id), True
+
+    def __refresh_active(self) -> Dict[sim_id_type, Simulation]:
+        """
+        Moves the simulations that reached a final state to the final index.
+        The lock has to be held by the caller.
+
+        :return: The active simulations index
+        """
+        for sim_id in [sim_id for sim_id, simulation in self.__active.items()
+                       if SimulationLifecycle.is_final_state(simulation.state)]:
+            self.__final[sim_id] = self.__active.pop(sim_id)
+        return self.__active
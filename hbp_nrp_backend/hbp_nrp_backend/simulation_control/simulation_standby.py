@@ -0,0 +1,369 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the standby of the simulations created ahead of the users' requests
+"""
+
+__author__ = 'NRP software team'
+
+import collections
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Collection, Deque, Dict, NamedTuple, Optional, Set, Tuple
+
+from hbp_nrp_commons.rw_lock import KeyedReadWriteLock
+
+from . import sim_id_type
+from .simulation import Simulation
+from .simulation_initializer import SimulationInitializer
+from .simulation_queue import SimulationQueue
+from .simulation_registry import SimulationRegistry, SimulationLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class StandbyKey(NamedTuple):
+    """
+    What a standby simulation is created from, i.e. what a request has to match to take it.
+    The experiment files are cloned with the token of owner, the only user who can take it.
+    """
+    experiment_id: str
+    experiment_configuration: str
+    main_script: str
+    ctx_id: Optional[str]
+    owner: str
+
+
+class SimulationStandby:
+    """
+    Keeps up to capacity simulations of each standby experiment initialized and paused, i.e.
+    with the experiment files cloned and the simulation server started, ready to be handed over
+    to the next user creating a simulation of the experiment.
+
+    The standby of an experiment is filled, in the background, once a user creates a simulation
+    of it: the standby simulations are created with the same request (see StandbyKey) and token,
+    hence they are handed over to that user only.
+    A standby simulation runs only if it can be admitted right away, never queued, and it's
+    stopped after waiting idle_timeout seconds for a user, or earlier to make room for the
+    queued simulations (see evict).
+    """
+
+    # the owner of the simulations in standby
+    OWNER = "nrp-standby"
+
+    PAUSED_STATE = "paused"
+    STOPPED_STATE = "stopped"
+
+    def __init__(self, experiments: Collection[str], capacity: int, idle_timeout: float,
+                 registry: SimulationRegistry, queue: SimulationQueue,
+                 create_simulation: Callable[..., Simulation] = Simulation,
+                 simulation_locks: Optional[KeyedReadWriteLock] = None):
+        """
+        :param experiments: The ids of the experiments kept in standby
+        :param capacity: The number of standby simulations of each experiment
+        :param idle_timeout: The seconds a standby simulation waits for a user before being
+                             stopped, 0 keeps it until taken
+        :param registry: The registry of the simulations
+        :param queue: The admission queue of the simulations
+        :param create_simulation: Creates a simulation, with the arguments of Simulation
+        :param simulation_locks: The locks of the simulations, keyed by their id, held as the
+                                 writer by whoever changes their state (e.g. the requests on them)
+        """
+        self.__experiments = frozenset(experiments)
+        self.__capacity = capacity
+        self.__idle_timeout = idle_timeout
+        self.__registry = registry
+        self.__queue = queue
+        self.__create_simulation = create_simulation
+        self.__simulation_locks = (simulation_locks if simulation_locks is not None
+                                   else KeyedReadWriteLock())
+
+        self.__lock = threading.Lock()
+        # key -> the idle standby simulations, in order of arrival in standby
+        self.__idle: Dict[StandbyKey, Deque[Simulation]] = {}
+        # sim_id -> the arrival time of the idle simulation and its expiry timer
+        self.__idle_since: Dict[sim_id_type, Tuple[float, Optional[threading.Timer]]] = {}
+        # key -> the number of standby simulations being created
+        self.__creating: Dict[StandbyKey, int] = collections.Counter()
+        # the standby simulations are created one at a time, not to hold the others back
+        self.__executor = ThreadPoolExecutor(max_workers=1,
+                                             thread_name_prefix="nrp_simulation_standby")
+        # the creations submitted to the executor and not done yet
+        self.__pending: Set[Future] = set()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__idle_since)
+
+    def is_standby(self, key: StandbyKey) -> bool:
+        """
+        :param key: The request creating a simulation
+        :return: Whether simulations of the requested experiment are kept in standby
+        """
+        return self.__capacity > 0 and key.experiment_id in self.__experiments
+
+    def take(self, key: StandbyKey, token: Optional[str],
+             can_take: Callable[[Simulation], bool]) -> Optional[Simulation]:
+        """
+        Hands an idle standby simulation matching key over to the user creating the simulation,
+        i.e. key.owner
+
+        :param key: The request creating a simulation
+        :param token: The token of the user
+        :param can_take: Whether the user can take a standby simulation, e.g. whether they can
+                         access its experiment, called out of the lock
+        :return: The simulation, 'paused' and owned by key.owner, None if none is idle
+        """
+        with self.__lock:
+            candidate = next((simulation for simulation in self.__idle.get(key, ())
+                              if simulation.state == self.PAUSED_STATE), None)
+        if candidate is None or not can_take(candidate):
+            return None
+
+        with self.__lock:
+            # the candidate may have expired or been taken meanwhile
+            if not self.__remove_idle(key, candidate):
+                return None
+
+        candidate.standby = False
+        candidate.token = token
+        self.__registry.change_owner(candidate.sim_id, key.owner)
+        logger.info("Standby simulation handed over to '%s'. Simulation ID: '%s'",
+                    key.owner, str(candidate.sim_id))
+        return candidate
+
+    def fill(self, key: StandbyKey, token: Optional[str]) -> None:
+        """
+        Creates, in the background, the standby simulations missing for key
+
+        :param key: The request the standby simulations are created from
+        :param token: The token of key.owner, the experiment files are cloned with
+        """
+        if not self.is_standby(key):
+            return
+
+        with self.__lock:
+            missing = self.__capacity - len(self.__idle.get(key, ())) - self.__creating[key]
+            self.__creating[key] += max(missing, 0)
+
+        for _ in range(missing):
+            future = self.__executor.submit(self.__create, key, token)
+            with self.__lock:
+                self.__pending.add(future)
+            future.add_done_callback(self.__discard_pending)
+
+    def evict(self, wait: bool = False) -> bool:
+        """
+        Stops the simulation idle in standby for the longest time, e.g. to make room for
+        a queued simulation
+
+        :param wait: Whether to stop it in the calling thread rather than in the background
+        :return: Whether a simulation has been stopped
+        """
+        with self.__lock:
+            if not self.__idle_since:
+                return False
+            sim_id = min(self.__idle_since, key=lambda i: self.__idle_since[i][0])
+            key, simulation = self.__find_idle(sim_id)
+            self.__remove_idle(key, simulation)
+
+        logger.info("Standby simulation evicted. Simulation ID: '%s'", str(sim_id))
+        if wait:
+            self.__stop(simulation)
+            return True
+        threading.Thread(target=self.__stop, args=(simulation,), daemon=True,
+                         name=f"SimulationStandbyEviction-{sim_id}").start()
+        return True
+
+    def shutdown(self) -> None:
+        """
+        Stops creating standby simulations and expiring the idle ones
+        """
+        # shutdown(cancel_futures=True) is not available before Python 3.9
+        with self.__lock:
+            pending = list(self.__pending)
+        # the cancelled futures run their done callbacks, taking the lock
+        for future in pending:
+            future.cancel()
+        self.__executor.shutdown(wait=False)
+        with self.__lock:
+            for _, timer in self.__idle_since.values():
+                if timer is not None:
+                    timer.cancel()
+
+    def __create(self, key: StandbyKey, token: Optional[str]) -> None:
+        """
+        Creates and initializes a standby simulation, then adds it to the idle ones
+
+        :param key: The request the simulation is created from
+        :param token: The token the experiment files are cloned with
+        """
+        simulation, ready = None, False
+        try:
+            simulation = self.__registry.create(
+                functools.partial(self.__new_simulation, key=key, token=token))
+            SimulationInitializer.initialize(simulation)
+        except SimulationLimitError:
+            logger.info("No room for a standby simulation of experiment '%s'", key.experiment_id)
+        # pylint: disable=broad-except
+        except Exception:
+            logger.exception("Standby simulation initialization failed. Experiment: '%s'",
+                             key.experiment_id)
+        finally:
+            with self.__lock:
+                self.__creating[key] -= 1
+                ready = simulation is not None and simulation.state == self.PAUSED_STATE
+                if ready:
+                    self.__add_idle(key, simulation)
+
+        if ready:
+            logger.info("Standby simulation ready, %s idle. Simulation ID: '%s'",
+                        len(self), str(simulation.sim_id))
+
+    def __discard_pending(self, future: Future) -> None:
+        """
+        Forgets a creation once done
+
+        :param future: The creation
+        """
+        with self.__lock:
+            self.__pending.discard(future)
+
+    def __new_simulation(self, sim_id: sim_id_type, key: StandbyKey,
+                         token: Optional[str]) -> Simulation:
+        """
+        Creates a standby simulation, admitted to run
+
+        :param sim_id: The simulation id
+        :param key: The request the simulation is created from
+        :param token: The token the experiment files are cloned with
+        :return: The simulation
+        :raise SimulationLimitError: When the simulation can't be admitted right away
+        """
+        simulation = self.__create_simulation(sim_id,
+                                              key.experiment_id,
+                                              self.OWNER,
+                                              experiment_configuration=key.experiment_configuration,
+                                              main_script=key.main_script,
+                                              ctx_id=key.ctx_id,
+                                              token=token)
+        simulation.standby = True
+        simulation.lifecycle.add_final_state_callback(self.__queue.release)
+        simulation.lifecycle.add_final_state_callback(self.__forget)
+
+        if not self.__queue.try_admit(simulation):
+            simulation.lifecycle.shutdown(None)
+            raise SimulationLimitError("No room for a standby simulation")
+        return simulation
+
+    def __add_idle(self, key: StandbyKey, simulation: Simulation) -> None:
+        """
+        Adds a simulation to the idle ones, starting its expiry timer.
+        The lock has to be held by the caller.
+
+        :param key: The request the simulation has been created from
+        :param simulation: The simulation
+        """
+        timer = None
+        if self.__idle_timeout:
+            timer = threading.Timer(self.__idle_timeout, self.__expire, args=(key, simulation))
+            timer.daemon = True
+            timer.start()
+        self.__idle.setdefault(key, collections.deque()).append(simulation)
+        self.__idle_since[simulation.sim_id] = (time.monotonic(), timer)
+
+    def __remove_idle(self, key: StandbyKey, simulation: Simulation) -> bool:
+        """
+        Removes a simulation from the idle ones, cancelling its expiry timer.
+        The lock has to be held by the caller.
+
+        :param key: The request the simulation has been created from
+        :param simulation: The simulation
+        :return: Whether the simulation was idle
+        """
+        entry = self.__idle_since.pop(simulation.sim_id, None)
+        if entry is None:
+            return False
+
+        if entry[1] is not None:
+            entry[1].cancel()
+        idle = self.__idle[key]
+        idle.remove(simulation)
+        if not idle:
+            del self.__idle[key]
+        return True
+
+    def __expire(self, key: StandbyKey, simulation: Simulation) -> None:
+        """
+        Stops a simulation that waited idle_timeout seconds in standby
+
+        :param key: The request the simulation has been created from
+        :param simulation: The simulation
+        """
+        with self.__lock:
+            if not self.__remove_idle(key, simulation):
+                return
+
+        logger.info("Standby simulation idle for %s s, stopping it. Simulation ID: '%s'",
+                    self.__idle_timeout, str(simulation.sim_id))
+        self.__stop(simulation)
+
+    def __forget(self, simulation: Simulation) -> None:
+        """
+        Removes a simulation that reached a final state (e.g. failed) from the idle ones
+
+        :param simulation: The simulation
+        """
+        with self.__lock:
+            idle = self.__find_idle(simulation.sim_id)
+            if idle is not None:
+                self.__remove_idle(*idle)
+
+    def __stop(self, simulation: Simulation) -> None:
+        """
+        Stops a standby simulation, holding its lock as the writer
+
+        :param simulation: The simulation
+        """
+        # pylint: disable=broad-except
+        try:
+            with self.__simulation_locks.write(simulation.sim_id):
+                simulation.state = self.STOPPED_STATE
+        except Exception:
+            logger.exception("Stopping the standby simulation failed. Simulation ID: '%s'",
+                             str(simulation.sim_id))
+
+    def __find_idle(self, sim_id: sim_id_type) -> Optional[Tuple[StandbyKey, Simulation]]:
+        """
+        Finds an idle simulation. The lock has to be held by the caller.
+
+        :param sim_id: The simulation id
+        :return: The request the simulation has been created from and the simulation,
+                 None if not idle
+        """
+        return next(((key, simulation) for key, simulations in self.__idle.items()
+                     for simulation in simulations if simulation.sim_id == sim_id), None)
@@ -0,0 +1,175 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains the background teardown of the stopped simulations
+"""
+# avoid circular import when using typing annotations PEP563
+# use "import module.submodule as subm" and subm.Class
+from __future__ import annotations
+
+__author__ = 'NRP software team'
+
+import logging
+import threading
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import hbp_nrp_backend.simulation_control.simulation as sim
+
+from . import sim_id_type
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationTeardown:
+    """
+    Tears stopped simulations down in the background, on a bounded pool of threads.
+
+    The progress of the teardown of a simulation is recorded in Simulation.teardown:
+    'pending' until a thread runs it, 'running', then 'completed' or 'failed'.
+    The steps of a teardown (e.g. logs upload) are retried with an exponential backoff.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    # seconds before retrying a failed step, doubled after each attempt
+    RETRY_DELAY: float = 1.
+
+    def __init__(self, max_workers: int, max_attempts: int, retry_delay: float = RETRY_DELAY):
+        """
+        :param max_workers: The maximum number of simulations torn down concurrently
+        :param max_attempts: The maximum number of attempts of each step
+        :param retry_delay: The seconds before retrying a failed step for the first time
+        """
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers,
+                                             thread_name_prefix="nrp_simulation_teardown")
+        self.__lock = threading.Lock()
+        # the teardowns not completed yet
+        self.__pending: Dict[sim_id_type, Future] = {}
+        # set on shutdown, so that the pending teardowns don't wait before retrying
+        self.__shutting_down = threading.Event()
+
+    def submit(self, simulation: sim.Simulation, teardown: Callable[[], None]) -> Future:
+        """
+        Schedules the teardown of the simulation.
+
+        :param simulation: The simulation to be torn down
+        :param teardown: Tears the simulation down, using retry for its steps
+        :return: The future result of the teardown
+        """
+        sim_id = simulation.sim_id
+        simulation.teardown = self.PENDING
+        with self.__lock:
+            future = self.__executor.submit(self.__run, simulation, teardown)
+            self.__pending[sim_id] = future
+        future.add_done_callback(lambda _: self.__done(sim_id, future))
+        return future
+
+    def retry(self, description: str, step: Callable, *args) -> None:
+        """
+        Runs a step of a teardown, retrying it up to max_attempts times on failure.
+
+        :param description: The description of the step, for logging
+        :param step: The step to be run
+        :param args: The arguments of the step
+        :raise Exception: The error raised by the last attempt
+        """
+        delay = self.retry_delay
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                step(*args)
+                return
+            except Exception:  # pylint: disable=broad-except
+                if attempt == self.max_attempts:
+                    raise
+                logger.warning("%s failed (attempt %s of %s), retrying in %s s",
+                               description, attempt, self.max_attempts, delay, exc_info=True)
+            self.__shutting_down.wait(delay)
+            delay *= 2
+
+    def wait(self, sim_id: sim_id_type, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the teardown of a simulation to complete
+
+        :param sim_id: The simulation id
+        :param timeout: The maximum waiting time in seconds, unbounded if None
+        :return: False if the teardown is still pending after timeout, True otherwise
+        """
+        with self.__lock:
+            future = self.__pending.get(sim_id)
+        return future is None or bool(futures.wait([future], timeout).done)
+
+    def is_pending(self, sim_id: sim_id_type) -> bool:
+        """
+        :param sim_id: The simulation id
+        :return: Whether the teardown of the simulation is not completed yet
+        """
+        with self.__lock:
+            return sim_id in self.__pending
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting teardowns, the pending ones are completed without waiting before retries
+
+        :param wait: Whether to wait for the pending teardowns to complete
+        """
+        self.__shutting_down.set()
+        self.__executor.shutdown(wait=wait)
+
+    def __run(self, simulation: sim.Simulation, teardown: Callable[[], None]) -> None:
+        """
+        Runs a teardown recording its progress in the simulation
+
+        :param simulation: The simulation to be torn down
+        :param teardown: Tears the simulation down
+        """
+        sim_id_str = str(simulation.sim_id)
+        simulation.teardown = self.RUNNING
+        try:
+            teardown()
+        # pylint: disable=broad-except
+        except Exception:
+            simulation.teardown = self.FAILED
+            logger.exception("Teardown failed. Simulation ID: '%s'", sim_id_str)
+        else:
+            simulation.teardown = self.COMPLETED
+            logger.debug("Teardown completed. Simulation ID: '%s'", sim_id_str)
+
+    def __done(self, sim_id: sim_id_type, future: Future) -> None:
+        """
+        Forgets a completed teardown
+
+        :param sim_id: The simulation id
+        :param future: The completed teardown
+        """
+        with self.__lock:
+            if self.__pending.get(sim_id) is future:
+                del self.__pending[sim_id]
@@ -26,9 +26,11 @@ This module tests the backend implementation of the simulation lifecycle
 """
 
 from unittest.mock import patch, MagicMock, mock_open, PropertyMock
+import threading
 import unittest
 import os
 from hbp_nrp_backend.simulation_control.backend_simulation_lifecycle import BackendSimulationLifecycle
+from hbp_nrp_backend.simulation_control.simulation_teardown import SimulationTeardown
 from hbp_nrp_backend import NRPServicesGeneralException
  
 
@@ -38,9 +40,10 @@ __author__ = 'NRP software team'
 
 _base_path = 'hbp_nrp_backend.simulation_control.backend_simulation_lifecycle'
 
+TIMEOUT = 5.
+
 
 @patch("builtins.open", mock_open(read_data='somedata'))
-@patch(f'{_base_path}.user_auth.UserAuthentication', new=MagicMock())
 class TestBackendSimulationLifecycle(unittest.TestCase):
 
     def setUp(self):
@@ -50,10 +53,12 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
         t = type(self.simulation)
         t.sim_id= PropertyMock(return_value=42)
         t.experiment_conf = PropertyMock(return_value="simulation_config.json")
+        t.experiment_configuration = PropertyMock(return_value="simulation_config.json")
         t.experiment_id = PropertyMock(return_value="some_exp_id"),
         t.main_script = PropertyMock(return_value="main_script.py"),
         t.private = PropertyMock(return_value=True)
         t.mqtt_topics_prefix = PropertyMock(return_value="")
+        self.simulation.standby = False
 
         # mock SimulationServerInstance
         self.patcher_simserver_instance = patch(f'{_base_path}.SimulationServerInstance')
@@ -84,6 +89,14 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
         self.os_mock.path.exists.return_value = True
         self.os_mock.makedirs.return_value = None
 
+        # tear the simulations down without waiting before retrying
+        self.teardowns = SimulationTeardown(max_workers=1, max_attempts=2, retry_delay=0)
+        self.addCleanup(self.teardowns.shutdown)
+        self.patcher_teardowns = patch.object(BackendSimulationLifecycle, 'teardowns',
+                                              self.teardowns)
+        self.patcher_teardowns.start()
+        self.addCleanup(self.patcher_teardowns.stop)
+
         # create a BackendSimulationLifecycle
         with patch("hbp_nrp_commons.simulation_lifecycle.mqtt"):
             self.lifecycle = BackendSimulationLifecycle(self.simulation)
@@ -104,6 +117,58 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
 
         self.assertIsNotNone(self.lifecycle.experiment_path)
 
+    def __initialization_calls(self):
+        calls = MagicMock()
+        storage = self.storage_mock.return_value
+        calls.attach_mock(storage.download_file, "download_file")
+        calls.attach_mock(storage.clone_all_experiment_files, "clone")
+        calls.attach_mock(self.simserver_instance_mock.return_value.initialize, "spawn")
+        return calls
+
+    def test_backend_initialize_pipelined(self):
+        calls = self.__initialization_calls()
+
+        self.lifecycle.initialize(MagicMock())
+
+        # the server is spawned once the configuration is available, before the clone
+        self.assertEqual([c[0] for c in calls.mock_calls], ["download_file", "spawn", "clone"])
+        self.assertEqual(calls.download_file.call_args[0][2], "simulation_config.json")
+        self.assertIn("simulation_config.json", calls.clone.call_args[1]["exclude"])
+
+        self.assertEqual(list(self.lifecycle.initialization_timings),
+                         ["prefetch", "spawn", "clone"])
+
+    def test_backend_initialize_prefetch_fail(self):
+        calls = self.__initialization_calls()
+        calls.download_file.side_effect = ConnectionError
+
+        self.lifecycle.initialize(MagicMock())
+
+        # the configuration is cloned with the rest of the files before spawning the server
+        self.assertEqual([c[0] for c in calls.mock_calls], ["download_file", "clone", "spawn"])
+        self.assertNotIn("simulation_config.json", calls.clone.call_args[1]["exclude"])
+
+    def test_backend_initialize_config_in_subfolder(self):
+        type(self.simulation).experiment_configuration = PropertyMock(
+            return_value="configs/simulation_config.json")
+        calls = self.__initialization_calls()
+
+        self.lifecycle.initialize(MagicMock())
+
+        self.assertEqual([c[0] for c in calls.mock_calls], ["clone", "spawn"])
+
+    def test_backend_initialize_cancelled(self):
+        calls = self.__initialization_calls()
+        # cancelled while cloning, with the configuration not prefetched
+        calls.download_file.side_effect = ConnectionError
+        calls.clone.side_effect = lambda **_kwargs: self.lifecycle.cancel_initialization()
+
+        self.lifecycle.initialize(MagicMock())
+
+        # the remaining stages are skipped
+        self.assertEqual([c[0] for c in calls.mock_calls], ["download_file", "clone"])
+        self.assertEqual(list(self.lifecycle.initialization_timings), ["prefetch", "clone"])
+
     def test_backend_initialize_storage_fail(self):
 
         self.storage_mock.return_value.clone_all_experiment_files.side_effect = Exception
@@ -126,6 +191,22 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
             self.assertEqual(raised_ex.error_type, "Server Error")
             self.assertIsNotNone(raised_ex.data)
 
+    def test_backend_mqtt_client_id(self):
+        # the lifecycles of the simulations running side by side don't share MQTT client ids
+        self.assertEqual(self.lifecycle.mqtt_client_id,
+                         f"{BackendSimulationLifecycle.DEFAULT_MQTT_CLIENT_ID}_42")
+
+    def test_backend_final_state_callbacks(self):
+        failing_callback, callback = MagicMock(side_effect=Exception), MagicMock()
+        self.lifecycle.add_final_state_callback(failing_callback)
+        self.lifecycle.add_final_state_callback(callback)
+
+        self.lifecycle.shutdown(MagicMock())
+
+        # a failing callback doesn't prevent the others from being called
+        failing_callback.assert_called_once_with(self.simulation)
+        callback.assert_called_once_with(self.simulation)
+
     # start()
     def test_backend_start(self):
         # The method does nothing currently, so we have nothing to test
@@ -138,23 +219,77 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
         self.lifecycle.stop(MagicMock())
         self.assertFalse(self.sim_util_mock.delete_simulation_dir.called)
 
+    def test_backend_stop_before_spawn(self):
+        type(self.simulation).simulation_server = PropertyMock(return_value=None)
+        self.lifecycle._sim_dir = "/some/tmp/dir/"
+
+        # e.g. the initialization has been cancelled, the files cloned so far are deleted
+        self.lifecycle.stop(MagicMock())
+        self.sim_util_mock.delete_simulation_dir.assert_called_once_with("/some/tmp/dir/")
+
+    def _stop(self):
+        simulation_server = MagicMock()
+        type(self.simulation).simulation_server = PropertyMock(return_value=simulation_server)
+
+        self.lifecycle.stop(MagicMock())
+
+        self.assertTrue(self.teardowns.wait(42, TIMEOUT))
+        return simulation_server
+
     @patch(f"{_base_path}.glob")
     def test_backend_stop(self, glob_mock):
         glob_mock.glob.return_value = ["file.log"]
-        
-        returned_simulation_server = MagicMock()
-        type(self.simulation).simulation_server = PropertyMock(return_value=returned_simulation_server)
 
-        self.lifecycle.stop(MagicMock())
+        returned_simulation_server = self._stop()
 
-        self.assertTrue(returned_simulation_server.shutdown.called)
+        # the simulation server is requested to terminate, the teardown waits for it
+        self.assertTrue(returned_simulation_server.terminate.called)
+        self.assertTrue(returned_simulation_server.wait_termination.called)
+        self.assertFalse(returned_simulation_server.shutdown.called)
 
         # _save_log_to_user_storage
-        self.assertTrue(self.zip_util_mock.create_from_filelist.called)
-        self.assertTrue(self.storage_mock.return_value.create_or_update.called)
+        self.assertTrue(self.zip_util_mock.stream_from_filelist.called)
+        zipped_logs = self.zip_util_mock.stream_from_filelist.return_value
+        self.assertIs(self.storage_mock.return_value.create_or_update.call_args.args[3],
+                      zipped_logs)
+        self.assertTrue(zipped_logs.close.called)
         
         # finally
         self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
+        self.assertEqual(self.simulation.teardown, SimulationTeardown.COMPLETED)
+
+    @patch(f"{_base_path}.glob")
+    def test_backend_stop_standby(self, glob_mock):
+        glob_mock.glob.return_value = ["file.log"]
+        self.simulation.standby = True
+
+        self._stop()
+
+        # nobody ran the simulation, its logs are not uploaded
+        self.assertFalse(self.storage_mock.return_value.create_or_update.called)
+        self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
+        self.assertEqual(self.simulation.teardown, SimulationTeardown.COMPLETED)
+
+    def test_backend_stop_deferred_teardown(self):
+        returned_simulation_server = MagicMock()
+        type(self.simulation).simulation_server = PropertyMock(
+            return_value=returned_simulation_server)
+
+        release = threading.Event()
+        with patch.object(BackendSimulationLifecycle, "_teardown",
+                          side_effect=lambda _server: release.wait(TIMEOUT)) as teardown_mock:
+            self.lifecycle.stop(MagicMock())
+
+            # stop returns once the simulation server is requested to terminate
+            self.assertTrue(returned_simulation_server.terminate.called)
+            self.assertTrue(self.teardowns.is_pending(42))
+            self.assertIn(self.simulation.teardown,
+                          (SimulationTeardown.PENDING, SimulationTeardown.RUNNING))
+
+            release.set()
+            self.assertTrue(self.teardowns.wait(42, TIMEOUT))
+
+        teardown_mock.assert_called_once_with(returned_simulation_server)
 
     def test_backend_stop_shutdown_fail(self):
         # should clean sim_dir up even when shutdown fails
@@ -164,16 +299,41 @@ class TestBackendSimulationLifecycle(unittest.TestCase):
         with self.assertRaises(Exception):
             self.lifecycle.stop(MagicMock())
             self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
-    
+
+    def test_backend_stop_terminate_fail(self):
+        # should clean sim_dir up even when the termination request fails
+        simulation_server = MagicMock()
+        simulation_server.terminate.side_effect = Exception
+        type(self.simulation).simulation_server = PropertyMock(return_value=simulation_server)
+
+        with self.assertRaises(Exception):
+            self.lifecycle.stop(MagicMock())
+
+        self.assertTrue(self.teardowns.wait(42, TIMEOUT))
+        self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
+
     def test_backend_stop_logs_update_fail(self):
         # should clean sim_dir up even when file updates fails
         # TODO What to do on top of that?
 
-        with patch.object(BackendSimulationLifecycle, "_save_log_to_user_storage", side_effect = Exception):
-            with self.assertRaises(Exception):
-                self.lifecycle.stop(MagicMock())
-                self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
-        
+        with patch.object(BackendSimulationLifecycle, "_save_log_to_user_storage",
+                          side_effect=Exception) as save_log_mock:
+            self._stop()
+
+        # retried
+        self.assertEqual(save_log_mock.call_count, 2)
+        self.assertTrue(self.sim_util_mock.delete_simulation_dir.called)
+        self.assertEqual(self.simulation.teardown, SimulationTeardown.FAILED)
+
+    def test_backend_stop_logs_update_retried(self):
+        with patch.object(BackendSimulationLifecycle, "_save_log_to_user_storage",
+                          side_effect=[Exception, None]) as save_log_mock:
+            self._stop()
+
+        self.assertEqual(save_log_mock.call_count, 2)
+        self.assertEqual(self.sim_util_mock.delete_simulation_dir.call_count, 1)
+        self.assertEqual(self.simulation.teardown, SimulationTeardown.COMPLETED)
+
     # pause()
     def test_backend_pause(self):
         # The method does nothing currently, so we have nothing to test
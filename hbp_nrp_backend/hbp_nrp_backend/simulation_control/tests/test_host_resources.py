@@ -0,0 +1,131 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.host_resources
+"""
+
+__author__ = 'NRP software team'
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from hbp_nrp_backend.simulation_control.host_resources import (HostResources, ResourceAdmission,
+                                                               read_host_resources, MiB)
+
+MEMINFO = """MemTotal:       16303736 kB
+MemFree:         1234567 kB
+MemAvailable:    2097152 kB
+Buffers:          123456 kB
+"""
+
+
+class TestReadHostResources(unittest.TestCase):
+
+    def setUp(self):
+        self.proc_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.proc_dir.cleanup)
+        self.write("loadavg", "1.50 0.80 0.40 2/345 6789\n")
+        self.write("meminfo", MEMINFO)
+
+    def write(self, name, content):
+        with open(os.path.join(self.proc_dir.name, name), "w", encoding="ascii") as f:
+            f.write(content)
+
+    @patch("hbp_nrp_backend.simulation_control.host_resources.os.sched_getaffinity",
+           return_value={0, 1, 2, 3})
+    @patch("hbp_nrp_backend.simulation_control.host_resources.os.statvfs")
+    def test_read(self, statvfs_mock, _affinity_mock):
+        statvfs_mock.return_value = MagicMock(f_bavail=1024, f_frsize=4096)
+
+        resources = read_host_resources("/sim/dirs", proc_dir=self.proc_dir.name)
+
+        statvfs_mock.assert_called_once_with("/sim/dirs")
+        self.assertEqual(resources, HostResources(cores=4, load=1.5,
+                                                  memory_available=2048 * MiB,
+                                                  disk_free=4 * MiB))
+
+    def test_read_no_mem_available(self):
+        self.write("meminfo", "MemTotal:       16303736 kB\n")
+        self.assertRaises(OSError, read_host_resources, "/", proc_dir=self.proc_dir.name)
+
+    def test_read_no_proc(self):
+        self.assertRaises(OSError, read_host_resources, "/",
+                          proc_dir=os.path.join(self.proc_dir.name, "missing"))
+
+
+class TestResourceAdmission(unittest.TestCase):
+
+    def setUp(self):
+        self.resources = HostResources(cores=8, load=2., memory_available=4096 * MiB,
+                                       disk_free=10240 * MiB)
+        self.read_resources = MagicMock(side_effect=lambda _path: self.resources)
+        self.admission = ResourceAdmission(cores=2, memory=1024, disk=1024, disk_path="/sim/dirs",
+                                           read_resources=self.read_resources)
+
+    def test_first_simulation_is_always_admitted(self):
+        self.resources = HostResources(cores=1, load=4., memory_available=0, disk_free=0)
+        self.assertTrue(self.admission(0))
+        self.read_resources.assert_not_called()
+
+    def test_enough_resources(self):
+        self.assertTrue(self.admission(1))
+        self.read_resources.assert_called_once_with("/sim/dirs")
+
+    def test_cores(self):
+        # the cores of the active simulations are reserved, even if not busy yet
+        self.assertTrue(self.admission(3))
+        self.assertFalse(self.admission(4))
+
+        # the busy cores
+        self.resources = HostResources(cores=8, load=6.5, memory_available=4096 * MiB,
+                                       disk_free=10240 * MiB)
+        self.assertFalse(self.admission(1))
+
+    def test_memory(self):
+        self.resources = HostResources(cores=8, load=2., memory_available=1023 * MiB,
+                                       disk_free=10240 * MiB)
+        self.assertFalse(self.admission(1))
+
+    def test_disk(self):
+        self.resources = HostResources(cores=8, load=2., memory_available=4096 * MiB,
+                                       disk_free=1023 * MiB)
+        self.assertFalse(self.admission(1))
+
+    def test_disabled_checks(self):
+        self.resources = HostResources(cores=1, load=4., memory_available=0, disk_free=0)
+        admission = ResourceAdmission(cores=0, memory=0, disk=0, disk_path="/sim/dirs",
+                                      read_resources=self.read_resources)
+        self.assertTrue(admission(5))
+        self.read_resources.assert_not_called()
+
+    def test_unreadable_resources(self):
+        self.read_resources.side_effect = OSError
+        # the concurrency limit of the queue applies alone
+        self.assertTrue(self.admission(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
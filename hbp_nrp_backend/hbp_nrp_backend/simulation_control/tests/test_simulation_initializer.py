@@ -0,0 +1,203 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.SimulationInitializer
+"""
+
+__author__ = 'NRP software team'
+
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from hbp_nrp_backend import NRPServicesGeneralException
+from hbp_nrp_backend.simulation_control.simulation_initializer import SimulationInitializer
+
+TIMEOUT = 5.
+
+
+class FakeSimulation:
+    def __init__(self, sim_id, initialize=None):
+        self.sim_id = sim_id
+        self.error = None
+        self.commands = []
+        self.lifecycle = MagicMock()
+        self.__state = "created"
+        self.__initialize = initialize
+
+    @property
+    def state(self):
+        return self.__state
+
+    @state.setter
+    def state(self, command):
+        self.commands.append(command)
+        if command != "initialized":
+            self.__state = command
+            return
+        try:
+            if self.__initialize is not None:
+                self.__initialize()
+        except Exception:
+            self.__state = "failed"
+            raise
+        self.__state = "paused"
+
+
+class TestSimulationInitializer(unittest.TestCase):
+
+    def setUp(self):
+        self.initializer = SimulationInitializer(max_workers=2)
+        self.addCleanup(self.initializer.shutdown)
+
+    def test_initialize(self):
+        sim = FakeSimulation(0)
+
+        SimulationInitializer.initialize(sim)
+
+        self.assertEqual(sim.commands, ["initialized"])
+        self.assertEqual(sim.state, "paused")
+        self.assertIsNone(sim.error)
+
+    def test_initialize_failed(self):
+        def fail():
+            raise NRPServicesGeneralException("Error starting the simulation", "Server Error")
+
+        sim = FakeSimulation(0, initialize=fail)
+
+        self.assertRaises(NRPServicesGeneralException, SimulationInitializer.initialize, sim)
+        self.assertEqual(sim.state, "failed")
+        self.assertEqual(sim.error, "Error starting the simulation")
+
+        sim = FakeSimulation(1, initialize=lambda: 1 / 0)
+        self.assertRaises(ZeroDivisionError, SimulationInitializer.initialize, sim)
+        self.assertIn("ZeroDivisionError", sim.error)
+
+    def test_submit(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def initialize():
+            started.set()
+            release.wait(TIMEOUT)
+
+        sim = FakeSimulation(0, initialize=initialize)
+        future = self.initializer.submit(sim)
+
+        self.assertTrue(started.wait(TIMEOUT))
+        self.assertTrue(self.initializer.is_initializing(0))
+        self.assertEqual(sim.state, "created")
+
+        release.set()
+        future.result(TIMEOUT)
+        self.assertFalse(self.initializer.is_initializing(0))
+        self.assertEqual(sim.state, "paused")
+
+    def test_submit_failed(self):
+        sim = FakeSimulation(0, initialize=lambda: 1 / 0)
+
+        # the error is recorded rather than raised
+        self.assertIsNone(self.initializer.submit(sim).result(TIMEOUT))
+        self.assertFalse(self.initializer.is_initializing(0))
+        self.assertEqual(sim.state, "failed")
+        self.assertIn("ZeroDivisionError", sim.error)
+
+    def test_bounded_workers(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+        all_workers_busy = threading.Event()
+        release = threading.Event()
+
+        def initialize():
+            with lock:
+                running.append(True)
+                peak.append(len(running))
+                if len(running) == 2:
+                    all_workers_busy.set()
+            release.wait(TIMEOUT)
+            with lock:
+                running.pop()
+
+        futures = [self.initializer.submit(FakeSimulation(i, initialize=initialize))
+                   for i in range(4)]
+        self.assertTrue(all(self.initializer.is_initializing(i) for i in range(4)))
+        self.assertTrue(all_workers_busy.wait(TIMEOUT))
+
+        release.set()
+        for future in futures:
+            future.result(TIMEOUT)
+        self.assertEqual(max(peak), 2)
+
+    def test_cancel(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def initialize():
+            started.set()
+            release.wait(TIMEOUT)
+
+        sim = FakeSimulation(0, initialize=initialize)
+        future = self.initializer.submit(sim)
+        self.assertTrue(started.wait(TIMEOUT))
+
+        self.assertTrue(self.initializer.cancel(sim, "stopped"))
+        sim.lifecycle.cancel_initialization.assert_called_once_with()
+        self.assertEqual(sim.state, "created")
+
+        # stopped once the initialization has returned
+        release.set()
+        future.result(TIMEOUT)
+        self.assertEqual(sim.commands, ["initialized", "stopped"])
+        self.assertEqual(sim.state, "stopped")
+        self.assertFalse(self.initializer.is_initializing(0))
+
+    def test_cancel_not_started(self):
+        release = threading.Event()
+        busy = [FakeSimulation(i, initialize=lambda: release.wait(TIMEOUT)) for i in range(2)]
+        futures = [self.initializer.submit(sim) for sim in busy]
+
+        # waiting for a worker, it's never initialized
+        sim = FakeSimulation(2)
+        self.initializer.submit(sim)
+        self.assertTrue(self.initializer.cancel(sim, "failed"))
+        self.assertEqual(sim.commands, ["failed"])
+        self.assertFalse(self.initializer.is_initializing(2))
+
+        release.set()
+        for future in futures:
+            future.result(TIMEOUT)
+
+    def test_cancel_not_initializing(self):
+        sim = FakeSimulation(0)
+        self.assertFalse(self.initializer.cancel(sim, "stopped"))
+        self.assertEqual(sim.commands, [])
+
+        self.initializer.submit(sim).result(TIMEOUT)
+        self.assertFalse(self.initializer.cancel(sim, "stopped"))
+        self.assertEqual(sim.state, "paused")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.SimulationQueue
+"""
+
+__author__ = 'NRP software team'
+
+import unittest
+from unittest.mock import MagicMock
+
+from hbp_nrp_backend.simulation_control import (SimulationQueue, SimulationQueueFullError,
+                                                SimulationLimitError)
+
+
+class FakeSimulation:
+    def __init__(self, sim_id, owner="owner", state="created"):
+        self.sim_id = sim_id
+        self.owner = owner
+        self.state = state
+        self.admission = None
+        self.queue_position = None
+        self.queue_wait_time = None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+class TestSimulationQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.on_admitted = MagicMock()
+        self.queue = SimulationQueue(max_active=1, depth=3, on_admitted=self.on_admitted,
+                                     clock=self.clock)
+
+    def test_admit(self):
+        running = FakeSimulation(0)
+        self.assertTrue(self.queue.admit(running))
+        self.assertEqual(running.admission, SimulationQueue.ADMITTED)
+        self.assertEqual(running.queue_wait_time, 0.)
+
+        queued = FakeSimulation(1)
+        self.assertFalse(self.queue.admit(queued))
+        self.assertEqual(queued.admission, SimulationQueue.QUEUED)
+        self.assertEqual(queued.queue_position, 1)
+        self.assertTrue(self.queue.is_queued(1))
+        self.assertEqual(len(self.queue), 1)
+
+        # the directly admitted simulations are initialized by the caller
+        self.on_admitted.assert_not_called()
+
+    def test_release_admits_next(self):
+        running, queued = FakeSimulation(0), FakeSimulation(1)
+        self.queue.admit(running)
+        self.queue.admit(queued)
+
+        self.clock.now = 5.
+        running.state = "stopped"
+        self.queue.release(running)
+
+        self.on_admitted.assert_called_once_with(queued)
+        self.assertEqual(queued.admission, SimulationQueue.ADMITTED)
+        self.assertIsNone(queued.queue_position)
+        self.assertEqual(queued.queue_wait_time, 5.)
+        self.assertFalse(self.queue.is_queued(1))
+
+    def test_queue_full(self):
+        for sim_id in range(4):
+            self.queue.admit(FakeSimulation(sim_id))
+        self.assertTrue(self.queue.is_full())
+
+        self.assertRaises(SimulationQueueFullError, self.queue.admit, FakeSimulation(4))
+        # the 409 handling of the former limit applies
+        self.assertTrue(issubclass(SimulationQueueFullError, SimulationLimitError))
+        self.assertEqual(self.queue.stats()['rejected'], 1)
+
+    def test_no_queue(self):
+        queue = SimulationQueue(max_active=1, depth=0, on_admitted=self.on_admitted)
+        self.assertFalse(queue.is_full())
+        queue.admit(FakeSimulation(0))
+        self.assertTrue(queue.is_full())
+        self.assertRaises(SimulationQueueFullError, queue.admit, FakeSimulation(1))
+
+    def test_fairness_across_owners(self):
+        queue = SimulationQueue(max_active=1, depth=10, on_admitted=self.on_admitted)
+        queue.admit(FakeSimulation(0, owner="alice"))
+        # alice queues many simulations before bob and carol
+        sims = [FakeSimulation(1, owner="alice"), FakeSimulation(2, owner="alice"),
+                FakeSimulation(3, owner="alice"), FakeSimulation(4, owner="bob"),
+                FakeSimulation(5, owner="carol"), FakeSimulation(6, owner="bob")]
+        for sim in sims:
+            queue.admit(sim)
+
+        # round-robin order across owners
+        expected_order = [1, 4, 5, 2, 6, 3]
+        self.assertEqual([s.sim_id for s in sorted(sims, key=lambda s: s.queue_position)],
+                         expected_order)
+
+        admitted = []
+        self.on_admitted.side_effect = admitted.append
+        active = FakeSimulation(0, owner="alice")
+        for _ in sims:
+            queue.release(active)
+            active = admitted[-1]
+        self.assertEqual([s.sim_id for s in admitted], expected_order)
+
+    def test_cancel_queued(self):
+        self.queue.admit(FakeSimulation(0))
+        first, second = FakeSimulation(1), FakeSimulation(2)
+        self.queue.admit(first)
+        self.queue.admit(second)
+
+        first.state = "stopped"
+        self.queue.release(first)
+
+        self.assertFalse(self.queue.is_queued(1))
+        self.assertIsNone(first.queue_position)
+        self.assertEqual(second.queue_position, 1)
+        self.on_admitted.assert_not_called()
+
+    def test_unreleased_final_simulations_are_forgotten(self):
+        running = FakeSimulation(0)
+        self.queue.admit(running)
+        running.state = "failed"
+
+        self.assertFalse(self.queue.is_full())
+        self.assertTrue(self.queue.admit(FakeSimulation(1)))
+
+    def test_admission_failure(self):
+        running, queued = FakeSimulation(0), FakeSimulation(1)
+        self.queue.admit(running)
+        self.queue.admit(queued)
+        self.on_admitted.side_effect = RuntimeError
+
+        # the failure is logged, the queue goes on
+        self.queue.release(running)
+        self.assertEqual(self.queue.stats()['active'], 1)
+
+    def test_stats(self):
+        self.assertEqual(self.queue.stats(), {'active': 0, 'queued': 0, 'admitted': 0,
+                                              'rejected': 0, 'wait_mean': 0., 'wait_p95': 0.,
+                                              'wait_max': 0.})
+        active = FakeSimulation(0)
+        self.queue.admit(active)
+        for sim_id in range(1, 4):
+            self.queue.admit(FakeSimulation(sim_id))
+
+        self.on_admitted.side_effect = lambda sim: setattr(self, 'active', sim)
+        for wait in (1., 3., 5.):
+            self.clock.now += wait
+            self.queue.release(active)
+            active = self.active
+
+        stats = self.queue.stats()
+        self.assertEqual(stats['admitted'], 3)
+        self.assertEqual(stats['queued'], 0)
+        # the simulations waited 1, 4 and 9 seconds
+        self.assertAlmostEqual(stats['wait_mean'], 14 / 3)
+        self.assertEqual(stats['wait_max'], 9.)
+        self.assertTrue(4. < stats['wait_p95'] <= 9.)
+
+    def test_concurrent_simulations(self):
+        self.queue = SimulationQueue(max_active=2, depth=1, on_admitted=self.on_admitted)
+        running = [FakeSimulation(0), FakeSimulation(1)]
+        self.assertTrue(all(self.queue.admit(sim) for sim in running))
+        self.assertFalse(self.queue.admit(FakeSimulation(2)))
+        self.assertTrue(self.queue.is_full())
+
+        self.queue.release(running[1])
+        self.on_admitted.assert_called_once()
+        self.assertEqual(self.queue.stats()['active'], 2)
+
+    def test_can_admit(self):
+        # the host has the resources for one simulation
+        can_admit = MagicMock(side_effect=lambda active: active < 1)
+        self.queue = SimulationQueue(max_active=3, depth=1, on_admitted=self.on_admitted,
+                                     can_admit=can_admit)
+        running, queued = FakeSimulation(0), FakeSimulation(1)
+        self.assertTrue(self.queue.admit(running))
+        can_admit.assert_called_with(0)
+
+        self.assertFalse(self.queue.admit(queued))
+        can_admit.assert_called_with(1)
+        self.assertTrue(self.queue.is_full())
+        self.assertRaises(SimulationQueueFullError, self.queue.admit, FakeSimulation(2))
+
+        # the resources are checked again when a simulation is released
+        running.state = "stopped"
+        self.queue.release(running)
+        self.on_admitted.assert_called_once_with(queued)
+        self.assertEqual(queued.admission, SimulationQueue.ADMITTED)
+
+    def test_try_admit(self):
+        running = FakeSimulation(0)
+        self.assertTrue(self.queue.try_admit(running))
+        self.assertEqual(running.admission, SimulationQueue.ADMITTED)
+
+        # never queued
+        extra = FakeSimulation(1)
+        self.assertFalse(self.queue.try_admit(extra))
+        self.assertIsNone(extra.admission)
+        self.assertEqual(len(self.queue), 0)
+
+        # not admitted ahead of the queued simulations
+        self.queue = SimulationQueue(max_active=2, depth=1, on_admitted=self.on_admitted)
+        self.queue.admit(FakeSimulation(0))
+        self.queue.admit(FakeSimulation(1))
+        self.queue.admit(FakeSimulation(2))
+        self.assertFalse(self.queue.try_admit(FakeSimulation(3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.SimulationRegistry
+"""
+
+__author__ = 'NRP software team'
+
+import threading
+import unittest
+
+from hbp_nrp_backend.simulation_control import SimulationRegistry, SimulationLimitError
+
+
+class FakeSimulation:
+    def __init__(self, sim_id, owner="owner", state="created", experiment_id="exp"):
+        self.sim_id = sim_id
+        self.owner = owner
+        self.state = state
+        self.experiment_id = experiment_id
+
+
+class TestSimulationRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = SimulationRegistry()
+
+    def test_create(self):
+        sims = [self.registry.create(FakeSimulation) for _ in range(3)]
+
+        self.assertEqual([s.sim_id for s in sims], [0, 1, 2])
+        self.assertEqual(len(self.registry), 3)
+        self.assertIn(1, self.registry)
+        self.assertIs(self.registry.get(1), sims[1])
+        self.assertEqual(list(self.registry), sims)
+
+    def test_get_missing(self):
+        self.assertRaises(ValueError, self.registry.get, 0)
+        self.assertRaises(ValueError, self.registry.get, -1)
+        self.assertRaises(ValueError, self.registry.get, None)
+
+    def test_register(self):
+        self.registry.register(FakeSimulation(5))
+        self.assertRaises(ValueError, self.registry.register, FakeSimulation(5))
+
+        # allocated ids don't collide with the registered ones
+        self.assertEqual(self.registry.create(FakeSimulation).sim_id, 6)
+
+    def test_state_indexes(self):
+        sims = [self.registry.create(FakeSimulation) for _ in range(3)]
+        self.registry.register(FakeSimulation(3, state="failed"))
+
+        self.assertEqual(self.registry.active(), sims)
+        self.assertEqual([s.sim_id for s in self.registry.final()], [3])
+
+        sims[1].state = "stopped"
+        self.assertEqual(self.registry.active(), [sims[0], sims[2]])
+        self.assertEqual([s.sim_id for s in self.registry.final()], [1, 3])
+
+    def test_owner_index(self):
+        alice = self.registry.create(lambda sim_id: FakeSimulation(sim_id, owner="alice"))
+        bob = self.registry.create(lambda sim_id: FakeSimulation(sim_id, owner="bob"))
+
+        self.assertEqual(self.registry.owned_by("alice"), [alice])
+        self.assertEqual(self.registry.owned_by("bob"), [bob])
+        self.assertEqual(self.registry.owned_by("carol"), [])
+
+        self.registry.remove(alice.sim_id)
+        self.assertEqual(self.registry.owned_by("alice"), [])
+
+    def test_change_owner(self):
+        sim = self.registry.create(lambda sim_id: FakeSimulation(sim_id, owner="standby"))
+
+        self.assertIs(self.registry.change_owner(sim.sim_id, "alice"), sim)
+
+        self.assertEqual(sim.owner, "alice")
+        self.assertEqual(self.registry.owned_by("alice"), [sim])
+        self.assertEqual(self.registry.owned_by("standby"), [])
+        self.assertRaises(ValueError, self.registry.change_owner, 42, "alice")
+
+    def test_select(self):
+        sims = [FakeSimulation(0, owner="alice", state="started"),
+                FakeSimulation(1, owner="bob", state="stopped", experiment_id="other"),
+                FakeSimulation(2, owner="alice", state="failed"),
+                FakeSimulation(3, owner="bob", state="paused", experiment_id="other")]
+        for sim in reversed(sims):
+            self.registry.register(sim)
+
+        def ids(selection):
+            return [s.sim_id for s in selection[0]], selection[1]
+
+        self.assertEqual(ids(self.registry.select()), ([0, 1, 2, 3], False))
+        self.assertEqual(ids(self.registry.select(owner="alice")), ([0, 2], False))
+        self.assertEqual(ids(self.registry.select(owner="carol")), ([], False))
+        self.assertEqual(ids(self.registry.select(states=["stopped", "failed"])), ([1, 2], False))
+        self.assertEqual(ids(self.registry.select(states=["started"])), ([0], False))
+        self.assertEqual(ids(self.registry.select(states=["started", "stopped"])), ([0, 1], False))
+        self.assertEqual(ids(self.registry.select(experiment_id="other")), ([1, 3], False))
+        self.assertEqual(ids(self.registry.select(owner="bob", states=["paused"])), ([3], False))
+
+        # pagination
+        self.assertEqual(ids(self.registry.select(limit=2)), ([0, 1], True))
+        self.assertEqual(ids(self.registry.select(after=1, limit=2)), ([2, 3], False))
+        self.assertEqual(ids(self.registry.select(after=3)), ([], False))
+
+        # state changes are taken into account
+        sims[0].state = "stopped"
+        self.assertEqual(ids(self.registry.select(states=["stopped"])), ([0, 1], False))
+        self.assertEqual(ids(self.registry.select(states=["started"])), ([], False))
+
+        # the snapshots are taken while selecting
+        snapshots, more = self.registry.select(owner="bob", snapshot=lambda s: (s.sim_id, s.state))
+        sims[3].state = "stopped"
+        self.assertEqual(snapshots, [(1, "stopped"), (3, "paused")])
+        self.assertFalse(more)
+
+    def test_select_pages(self):
+        checked = []
+
+        class CheckedSimulation(FakeSimulation):
+            @property
+            def experiment_id(self):
+                checked.append(self.sim_id)
+                return "exp"
+
+            @experiment_id.setter
+            def experiment_id(self, _value):
+                pass
+
+        for sim_id in range(100):
+            self.registry.create(CheckedSimulation)
+        self.registry.remove(51)
+
+        selected, more = self.registry.select(experiment_id="exp", after=50, limit=10)
+
+        self.assertEqual([s.sim_id for s in selected], list(range(52, 62)))
+        self.assertTrue(more)
+        # the simulations after the cursor are checked until the page is full
+        self.assertEqual(checked, list(range(52, 63)))
+
+    def test_remove(self):
+        sim = self.registry.create(FakeSimulation)
+        self.assertIs(self.registry.remove(sim.sim_id), sim)
+
+        self.assertNotIn(sim.sim_id, self.registry)
+        self.assertEqual(self.registry.active(), [])
+        self.assertRaises(ValueError, self.registry.remove, sim.sim_id)
+
+    def test_clear(self):
+        self.registry.create(FakeSimulation)
+        self.registry.clear()
+
+        self.assertEqual(len(self.registry), 0)
+        self.assertEqual(self.registry.create(FakeSimulation).sim_id, 0)
+
+    def test_max_active(self):
+        sim = self.registry.create(FakeSimulation, max_active=1)
+        self.assertRaises(SimulationLimitError, self.registry.create, FakeSimulation, max_active=1)
+
+        sim.state = "stopped"
+        self.assertEqual(self.registry.create(FakeSimulation, max_active=1).sim_id, 1)
+
+    def test_failed_creation(self):
+        def create_simulation(sim_id):
+            raise RuntimeError
+
+        self.assertRaises(RuntimeError, self.registry.create, create_simulation, max_active=1)
+        self.assertEqual(len(self.registry), 0)
+        # the id reservation is released
+        self.registry.create(FakeSimulation, max_active=1)
+
+    def test_concurrent_creation_is_atomic(self):
+        release = threading.Event()
+        created = []
+        rejected = []
+
+        def slow_simulation(sim_id):
+            release.wait(5)
+            return FakeSimulation(sim_id)
+
+        def create():
+            try:
+                created.append(self.registry.create(slow_simulation, max_active=1))
+            except SimulationLimitError:
+                rejected.append(True)
+
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # the simulations being created count as active
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(rejected), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
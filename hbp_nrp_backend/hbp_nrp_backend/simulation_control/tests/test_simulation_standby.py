@@ -0,0 +1,268 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.SimulationStandby
+"""
+
+__author__ = 'NRP software team'
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from hbp_nrp_commons.rw_lock import KeyedReadWriteLock
+from hbp_nrp_backend.simulation_control import (SimulationQueue, SimulationRegistry,
+                                                SimulationStandby, StandbyKey)
+
+TIMEOUT = 5.
+
+KEY = StandbyKey("demo_0", "simulation_config.json", "main_script.py", None, "alice")
+
+
+class FakeLifecycle:
+    def __init__(self):
+        self.final_state_callbacks = []
+
+    def add_final_state_callback(self, callback):
+        self.final_state_callbacks.append(callback)
+
+    def shutdown(self, _event):
+        pass
+
+
+class FakeSimulation:
+    # the simulations being initialized wait for this event
+    initialized = None
+    fail_initialization = False
+
+    def __init__(self, sim_id, experiment_id, owner, experiment_configuration, main_script,
+                 ctx_id, token):
+        self.sim_id = sim_id
+        self.experiment_id = experiment_id
+        self.owner = owner
+        self.experiment_configuration = experiment_configuration
+        self.main_script = main_script
+        self.ctx_id = ctx_id
+        self.token = token
+        self.standby = False
+        self.error = None
+        self.admission = None
+        self.queue_position = None
+        self.queue_wait_time = None
+        self.lifecycle = FakeLifecycle()
+        self.__state = "created"
+
+    @property
+    def state(self):
+        return self.__state
+
+    @state.setter
+    def state(self, command):
+        if command == "initialized":
+            if self.initialized is not None:
+                self.initialized.wait(TIMEOUT)
+            if self.fail_initialization:
+                self.__state = "failed"
+            else:
+                self.__state = "paused"
+                return
+        else:
+            self.__state = command
+        for callback in self.lifecycle.final_state_callbacks:
+            callback(self)
+
+
+class TestSimulationStandby(unittest.TestCase):
+
+    def setUp(self):
+        FakeSimulation.initialized = None
+        FakeSimulation.fail_initialization = False
+        self.registry = SimulationRegistry()
+        self.queue = SimulationQueue(max_active=3, depth=1, on_admitted=MagicMock())
+        self.simulation_locks = KeyedReadWriteLock()
+        self.standby = self.create_standby(capacity=2)
+
+    def create_standby(self, capacity, idle_timeout=0.):
+        standby = SimulationStandby(experiments=["demo_0"], capacity=capacity,
+                                    idle_timeout=idle_timeout, registry=self.registry,
+                                    queue=self.queue, create_simulation=FakeSimulation,
+                                    simulation_locks=self.simulation_locks)
+        self.addCleanup(standby.shutdown)
+        return standby
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + TIMEOUT
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.01)
+
+    def test_is_standby(self):
+        self.assertTrue(self.standby.is_standby(KEY))
+        self.assertFalse(self.standby.is_standby(KEY._replace(experiment_id="other")))
+        self.assertFalse(self.create_standby(capacity=0).is_standby(KEY))
+
+    def test_fill(self):
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+
+        sims = self.registry.all()
+        self.assertEqual([s.owner for s in sims], [SimulationStandby.OWNER] * 2)
+        self.assertEqual([s.state for s in sims], ["paused"] * 2)
+        self.assertEqual([s.token for s in sims], ["alice_token"] * 2)
+        self.assertTrue(all(s.standby for s in sims))
+        self.assertEqual(self.queue.stats()['active'], 2)
+
+        # already full
+        self.standby.fill(KEY, "alice_token")
+        self.standby.fill(KEY._replace(experiment_id="other"), "alice_token")
+        time.sleep(0.05)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_fill_counts_pending(self):
+        FakeSimulation.initialized = threading.Event()
+        self.standby.fill(KEY, "alice_token")
+        self.standby.fill(KEY, "alice_token")
+
+        FakeSimulation.initialized.set()
+        self.wait_until(lambda: len(self.standby) == 2)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_fill_without_room(self):
+        standby = self.create_standby(capacity=5)
+        standby.fill(KEY, "alice_token")
+
+        # the standby simulations are admitted, never queued
+        self.wait_until(lambda: len(standby) == 3)
+        time.sleep(0.05)
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(len(self.registry), 3)
+
+    def test_failed_initialization(self):
+        FakeSimulation.fail_initialization = True
+        self.standby.fill(KEY, "alice_token")
+
+        self.wait_until(lambda: self.queue.stats()['active'] == 0
+                        and len(self.registry.final()) == 2)
+        self.assertEqual(len(self.standby), 0)
+
+    def test_take(self):
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+        first = self.registry.get(0)
+
+        sim = self.standby.take(KEY, "alice_token", can_take=lambda _s: True)
+
+        # handed over, in order of arrival in standby
+        self.assertIs(sim, first)
+        self.assertEqual(sim.owner, "alice")
+        self.assertEqual(sim.token, "alice_token")
+        self.assertFalse(sim.standby)
+        self.assertEqual(self.registry.owned_by("alice"), [sim])
+        self.assertEqual(len(self.standby), 1)
+
+    def test_take_mismatch(self):
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+
+        self.assertIsNone(self.standby.take(KEY._replace(main_script="other.py"), "alice_token",
+                                            can_take=lambda _s: True))
+        self.assertIsNone(self.standby.take(KEY._replace(ctx_id="collab"), "alice_token",
+                                            can_take=lambda _s: True))
+        # cloned with the token of alice, bob can't take them
+        self.assertIsNone(self.standby.take(KEY._replace(owner="bob"), "bob_token",
+                                            can_take=lambda _s: True))
+        # e.g. alice can't access the experiment
+        self.assertIsNone(self.standby.take(KEY, "alice_token",
+                                            can_take=lambda _s: False))
+        self.assertEqual(len(self.standby), 2)
+        self.assertEqual(self.registry.owned_by("alice"), [])
+
+    def test_take_empty(self):
+        self.assertIsNone(self.standby.take(KEY, "alice_token",
+                                            can_take=lambda _s: True))
+
+    def test_failed_while_idle(self):
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+
+        self.registry.get(0).state = "failed"
+
+        self.assertEqual(len(self.standby), 1)
+        self.assertEqual(self.standby.take(KEY, "alice_token",
+                                           can_take=lambda _s: True).sim_id, 1)
+
+    def test_idle_timeout(self):
+        standby = self.create_standby(capacity=1, idle_timeout=0.05)
+        standby.fill(KEY, "alice_token")
+
+        self.wait_until(lambda: len(self.registry) == 1)
+        sim = self.registry.get(0)
+        self.wait_until(lambda: sim.state == "stopped")
+        self.assertEqual(len(standby), 0)
+        self.assertEqual(self.queue.stats()['active'], 0)
+
+    def test_evict(self):
+        self.assertFalse(self.standby.evict())
+
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+
+        # the simulation idle for the longest time first
+        self.assertTrue(self.standby.evict(wait=True))
+        self.assertEqual(self.registry.get(0).state, "stopped")
+        self.assertEqual(len(self.standby), 1)
+        self.assertEqual(self.queue.stats()['active'], 1)
+
+        self.assertTrue(self.standby.evict())
+        self.wait_until(lambda: self.registry.get(1).state == "stopped")
+        self.assertEqual(len(self.standby), 0)
+
+    def test_evict_holds_simulation_lock(self):
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.standby) == 2)
+
+        # e.g. a request changing the state of the simulation
+        with self.simulation_locks.write(0):
+            self.assertTrue(self.standby.evict())
+            time.sleep(0.1)
+            self.assertEqual(self.registry.get(0).state, "paused")
+
+        self.wait_until(lambda: self.registry.get(0).state == "stopped")
+
+    def test_shutdown(self):
+        FakeSimulation.initialized = threading.Event()
+        self.standby.fill(KEY, "alice_token")
+        self.wait_until(lambda: len(self.registry.all()) == 1)
+
+        # the creation not started yet is cancelled, the running one completes
+        self.standby.shutdown()
+        FakeSimulation.initialized.set()
+        self.wait_until(lambda: len(self.standby) == 1)
+        time.sleep(0.1)
+        self.assertEqual(len(self.registry.all()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Test file for testing hbp_nrp_backend.simulation_control.SimulationTeardown
+"""
+
+__author__ = 'NRP software team'
+
+import threading
+import unittest
+from unittest import mock
+
+from hbp_nrp_backend.simulation_control.simulation_teardown import SimulationTeardown
+
+TIMEOUT = 5.
+
+
+class FakeSimulation:
+    def __init__(self, sim_id):
+        self.sim_id = sim_id
+        self.teardown = None
+
+
+class TestSimulationTeardown(unittest.TestCase):
+
+    def setUp(self):
+        self.teardowns = SimulationTeardown(max_workers=1, max_attempts=3, retry_delay=0)
+        self.addCleanup(self.teardowns.shutdown)
+
+    def test_submit(self):
+        sim = FakeSimulation(0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def teardown():
+            started.set()
+            release.wait(TIMEOUT)
+
+        self.teardowns.submit(sim, teardown)
+
+        self.assertTrue(started.wait(TIMEOUT))
+        self.assertEqual(sim.teardown, SimulationTeardown.RUNNING)
+        self.assertTrue(self.teardowns.is_pending(0))
+        self.assertFalse(self.teardowns.wait(0, 0))
+
+        release.set()
+        self.assertTrue(self.teardowns.wait(0, TIMEOUT))
+        self.assertFalse(self.teardowns.is_pending(0))
+        self.assertEqual(sim.teardown, SimulationTeardown.COMPLETED)
+
+    def test_submit_pending(self):
+        release = threading.Event()
+        first, second = FakeSimulation(0), FakeSimulation(1)
+
+        self.teardowns.submit(first, lambda: release.wait(TIMEOUT))
+        self.teardowns.submit(second, lambda: None)
+
+        # a single worker
+        self.assertEqual(second.teardown, SimulationTeardown.PENDING)
+        release.set()
+        self.assertTrue(self.teardowns.wait(1, TIMEOUT))
+        self.assertEqual(second.teardown, SimulationTeardown.COMPLETED)
+
+    def test_submit_failed(self):
+        sim = FakeSimulation(0)
+
+        self.teardowns.submit(sim, lambda: 1 / 0).result(TIMEOUT)
+
+        self.assertEqual(sim.teardown, SimulationTeardown.FAILED)
+
+    def test_wait_unknown(self):
+        self.assertTrue(self.teardowns.wait(42, 0))
+
+    def test_retry(self):
+        step = mock.MagicMock(side_effect=[OSError, OSError, None])
+
+        self.teardowns.retry("step", step, "arg")
+
+        self.assertEqual(step.call_count, 3)
+        step.assert_called_with("arg")
+
+    def test_retry_exhausted(self):
+        step = mock.MagicMock(side_effect=OSError)
+
+        self.assertRaises(OSError, self.teardowns.retry, "step", step)
+        self.assertEqual(step.call_count, 3)
+
+    def test_retry_backoff(self):
+        self.teardowns.retry_delay = 0.01
+        step = mock.MagicMock(side_effect=[OSError, OSError, None])
+
+        with mock.patch('hbp_nrp_backend.simulation_control.simulation_teardown.threading.Event.wait',
+                        autospec=True) as wait_mock:
+            self.teardowns.retry("step", step)
+
+        self.assertEqual([c.args[1] for c in wait_mock.call_args_list], [0.01, 0.02])
+
+
+if __name__ == '__main__':
+    unittest.main()
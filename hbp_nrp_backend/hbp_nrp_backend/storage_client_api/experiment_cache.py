@@ -0,0 +1,308 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+On-disk cache of the experiment files cloned from the storage server
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+__author__ = 'NRP software team'
+
+logger = logging.getLogger(__name__)
+
+
+class ExperimentCache:
+    """
+    A size-bounded cache of experiment files, evicting the least recently used ones.
+
+    Cached files are identified by the storage listing entry describing them.
+    When the storage provides a content digest (i.e. a 'hash' or an 'etag' field),
+    the files are addressed by their content, otherwise by their experiment, path,
+    size and modification date. Thus, a file changed on the storage is never served
+    from the cache.
+
+    The cache directory contains a 'blobs' folder, holding one file per cache entry, and an
+    index storing the size and the last use of the entries. The index is written by save().
+
+    The class is thread-safe. The cache directory can be shared by several processes: the index
+    is loaded and saved under a file lock, each process merging its entries with the saved ones.
+    """
+
+    INDEX_FILE_NAME = 'index.json'
+    LOCK_FILE_NAME = 'index.lock'
+    BLOBS_DIR_NAME = 'blobs'
+    # the suffix of the files being written, never removed as they may be another process'
+    TMP_SUFFIX = '.tmp'
+
+    # the listing entry fields identifying the content of a file
+    CONTENT_ID_FIELDS = ('hash', 'etag')
+
+    def __init__(self, cache_dir: str, max_size: int):
+        """
+        Creates the cache, loading the index found in cache_dir, if any
+
+        :param cache_dir: the directory holding the cache
+        :param max_size: the maximum total size, in bytes, of the cached files
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__blobs_dir = os.path.join(cache_dir, self.BLOBS_DIR_NAME)
+        self.__index_path = os.path.join(cache_dir, self.INDEX_FILE_NAME)
+        self.__lock_path = os.path.join(cache_dir, self.LOCK_FILE_NAME)
+
+        # key -> [size, last use timestamp], least recently used first
+        self.__entries: OrderedDict = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+        os.makedirs(self.__blobs_dir, exist_ok=True)
+        with self.__index_lock():
+            self.__load()
+
+    @property
+    def size(self) -> int:
+        """
+        :return: the total size, in bytes, of the cached files
+        """
+        return self.__size
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def stats(self) -> dict:
+        """
+        :return: the counters of the cache
+        """
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self.__entries), 'size': self.__size}
+
+    @classmethod
+    def entry_key(cls, experiment: str, rel_path: str, entry: dict) -> Optional[str]:
+        """
+        Computes the cache key of a file
+
+        :param experiment: the experiment the file belongs to
+        :param rel_path: the path of the file relative to the experiment folder
+        :param entry: the storage listing entry of the file
+        :return: the cache key, None if the entry doesn't identify the file content
+        """
+        for field in cls.CONTENT_ID_FIELDS:
+            if entry.get(field):
+                identity = f"{field}\0{entry[field]}"
+                break
+        else:
+            if entry.get('modifiedOn') is None or entry.get('size') is None:
+                return None
+            identity = f"{experiment}\0{rel_path}\0{entry['size']}\0{entry['modifiedOn']}"
+
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def fetch(self, experiment: str, rel_path: str, entry: dict, dest_path: str,
+              download: Callable[[], None]) -> bool:
+        """
+        Writes the file described by entry to dest_path, either copying it from the cache or
+        calling download and caching the downloaded file.
+
+        :param experiment: the experiment the file belongs to
+        :param rel_path: the path of the file relative to the experiment folder
+        :param entry: the storage listing entry of the file
+        :param dest_path: the path of the file to be written
+        :param download: a function downloading the file into dest_path
+        :return: True if the file has been copied from the cache, False otherwise
+        """
+        key = self.entry_key(experiment, rel_path, entry)
+
+        if key is not None and self.__copy_from_cache(key, dest_path):
+            return True
+
+        with self.__lock:
+            self.misses += 1
+
+        download()
+
+        if key is not None:
+            self.__store(key, dest_path)
+
+        return False
+
+    def save(self):
+        """
+        Writes the index of the cache to disk, keeping the entries saved by the other processes
+        sharing the cache directory whose files are still cached
+        """
+        with self.__lock:
+            entries = {key: {'size': size, 'last_used': last_used}
+                       for key, (size, last_used) in self.__entries.items()}
+
+        with self.__index_lock():
+            index = {key: {'size': size, 'last_used': last_used}
+                     for key, size, last_used in self.__read_index()
+                     if os.path.exists(self.__blob_path(key))}
+            index.update(entries)
+
+            tmp_path = self.__tmp_path(self.__index_path)
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.__index_path)
+
+    def clear(self):
+        """
+        Removes all the cached files
+        """
+        with self.__lock:
+            for key in list(self.__entries):
+                self.__remove(key)
+        self.save()
+
+    def __blob_path(self, key: str) -> str:
+        return os.path.join(self.__blobs_dir, key)
+
+    def __tmp_path(self, path: str) -> str:
+        """
+        :return: a path, unique across threads and processes, to write path before replacing it
+        """
+        return f"{path}.{os.getpid()}.{uuid.uuid4().hex}{self.TMP_SUFFIX}"
+
+    @contextlib.contextmanager
+    def __index_lock(self):
+        """
+        Locks the index against the other processes sharing the cache directory
+        """
+        with open(self.__lock_path, 'a') as lock_file:
+            # released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def __copy_from_cache(self, key: str, dest_path: str) -> bool:
+        with self.__lock:
+            if key not in self.__entries:
+                return False
+            self.__entries[key][1] = time.time()
+            self.__entries.move_to_end(key)
+
+        try:
+            shutil.copyfile(self.__blob_path(key), dest_path)
+        except FileNotFoundError:
+            # evicted in the meantime
+            return False
+
+        with self.__lock:
+            self.hits += 1
+        return True
+
+    def __store(self, key: str, file_path: str):
+        file_size = os.path.getsize(file_path)
+        if file_size > self.max_size:
+            return
+
+        # copy, rather than link, the file so that the simulation can't alter the cached one
+        tmp_path = self.__tmp_path(self.__blob_path(key))
+        try:
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, self.__blob_path(key))
+        except OSError:
+            logger.warning("Unable to cache '%s'", file_path, exc_info=True)
+            return
+
+        with self.__lock:
+            if key in self.__entries:
+                self.__size -= self.__entries[key][0]
+            self.__entries[key] = [file_size, time.time()]
+            self.__entries.move_to_end(key)
+            self.__size += file_size
+
+            while self.__size > self.max_size:
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def __remove(self, key: str):
+        """
+        Removes an entry, to be called holding the lock
+        """
+        size, _ = self.__entries.pop(key)
+        self.__size -= size
+        try:
+            os.remove(self.__blob_path(key))
+        except FileNotFoundError:
+            pass
+
+    def __read_index(self) -> List[Tuple[str, int, float]]:
+        """
+        Reads the index, to be called holding the index lock
+
+        :return: the (key, size, last use timestamp) of the saved entries
+        """
+        try:
+            with open(self.__index_path) as f:
+                index = json.load(f)
+            return [(key, int(value['size']), float(value['last_used']))
+                    for key, value in index.items()]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("Malformed experiment cache index '%s', the cache is reset",
+                           self.__index_path)
+            return []
+
+    def __load(self):
+        """
+        Loads the index, to be called holding the index lock.
+        The entries without a blob are dropped, the blobs without an entry (e.g. stored by
+        another process that hasn't saved the index yet) are added, as used when last modified.
+        """
+        blobs = {name for name in os.listdir(self.__blobs_dir)
+                 if not name.endswith(self.TMP_SUFFIX)}
+
+        entries = {key: (size, last_used)
+                   for key, size, last_used in self.__read_index() if key in blobs}
+        for blob in blobs.difference(entries):
+            try:
+                blob_stat = os.stat(self.__blob_path(blob))
+            except FileNotFoundError:
+                # evicted in the meantime
+                continue
+            entries[blob] = (blob_stat.st_size, blob_stat.st_mtime)
+
+        for key, (size, last_used) in sorted(entries.items(), key=lambda e: e[1][1]):
+            self.__entries[key] = [size, last_used]
+            self.__size += size
+
+        while self.__size > self.max_size:
+            self.__remove(next(iter(self.__entries)))
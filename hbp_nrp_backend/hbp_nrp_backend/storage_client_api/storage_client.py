@@ -28,29 +28,77 @@ import fnmatch
 import logging
 import os
 import tempfile
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
-from typing import Optional, List
+import uuid
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Optional, List
 
 import requests
+import requests.adapters
+from hbp_nrp_commons import zip_util
 from hbp_nrp_commons.workspace.settings import Settings
 from hbp_nrp_commons.workspace.sim_util import SimUtil
 
+from hbp_nrp_backend.storage_client_api.experiment_cache import ExperimentCache
+
 __author__ = 'NRP software team, Manos Angelidis'
 
 logger = logging.getLogger(__name__)
 
 
+class _CancellableExecutor(ThreadPoolExecutor):
+    """
+    A ThreadPoolExecutor keeping track of the submitted tasks, so that the ones not started yet
+    can be cancelled (shutdown(cancel_futures=True) is not available before Python 3.9).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__futures: List[Future] = []
+
+    def submit(self, fn, *args, **kwargs) -> Future:  # pylint: disable=arguments-differ
+        future = super().submit(fn, *args, **kwargs)
+        self.__futures.append(future)
+        return future
+
+    def cancel_pending(self):
+        """
+        Cancels the submitted tasks not started yet
+        """
+        for future in self.__futures:
+            future.cancel()
+
+
 class StorageClient:
     """
     Wrapper around the storage server API. Users of this class should first
     call the authentication function to retrieve a token, before making the
-    requests to the storage server
+    requests to the storage server.
+
+    Requests are sent through a single :class:`requests.Session`, shared by all the threads
+    using the client, whose pool keeps up to :code:`Settings.storage_pool_size` connections
+    to the storage server alive.
     """
 
     __instance = None
-    _sim_dir = None
+
+    # the size of the chunks in which downloaded files are written to disk
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+    # the responses of storage servers not providing experiment archives or manifests
+    UNSUPPORTED_STATUS_CODES = (400, 404, 405, 406, 501)
+    ARCHIVE_CONTENT_TYPES = ('application/zip', 'application/x-zip-compressed',
+                             'application/octet-stream')
+
+    # the HTTP session shared by every method, created once per singleton
+    __session: Optional[requests.Session] = None
+
+    # the cache of the cloned experiment files, created on first use
+    __experiment_cache: Optional[ExperimentCache] = None
+    __experiment_cache_lock = threading.Lock()
 
     def __new__(cls):
         """
@@ -73,14 +121,29 @@ class StorageClient:
         # folders in resources we want to filter
         self.__filtered_resources = []
 
-    def set_sim_dir(self, sim_dir):
-        """
-        Sets the sim_dir for this client
+        # NOTE __init__ is run on every StorageClient() call, keep the existing pool
+        # clone workers must not wait for each other's connections
+        if self.__session is None:
+            self.__session = self._create_session(max(Settings.storage_pool_size,
+                                                      Settings.storage_clone_workers))
 
-        :param sim_dir: Simulation directory
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
         """
+        Creates an HTTP session keeping up to pool_size keep-alive connections per host.
 
-        self._sim_dir = sim_dir
+        urllib3 connection pools are thread-safe, thus the session can be shared among the threads
+        issuing requests to the storage server (e.g. when cloning experiment files).
+
+        :param pool_size: the maximum number of connections to be kept in the pool
+        :return: the new session
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     def get_user(self, token):
         """
@@ -93,7 +156,7 @@ class StorageClient:
         """
 
         try:
-            res = requests.get(
+            res = self.__session.get(
                 f'{self.__proxy_url}/identity/me',
                 headers={'Authorization': f'Bearer {token}'}
             )
@@ -135,7 +198,7 @@ class StorageClient:
             query_args['all'] = str(get_all).lower()
 
         try:
-            res = requests.get(
+            res = self.__session.get(
                 '{proxy_url}/storage/experiments?{params}'.format(
                     proxy_url=self.__proxy_url,
                     params=urllib.parse.urlencode(query_args)),
@@ -165,8 +228,8 @@ class StorageClient:
             request_url = f'{self.__proxy_url}/storage/{experiment}/{filename}' \
                           f'?byname={str(by_name).lower()}'
 
-            res = requests.get(request_url,
-                               headers={'Authorization': f'Bearer {token}'})
+            res = self.__session.get(request_url,
+                                     headers={'Authorization': f'Bearer {token}'})
 
             # TODO what about missing files? i.e. 204
             if res.status_code < 200 or res.status_code >= 300:
@@ -179,6 +242,51 @@ class StorageClient:
             logger.exception(err)
             raise ConnectionError from err
 
+    def download_file(self, token: str, experiment: str, filename: str, dest_path: str,
+                      by_name: bool = False) -> str:
+        """
+        Downloads a file under an experiment to dest_path.
+        The content is streamed to disk by chunks of DOWNLOAD_CHUNK_SIZE bytes, thus it's never
+        held in memory as a whole. It's written to a temporary file, in the same folder, renamed
+        to dest_path once complete: a partially downloaded file never appears as dest_path.
+
+        :param token: a valid token to be used for the request
+        :param experiment: the name of the experiment
+        :param filename: the name of the file to download
+        :param dest_path: the local path of the downloaded file, replaced if existing
+        :param by_name: whether filename is the name of the file rather than its uuid
+        :return: dest_path
+        """
+        request_url = f'{self.__proxy_url}/storage/{experiment}/{filename}' \
+                      f'?byname={str(by_name).lower()}'
+
+        dest_dir, dest_name = os.path.split(dest_path)
+        part_path = os.path.join(dest_dir, f'.{dest_name}.{uuid.uuid4().hex}.part')
+
+        try:
+            with self.__session.get(request_url,
+                                    headers={'Authorization': f'Bearer {token}'},
+                                    stream=True) as res:
+
+                if res.status_code < 200 or res.status_code >= 300:
+                    raise Exception('Failed to communicate with the storage server, status code {}'
+                                    .format(res.status_code))
+
+                with open(part_path, "xb") as f:
+                    for chunk in res.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+
+            os.replace(part_path, dest_path)
+            return dest_path
+
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError) as err:
+            logger.exception(err)
+            raise ConnectionError from err
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
     def delete_file(self, token: str, experiment: str, filename) -> str:
         """
         Deletes a file under an experiment based on the
@@ -196,7 +304,7 @@ class StorageClient:
                     experiment, filename), safe='')
             )
 
-            res = requests.delete(
+            res = self.__session.delete(
                 request_url,
                 headers={'Authorization': f'Bearer {token}'}
             )
@@ -218,7 +326,9 @@ class StorageClient:
         :param token: a valid token to be used for the request
         :param experiment: the name of the experiment
         :param filename: the name of the file to update/create
-        :param content: the content of the file
+        :param content: the content of the file, either as a whole or as an iterator
+                        over its chunks, which are then sent as they are produced
+                        (i.e. with a chunked transfer encoding)
         :param content_type: the content type of the file i.e. text/plain or
                              application/octet-stream
         :param append: append to file or create new file
@@ -227,10 +337,10 @@ class StorageClient:
             append_query = "?append=true" if append else ""
             request_url = f'{self.__proxy_url}/storage/{experiment}/{filename}{append_query}'
 
-            res = requests.post(request_url,
-                                headers={'content-type': content_type,
-                                         'Authorization': f'Bearer {token}'},
-                                data=content)
+            res = self.__session.post(request_url,
+                                      headers={'content-type': content_type,
+                                               'Authorization': f'Bearer {token}'},
+                                      data=content)
 
             if res.status_code < 200 or res.status_code >= 300:
                 raise Exception(f'Failed to communicate with the storage server,'
@@ -256,7 +366,7 @@ class StorageClient:
                 name=name
             )
 
-            res = requests.post(
+            res = self.__session.post(
                 request_url,
                 headers={'Authorization': f'Bearer {token}'}
             )
@@ -294,11 +404,11 @@ class StorageClient:
                 experiment=experiment,
                 name=name)
 
-            res = requests.post(request_url,
-                                headers={
-                                    'content-type': 'application/octet-stream',
-                                    'Authorization': f'Bearer {token}'},
-                                data=content)
+            res = self.__session.post(request_url,
+                                      headers={
+                                          'content-type': 'application/octet-stream',
+                                          'Authorization': f'Bearer {token}'},
+                                      data=content)
 
             if res.status_code < 200 or res.status_code >= 300:
                 raise Exception(f'Failed to communicate with the storage server,'
@@ -321,7 +431,7 @@ class StorageClient:
         """
         try:
 
-            res = requests.get(
+            res = self.__session.get(
                 f'{self.__proxy_url}/storage/{experiment}',  # request url
                 headers={'Authorization': f'Bearer {token}'})
 
@@ -341,7 +451,8 @@ class StorageClient:
             logger.exception(err)
             raise ConnectionError from err
 
-    def clone_file(self, token: str, filename: str, experiment: str) -> Optional[str]:
+    def clone_file(self, token: str, filename: str, experiment: str,
+                   sim_dir: str) -> Optional[str]:
         """
         Clones a file according to a given filename to a simulation folder.
         The caller then has the responsibility of managing this folder.
@@ -349,14 +460,13 @@ class StorageClient:
         :param filename: The filename of the file to clone
         :param token: The token of the request
         :param experiment: The experiment which contains the file
+        :param sim_dir: The simulation folder to clone the file into
         :return: The local path of the cloned file,
         """
         for folder_entry in self.get_files_list(token, experiment):
             if filename in folder_entry['name']:
-                clone_destination: str = os.path.join(self._sim_dir, filename)
-                with open(clone_destination, "wb") as f:
-                    f.write(self.get_file(
-                        token, experiment, filename, by_name=True))
+                clone_destination: str = os.path.join(sim_dir, filename)
+                self.download_file(token, experiment, filename, clone_destination, by_name=True)
                 break
         else:
             return None  # filename not found
@@ -372,8 +482,8 @@ class StorageClient:
         :param dest_folder: folder location where it will be copy to
         :param filename: name of the file to be copied.
         """
-        with open(os.path.join(src_folder, filename), "wb") as f:
-            f.write(self.get_file(token, dest_folder, filename, by_name=True))
+        self.download_file(token, dest_folder, filename, os.path.join(src_folder, filename),
+                           by_name=True)
 
     # pylint: disable=no-self-use
     @staticmethod
@@ -387,43 +497,37 @@ class StorageClient:
         _, ext = os.path.splitext(filename)
         return ext.lower() in extensions
 
-    def copy_folder_content_to_tmp(self, token: str, folder):
+    def copy_folder_content_to_tmp(self, token: str, folder, sim_dir: str):
         """
         Copy the content of the folder located in storage/experiment into sim_dir folder
 
+        Folder listings and file downloads are run concurrently by a pool of
+        :code:`Settings.storage_clone_workers` threads, as when cloning the experiment files.
+
         :param token: The token of the request
         :param folder: the folder in the storage folder to copy in tmp folder,
                        it has included the uuid of the experiment
+        :param sim_dir: the simulation folder to copy the folder into
         """
-        folder['fullpath'] = folder['name']
-        child_folders = [folder]
-
-        while child_folders:
-            current_folder = child_folders.pop()
-            folder_path = current_folder['fullpath']
-            folder_uuid = urllib.parse.quote_plus(current_folder['uuid'])
-
-            for entry_to_copy in self.get_files_list(token, folder_uuid, folder=True):
-                entry_name, entry_type = entry_to_copy['name'], entry_to_copy['type']
+        folder_tmp_root = os.path.join(sim_dir, folder['name'])
+        created_folders = set()
 
-                if entry_type == 'folder':
-                    if entry_name not in self.__filtered_resources:
-                        entry_to_copy['fullpath'] = os.path.join(
-                            folder_path, entry_name)
-                        child_folders.append(entry_to_copy)
+        def submit_copy(folder_uuid: str, rel_path: str, entry: dict) -> Future:
+            folder_tmp_path = os.path.join(folder_tmp_root, rel_path)
+            if rel_path not in created_folders:
+                SimUtil.makedirs(folder_tmp_path)
+                created_folders.add(rel_path)
+            return executor.submit(self.copy_file_content,
+                                   token, folder_tmp_path, folder_uuid, entry['name'])
 
-                elif entry_type == 'file':
-                    folder_tmp_path = str(
-                        os.path.join(self._sim_dir, folder_path))
-
-                    SimUtil.makedirs(folder_tmp_path)
-
-                    self.copy_file_content(
-                        token,
-                        folder_tmp_path,
-                        folder_uuid,
-                        entry_name
-                    )
+        executor = _CancellableExecutor(max_workers=Settings.storage_clone_workers,
+                                        thread_name_prefix='StorageClientCopy')
+        try:
+            self._walk_concurrently(token, urllib.parse.quote_plus(folder['uuid']),
+                                    lambda _entry: False, executor, on_file=submit_copy)
+        finally:
+            executor.cancel_pending()
+            executor.shutdown(wait=True)
 
     # pylint: disable=broad-except
     def clone_all_experiment_files(self,
@@ -435,21 +539,123 @@ class StorageClient:
         Clones all the experiment files to a simulation folder.
         The caller has then the responsibility of managing this folder.
 
+        When :code:`Settings.storage_clone_mode` is 'archive', the experiment is downloaded as a
+        single zip archive, extracted while being received. The clone falls back to the 'files'
+        mode if the storage server can't provide the archive.
+
+        In 'files' mode, folder listings and file downloads are run concurrently by a pool of
+        :code:`Settings.storage_clone_workers` threads.
+        Unchanged files are copied from the experiment cache, when enabled,
+        instead of being downloaded.
+
         :param token: The token of the request
         :param experiment: The experiment to clone
         :param destination_dir: the directory in which to clone the files,
             if None or an empty string is provided, clones into a temporary folder
         :param exclude: a list of folders of files not to clone (folder names ends with '/')
-        :return: A dictionary containing the paths to the experiment files
+        :return: The directory the experiment files have been cloned into
         """
 
-        self._sim_dir = destination_dir if destination_dir else tempfile.mkdtemp(
-            prefix='nrp.')
-        # TODO Resources self.__resources_path = os.path.join(self._sim_dir, "resources")
+        # the client is shared by the simulations, the destination is kept local to the clone
+        if not destination_dir:
+            destination_dir = tempfile.mkdtemp(prefix='nrp.')
+        # TODO Resources self.__resources_path = os.path.join(destination_dir, "resources")
 
         exclude_rules = exclude if exclude is not None else []
+        is_excluded = self._exclusion_filter(exclude_rules)
+
+        if Settings.storage_clone_mode == 'archive':
+            if self._clone_archive(token, experiment, destination_dir, exclude_rules,
+                                   is_excluded):
+                return destination_dir
+
+            logger.info("The storage server doesn't provide the archive of '%s', "
+                        "cloning it file by file", experiment)
+
+        cache = self._get_experiment_cache()
+        try:
+            self._clone_concurrently(token, experiment, destination_dir, exclude_rules,
+                                     is_excluded, Settings.storage_clone_workers, cache)
+        finally:
+            if cache is not None:
+                cache.save()
+                logger.debug("Experiment cache stats: %s", cache.stats())
+
+        return destination_dir
 
-        # local helper functions
+    def _clone_archive(self, token: str, experiment: str, destination_dir: str,
+                       exclude_rules: List[str], is_excluded: Callable[[dict], bool]) -> bool:
+        """
+        Clones the experiment files into destination_dir from a zip archive of the experiment,
+        extracted while being downloaded.
+        The exclude rules are sent to the storage server and applied to the archive content too.
+
+        :param token: The token of the request
+        :param experiment: The experiment to clone
+        :param destination_dir: the directory in which to clone the files
+        :param exclude_rules: a list of folders of files not to clone
+        :param is_excluded: the exclusion filter of the experiment root folder entries
+        :return: True if the experiment has been cloned,
+                 False if the storage server doesn't provide experiment archives
+        """
+
+        params = [('type', 'zip')] + [('exclude', rule) for rule in exclude_rules]
+
+        try:
+            with self.__session.get(f'{self.__proxy_url}/storage/{experiment}',
+                                    params=params,
+                                    headers={'Authorization': f'Bearer {token}'},
+                                    stream=True) as res:
+
+                if res.status_code in self.UNSUPPORTED_STATUS_CODES:
+                    return False
+
+                if res.status_code < 200 or res.status_code >= 300:
+                    raise Exception(f'Failed to communicate with the storage server,'
+                                    f' status code {str(res.status_code)}')
+
+                # servers ignoring the type parameter reply with the experiment files list
+                content_type = res.headers.get('content-type', '').split(';')[0].strip()
+                if content_type not in self.ARCHIVE_CONTENT_TYPES:
+                    return False
+
+                zip_util.extract_stream(res.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE),
+                                        destination_dir, self._path_filter(is_excluded))
+                return True
+
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError) as err:
+            logger.exception(err)
+            raise ConnectionError from err
+
+    def _get_experiment_cache(self) -> Optional[ExperimentCache]:
+        """
+        :return: the experiment cache, created on first use, None if it's disabled
+        """
+        if Settings.experiment_cache_size <= 0:
+            return None
+
+        with self.__experiment_cache_lock:
+            if self.__experiment_cache is None:
+                try:
+                    self.__experiment_cache = ExperimentCache(
+                        Settings.experiment_cache_dir,
+                        Settings.experiment_cache_size * 1024 * 1024)
+                except OSError:
+                    logger.exception("Unable to create the experiment cache in '%s'",
+                                     Settings.experiment_cache_dir)
+                    return None
+            return self.__experiment_cache
+
+    @staticmethod
+    def _exclusion_filter(exclude_rules: List[str]) -> Callable[[dict], bool]:
+        """
+        Builds a predicate telling whether an entry of the experiment root folder
+        has to be excluded from a clone.
+
+        :param exclude_rules: a list of folders of files not to clone (folder names ends with '/')
+        :return: a function taking a storage folder entry and returning True if it is excluded
+        """
 
         def match_exclusion(name: str, exclusion_list: List[str]):
             return any((fnmatch.fnmatch(name, exc_rule) for exc_rule in exclusion_list))
@@ -466,22 +672,241 @@ class StorageClient:
         exclude_dirs_rules = [os.path.dirname(r) for r in exclude_rules
                               if is_directory(r)]
 
-        for entry_to_clone in self.get_files_list(token, experiment, folder=True):
+        def is_excluded(entry: dict) -> bool:
+            rules = exclude_dirs_rules if entry['type'] == 'folder' else exclude_file_rules
+            return match_exclusion(entry['name'], rules)
 
-            entry_type, entry_name = entry_to_clone['type'], entry_to_clone['name']
+        return is_excluded
 
-            if entry_type == 'folder' and not match_exclusion(entry_name, exclude_dirs_rules):
-                self.copy_folder_content_to_tmp(token, entry_to_clone)
+    def _path_filter(self, is_excluded: Callable[[dict], bool]) -> Callable[[str], bool]:
+        """
+        Builds a predicate telling whether a path, relative to the experiment folder,
+        is to be cloned, according to the exclusion filter of the experiment root folder entries.
 
-            elif entry_type == 'file' and not match_exclusion(entry_name, exclude_file_rules):
-                dest_file_path = os.path.join(destination_dir, entry_name)
+        :param is_excluded: the exclusion filter of the experiment root folder entries
+        :return: a function taking a relative path ('/' separated, folders may end with '/')
+                 and returning True if it is to be cloned
+        """
 
-                with open(dest_file_path, "wb") as file_clone:
-                    file_contents = self.get_file(token, experiment, entry_name,
-                                                  by_name=True)
-                    file_clone.write(file_contents)
+        def is_cloned(path: str) -> bool:
+            top_level_name, sep, _ = path.partition('/')
+            return not (self.check_file_extension(path.rstrip('/'), ['.swp']) or
+                        is_excluded({'name': top_level_name,
+                                     'type': 'folder' if sep else 'file'}))
 
-        return destination_dir
+        return is_cloned
+
+    def get_experiment_manifest(self, token: str, experiment: str,
+                                exclude: Optional[List[str]] = None) -> List[dict]:
+        """
+        Lists all the files and folders of an experiment, recursively.
+
+        The manifest is requested to the storage server, which applies the exclude rules,
+        in a single request. Storage servers not providing manifests are sent a listing request
+        per folder, the listings being run concurrently by a pool of
+        :code:`Settings.storage_clone_workers` threads.
+
+        :param token: a valid token to be used for the request
+        :param experiment: the name of the experiment
+        :param exclude: a list of folders of files not to list (folder names ends with '/')
+        :return: the storage listing entries of the experiment files and folders, with their
+                 'path', relative to the experiment folder, and the 'folder' to be used to
+                 download them (see get_file)
+        """
+        exclude_rules = exclude if exclude is not None else []
+        is_excluded = self._exclusion_filter(exclude_rules)
+
+        manifest = self._get_server_manifest(token, experiment, exclude_rules, is_excluded)
+        if manifest is not None:
+            return manifest
+
+        manifest = []
+
+        def add_entry(folder_uuid: str, rel_path: str, entry: dict):
+            manifest.append(dict(entry, path=os.path.join(rel_path, entry['name']),
+                                 folder=folder_uuid))
+
+        with ThreadPoolExecutor(max_workers=Settings.storage_clone_workers,
+                                thread_name_prefix='StorageClientManifest') as executor:
+            self._walk_concurrently(token, experiment, is_excluded, executor,
+                                    on_file=add_entry, on_folder=add_entry)
+        return manifest
+
+    def _get_server_manifest(self, token: str, experiment: str, exclude_rules: List[str],
+                             is_excluded: Callable[[dict], bool]) -> Optional[List[dict]]:
+        """
+        Requests the recursive listing of an experiment to the storage server
+
+        :param token: a valid token to be used for the request
+        :param experiment: the name of the experiment
+        :param exclude_rules: a list of folders of files not to list
+        :param is_excluded: the exclusion filter of the experiment root folder entries,
+                            applied in case the server ignores exclude_rules
+        :return: the manifest (see get_experiment_manifest),
+                 None if the storage server doesn't provide manifests
+        """
+        params = [('recursive', 'true')] + [('exclude', rule) for rule in exclude_rules]
+
+        try:
+            res = self.__session.get(f'{self.__proxy_url}/storage/{experiment}',
+                                     params=params,
+                                     headers={'Authorization': f'Bearer {token}'})
+        except requests.exceptions.ConnectionError as err:
+            logger.exception(err)
+            raise ConnectionError from err
+
+        if res.status_code in self.UNSUPPORTED_STATUS_CODES:
+            return None
+
+        if res.status_code < 200 or res.status_code >= 300:
+            raise Exception(f'Failed to communicate with the storage server,'
+                            f' status code {str(res.status_code)}')
+
+        entries = res.json()
+        # servers ignoring the recursive parameter reply with the experiment root folder listing
+        if any('path' not in entry for entry in entries):
+            return None
+
+        is_cloned = self._path_filter(is_excluded)
+        manifest = []
+        for entry in entries:
+            if not is_cloned(entry['path'] + ('/' if entry['type'] == 'folder' else '')):
+                continue
+            if 'folder' not in entry:
+                entry['folder'] = urllib.parse.quote_plus(entry['parent']) \
+                    if '/' in entry['path'] and entry.get('parent') else experiment
+            manifest.append(entry)
+        return manifest
+
+    def _walk_concurrently(self, token: str, experiment: str,
+                           is_excluded: Callable[[dict], bool],
+                           executor: ThreadPoolExecutor,
+                           on_file: Callable[[str, str, dict], Optional[Future]],
+                           on_folder: Optional[Callable[[str, str, dict], None]] = None):
+        """
+        Walks the experiment folders, listing them concurrently.
+        Sub-folders are listed as soon as their parent listing has been received.
+
+        The callbacks are run by the calling thread, as soon as an entry is found.
+        on_file may return a future (e.g. a download submitted to executor) to be waited for too.
+        The first failing task makes the whole walk fail: its exception is raised.
+
+        :param token: The token of the request
+        :param experiment: The experiment to walk
+        :param is_excluded: the exclusion filter of the experiment root folder entries
+        :param executor: the pool running the listings
+        :param on_file: called with the (folder uuid, relative path of the folder, entry)
+                        of every file
+        :param on_folder: called with the (folder uuid, relative path of the folder, entry)
+                          of every folder
+        """
+
+        def list_folder(folder_uuid: str, rel_path: str):
+            return folder_uuid, rel_path, self.get_files_list(token, folder_uuid, folder=True)
+
+        listings = {executor.submit(list_folder, experiment, '')}
+        pending = set(listings)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+
+            for future in done:
+                result = future.result()  # raises the exception of a failed task
+
+                if future not in listings:
+                    continue
+                listings.discard(future)
+
+                folder_uuid, rel_path, entries = result
+                is_root = not rel_path
+
+                for entry in entries:
+                    entry_type, entry_name = entry['type'], entry['name']
+
+                    if is_root and is_excluded(entry):
+                        continue
+
+                    if entry_type == 'folder':
+                        if entry_name not in self.__filtered_resources:
+                            if on_folder is not None:
+                                on_folder(folder_uuid, rel_path, entry)
+                            listing = executor.submit(list_folder,
+                                                      urllib.parse.quote_plus(entry['uuid']),
+                                                      os.path.join(rel_path, entry_name))
+                            listings.add(listing)
+                            pending.add(listing)
+
+                    elif entry_type == 'file':
+                        file_future = on_file(folder_uuid, rel_path, entry)
+                        if file_future is not None:
+                            pending.add(file_future)
+
+    def _clone_concurrently(self, token: str, experiment: str, destination_dir: str,
+                            exclude_rules: List[str], is_excluded: Callable[[dict], bool],
+                            workers: int, cache: Optional[ExperimentCache] = None):
+        """
+        Clones the experiment files into destination_dir using a pool of worker threads.
+
+        The files to be downloaded are taken from the experiment manifest provided by the
+        storage server. Storage servers not providing manifests are walked concurrently:
+        every folder listing and every file download is a task of its own, so that
+        sub-folders are walked while the files already found are being downloaded.
+        The exclusion rules apply to the entries of the experiment root folder only.
+
+        The first failing task makes the whole clone fail: the tasks not started yet are
+        cancelled and its exception is raised, once the running tasks have returned.
+        So does a manifest entry whose path is absolute or leads out of destination_dir.
+
+        :param token: The token of the request
+        :param experiment: The experiment to clone
+        :param destination_dir: the directory in which to clone the files
+        :param exclude_rules: a list of folders of files not to clone
+        :param is_excluded: the exclusion filter of the experiment root folder entries
+        :param workers: the maximum number of concurrent requests to the storage server
+        :param cache: the cache to fetch the files from, None to download all of them
+        """
+
+        def download_file(folder_uuid: str, rel_path: str, entry: dict):
+            dest_folder = os.path.join(destination_dir, rel_path)
+
+            def download():
+                self.copy_file_content(token, dest_folder, folder_uuid, entry['name'])
+
+            if cache is None:
+                download()
+            else:
+                cache.fetch(experiment, os.path.join(rel_path, entry['name']), entry,
+                            os.path.join(dest_folder, entry['name']), download)
+
+        created_folders = set()
+
+        def submit_download(folder_uuid: str, rel_path: str, entry: dict) -> Future:
+            if rel_path not in created_folders:
+                SimUtil.makedirs(os.path.join(destination_dir, rel_path))
+                created_folders.add(rel_path)
+            return executor.submit(download_file, folder_uuid, rel_path, entry)
+
+        manifest = self._get_server_manifest(token, experiment, exclude_rules, is_excluded)
+
+        executor = _CancellableExecutor(max_workers=workers,
+                                        thread_name_prefix='StorageClientClone')
+        try:
+            if manifest is None:
+                self._walk_concurrently(token, experiment, is_excluded, executor,
+                                        on_file=submit_download)
+            else:
+                downloads = []
+                for entry in (e for e in manifest if e['type'] == 'file'):
+                    # the manifest entries can't be written outside destination_dir
+                    rel_path = zip_util.checked_relpath(entry['path'])
+                    zip_util.checked_relpath(entry['name'])
+                    downloads.append(submit_download(entry['folder'], os.path.dirname(rel_path),
+                                                     entry))
+                for download in as_completed(downloads):
+                    download.result()  # raises the exception of a failed download
+        finally:
+            executor.cancel_pending()
+            executor.shutdown(wait=True)
 
     def get_folder_uuid_by_name(self, token, context_id, folder_name):
         """
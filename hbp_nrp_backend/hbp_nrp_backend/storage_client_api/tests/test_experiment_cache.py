@@ -0,0 +1,175 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+ExperimentCache unit test
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from hbp_nrp_backend.storage_client_api.experiment_cache import ExperimentCache
+
+
+def _entry(size, modified_on="2017-08-30T11:23:47.842214Z", **fields):
+    return dict(type="file", size=size, modifiedOn=modified_on, **fields)
+
+
+class TestExperimentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+
+    def __fetch(self, cache, rel_path, entry, content, experiment="exp"):
+        dest_path = os.path.join(self.tmp_dir, os.path.basename(rel_path))
+
+        def download():
+            with open(dest_path, "wb") as f:
+                f.write(content)
+
+        mocked_download = MagicMock(side_effect=download)
+        hit = cache.fetch(experiment, rel_path, entry, dest_path, mocked_download)
+
+        with open(dest_path, "rb") as f:
+            self.assertEqual(f.read(), content)
+        return hit, mocked_download
+
+    def test_miss_then_hit(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+
+        hit, download = self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+        self.assertFalse(hit)
+        download.assert_called_once()
+
+        hit, download = self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+        self.assertTrue(hit)
+        download.assert_not_called()
+
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0,
+                                         'entries': 1, 'size': 4})
+
+    def test_changed_file_is_downloaded(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+
+        hit, download = self.__fetch(cache, "a.txt",
+                                     _entry(4, modified_on="2018-01-01T00:00:00Z"), b"bbbb")
+        self.assertFalse(hit)
+        download.assert_called_once()
+
+    def test_content_digest_is_shared(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+        self.__fetch(cache, "a.txt", _entry(4, hash="1234"), b"aaaa", experiment="exp_0")
+
+        hit, _ = self.__fetch(cache, "copy_of_a.txt", _entry(4, hash="1234"), b"aaaa",
+                              experiment="exp_1")
+        self.assertTrue(hit)
+
+    def test_unidentified_file_is_not_cached(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+
+        for _ in range(2):
+            hit, download = self.__fetch(cache, "a.txt", {"type": "file"}, b"aaaa")
+            self.assertFalse(hit)
+            download.assert_called_once()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ExperimentCache(self.cache_dir, 10)
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+        self.__fetch(cache, "b.txt", _entry(4), b"bbbb")
+        # a.txt becomes the most recently used
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+
+        self.__fetch(cache, "c.txt", _entry(4), b"cccc")
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 8)
+
+        self.assertTrue(self.__fetch(cache, "a.txt", _entry(4), b"aaaa")[0])
+        self.assertFalse(self.__fetch(cache, "b.txt", _entry(4), b"bbbb")[0])
+
+    def test_file_larger_than_cache(self):
+        cache = ExperimentCache(self.cache_dir, 2)
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "blobs")), [])
+
+    def test_persistence(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+        cache.save()
+
+        # a blob not in the index, e.g. stored by another process, and a blob being written
+        with open(os.path.join(self.cache_dir, "blobs", "orphan"), "wb") as f:
+            f.write(b"orphan")
+        with open(os.path.join(self.cache_dir, "blobs", "orphan.1.abcd.tmp"), "wb") as f:
+            f.write(b"orphan")
+
+        reloaded = ExperimentCache(self.cache_dir, 1024)
+        self.assertEqual(reloaded.size, 10)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.cache_dir, "blobs"))),
+                         sorted(["orphan", "orphan.1.abcd.tmp",
+                                 ExperimentCache.entry_key("exp", "a.txt", _entry(4))]))
+        self.assertTrue(self.__fetch(reloaded, "a.txt", _entry(4), b"aaaa")[0])
+
+    def test_shared_cache_dir(self):
+        cache_0 = ExperimentCache(self.cache_dir, 1024)
+        cache_1 = ExperimentCache(self.cache_dir, 1024)
+        self.__fetch(cache_0, "a.txt", _entry(4), b"aaaa")
+        self.__fetch(cache_1, "b.txt", _entry(4), b"bbbb")
+
+        # the index keeps the entries of both caches, whichever saves first
+        cache_0.save()
+        ExperimentCache(self.cache_dir, 1024)
+        cache_1.save()
+
+        with open(os.path.join(self.cache_dir, "index.json")) as f:
+            self.assertEqual(len(json.load(f)), 2)
+        reloaded = ExperimentCache(self.cache_dir, 1024)
+        self.assertTrue(self.__fetch(reloaded, "a.txt", _entry(4), b"aaaa")[0])
+        self.assertTrue(self.__fetch(reloaded, "b.txt", _entry(4), b"bbbb")[0])
+
+    def test_malformed_index(self):
+        os.makedirs(os.path.join(self.cache_dir, "blobs"))
+        with open(os.path.join(self.cache_dir, "index.json"), "w") as f:
+            json.dump({"key": "value"}, f)
+
+        cache = ExperimentCache(self.cache_dir, 1024)
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = ExperimentCache(self.cache_dir, 1024)
+        self.__fetch(cache, "a.txt", _entry(4), b"aaaa")
+
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, "blobs")), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,13 +26,20 @@ Storage client unit test
 """
 from builtins import object
 import inspect
+import io
 import unittest
 import shutil
 import os
 import requests
 import json
-from unittest.mock import patch, mock_open
+import zipfile
+import tempfile
+import time
+import urllib.parse
+from unittest.mock import patch, mock_open, MagicMock
+from hbp_nrp_backend.storage_client_api.experiment_cache import ExperimentCache
 from hbp_nrp_backend.storage_client_api.storage_client import StorageClient
+from hbp_nrp_commons.workspace.settings import Settings
 
 # Used to mock all the http requests by providing a response and a
 # status code
@@ -189,15 +196,28 @@ class TestStorageClient(unittest.TestCase):
                 shutil.rmtree(d)
         self.temporary_directory_to_clean = []
 
+    # HTTP SESSION
+    def test_session_shared_among_instances(self):
+        session = StorageClient()._StorageClient__session
+        self.assertIsInstance(session, requests.Session)
+        self.assertIs(StorageClient()._StorageClient__session, session)
+
+    def test_create_session_pool_size(self):
+        session = StorageClient._create_session(42)
+
+        for prefix in ('http://', 'https://'):
+            adapter = session.get_adapter(prefix + 'storage')
+            self.assertEqual(adapter._pool_maxsize, 42)
+
     # GET USER
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_user_successfully(self, mocked_get):
         mocked_get.side_effect = mocked_get_user_ok
         client = StorageClient()
         res = client.get_user("faketoken")
         self.assertEqual(res, {"id": "fake_id"})
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_user_not_ok(self, mocked_get):
         mocked_get.side_effect = mocked_request_not_ok
 
@@ -208,7 +228,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Could not verify auth token, status code 404' in context.exception.args)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_user_connection_error(self, mocked_get):
         expected_exception_cls = ConnectionError
         mocked_get.side_effect = requests.exceptions.ConnectionError
@@ -220,7 +240,7 @@ class TestStorageClient(unittest.TestCase):
 
     # LIST EXPERIMENTS
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_experiments_successfully(self, mocked_get):
         mocked_get.side_effect = mocked_get_experiments_ok
 
@@ -232,7 +252,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertEqual(
             res[1]['uuid'], "b246cc8e-d844-4826-ae5b-d2c023b893d8")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_experiments_failed(self, mocked_get):
         mocked_get.side_effect = mocked_request_not_ok
 
@@ -243,7 +263,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_experiment_connection_error(self, mocked_get):
         expected_exception_cls = ConnectionError
         mocked_get.side_effect = requests.exceptions.ConnectionError
@@ -254,7 +274,7 @@ class TestStorageClient(unittest.TestCase):
             client.list_experiments("fakeToken", 'ctx')
 
     # GET FILE
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_file_by_name_successfully(self, mocked_get):
         client = StorageClient()
 
@@ -270,7 +290,7 @@ class TestStorageClient(unittest.TestCase):
         parsed_conf = json.loads(file)
         self.assertEqual(parsed_conf["SimulationName"], "tf_exchange")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_zip_by_name_successfully(self, mocked_get):
         client = StorageClient()
 
@@ -286,7 +306,7 @@ class TestStorageClient(unittest.TestCase):
             "fakeToken", "fakeExperiment", "fake.zip", by_name=True)
         self.assertIsInstance(res, bytes)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_file_name_successfully(self, mocked_get):
         client = StorageClient()
 
@@ -302,7 +322,7 @@ class TestStorageClient(unittest.TestCase):
 
         self.assertEqual(parsed_conf["SimulationTimeout"], 1)
 
-    @patch('requests.get', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.get', side_effect=mocked_request_not_ok)
     def test_get_file_fail(self, mocked_put):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -312,7 +332,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_file_connection_error(self, mocked_put):
         client = StorageClient()
         mocked_put.side_effect = requests.exceptions.ConnectionError
@@ -320,15 +340,83 @@ class TestStorageClient(unittest.TestCase):
             client.get_file(
                 "fakeToken", "fakeExperiment", "simulation_config.json")
 
+    # DOWNLOAD FILE
+    def __mock_streamed_response(self, mocked_get, status_code=200, chunks=(b"da", b"ta")):
+        response = MagicMock(status_code=status_code)
+        response.__enter__.return_value = response
+        response.iter_content.return_value = iter(chunks)
+        mocked_get.return_value = response
+        return response
+
+    @patch('requests.Session.get')
+    def test_download_file_successfully(self, mocked_get):
+        response = self.__mock_streamed_response(mocked_get)
+        client = StorageClient()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest_path = os.path.join(tmp_dir, "fakeFile")
+            res = client.download_file("fakeToken", "fakeExperiment", "fakeFile", dest_path,
+                                       by_name=True)
+
+            self.assertEqual(res, dest_path)
+            with open(dest_path, "rb") as f:
+                self.assertEqual(f.read(), b"data")
+            self.assertEqual(os.listdir(tmp_dir), ["fakeFile"])
+
+        self.assertTrue(mocked_get.call_args.kwargs['stream'])
+        self.assertIn("fakeExperiment/fakeFile?byname=true", mocked_get.call_args.args[0])
+        response.iter_content.assert_called_once_with(chunk_size=StorageClient.DOWNLOAD_CHUNK_SIZE)
+
+    @patch('requests.Session.get')
+    def test_download_file_fail(self, mocked_get):
+        self.__mock_streamed_response(mocked_get, status_code=404)
+        client = StorageClient()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest_path = os.path.join(tmp_dir, "fakeFile")
+            self.assertRaises(Exception, client.download_file,
+                              "fakeToken", "fakeExperiment", "fakeFile", dest_path)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    @patch('requests.Session.get')
+    def test_download_file_interrupted(self, mocked_get):
+        def broken_stream():
+            yield b"da"
+            raise requests.exceptions.ChunkedEncodingError()
+
+        self.__mock_streamed_response(mocked_get, chunks=broken_stream())
+        client = StorageClient()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest_path = os.path.join(tmp_dir, "fakeFile")
+            with open(dest_path, "wb") as f:
+                f.write(b"previous")
+
+            self.assertRaises(ConnectionError, client.download_file,
+                              "fakeToken", "fakeExperiment", "fakeFile", dest_path)
+
+            # neither partial files nor a truncated destination
+            self.assertEqual(os.listdir(tmp_dir), ["fakeFile"])
+            with open(dest_path, "rb") as f:
+                self.assertEqual(f.read(), b"previous")
+
+    @patch('requests.Session.get')
+    def test_download_file_connection_error(self, mocked_get):
+        mocked_get.side_effect = requests.exceptions.ConnectionError()
+        client = StorageClient()
+
+        self.assertRaises(ConnectionError, client.download_file,
+                          "fakeToken", "fakeExperiment", "fakeFile", "/some/path/fakeFile")
+
     # DELETE FILE
-    @patch('requests.delete', side_effect=mocked_delete_experiment_ok)
+    @patch('requests.Session.delete', side_effect=mocked_delete_experiment_ok)
     def test_delete_file_successfully(self, mocked_delete):
         client = StorageClient()
         res = client.delete_file(
             "fakeToken", "fakeExperiment", "simulation_config.json")
         self.assertEqual(res, "simulation_config.json")
 
-    @patch('requests.delete', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.delete', side_effect=mocked_request_not_ok)
     def test_delete_file_failed(self, mocked_delete):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -338,7 +426,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.delete')
+    @patch('requests.Session.delete')
     def test_delete_file_connection_error(self, mocked_put):
         client = StorageClient()
         mocked_put.side_effect = requests.exceptions.ConnectionError
@@ -347,7 +435,7 @@ class TestStorageClient(unittest.TestCase):
                 "fakeToken", "fakeExperiment", "simulation_config.json")
 
     # CREATE OR UPDATE
-    @patch('requests.post', side_effect=mocked_create_or_update_ok)
+    @patch('requests.Session.post', side_effect=mocked_create_or_update_ok)
     def test_create_or_update_successfully(self, mocked_post):
         client = StorageClient()
         res = client.create_or_update(
@@ -358,7 +446,7 @@ class TestStorageClient(unittest.TestCase):
             "text/plain")
         self.assertEqual(res, 200)
 
-    @patch('requests.post', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.post', side_effect=mocked_request_not_ok)
     def test_create_or_update_failed(self, mocked_post):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -372,7 +460,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_create_or_update_connection_error(self, mocked_post):
         client = StorageClient()
         mocked_post.side_effect = requests.exceptions.ConnectionError
@@ -385,7 +473,7 @@ class TestStorageClient(unittest.TestCase):
                 "text/plain")
 
     # CREATE FOLDER
-    @patch('requests.post', side_effect=mocked_create_folder_ok)
+    @patch('requests.Session.post', side_effect=mocked_create_folder_ok)
     def test_create_folder_successfully(self, mocked_post):
         client = StorageClient()
         res = client.create_folder(
@@ -395,7 +483,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertEqual(res['uuid'], '5b1a2363-1529-40cd-a8b7-94bfd6dea23d')
         self.assertEqual(res['name'], 'fakeFolder')
 
-    @patch('requests.post', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.post', side_effect=mocked_request_not_ok)
     def test_create_folder_failed(self, mocked_post):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -407,7 +495,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_create_folder_connection_error(self, mocked_post):
         client = StorageClient()
         mocked_post.side_effect = requests.exceptions.ConnectionError
@@ -418,7 +506,7 @@ class TestStorageClient(unittest.TestCase):
                 "fakeName")
 
     # EXTRACT ZIP
-    @patch('requests.post', side_effect=mocked_create_and_extract_zip_ok)
+    @patch('requests.Session.post', side_effect=mocked_create_and_extract_zip_ok)
     def test_create_and_extract_zip_successfully(self, mocked_post):
         client = StorageClient()
         res = client.create_and_extract_zip(
@@ -428,7 +516,7 @@ class TestStorageClient(unittest.TestCase):
             "FakeContent")
         self.assertEqual(res, 200)
 
-    @patch('requests.post', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.post', side_effect=mocked_request_not_ok)
     def test_create_and_extract_zip_failed(self, mocked_post):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -440,7 +528,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_create_and_extract_zip_connection_error(self, mocked_post):
         client = StorageClient()
         mocked_post.side_effect = requests.exceptions.ConnectionError
@@ -453,7 +541,7 @@ class TestStorageClient(unittest.TestCase):
 
     # LIST FILES
 
-    @patch('requests.get', side_effect=mocked_get_files_list_ok)
+    @patch('requests.Session.get', side_effect=mocked_get_files_list_ok)
     def test_get_files_list_successfully(self, mocked_post):
         client = StorageClient()
         res = client.get_files_list(
@@ -463,7 +551,7 @@ class TestStorageClient(unittest.TestCase):
             res[0]['uuid'], '07b35b8f-67cd-4e94-8bec-5ede8049590d')
         self.assertEqual(res[1]['name'], 'simple_move_robot.py')
 
-    @patch('requests.get', side_effect=mocked_request_not_ok)
+    @patch('requests.Session.get', side_effect=mocked_request_not_ok)
     def test_get_files_list_failed(self, mocked_post):
         client = StorageClient()
         with self.assertRaises(Exception) as context:
@@ -474,7 +562,7 @@ class TestStorageClient(unittest.TestCase):
         self.assertTrue(
             'Failed to communicate with the storage server, status code 404' in context.exception.args)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_files_list_connection_error(self, mocked_post):
         client = StorageClient()
         mocked_post.side_effect = requests.exceptions.ConnectionError
@@ -505,15 +593,12 @@ class TestStorageClient(unittest.TestCase):
         }]
         res = client.clone_file("fakeToken",
                                 "fakeFile",
-                                "fakeExperiment")
+                                "fakeExperiment",
+                                "/some/path")
         self.assertEqual(res, None)
 
     # CLONE ALL EXPERIMENT FILES
-    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
-    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_file')
-    def test_clone_all_experiment_files(self, mocked_get, mocked_list):
-        mocked_get.side_effect = None
-
+    def __mock_experiment_listing(self, mocked_list):
         experiment_name = "fakeExperiment"
 
         env_editor_name = "env_editor.autosaved"
@@ -570,20 +655,313 @@ class TestStorageClient(unittest.TestCase):
 
         mocked_list.side_effect = mocked_list_fun
 
+        return experiment_name
+
+    def __clone_all_experiment_files(self, mocked_download, mocked_list, workers, exclude=None):
+        experiment_name = self.__mock_experiment_listing(mocked_list)
+        mocked_download.reset_mock()
+
         client = StorageClient()
 
-        with patch("builtins.open", mock_open(read_data="data")) as mocked_open, \
-                patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil') as mocked_sim_util:
+        with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil') as mocked_sim_util, \
+                patch.object(Settings, 'storage_clone_workers', workers), \
+                patch.object(Settings, 'experiment_cache_size', 0):
             sim_dir = '/some/path/over/the/rainbow'
-            client.clone_all_experiment_files(
-                "fakeToken", experiment_name, destination_dir=sim_dir)
-
-            mocked_open.assert_any_call(
-                os.path.join(sim_dir, env_editor_name), 'wb')
-            mocked_open.assert_any_call(
-                os.path.join(sim_dir, exp_conf_name), 'wb')
-            mocked_open.assert_any_call(os.path.join(
-                sim_dir, tfs_dir_name, simple_robot_name), 'wb')
+            res = client.clone_all_experiment_files(
+                "fakeToken", experiment_name, destination_dir=sim_dir, exclude=exclude)
+
+            self.assertEqual(res, sim_dir)
+
+        downloaded = {c.args[3] for c in mocked_download.call_args_list}
+        return sim_dir, downloaded
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest',
+           return_value=None)
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_clone_all_experiment_files(self, mocked_download, mocked_list, _mocked_manifest):
+        for workers in [1, 4]:
+            sim_dir, downloaded = self.__clone_all_experiment_files(mocked_download, mocked_list,
+                                                                    workers)
+
+            self.assertEqual(downloaded, {
+                os.path.join(sim_dir, "env_editor.autosaved"),
+                os.path.join(sim_dir, 'simulation_config.json'),
+                os.path.join(sim_dir, 'transfer_functions', 'simple_move_robot.py')})
+            mocked_download.assert_any_call("fakeToken", "fakeExperiment",
+                                            'simulation_config.json',
+                                            os.path.join(sim_dir, 'simulation_config.json'),
+                                            by_name=True)
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest',
+           return_value=None)
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_clone_all_experiment_files_exclude(self, mocked_download, mocked_list, _mocked_manifest):
+        for workers in [1, 4]:
+            sim_dir, downloaded = self.__clone_all_experiment_files(
+                mocked_download, mocked_list, workers,
+                exclude=['transfer_functions/', '*.autosaved'])
+
+            self.assertEqual(downloaded, {os.path.join(sim_dir, 'simulation_config.json')})
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_copy_folder_content_to_tmp(self, mocked_download, mocked_list):
+        experiment_name = self.__mock_experiment_listing(mocked_list)
+
+        client = StorageClient()
+        sim_dir = '/some/path/over/the/rainbow'
+        for workers in [1, 4]:
+            mocked_download.reset_mock()
+            with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil'), \
+                    patch.object(Settings, 'storage_clone_workers', workers):
+                client.copy_folder_content_to_tmp("fakeToken",
+                                                  {"name": "resources", "uuid": experiment_name},
+                                                  sim_dir)
+
+            self.assertEqual({c.args[3] for c in mocked_download.call_args_list}, {
+                os.path.join(sim_dir, 'resources', "env_editor.autosaved"),
+                os.path.join(sim_dir, 'resources', 'simulation_config.json'),
+                os.path.join(sim_dir, 'resources', 'transfer_functions', 'simple_move_robot.py')})
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest',
+           return_value=None)
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_clone_all_experiment_files_to_tmp_dir(self, mocked_download, mocked_list, _mocked_manifest):
+        experiment_name = self.__mock_experiment_listing(mocked_list)
+
+        client = StorageClient()
+        with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil'), \
+                patch('hbp_nrp_backend.storage_client_api.storage_client.tempfile.mkdtemp',
+                      return_value='/tmp/nrp.fake'), \
+                patch.object(Settings, 'experiment_cache_size', 0):
+            res = client.clone_all_experiment_files("fakeToken", experiment_name)
+
+        self.assertEqual(res, '/tmp/nrp.fake')
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest',
+           return_value=None)
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_clone_all_experiment_files_concurrently_fails_fast(self, mocked_download, mocked_list, _mocked_manifest):
+        files_count = 100
+        mocked_list.return_value = [{"uuid": f"file_{i}", "name": f"file_{i}", "type": "file"}
+                                    for i in range(files_count)]
+
+        def failing_download(*_args, **_kwargs):
+            time.sleep(0.01)
+            raise Exception("Download failed")
+
+        mocked_download.side_effect = failing_download
+
+        client = StorageClient()
+        with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil'), \
+                patch.object(Settings, 'storage_clone_workers', 2), \
+                patch.object(Settings, 'experiment_cache_size', 0):
+            self.assertRaisesRegex(Exception, "Download failed",
+                                   client.clone_all_experiment_files,
+                                   "fakeToken", "fakeExperiment", destination_dir='/some/path')
+
+        # the pending downloads have been cancelled
+        self.assertLess(mocked_download.call_count, files_count // 4)
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest',
+           return_value=None)
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    def test_clone_all_experiment_files_cached(self, mocked_download, mocked_list, _mocked_manifest):
+        listing = {
+            "fakeExperiment": [
+                {"uuid": "fakeExperiment/a.txt", "name": "a.txt", "type": "file",
+                 "size": 4, "modifiedOn": "2017-08-30T11:23:47.842214Z"},
+                {"uuid": "fakeExperiment/sub", "name": "sub", "type": "folder"}],
+            urllib.parse.quote_plus("fakeExperiment/sub"): [
+                {"uuid": "fakeExperiment/sub/b.txt", "name": "b.txt", "type": "file",
+                 "size": 4, "modifiedOn": "2017-08-30T11:23:47.842214Z"}]
+        }
+        mocked_list.side_effect = lambda _token, folder_uuid, folder: listing[folder_uuid]
+
+        def download(_token, _experiment, _filename, dest_path, by_name):
+            with open(dest_path, "wb") as f:
+                f.write(b"data")
+
+        mocked_download.side_effect = download
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ExperimentCache(os.path.join(tmp_dir, "cache"), 1024)
+            client = StorageClient()
+
+            with patch.object(StorageClient, '_get_experiment_cache', return_value=cache):
+                for i in range(2):
+                    sim_dir = os.path.join(tmp_dir, f"sim_{i}")
+                    os.mkdir(sim_dir)
+                    client.clone_all_experiment_files("fakeToken", "fakeExperiment",
+                                                      destination_dir=sim_dir)
+
+                    for rel_path in ("a.txt", os.path.join("sub", "b.txt")):
+                        with open(os.path.join(sim_dir, rel_path), "rb") as f:
+                            self.assertEqual(f.read(), b"data")
+
+            # the second clone has been served by the cache
+            self.assertEqual(mocked_download.call_count, 2)
+            self.assertEqual(cache.stats()["hits"], 2)
+            self.assertEqual(cache.stats()["misses"], 2)
+
+    # EXPERIMENT MANIFEST
+    @patch('requests.Session.get')
+    def test_get_experiment_manifest(self, mocked_get):
+        mocked_get.return_value = MockResponse([
+            {"name": "simulation_config.json", "type": "file",
+             "path": "simulation_config.json", "parent": "fakeExperiment"},
+            {"name": "tfs", "type": "folder", "path": "tfs", "parent": "fakeExperiment"},
+            {"name": "tf.py", "type": "file", "path": "tfs/tf.py", "parent": "fakeExperiment/tfs"},
+            {"name": ".tf.py.swp", "type": "file", "path": "tfs/.tf.py.swp",
+             "parent": "fakeExperiment/tfs"},
+            # to be excluded, in case the server didn't
+            {"name": "logs", "type": "folder", "path": "logs", "parent": "fakeExperiment"},
+            {"name": "sim.log", "type": "file", "path": "logs/sim.log",
+             "parent": "fakeExperiment/logs"},
+        ], 200)
+
+        client = StorageClient()
+        manifest = client.get_experiment_manifest("fakeToken", "fakeExperiment",
+                                                  exclude=["logs/"])
+
+        self.assertEqual([(e["path"], e["folder"]) for e in manifest],
+                         [("simulation_config.json", "fakeExperiment"),
+                          ("tfs", "fakeExperiment"),
+                          ("tfs/tf.py", urllib.parse.quote_plus("fakeExperiment/tfs"))])
+        self.assertEqual(mocked_get.call_args.kwargs['params'],
+                         [('recursive', 'true'), ('exclude', 'logs/')])
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('requests.Session.get')
+    def test_get_experiment_manifest_fallback(self, mocked_get, mocked_list):
+        experiment_name = self.__mock_experiment_listing(mocked_list)
+        client = StorageClient()
+
+        for response in [MockResponse(None, 501),
+                         MockResponse([{"name": "a", "type": "file"}], 200)]:
+            mocked_get.return_value = response
+
+            manifest = client.get_experiment_manifest("fakeToken", experiment_name,
+                                                      exclude=["*.autosaved"])
+
+            self.assertEqual(sorted((e["path"], e["folder"]) for e in manifest), [
+                ('simulation_config.json', experiment_name),
+                ('transfer_functions', experiment_name),
+                ('transfer_functions/simple_move_robot.py', "6a63d03e-6dad-4793-80d7-8e32a83aaa66")])
+
+    @patch('requests.Session.get')
+    def test_get_experiment_manifest_failed(self, mocked_get):
+        mocked_get.return_value = MockResponse(None, 500)
+        client = StorageClient()
+
+        self.assertRaises(Exception, client.get_experiment_manifest,
+                          "fakeToken", "fakeExperiment")
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.get_files_list')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest')
+    def test_clone_all_experiment_files_manifest(self, mocked_manifest, mocked_download,
+                                                 mocked_list):
+        mocked_manifest.return_value = [
+            {"name": "a.txt", "type": "file", "path": "a.txt", "folder": "fakeExperiment"},
+            {"name": "sub", "type": "folder", "path": "sub", "folder": "fakeExperiment"},
+            {"name": "b.txt", "type": "file", "path": "sub/b.txt", "folder": "fakeExperiment%2Fsub"}]
+
+        client = StorageClient()
+        with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil'), \
+                patch.object(Settings, 'experiment_cache_size', 0):
+            client.clone_all_experiment_files("fakeToken", "fakeExperiment",
+                                              destination_dir='/sim/dir', exclude=['logs/'])
+
+        mocked_manifest.assert_called_once()
+        self.assertEqual(mocked_manifest.call_args.args[2], ['logs/'])
+        mocked_list.assert_not_called()
+        self.assertEqual(sorted(c.args[1:4] for c in mocked_download.call_args_list), [
+            ("fakeExperiment", "a.txt", "/sim/dir/a.txt"),
+            ("fakeExperiment%2Fsub", "b.txt", "/sim/dir/sub/b.txt")])
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.download_file')
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._get_server_manifest')
+    def test_clone_all_experiment_files_manifest_illegal_path(self, mocked_manifest,
+                                                              mocked_download):
+        client = StorageClient()
+        for path, name in (("../a.txt", "a.txt"), ("/etc/a.txt", "a.txt"),
+                           ("sub/../../a.txt", "a.txt"), ("a.txt", "../a.txt")):
+            mocked_manifest.return_value = [
+                {"name": name, "type": "file", "path": path, "folder": "fakeExperiment"}]
+            with patch('hbp_nrp_backend.storage_client_api.storage_client.SimUtil'), \
+                    patch.object(Settings, 'experiment_cache_size', 0):
+                self.assertRaises(ValueError, client.clone_all_experiment_files,
+                                  "fakeToken", "fakeExperiment", destination_dir='/sim/dir')
+        mocked_download.assert_not_called()
+
+    def __mock_archive_response(self, mocked_get, status_code=200,
+                                content_type="application/zip", content=b""):
+        response = MagicMock(status_code=status_code, headers={"content-type": content_type})
+        response.__enter__.return_value = response
+        response.iter_content.return_value = iter([content])
+        mocked_get.return_value = response
+        return response
+
+    @patch('requests.Session.get')
+    def test_clone_all_experiment_files_archive(self, mocked_get):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("simulation_config.json", b"config")
+            zf.writestr("transfer_functions/simple_move_robot.py", b"tf")
+            zf.writestr("transfer_functions/.simple_move_robot.py.swp", b"swap")
+            # to be excluded, in case the server didn't
+            zf.writestr("env_editor.autosaved", b"autosaved")
+            zf.writestr("logs/sim.log", b"log")
+        self.__mock_archive_response(mocked_get, content=archive.getvalue())
+
+        client = StorageClient()
+        with tempfile.TemporaryDirectory() as sim_dir, \
+                patch.object(Settings, 'storage_clone_mode', 'archive'):
+            res = client.clone_all_experiment_files("fakeToken", "fakeExperiment",
+                                                    destination_dir=sim_dir,
+                                                    exclude=['*.autosaved', 'logs/'])
+
+            self.assertEqual(res, sim_dir)
+            self.assertEqual(sorted(os.listdir(sim_dir)),
+                             ['simulation_config.json', 'transfer_functions'])
+            self.assertEqual(os.listdir(os.path.join(sim_dir, 'transfer_functions')),
+                             ['simple_move_robot.py'])
+
+        self.assertIn("fakeExperiment", mocked_get.call_args.args[0])
+        self.assertEqual(mocked_get.call_args.kwargs['params'],
+                         [('type', 'zip'), ('exclude', '*.autosaved'), ('exclude', 'logs/')])
+
+    @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient._clone_concurrently')
+    @patch('requests.Session.get')
+    def test_clone_all_experiment_files_archive_fallback(self, mocked_get, mocked_clone):
+        client = StorageClient()
+
+        for status_code, content_type in [(501, "text/plain"), (200, "application/json")]:
+            mocked_clone.reset_mock()
+            self.__mock_archive_response(mocked_get, status_code=status_code,
+                                         content_type=content_type, content=b"[]")
+
+            with patch.object(Settings, 'storage_clone_mode', 'archive'), \
+                    patch.object(Settings, 'experiment_cache_size', 0):
+                client.clone_all_experiment_files("fakeToken", "fakeExperiment",
+                                                  destination_dir="/some/path")
+
+            mocked_clone.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_clone_all_experiment_files_archive_failed(self, mocked_get):
+        self.__mock_archive_response(mocked_get, status_code=500)
+        client = StorageClient()
+
+        with patch.object(Settings, 'storage_clone_mode', 'archive'):
+            self.assertRaises(Exception, client.clone_all_experiment_files,
+                              "fakeToken", "fakeExperiment", destination_dir="/some/path")
 
     @patch('hbp_nrp_backend.storage_client_api.storage_client.StorageClient.list_experiments')
     def test_get_folder_uuid_by_name_ok(self, mocked_get):
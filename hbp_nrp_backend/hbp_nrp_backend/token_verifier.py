@@ -0,0 +1,235 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains a verifier of JWT bearer tokens, checking them locally against the
+signing keys of a JWKS (JSON Web Key Set) file.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+__author__ = 'NRP software team'
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUnverifiableError(Exception):
+    """
+    The token can't be verified locally, e.g. it isn't a JWT or its signing key is unknown
+    """
+
+
+class InvalidTokenError(Exception):
+    """
+    The token is a JWT that failed the verification, e.g. a wrong signature or an expired token
+    """
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _b64url_int(data: str) -> int:
+    return int.from_bytes(_b64url_decode(data), "big")
+
+
+class JWKSTokenVerifier:
+    """
+    Verifies the signature and the validity period of JWT bearer tokens against the public keys
+    of a JWKS file, and extracts the user id from their claims.
+
+    Supported algorithms are RS256/384/512, PS256/384/512 and ES256/384/512.
+    Tokens without an expiry ('exp' claim) are rejected.
+    The JWKS file is read again when a token is signed by an unknown key and the file changed,
+    so that signing keys can be rotated without restarting the backend.
+    """
+
+    # The clock skew, in seconds, tolerated when checking the validity period of a token
+    LEEWAY = 30
+
+    __HASHES = {'256': hashes.SHA256, '384': hashes.SHA384, '512': hashes.SHA512}
+    __CURVES = {'P-256': ec.SECP256R1, 'P-384': ec.SECP384R1, 'P-521': ec.SECP521R1}
+
+    def __init__(self, jwks_file: str, user_id_claim: str = "sub", issuer: Optional[str] = None,
+                 clock=time.time):
+        """
+        :param jwks_file: the path of the JWKS file holding the public signing keys
+        :param user_id_claim: the claim holding the user id
+        :param issuer: the expected issuer ('iss' claim) of the tokens, not checked if None
+        :param clock: the function returning the current time, in seconds since the epoch
+        :raise OSError, ValueError: when the JWKS file can't be read or is malformed
+        """
+        self.jwks_file = jwks_file
+        self.user_id_claim = user_id_claim
+        self.issuer = issuer
+        self.__clock = clock
+
+        self.__keys = []  # (kid, kty, public key)
+        self.__jwks_mtime = None
+        self.__lock = threading.Lock()
+        self.__load_keys()
+
+    def get_user_id(self, token: str) -> str:
+        """
+        Verifies token and extracts the user id from its claims
+
+        :param token: the bearer token
+        :return: the id of the user the token was issued to
+        :raise TokenUnverifiableError: when the token can't be verified locally
+        :raise InvalidTokenError: when the token is invalid
+        """
+        try:
+            encoded_header, encoded_payload, encoded_signature = token.split(".")
+            header = json.loads(_b64url_decode(encoded_header))
+            claims = json.loads(_b64url_decode(encoded_payload))
+            signature = _b64url_decode(encoded_signature)
+        except (ValueError, binascii.Error) as e:
+            raise TokenUnverifiableError("Not a JWT") from e
+
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise TokenUnverifiableError("Not a JWT")
+
+        alg = header.get("alg", "")
+        if alg[:2] not in ("RS", "PS", "ES") or alg[2:] not in self.__HASHES:
+            raise TokenUnverifiableError(f"Unsupported algorithm '{alg}'")
+
+        key = self.__find_key(header.get("kid"), "EC" if alg.startswith("ES") else "RSA")
+        signing_input = f"{encoded_header}.{encoded_payload}".encode()
+        self.__verify_signature(alg, key, signing_input, signature)
+        self.__verify_claims(claims)
+
+        user_id = claims.get(self.user_id_claim)
+        if not user_id:
+            raise TokenUnverifiableError(f"No '{self.user_id_claim}' claim")
+        return str(user_id)
+
+    def __verify_signature(self, alg, key, signing_input, signature):
+        hash_algorithm = self.__HASHES[alg[2:]]()
+        try:
+            if alg.startswith("RS"):
+                key.verify(signature, signing_input, padding.PKCS1v15(), hash_algorithm)
+            elif alg.startswith("PS"):
+                key.verify(signature, signing_input,
+                           padding.PSS(mgf=padding.MGF1(hash_algorithm),
+                                       salt_length=hash_algorithm.digest_size),
+                           hash_algorithm)
+            else:
+                # JWS EC signatures are the concatenation of r and s
+                half = len(signature) // 2
+                der_signature = encode_dss_signature(int.from_bytes(signature[:half], "big"),
+                                                     int.from_bytes(signature[half:], "big"))
+                key.verify(der_signature, signing_input, ec.ECDSA(hash_algorithm))
+        except InvalidSignature as e:
+            raise InvalidTokenError("Invalid signature") from e
+
+    def __verify_claims(self, claims):
+        # a token without expiry would be valid forever
+        if "exp" not in claims:
+            raise InvalidTokenError("No 'exp' claim")
+
+        now = self.__clock()
+        try:
+            if now >= float(claims["exp"]) + self.LEEWAY:
+                raise InvalidTokenError("Expired token")
+            if "nbf" in claims and now < float(claims["nbf"]) - self.LEEWAY:
+                raise InvalidTokenError("Token not valid yet")
+        except (TypeError, ValueError) as e:
+            raise InvalidTokenError("Malformed validity period") from e
+
+        if self.issuer is not None and claims.get("iss") != self.issuer:
+            raise InvalidTokenError(f"Unexpected issuer '{claims.get('iss')}'")
+
+    def __find_key(self, kid, kty):
+        """
+        :return: the public key kid (any key of type kty if kid is None)
+        :raise TokenUnverifiableError: if no such key is known, even after reloading the JWKS file
+        """
+        for reload in (False, True):
+            if reload and not self.__reload_keys():
+                break
+            for key_id, key_type, key in self.__keys:
+                if key_type == kty and (kid is None or key_id == kid):
+                    return key
+        raise TokenUnverifiableError(f"Unknown signing key '{kid}'")
+
+    def __reload_keys(self) -> bool:
+        """
+        Reads the JWKS file again if it changed since it was last read
+
+        :return: True if the keys were reloaded
+        """
+        with self.__lock:
+            try:
+                if os.stat(self.jwks_file).st_mtime_ns == self.__jwks_mtime:
+                    return False
+                self.__load_keys()
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to reload the JWKS file '%s': %s", self.jwks_file, e)
+                return False
+        return True
+
+    def __load_keys(self):
+        mtime = os.stat(self.jwks_file).st_mtime_ns
+        with open(self.jwks_file, encoding="utf-8") as jwks:
+            jwks_content = json.load(jwks)
+        if not isinstance(jwks_content, dict):
+            raise ValueError("Not a JWKS")
+        jwks_keys = jwks_content.get("keys", [])
+
+        keys = []
+        for jwk in jwks_keys:
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys.append((jwk.get("kid"), jwk["kty"], self.__public_key(jwk)))
+            except (KeyError, ValueError, binascii.Error) as e:
+                logger.warning("Ignoring malformed JWK '%s': %s", jwk.get("kid"), e)
+
+        self.__keys = keys
+        self.__jwks_mtime = mtime
+        logger.info("Loaded %s signing keys from '%s'", len(keys), self.jwks_file)
+
+    @classmethod
+    def __public_key(cls, jwk):
+        # the backend argument is optional since cryptography 3.1 only
+        if jwk["kty"] == "RSA":
+            return rsa.RSAPublicNumbers(_b64url_int(jwk["e"]),
+                                        _b64url_int(jwk["n"])).public_key(default_backend())
+        if jwk["kty"] == "EC":
+            curve = cls.__CURVES[jwk["crv"]]()
+            return ec.EllipticCurvePublicNumbers(_b64url_int(jwk["x"]), _b64url_int(jwk["y"]),
+                                                 curve).public_key(default_backend())
+        raise ValueError(f"Unsupported key type '{jwk['kty']}'")
@@ -28,16 +28,36 @@ calling the service.
 
 __author__ = 'NRP software team, Oliver Denninger'
 
-from flask_restful import reqparse
-from flask import request
+from functools import cached_property
+from flask import g, request
 import logging
-from functools import lru_cache
+
+from hbp_nrp_commons.ttl_cache import TTLCache
+from hbp_nrp_commons.workspace.settings import Settings
 
 import hbp_nrp_backend.storage_client_api.storage_client as storage_client
+from hbp_nrp_backend.token_verifier import (JWKSTokenVerifier, InvalidTokenError,
+                                            TokenUnverifiableError)
 
 logger = logging.getLogger(__name__)
 
 
+def _create_token_verifier():
+    """
+    :return: the verifier of the tokens in 'jwks' authentication mode, None otherwise or if the
+             JWKS file can't be loaded
+    """
+    if Settings.auth_mode != 'jwks':
+        return None
+    try:
+        return JWKSTokenVerifier(Settings.auth_jwks_file, Settings.auth_user_id_claim,
+                                 Settings.auth_jwt_issuer)
+    except (OSError, ValueError) as e:
+        logger.error("Failed to load the JWKS file '%s', tokens will be verified remotely: %s",
+                     Settings.auth_jwks_file, e)
+        return None
+
+
 class UserAuthentication:
     """
     Helper class to get the user, authenticated at the HBP Unified Portal, from a HTTP request.
@@ -51,6 +71,32 @@ class UserAuthentication:
     NO_TOKEN = "no_token"
     client = storage_client.StorageClient()
 
+    # The attribute of flask.g holding the RequestAuthContext of the current request
+    CONTEXT_ATTRIBUTE = "nrp_auth_context"
+
+    # Caches of the storage server answers, negative ones (i.e. unknown token owners, denied
+    # accesses, failures) expire sooner so that transient failures are retried
+    token_owner_cache = TTLCache(Settings.auth_cache_size, Settings.auth_cache_ttl,
+                                 Settings.auth_cache_negative_ttl)
+    experiment_access_cache = TTLCache(Settings.auth_cache_size, Settings.auth_cache_ttl,
+                                       Settings.auth_cache_negative_ttl)
+
+    # Verifies the tokens locally, None if they are verified by the storage server only
+    token_verifier = _create_token_verifier()
+
+    @staticmethod
+    def get_context():
+        """
+        Gets the authentication context of the current HTTP request, created on first use
+
+        :return: The RequestAuthContext of the current request
+        """
+        context = g.get(UserAuthentication.CONTEXT_ATTRIBUTE)
+        if context is None:
+            context = RequestAuthContext(request.headers)
+            setattr(g, UserAuthentication.CONTEXT_ATTRIBUTE, context)
+        return context
+
     @staticmethod
     def get_header(header_name, default_value):
         """
@@ -60,12 +106,7 @@ class UserAuthentication:
         :param default_value: If nothing is found, this will be returned
         :return: The value of the header_name header or if not found default_value
         """
-        request_parser = reqparse.RequestParser()
-        request_parser.add_argument(header_name,
-                                    type=str, location='headers')
-        header_value = request_parser.parse_args(request)[header_name]
-
-        return header_value if header_value is not None else default_value
+        return UserAuthentication.get_context().get_header(header_name, default_value)
 
     @staticmethod
     def get_x_user_name_header():
@@ -74,8 +115,7 @@ class UserAuthentication:
 
         :return: The value of the 'X-User-Name' header or if not found 'default-owner'
         """
-        return UserAuthentication.get_header(UserAuthentication.HTTP_HEADER_USER_NAME,
-                                             UserAuthentication.DEFAULT_OWNER)
+        return UserAuthentication.get_context().user_name
 
     @staticmethod
     def get_header_token():
@@ -84,22 +124,38 @@ class UserAuthentication:
 
         :return: The value of the 'Authorization' header or if not found 'no-token'
         """
-        token_field = UserAuthentication.get_header(UserAuthentication.HEADER_TOKEN,
-                                                    UserAuthentication.NO_TOKEN)
-        if token_field != UserAuthentication.NO_TOKEN:
-            return token_field.split()[1]
-        else:
-            return token_field
+        return UserAuthentication.get_context().token
 
     @staticmethod
-    @lru_cache()
     def get_token_owner(token):
         """
-        Gets the owner of an authentication token
+        Gets the owner of an authentication token.
+        The token is verified locally when a token_verifier is set, so that the storage server
+        is asked (and its answer cached in token_owner_cache) only if that's not possible.
 
         :param token: The authentication token
         :return: The user's id
         """
+        if UserAuthentication.token_verifier is not None:
+            try:
+                return UserAuthentication.token_verifier.get_user_id(token)
+            except InvalidTokenError as e:
+                logger.warning("Invalid authentication token: %s", e)
+                return None
+            except TokenUnverifiableError as e:
+                logger.debug("Authentication token verified remotely: %s", e)
+
+        return UserAuthentication.token_owner_cache.get_or_compute(
+            token, lambda: UserAuthentication.__fetch_token_owner(token))
+
+    @staticmethod
+    def __fetch_token_owner(token):
+        """
+        Gets the owner of an authentication token from the storage server
+
+        :param token: The authentication token
+        :return: The user's id, None if it can't be retrieved
+        """
         try:
             user = UserAuthentication.client.get_user(token)
             return user['id'] if user else None
@@ -115,22 +171,12 @@ class UserAuthentication:
 
         :return: The user's id
         """
-        username = UserAuthentication.get_x_user_name_header()
-        if username != UserAuthentication.DEFAULT_OWNER:
-            return username
-
-        token = UserAuthentication.get_header_token()
-        if token == UserAuthentication.NO_TOKEN:
-            return username
-
-        token_owner = UserAuthentication.get_token_owner(token)
-        return token_owner if token_owner else username
+        return UserAuthentication.get_context().user
 
     @staticmethod
-    @lru_cache()
     def __user_can_access_experiment(token, context_id, experiment_id):
         """
-        Checkis if a user can access a simulation.
+        Checkis if a user can access a simulation, cached in experiment_access_cache
 
         :param token: The authentication token
         :param context_id: Optional context idenfifier
@@ -141,6 +187,20 @@ class UserAuthentication:
         if token == UserAuthentication.NO_TOKEN:
             return False
 
+        return UserAuthentication.experiment_access_cache.get_or_compute(
+            (token, context_id, experiment_id),
+            lambda: UserAuthentication.__fetch_experiment_access(token, context_id, experiment_id))
+
+    @staticmethod
+    def __fetch_experiment_access(token, context_id, experiment_id):
+        """
+        Asks the storage server whether a user can access a simulation
+
+        :param token: The authentication token
+        :param context_id: Optional context idenfifier
+        :param experiment_id: The simulation's experiment id
+        :return: Whether the user can access the simulation, False if it can't be checked
+        """
         try:
             return UserAuthentication.client.can_access_experiment(token, context_id, experiment_id)
         # pylint: disable=broad-except
@@ -178,3 +238,77 @@ class UserAuthentication:
             logger.warning(
                 "Request from user '%s' but simulation owned by '%s'", request_user, user)
             return False
+
+    @staticmethod
+    def cache_stats():
+        """
+        :return: the statistics of the authentication caches, by cache name
+        """
+        return {'token_owner': UserAuthentication.token_owner_cache.stats(),
+                'experiment_access': UserAuthentication.experiment_access_cache.stats()}
+
+    @staticmethod
+    def clear_caches():
+        """
+        Empties the authentication caches
+        """
+        UserAuthentication.token_owner_cache.clear()
+        UserAuthentication.experiment_access_cache.clear()
+
+
+class RequestAuthContext:
+    """
+    The authentication data of a HTTP request.
+    Its headers are read once, the user and the token are resolved on first use and memoized
+    for the lifetime of the request, which is shared by all the resources handling it.
+    """
+
+    def __init__(self, headers):
+        """
+        :param headers: the headers of the request
+        """
+        self.__headers = headers
+
+    def get_header(self, header_name, default_value):
+        """
+        :param header_name: the name of the header to get
+        :param default_value: If nothing is found, this will be returned
+        :return: The value of the header_name header or if not found default_value
+        """
+        header_value = self.__headers.get(header_name)
+        return header_value if header_value is not None else default_value
+
+    @cached_property
+    def user_name(self):
+        """
+        The value of the 'X-User-Name' header or if not found 'default-owner'
+        """
+        return self.get_header(UserAuthentication.HTTP_HEADER_USER_NAME,
+                               UserAuthentication.DEFAULT_OWNER)
+
+    @cached_property
+    def token(self):
+        """
+        The token of the 'Authorization' header or if not found 'no-token'
+        """
+        token_field = self.get_header(UserAuthentication.HEADER_TOKEN,
+                                      UserAuthentication.NO_TOKEN)
+        if token_field != UserAuthentication.NO_TOKEN:
+            return token_field.split()[1]
+        else:
+            return token_field
+
+    @cached_property
+    def user(self):
+        """
+        The x-user-name if specified, else the owner of the authentication token
+        """
+        username = self.user_name
+        if username != UserAuthentication.DEFAULT_OWNER:
+            return username
+
+        if self.token == UserAuthentication.NO_TOKEN:
+            return username
+
+        token_owner = UserAuthentication.get_token_owner(self.token)
+        return token_owner if token_owner else username
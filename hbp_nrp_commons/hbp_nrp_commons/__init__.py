@@ -6,8 +6,6 @@ import os
 import logging
 from typing import Optional, Union
 
-from .version import VERSION as __version__  # pylint: disable=W0611
-
 __author__ = "NRP Team"
 
 
@@ -71,3 +69,15 @@ def set_up_logger(name: Optional[str] = None,
                      str(logfile_name) if isinstance(handler, logging.FileHandler) else "STDOUT")
     
     return logger
+
+
+def __getattr__(name):
+    """
+    Computes __version__ on first use, rather than on import
+    """
+    if name == "__version__":
+        # pylint: disable=import-outside-toplevel
+        from .version import VERSION
+        globals()[name] = VERSION
+        return VERSION
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
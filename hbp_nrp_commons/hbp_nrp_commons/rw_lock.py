@@ -0,0 +1,154 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains reader/writer locks, standalone or keyed by the resource they protect.
+"""
+
+import contextlib
+import threading
+from typing import Hashable
+
+__author__ = 'NRP software team'
+
+
+class ReadWriteLock:
+    """
+    A lock held either by any number of readers or by a single writer.
+
+    Writers are preferred: once a writer waits, new readers wait for it to be done,
+    so that a steady flow of readers can't starve the writers.
+    The lock isn't reentrant.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = False
+        self.__waiting_writers = 0
+
+    def acquire_read(self):
+        """
+        Blocks until the lock can be shared with the other readers
+        """
+        with self.__condition:
+            while self.__writer or self.__waiting_writers:
+                self.__condition.wait()
+            self.__readers += 1
+
+    def release_read(self):
+        """
+        Releases the lock held as a reader, letting the writers in once the last reader is done
+        """
+        with self.__condition:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Blocks until the lock is held by nobody else
+        """
+        with self.__condition:
+            self.__waiting_writers += 1
+            try:
+                while self.__writer or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__waiting_writers -= 1
+            self.__writer = True
+
+    def release_write(self):
+        """
+        Releases the lock held as the writer, letting the waiting readers and writers in
+        """
+        with self.__condition:
+            self.__writer = False
+            self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def read(self):
+        """
+        Context manager holding the lock as a reader
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write(self):
+        """
+        Context manager holding the lock as the writer
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class KeyedReadWriteLock:
+    """
+    A ReadWriteLock per key, e.g. per protected resource id.
+    Locks on different keys never wait for each other.
+    The lock of a key is discarded as soon as nobody uses it, so that the keys don't accumulate.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__locks = {}  # key -> [ReadWriteLock, number of holders and waiters]
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__locks)
+
+    @contextlib.contextmanager
+    def read(self, key: Hashable):
+        """
+        Context manager holding the lock of key as a reader
+        """
+        with self.__use(key) as rw_lock, rw_lock.read():
+            yield
+
+    @contextlib.contextmanager
+    def write(self, key: Hashable):
+        """
+        Context manager holding the lock of key as the writer
+        """
+        with self.__use(key) as rw_lock, rw_lock.write():
+            yield
+
+    @contextlib.contextmanager
+    def __use(self, key):
+        with self.__lock:
+            entry = self.__locks.setdefault(key, [ReadWriteLock(), 0])
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self.__lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.__locks[key]
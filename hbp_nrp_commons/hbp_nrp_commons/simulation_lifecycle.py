@@ -28,7 +28,6 @@ This package defines the simulation lifecycle used in the NRP Backend and Simula
 import os
 import json
 import logging
-import time
 from typing import Optional, List
 
 from hbp_nrp_commons.workspace.settings import Settings
@@ -120,7 +119,6 @@ class SimulationLifecycle:
             return
 
         if source_state != dest_state:  # not a self transition
-            time.sleep(1)
             logger.debug("Final state '%s' reached. Shutdown.", dest_state)
             self.shutdown(state_change)
 
@@ -267,8 +265,8 @@ class SimulationLifecycle:
 
         if self.mqtt_topics_prefix:
             self.synchronization_topic = f"{self.mqtt_topics_prefix}/{synchronization_topic}"
-            # prefix mqtt_client_id with mqtt_topics_prefix
-            # TODO it should be prefixed by a globally unique sim_id (NRRPLT-8917)
+            # prefix mqtt_client_id with mqtt_topics_prefix, i.e. scope it to this backend.
+            # The subclasses derive mqtt_client_id from the simulation id
             self.mqtt_client_id = f"{self.mqtt_topics_prefix}_{mqtt_client_id}"
 
         # Transitions adds some members based on the STATES and transitions
@@ -409,8 +407,12 @@ class SimulationLifecycle:
         self._clear_synchronization_topic()
 
         self.__mqtt_client.unsubscribe(self.synchronization_topic)
-        self.__mqtt_client.loop_stop()
+        # the network thread sends the pending messages (e.g. the propagated final state)
+        # before the disconnection request, then exits: joining it waits for them to be sent.
+        # Called from the network thread (i.e. on a synchronization message), loop_stop
+        # doesn't join it, it exits once its callback has returned.
         self.__mqtt_client.disconnect()
+        self.__mqtt_client.loop_stop()
         self.__mqtt_client = None
 
     # These methods will be overridden in the derived classes, thus we need to exclude them
@@ -0,0 +1,107 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains a timer of the stages of a process (e.g. the initialization of a simulation)
+"""
+
+import contextlib
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+__author__ = 'NRP software team'
+
+
+class StageTimer:
+    """
+    Measures the duration of the named stages of a process, relative to its start.
+    Stages may overlap, e.g. when they are run by different threads.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        :param clock: The clock measuring the stages, in seconds
+        """
+        self.__clock = clock
+        self.__start = clock()
+        self.__lock = threading.Lock()
+        # name -> (start, end), in seconds since the start of the process
+        self.__stages: Dict[str, Tuple[float, float]] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Measures the stage run in the context, even when it fails
+
+        :param name: The name of the stage
+        """
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            self.record(name, start, self.elapsed())
+
+    def record_since(self, name: str, previous: str) -> None:
+        """
+        Records a stage from the end of a previous stage until now, e.g. a wait
+
+        :param name: The name of the stage
+        :param previous: The name of the previous stage, the start of the process if unknown
+        """
+        with self.__lock:
+            start = self.__stages[previous][1] if previous in self.__stages else 0.
+        self.record(name, start, self.elapsed())
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """
+        Records a stage
+
+        :param name: The name of the stage
+        :param start: The start of the stage, in seconds since the start of the process
+        :param end: The end of the stage, in seconds since the start of the process
+        """
+        with self.__lock:
+            self.__stages[name] = (start, end)
+
+    def elapsed(self) -> float:
+        """
+        :return: The seconds since the start of the process
+        """
+        return self.__clock() - self.__start
+
+    def durations(self) -> Dict[str, float]:
+        """
+        :return: The duration, in seconds, of the recorded stages, in recording order
+        """
+        with self.__lock:
+            return {name: end - start for name, (start, end) in self.__stages.items()}
+
+    def report(self) -> str:
+        """
+        :return: A description of the duration of the stages and of the whole process,
+                 e.g. "prefetch 0.10 s, clone 1.20 s (total 1.30 s)"
+        """
+        stages = ", ".join(f"{name} {duration:.2f} s"
+                           for name, duration in self.durations().items())
+        return f"{stages} (total {self.elapsed():.2f} s)"
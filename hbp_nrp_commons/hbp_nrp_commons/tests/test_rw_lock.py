@@ -0,0 +1,169 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Unit tests for the reader/writer locks
+"""
+
+__author__ = 'NRP software team'
+
+import threading
+import unittest
+
+from hbp_nrp_commons.rw_lock import ReadWriteLock, KeyedReadWriteLock
+
+TIMEOUT = 5.
+SHORT_WAIT = 0.1
+
+
+def _start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestReadWriteLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def test_concurrent_readers(self):
+        with self.lock.read():
+            acquired = threading.Event()
+
+            def reader():
+                with self.lock.read():
+                    acquired.set()
+
+            _start(reader)
+            self.assertTrue(acquired.wait(TIMEOUT))
+
+    def test_writer_excludes_readers(self):
+        acquired = threading.Event()
+
+        def reader():
+            with self.lock.read():
+                acquired.set()
+
+        with self.lock.write():
+            _start(reader)
+            self.assertFalse(acquired.wait(SHORT_WAIT))
+        self.assertTrue(acquired.wait(TIMEOUT))
+
+    def test_readers_exclude_writer(self):
+        acquired = threading.Event()
+
+        def writer():
+            with self.lock.write():
+                acquired.set()
+
+        with self.lock.read():
+            _start(writer)
+            self.assertFalse(acquired.wait(SHORT_WAIT))
+        self.assertTrue(acquired.wait(TIMEOUT))
+
+    def test_waiting_writer_is_preferred(self):
+        order = []
+        writer_acquired = threading.Event()
+        reader_acquired = threading.Event()
+
+        def writer():
+            with self.lock.write():
+                order.append("writer")
+                writer_acquired.set()
+
+        def reader():
+            with self.lock.read():
+                order.append("reader")
+                reader_acquired.set()
+
+        with self.lock.read():
+            _start(writer)
+            self.assertFalse(writer_acquired.wait(SHORT_WAIT))
+            # a new reader waits for the waiting writer
+            _start(reader)
+            self.assertFalse(reader_acquired.wait(SHORT_WAIT))
+
+        self.assertTrue(writer_acquired.wait(TIMEOUT))
+        self.assertTrue(reader_acquired.wait(TIMEOUT))
+        self.assertEqual(order, ["writer", "reader"])
+
+    def test_release_on_exception(self):
+        with self.assertRaises(KeyError):
+            with self.lock.write():
+                raise KeyError
+        with self.assertRaises(KeyError):
+            with self.lock.read():
+                raise KeyError
+
+        acquired = threading.Event()
+
+        def writer():
+            with self.lock.write():
+                acquired.set()
+
+        _start(writer)
+        self.assertTrue(acquired.wait(TIMEOUT))
+
+
+class TestKeyedReadWriteLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock = KeyedReadWriteLock()
+
+    def test_keys_are_independent(self):
+        acquired = threading.Event()
+
+        def writer():
+            with self.lock.write(1):
+                acquired.set()
+
+        with self.lock.write(0):
+            _start(writer)
+            self.assertTrue(acquired.wait(TIMEOUT))
+
+    def test_same_key(self):
+        acquired = threading.Event()
+
+        def reader():
+            with self.lock.read(0):
+                acquired.set()
+
+        with self.lock.write(0):
+            _start(reader)
+            self.assertFalse(acquired.wait(SHORT_WAIT))
+        self.assertTrue(acquired.wait(TIMEOUT))
+
+    def test_unused_keys_are_discarded(self):
+        with self.lock.read(0), self.lock.write(1):
+            self.assertEqual(len(self.lock), 2)
+        self.assertEqual(len(self.lock), 0)
+
+        with self.assertRaises(KeyError):
+            with self.lock.write(0):
+                raise KeyError
+        self.assertEqual(len(self.lock), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -69,11 +69,6 @@ class TestLifecycle(unittest.TestCase):
         self.publish_mock = self.mqtt_client_mock.return_value.publish
         self.addCleanup(patcher_mqtt_client.stop)
 
-        # time
-        patcher_time = mock.patch("hbp_nrp_commons.simulation_lifecycle.time")
-        self.time_mock = patcher_time.start()
-        self.addCleanup(patcher_time.stop)
-
     def make_transition_message(self, origin, source_state, transition, target_state):
         return json.dumps({"source_node": origin,
                            "source_state": source_state,
@@ -336,8 +331,10 @@ class TestLifecycle(unittest.TestCase):
                                             retain=lifecycle.clear_synchronization_topic)
 
         mqtt_client.unsubscribe.called_with(lifecycle.synchronization_topic)
-        self.assertTrue(mqtt_client.loop_stop.called)
-        self.assertTrue(mqtt_client.disconnect.called)
+        # the network thread sends the pending messages before exiting, once disconnected
+        self.assertEqual([c[0] for c in mqtt_client.method_calls
+                          if c[0] in ("disconnect", "loop_stop")],
+                         ["disconnect", "loop_stop"])
 
     def test_invalid_lifecycle(self):
         invalid = SimulationLifecycle('foo')
@@ -0,0 +1,86 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Unit tests for the stage timer
+"""
+
+__author__ = 'NRP software team'
+
+import unittest
+
+from hbp_nrp_commons.stage_timer import StageTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.
+
+    def __call__(self):
+        return self.now
+
+
+class TestStageTimer(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.timer = StageTimer(clock=self.clock)
+
+    def test_stages(self):
+        with self.timer.stage("download"):
+            self.clock.now += 2.
+        self.clock.now += 1.
+        self.timer.record_since("wait", "download")
+        with self.timer.stage("init"):
+            self.clock.now += 0.5
+
+        self.assertEqual(self.timer.durations(), {"download": 2., "wait": 1., "init": 0.5})
+        self.assertEqual(self.timer.elapsed(), 3.5)
+        self.assertEqual(self.timer.report(),
+                         "download 2.00 s, wait 1.00 s, init 0.50 s (total 3.50 s)")
+
+    def test_failed_stage_is_recorded(self):
+        with self.assertRaises(KeyError):
+            with self.timer.stage("download"):
+                self.clock.now += 1.
+                raise KeyError
+
+        self.assertEqual(self.timer.durations(), {"download": 1.})
+
+    def test_record_since_unknown_stage(self):
+        self.clock.now += 3.
+        self.timer.record_since("wait", "unknown")
+
+        self.assertEqual(self.timer.durations(), {"wait": 3.})
+
+    def test_overlapping_stages(self):
+        self.timer.record("spawn", 0., 1.)
+        self.timer.record("warm-up", 0.5, 2.)
+        self.clock.now += 2.
+
+        self.assertEqual(self.timer.durations(), {"spawn": 1., "warm-up": 1.5})
+        self.assertEqual(self.timer.elapsed(), 2.)
+
+
+if __name__ == '__main__':
+    unittest.main()
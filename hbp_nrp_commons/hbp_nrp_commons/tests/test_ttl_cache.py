@@ -0,0 +1,152 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Unit tests for the TTL cache
+"""
+
+__author__ = 'NRP software team'
+
+import unittest
+from unittest.mock import MagicMock
+
+from hbp_nrp_commons.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLCache(capacity=3, ttl=10, negative_ttl=1, clock=self.clock)
+
+    def test_invalid_capacity(self):
+        self.assertRaises(ValueError, TTLCache, capacity=0, ttl=10)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.put("a", "value")
+        self.assertEqual(self.cache.get("a"), "value")
+        self.assertEqual(len(self.cache), 1)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_positive_expiry(self):
+        self.cache.put("a", "value")
+
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get("a"), "value")
+
+        self.clock.now = 10
+        self.assertEqual(self.cache.get("a", "default"), "default")
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_negative_expiry(self):
+        self.cache.put("none", None)
+        self.cache.put("false", False)
+
+        self.clock.now = 0.5
+        self.assertIsNone(self.cache.get("none", "default"))
+        self.assertFalse(self.cache.get("false", "default"))
+
+        self.clock.now = 1
+        self.assertEqual(self.cache.get("none", "default"), "default")
+        self.assertEqual(self.cache.get("false", "default"), "default")
+
+    def test_disabled_ttl(self):
+        cache = TTLCache(capacity=3, ttl=10, negative_ttl=0, clock=self.clock)
+        cache.put("false", False)
+        cache.put("true", True)
+
+        self.assertEqual(cache.get("false", "default"), "default")
+        self.assertTrue(cache.get("true"))
+
+    def test_lru_eviction(self):
+        for key in "abc":
+            self.cache.put(key, key)
+        self.cache.get("a")  # "b" is now the least recently used
+
+        self.cache.put("d", "d")
+
+        self.assertIsNone(self.cache.get("b"))
+        for key in "acd":
+            self.assertEqual(self.cache.get(key), key)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_get_or_compute(self):
+        compute = MagicMock(return_value="value")
+
+        self.assertEqual(self.cache.get_or_compute("a", compute), "value")
+        self.assertEqual(self.cache.get_or_compute("a", compute), "value")
+        compute.assert_called_once()
+
+        self.clock.now = 10
+        self.assertEqual(self.cache.get_or_compute("a", compute), "value")
+        self.assertEqual(compute.call_count, 2)
+
+    def test_get_or_compute_negative(self):
+        compute = MagicMock(return_value=False)
+
+        self.assertFalse(self.cache.get_or_compute("a", compute))
+        self.assertFalse(self.cache.get_or_compute("a", compute))
+        compute.assert_called_once()
+
+        # a transient failure isn't remembered for long
+        self.clock.now = 1
+        compute.return_value = True
+        self.assertTrue(self.cache.get_or_compute("a", compute))
+
+    def test_get_or_compute_raises(self):
+        compute = MagicMock(side_effect=ValueError)
+
+        self.assertRaises(ValueError, self.cache.get_or_compute, "a", compute)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate_clear(self):
+        self.cache.put("a", "a")
+        self.cache.put("b", "b")
+
+        self.cache.invalidate("a")
+        self.cache.invalidate("missing")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), "b")
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()['hits'], 0)
+        self.assertEqual(self.cache.stats()['misses'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Unit tests for the zip helper functions
+"""
+
+__author__ = 'NRP software team'
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from hbp_nrp_commons import zip_util
+
+
+class TestStreamFromFilelist(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+        self.files = {}
+        for name, size in (("a.log", 10), ("b.log", 300 * 1024)):
+            path = os.path.join(self.tmp_dir, name)
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            self.files[path] = size
+
+    def test_stream(self):
+        chunks = list(zip_util.stream_from_filelist(self.files, preserve_path=False,
+                                                    chunk_size=16 * 1024))
+
+        # random content isn't compressible, the archive is made of several chunks
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) >= 16 * 1024 for c in chunks[:-1]))
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+            self.assertIsNone(zf.testzip())
+            for path in self.files:
+                with open(path, "rb") as f:
+                    self.assertEqual(zf.read(os.path.basename(path)), f.read())
+
+    def test_stream_preserve_path(self):
+        archive = b"".join(zip_util.stream_from_filelist(self.files))
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            self.assertEqual(sorted(zf.namelist()),
+                             sorted(p.lstrip(os.sep) for p in self.files))
+
+    def test_stream_error(self):
+        stream = zip_util.stream_from_filelist(
+            list(self.files) + [os.path.join(self.tmp_dir, "missing.log")])
+
+        with self.assertRaises(FileNotFoundError):
+            for _ in stream:
+                pass
+
+    def test_stream_closed_early(self):
+        stream = zip_util.stream_from_filelist(self.files, chunk_size=1024,
+                                               max_buffered_chunks=1)
+        next(stream)
+        stream.close()
+
+        self.assertFalse(any(t.name == "ZipStreamProducer" for t in threading.enumerate()))
+
+
+class TestExtractStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.extract_to = os.path.join(self.tmp_dir, "extracted")
+
+        self.members = {
+            "simulation_config.json": b'{"SimulationName": "test"}',
+            "models/robot.sdf": os.urandom(200 * 1024),
+            "models/mesh.dae": b"mesh " * 10000,
+            "empty.txt": b"",
+            "caf\u00e9.py": b"print('utf-8')",
+        }
+
+    def __archive(self, compression=zipfile.ZIP_DEFLATED, force_zip64=False):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression) as zf:
+            zf.writestr(zipfile.ZipInfo("models/"), b"")
+            for name, content in self.members.items():
+                with zf.open(name, "w", force_zip64=force_zip64) as f:
+                    f.write(content)
+        return buffer.getvalue()
+
+    @staticmethod
+    def __chunks(data: bytes, size: int):
+        return (data[i:i + size] for i in range(0, len(data), size))
+
+    def __assert_extracted(self, extracted, members=None):
+        members = self.members if members is None else members
+        self.assertEqual(sorted(extracted),
+                         sorted(os.path.join(self.extract_to, name) for name in members))
+        for name, content in members.items():
+            with open(os.path.join(self.extract_to, name), "rb") as f:
+                self.assertEqual(f.read(), content)
+        # no leftover temporary files
+        for _, _, files in os.walk(self.extract_to):
+            self.assertFalse(any(f.endswith(".part") for f in files))
+
+    def test_extract_deflated(self):
+        extracted = zip_util.extract_stream(self.__chunks(self.__archive(), 4096), self.extract_to)
+        self.__assert_extracted(extracted)
+
+    def test_extract_stored(self):
+        archive = self.__archive(compression=zipfile.ZIP_STORED)
+        extracted = zip_util.extract_stream(self.__chunks(archive, 1000), self.extract_to)
+        self.__assert_extracted(extracted)
+
+    def test_extract_zip64(self):
+        archive = self.__archive(force_zip64=True)
+        extracted = zip_util.extract_stream(self.__chunks(archive, 4096), self.extract_to)
+        self.__assert_extracted(extracted)
+
+    def test_extract_data_descriptors(self):
+        # an unseekable producer writes data descriptors after every entry
+        files = []
+        for name in ("a.txt", "b.bin"):
+            files.append(os.path.join(self.tmp_dir, name))
+            with open(files[-1], "wb") as f:
+                f.write(self.members["models/mesh.dae"] if name == "a.txt" else os.urandom(70000))
+
+        stream = zip_util.stream_from_filelist(files, preserve_path=False, chunk_size=1000)
+        extracted = zip_util.extract_stream(stream, self.extract_to)
+
+        self.assertEqual(sorted(extracted), [os.path.join(self.extract_to, n)
+                                             for n in ("a.txt", "b.bin")])
+        for path in files:
+            with open(path, "rb") as src, \
+                    open(os.path.join(self.extract_to, os.path.basename(path)), "rb") as dst:
+                self.assertEqual(src.read(), dst.read())
+
+    def test_extract_byte_by_byte(self):
+        extracted = zip_util.extract_stream(self.__chunks(self.__archive(), 1), self.extract_to)
+        self.__assert_extracted(extracted)
+
+    def test_extract_filtered(self):
+        extracted = zip_util.extract_stream(self.__chunks(self.__archive(), 4096), self.extract_to,
+                                            member_filter=lambda n: not n.startswith("models/"))
+
+        self.__assert_extracted(extracted, {name: content for name, content
+                                            in self.members.items()
+                                            if not name.startswith("models/")})
+        self.assertFalse(os.path.exists(os.path.join(self.extract_to, "models")))
+
+    def test_extract_empty(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w"):
+            pass
+
+        self.assertEqual(zip_util.extract_stream([buffer.getvalue()], self.extract_to), [])
+
+    def test_extract_path_traversal(self):
+        for name in ("../evil.py", "/etc/evil.py", "models/../../evil.py"):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as zf:
+                zf.writestr(name, b"evil")
+
+            with self.assertRaises(zipfile.BadZipFile):
+                zip_util.extract_stream([buffer.getvalue()], self.extract_to)
+            self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "evil.py")))
+
+    def test_extract_corrupted(self):
+        archive = bytearray(self.__archive(compression=zipfile.ZIP_STORED))
+        # alter the content of the first file
+        offset = archive.index(self.members["simulation_config.json"])
+        archive[offset] ^= 0xFF
+
+        with self.assertRaises(zipfile.BadZipFile):
+            zip_util.extract_stream([bytes(archive)], self.extract_to)
+        self.assertFalse(os.path.exists(os.path.join(self.extract_to, "simulation_config.json")))
+
+    def test_extract_truncated(self):
+        archive = self.__archive()
+
+        with self.assertRaises(zipfile.BadZipFile):
+            zip_util.extract_stream([archive[:len(archive) // 2]], self.extract_to)
+
+    def test_extract_not_a_zip(self):
+        with self.assertRaises(zipfile.BadZipFile):
+            zip_util.extract_stream([b'[{"name": "not a zip"}]'], self.extract_to)
+
+
+if __name__ == '__main__':
+    unittest.main()
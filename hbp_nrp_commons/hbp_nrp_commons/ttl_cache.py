@@ -0,0 +1,164 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module contains a thread-safe, size bounded (LRU) cache whose entries expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+__author__ = 'NRP software team'
+
+
+class TTLCache:
+    """
+    A thread-safe mapping of keys to values, each valid for a limited time.
+
+    Negative values (i.e. falsy ones, by default) are kept for a separate, usually shorter, time,
+    so that transient failures are retried soon while positive results are served from memory.
+    When the capacity is reached, the least recently used entry is evicted.
+    """
+
+    def __init__(self, capacity: int, ttl: float, negative_ttl: Optional[float] = None,
+                 is_negative: Callable[[Any], bool] = lambda value: not value,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param capacity: the maximum number of entries
+        :param ttl: the seconds a positive value is valid for, 0 disables their caching
+        :param negative_ttl: the seconds a negative value is valid for, 0 disables their caching,
+                             defaults to ttl
+        :param is_negative: tells whether a value is negative
+        :param clock: the monotonic clock used to expire the entries
+        """
+        if capacity < 1:
+            raise ValueError("The capacity of the cache must be at least 1")
+
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.__is_negative = is_negative
+        self.__clock = clock
+
+        # key -> (value, expiry time), in least to most recently used order
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    def get(self, key: Hashable, default=None):
+        """
+        :param key: the key of the entry
+        :param default: the value returned when the entry is missing or expired
+        :return: the cached value of key, default if there isn't any valid one
+        """
+        with self.__lock:
+            return self.__get(key, default)
+
+    def put(self, key: Hashable, value):
+        """
+        Caches value under key, evicting the least recently used entry when the cache is full.
+
+        :param key: the key of the entry
+        :param value: the value to be cached
+        """
+        ttl = self.negative_ttl if self.__is_negative(value) else self.ttl
+        if ttl <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = (value, self.__clock() + ttl)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.capacity:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        """
+        Gets the cached value of key, computing and caching it if needed.
+        The computation runs outside the cache lock, so that slow ones don't block the other keys.
+
+        :param key: the key of the entry
+        :param compute: the function computing the value of key
+        :return: the value of key
+        """
+        missing = object()
+        with self.__lock:
+            value = self.__get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes the entry of key, if any
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all the entries and resets the statistics
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        """
+        :return: the cache statistics, i.e. hits, misses, evictions, expirations and current size
+        """
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'expirations': self.expirations, 'size': len(self.__entries),
+                    'capacity': self.capacity}
+
+    def __get(self, key, default):
+        """
+        Looks key up, the lock has to be held by the caller
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expiry = entry
+        if expiry <= self.__clock():
+            del self.__entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return value
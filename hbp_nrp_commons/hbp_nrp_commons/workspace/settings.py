@@ -29,10 +29,38 @@ It holds the NRP backend configuration settings populated from the following lis
     - :code:`NRP_SIMULATION_DIR`: The local directory used by a running simulation (usually in /tmp)
     - :code:`NRP_MQTT_BROKER_ADDRESS`: The :code:`host:port` of the MQTT broker
     - :code:`STORAGE_ADDRESS` and :code:`STORAGE_PORT`: The :code:`host` and the :code:`port`, respectively, of the Storage Server.
+    - :code:`NRP_STORAGE_POOL_SIZE`: The maximum number of keep-alive connections to the Storage Server.
+    - :code:`NRP_STORAGE_CLONE_WORKERS`: The number of concurrent requests used to clone an experiment, 1 clones sequentially.
+    - :code:`NRP_STORAGE_CLONE_MODE`: 'files' to clone an experiment file by file, 'archive' to clone it as a single zip.
+    - :code:`NRP_EXPERIMENT_CACHE_DIR`: The local directory caching the cloned experiment files.
+    - :code:`NRP_EXPERIMENT_CACHE_SIZE`: The maximum size, in MiB, of the experiment cache, 0 disables it.
+    - :code:`NRP_AUTH_CACHE_SIZE`: The maximum number of cached authentication results (token owners, access rights).
+    - :code:`NRP_AUTH_CACHE_TTL`: The seconds a positive authentication result is cached for, 0 disables it.
+    - :code:`NRP_AUTH_CACHE_NEGATIVE_TTL`: The seconds a negative authentication result is cached for, 0 disables it.
+    - :code:`NRP_AUTH_MODE`: 'remote' to identify token owners with the Storage Server, 'jwks' to verify tokens locally first.
+    - :code:`NRP_AUTH_JWKS_FILE`: The JWKS file holding the public keys signing the tokens, in 'jwks' mode.
+    - :code:`NRP_AUTH_USER_ID_CLAIM`: The token claim holding the user id, in 'jwks' mode.
+    - :code:`NRP_AUTH_JWT_ISSUER`: The expected issuer of the tokens in 'jwks' mode, not checked if unset.
+    - :code:`NRP_SIMULATION_CREATION_MODE`: 'sync' to initialize a new simulation before replying to its creation request, 'async' to initialize it in the background.
+    - :code:`NRP_SIMULATION_INIT_WORKERS`: The maximum number of simulations initialized concurrently in the background.
+    - :code:`NRP_TEARDOWN_WORKERS`: The maximum number of stopped simulations torn down (logs upload, directory removal) concurrently in the background.
+    - :code:`NRP_TEARDOWN_ATTEMPTS`: The number of attempts of each teardown step, i.e. 1 + retries.
+    - :code:`NRP_SIMULATION_QUEUE_DEPTH`: The maximum number of simulations waiting for another one to complete, 0 rejects them.
+    - :code:`NRP_MAX_SIMULATIONS`: The maximum number of simulations running at the same time.
+    - :code:`NRP_SIMULATION_CORES`: The CPU cores needed by a simulation, checked against the idle ones before running one more simulation, 0 disables the check.
+    - :code:`NRP_SIMULATION_MEMORY`: The memory, in MiB, needed by a simulation, checked against the available one before running one more simulation, 0 disables the check.
+    - :code:`NRP_SIMULATION_DISK`: The disk space, in MiB, needed by a simulation, checked against the free one before running one more simulation, 0 disables the check.
+    - :code:`NRP_SIMULATION_SERVER_POOL_SIZE`: The number of idle simulation server processes started ahead of the simulations by each uWSGI worker, 0 spawns one per simulation.
+    - :code:`NRP_SIMULATION_SERVER_LAUNCHER`: 'spawn' to start each simulation server process from scratch, 'zygote' to fork it from a process that has already imported the simulation server modules.
+    - :code:`NRP_STANDBY_EXPERIMENTS`: The comma-separated ids of the experiments whose simulations are kept initialized and paused ahead of the users' requests.
+    - :code:`NRP_STANDBY_CAPACITY`: The number of standby simulations kept for each of those experiments, 0 disables the standby.
+    - :code:`NRP_STANDBY_IDLE_TIMEOUT`: The seconds a standby simulation waits for a user before being stopped, 0 keeps it until taken.
 
 """
 import logging
 import os
+import tempfile
+from typing import Tuple
 
 __author__ = 'NRP software team, Hossain Mahmud'
 
@@ -57,12 +85,98 @@ class _Settings:
     DEFAULT_STORAGE_HOST = "localhost"
     DEFAULT_STORAGE_PORT = 9000
 
+    # The default maximum number of pooled (keep-alive) connections to the storage server
+    DEFAULT_STORAGE_POOL_SIZE = 10
+
+    # The default number of threads cloning the experiment files from the storage server
+    DEFAULT_STORAGE_CLONE_WORKERS = 8
+
+    # The ways of cloning an experiment: file by file or as a single zip archive
+    STORAGE_CLONE_MODES = ('files', 'archive')
+    DEFAULT_STORAGE_CLONE_MODE = 'files'
+
+    # The default location and maximum size (MiB) of the experiment files cache
+    DEFAULT_EXPERIMENT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "nrp_experiment_cache")
+    DEFAULT_EXPERIMENT_CACHE_SIZE = 1024
+
+    # The default capacity and validity (seconds) of the authentication caches
+    DEFAULT_AUTH_CACHE_SIZE = 1024
+    DEFAULT_AUTH_CACHE_TTL = 300
+    DEFAULT_AUTH_CACHE_NEGATIVE_TTL = 10
+
+    # The ways of identifying the owner of a token: by asking the storage server or by verifying
+    # it locally against the keys of a JWKS file (falling back to the storage server)
+    AUTH_MODES = ('remote', 'jwks')
+    DEFAULT_AUTH_MODE = 'remote'
+    DEFAULT_AUTH_USER_ID_CLAIM = 'sub'
+
+    # The ways of creating a simulation: initializing it before replying to the request or
+    # replying right away and initializing it in the background
+    SIMULATION_CREATION_MODES = ('sync', 'async')
+    DEFAULT_SIMULATION_CREATION_MODE = 'sync'
+
+    # The default number of threads initializing simulations in the background
+    DEFAULT_SIMULATION_INIT_WORKERS = 2
+
+    # The default number of threads tearing stopped simulations down and of attempts of each step
+    DEFAULT_TEARDOWN_WORKERS = 2
+    DEFAULT_TEARDOWN_ATTEMPTS = 3
+
+    # The default maximum number of simulations queued while another one is running
+    DEFAULT_SIMULATION_QUEUE_DEPTH = 0
+
+    # The default maximum number of simulations running at the same time and the default host
+    # resources (cores, MiB of memory and of disk space) needed to run one more simulation
+    DEFAULT_MAX_SIMULATIONS = 1
+    DEFAULT_SIMULATION_CORES = 1
+    DEFAULT_SIMULATION_MEMORY = 1024
+    DEFAULT_SIMULATION_DISK = 1024
+
+    # The default number of idle simulation server processes started ahead of the simulations
+    DEFAULT_SIMULATION_SERVER_POOL_SIZE = 0
+
+    # The ways of starting a simulation server process: spawning it or forking it from a zygote
+    SIMULATION_SERVER_LAUNCHERS = ('spawn', 'zygote')
+    DEFAULT_SIMULATION_SERVER_LAUNCHER = 'spawn'
+
+    # The default number of standby simulations kept for each standby experiment
+    DEFAULT_STANDBY_CAPACITY = 1
+
+    # The default seconds a standby simulation waits for a user before being stopped
+    DEFAULT_STANDBY_IDLE_TIMEOUT = 15 * 60
+
     env_vars_name = {'ROOT_DIR': 'HBP',  # NRP home directory
                      'SIMULATION_DIR': 'NRP_SIMULATION_DIR',  # NRP simulation directory (in /tmp)
                      'MQTT_BROKER': "NRP_MQTT_BROKER_ADDRESS",
                      'MQTT_TOPICS_PREFIX': "NRP_MQTT_PREFIX",
                      'STORAGE_ADDRESS': 'STORAGE_ADDRESS',
-                     'STORAGE_PORT': 'STORAGE_PORT'}
+                     'STORAGE_PORT': 'STORAGE_PORT',
+                     'STORAGE_POOL_SIZE': 'NRP_STORAGE_POOL_SIZE',
+                     'STORAGE_CLONE_WORKERS': 'NRP_STORAGE_CLONE_WORKERS',
+                     'STORAGE_CLONE_MODE': 'NRP_STORAGE_CLONE_MODE',
+                     'EXPERIMENT_CACHE_DIR': 'NRP_EXPERIMENT_CACHE_DIR',
+                     'EXPERIMENT_CACHE_SIZE': 'NRP_EXPERIMENT_CACHE_SIZE',
+                     'AUTH_CACHE_SIZE': 'NRP_AUTH_CACHE_SIZE',
+                     'AUTH_CACHE_TTL': 'NRP_AUTH_CACHE_TTL',
+                     'AUTH_CACHE_NEGATIVE_TTL': 'NRP_AUTH_CACHE_NEGATIVE_TTL',
+                     'AUTH_MODE': 'NRP_AUTH_MODE',
+                     'AUTH_JWKS_FILE': 'NRP_AUTH_JWKS_FILE',
+                     'AUTH_USER_ID_CLAIM': 'NRP_AUTH_USER_ID_CLAIM',
+                     'AUTH_JWT_ISSUER': 'NRP_AUTH_JWT_ISSUER',
+                     'SIMULATION_CREATION_MODE': 'NRP_SIMULATION_CREATION_MODE',
+                     'SIMULATION_INIT_WORKERS': 'NRP_SIMULATION_INIT_WORKERS',
+                     'TEARDOWN_WORKERS': 'NRP_TEARDOWN_WORKERS',
+                     'TEARDOWN_ATTEMPTS': 'NRP_TEARDOWN_ATTEMPTS',
+                     'SIMULATION_QUEUE_DEPTH': 'NRP_SIMULATION_QUEUE_DEPTH',
+                     'MAX_SIMULATIONS': 'NRP_MAX_SIMULATIONS',
+                     'SIMULATION_CORES': 'NRP_SIMULATION_CORES',
+                     'SIMULATION_MEMORY': 'NRP_SIMULATION_MEMORY',
+                     'SIMULATION_DISK': 'NRP_SIMULATION_DISK',
+                     'SIMULATION_SERVER_POOL_SIZE': 'NRP_SIMULATION_SERVER_POOL_SIZE',
+                     'SIMULATION_SERVER_LAUNCHER': 'NRP_SIMULATION_SERVER_LAUNCHER',
+                     'STANDBY_EXPERIMENTS': 'NRP_STANDBY_EXPERIMENTS',
+                     'STANDBY_CAPACITY': 'NRP_STANDBY_CAPACITY',
+                     'STANDBY_IDLE_TIMEOUT': 'NRP_STANDBY_IDLE_TIMEOUT'}
 
     def __new__(cls):
         """
@@ -114,8 +228,151 @@ class _Settings:
         storage_port = os.environ.get(self.env_vars_name['STORAGE_PORT'], self.DEFAULT_STORAGE_PORT)
         self.storage_uri = f'http://{storage_address}:{storage_port}/storage'
 
+        # The size of the storage server connection pool, defaults to DEFAULT_STORAGE_POOL_SIZE
+        self.storage_pool_size: int = self._int_from_env('STORAGE_POOL_SIZE',
+                                                         self.DEFAULT_STORAGE_POOL_SIZE)
+
+        # The number of concurrent experiment clone requests,
+        # defaults to DEFAULT_STORAGE_CLONE_WORKERS
+        self.storage_clone_workers: int = self._int_from_env('STORAGE_CLONE_WORKERS',
+                                                             self.DEFAULT_STORAGE_CLONE_WORKERS)
+
+        # How to clone experiments, defaults to DEFAULT_STORAGE_CLONE_MODE
+        self.storage_clone_mode: str = os.environ.get(self.env_vars_name['STORAGE_CLONE_MODE'],
+                                                      self.DEFAULT_STORAGE_CLONE_MODE)
+        if self.storage_clone_mode not in self.STORAGE_CLONE_MODES:
+            logger.warning("'%s' must be one of %s, using default: %s",
+                           self.env_vars_name['STORAGE_CLONE_MODE'], self.STORAGE_CLONE_MODES,
+                           self.DEFAULT_STORAGE_CLONE_MODE)
+            self.storage_clone_mode = self.DEFAULT_STORAGE_CLONE_MODE
+
+        # The experiment files cache, defaults to DEFAULT_EXPERIMENT_CACHE_DIR and
+        # DEFAULT_EXPERIMENT_CACHE_SIZE
+        self.experiment_cache_dir: str = os.environ.get(self.env_vars_name['EXPERIMENT_CACHE_DIR'],
+                                                        self.DEFAULT_EXPERIMENT_CACHE_DIR)
+        self.experiment_cache_size: int = self._int_from_env('EXPERIMENT_CACHE_SIZE',
+                                                             self.DEFAULT_EXPERIMENT_CACHE_SIZE,
+                                                             min_value=0)
+
+        # The authentication caches, default to DEFAULT_AUTH_CACHE_SIZE, DEFAULT_AUTH_CACHE_TTL
+        # and DEFAULT_AUTH_CACHE_NEGATIVE_TTL
+        self.auth_cache_size: int = self._int_from_env('AUTH_CACHE_SIZE',
+                                                       self.DEFAULT_AUTH_CACHE_SIZE)
+        self.auth_cache_ttl: int = self._int_from_env('AUTH_CACHE_TTL',
+                                                      self.DEFAULT_AUTH_CACHE_TTL,
+                                                      min_value=0)
+        self.auth_cache_negative_ttl: int = self._int_from_env('AUTH_CACHE_NEGATIVE_TTL',
+                                                               self.DEFAULT_AUTH_CACHE_NEGATIVE_TTL,
+                                                               min_value=0)
+
+        # How to identify token owners, defaults to DEFAULT_AUTH_MODE
+        self.auth_mode: str = os.environ.get(self.env_vars_name['AUTH_MODE'],
+                                             self.DEFAULT_AUTH_MODE)
+        self.auth_jwks_file: str = os.environ.get(self.env_vars_name['AUTH_JWKS_FILE'])
+        if self.auth_mode not in self.AUTH_MODES:
+            logger.warning("'%s' must be one of %s, using default: %s",
+                           self.env_vars_name['AUTH_MODE'], self.AUTH_MODES,
+                           self.DEFAULT_AUTH_MODE)
+            self.auth_mode = self.DEFAULT_AUTH_MODE
+        elif self.auth_mode == 'jwks' and not self.auth_jwks_file:
+            logger.warning("'%s' is required in 'jwks' mode, using default: %s",
+                           self.env_vars_name['AUTH_JWKS_FILE'], self.DEFAULT_AUTH_MODE)
+            self.auth_mode = self.DEFAULT_AUTH_MODE
+        self.auth_user_id_claim: str = os.environ.get(self.env_vars_name['AUTH_USER_ID_CLAIM'],
+                                                      self.DEFAULT_AUTH_USER_ID_CLAIM)
+        self.auth_jwt_issuer: str = os.environ.get(self.env_vars_name['AUTH_JWT_ISSUER'])
+
+        # How to create simulations, defaults to DEFAULT_SIMULATION_CREATION_MODE
+        self.simulation_creation_mode: str = os.environ.get(
+            self.env_vars_name['SIMULATION_CREATION_MODE'], self.DEFAULT_SIMULATION_CREATION_MODE)
+        if self.simulation_creation_mode not in self.SIMULATION_CREATION_MODES:
+            logger.warning("'%s' must be one of %s, using default: %s",
+                           self.env_vars_name['SIMULATION_CREATION_MODE'],
+                           self.SIMULATION_CREATION_MODES, self.DEFAULT_SIMULATION_CREATION_MODE)
+            self.simulation_creation_mode = self.DEFAULT_SIMULATION_CREATION_MODE
+
+        # The number of background initialization threads,
+        # defaults to DEFAULT_SIMULATION_INIT_WORKERS
+        self.simulation_init_workers: int = self._int_from_env(
+            'SIMULATION_INIT_WORKERS', self.DEFAULT_SIMULATION_INIT_WORKERS)
+
+        # The background teardown, defaults to DEFAULT_TEARDOWN_WORKERS and
+        # DEFAULT_TEARDOWN_ATTEMPTS
+        self.teardown_workers: int = self._int_from_env('TEARDOWN_WORKERS',
+                                                        self.DEFAULT_TEARDOWN_WORKERS)
+        self.teardown_attempts: int = self._int_from_env('TEARDOWN_ATTEMPTS',
+                                                         self.DEFAULT_TEARDOWN_ATTEMPTS)
+
+        # The simulations admission queue, defaults to DEFAULT_SIMULATION_QUEUE_DEPTH
+        self.simulation_queue_depth: int = self._int_from_env(
+            'SIMULATION_QUEUE_DEPTH', self.DEFAULT_SIMULATION_QUEUE_DEPTH, min_value=0)
+
+        # The concurrent simulations, defaults to DEFAULT_MAX_SIMULATIONS and
+        # DEFAULT_SIMULATION_CORES, DEFAULT_SIMULATION_MEMORY, DEFAULT_SIMULATION_DISK
+        self.max_simulations: int = self._int_from_env('MAX_SIMULATIONS',
+                                                       self.DEFAULT_MAX_SIMULATIONS)
+        self.simulation_cores: int = self._int_from_env('SIMULATION_CORES',
+                                                        self.DEFAULT_SIMULATION_CORES, min_value=0)
+        self.simulation_memory: int = self._int_from_env('SIMULATION_MEMORY',
+                                                         self.DEFAULT_SIMULATION_MEMORY,
+                                                         min_value=0)
+        self.simulation_disk: int = self._int_from_env('SIMULATION_DISK',
+                                                       self.DEFAULT_SIMULATION_DISK, min_value=0)
+
+        # The simulation server processes pool, defaults to DEFAULT_SIMULATION_SERVER_POOL_SIZE
+        self.simulation_server_pool_size: int = self._int_from_env(
+            'SIMULATION_SERVER_POOL_SIZE', self.DEFAULT_SIMULATION_SERVER_POOL_SIZE, min_value=0)
+
+        # How to start simulation server processes, defaults to DEFAULT_SIMULATION_SERVER_LAUNCHER
+        self.simulation_server_launcher: str = os.environ.get(
+            self.env_vars_name['SIMULATION_SERVER_LAUNCHER'],
+            self.DEFAULT_SIMULATION_SERVER_LAUNCHER)
+        if self.simulation_server_launcher not in self.SIMULATION_SERVER_LAUNCHERS:
+            logger.warning("'%s' must be one of %s, using default: %s",
+                           self.env_vars_name['SIMULATION_SERVER_LAUNCHER'],
+                           self.SIMULATION_SERVER_LAUNCHERS,
+                           self.DEFAULT_SIMULATION_SERVER_LAUNCHER)
+            self.simulation_server_launcher = self.DEFAULT_SIMULATION_SERVER_LAUNCHER
+
+        # The experiments kept in standby, none by default
+        self.standby_experiments: Tuple[str, ...] = tuple(
+            experiment_id.strip() for experiment_id
+            in os.environ.get(self.env_vars_name['STANDBY_EXPERIMENTS'], '').split(',')
+            if experiment_id.strip())
+
+        # The standby simulations per experiment, defaults to DEFAULT_STANDBY_CAPACITY
+        self.standby_capacity: int = self._int_from_env(
+            'STANDBY_CAPACITY', self.DEFAULT_STANDBY_CAPACITY, min_value=0)
+
+        # The standby simulations idle timeout, defaults to DEFAULT_STANDBY_IDLE_TIMEOUT
+        self.standby_idle_timeout: int = self._int_from_env(
+            'STANDBY_IDLE_TIMEOUT', self.DEFAULT_STANDBY_IDLE_TIMEOUT, min_value=0)
+
         self.MAX_SIMULATION_TIMEOUT = 24 * 60 * 60  # 1 day in seconds
 
+    def _int_from_env(self, var_key: str, default: int, min_value: int = 1) -> int:
+        """
+        Reads an integer from the environment variable named env_vars_name[var_key]
+
+        :param var_key: the key of the environment variable name in env_vars_name
+        :param default: the value to be returned when the variable is unset or malformed
+        :param min_value: the minimum accepted value, default is returned for smaller values
+        :return: the value of the environment variable as int, default otherwise
+        """
+        var_name = self.env_vars_name[var_key]
+        try:
+            value = int(os.environ.get(var_name, default))
+        except (ValueError, TypeError):
+            logger.warning("Malformed value for '%s', using default: %s", var_name, default)
+            return default
+
+        if value < min_value:
+            logger.warning("'%s' must be at least %s, using default: %s",
+                           var_name, min_value, default)
+            return default
+
+        return value
+
 
 # Instantiate the singleton
 Settings = _Settings()
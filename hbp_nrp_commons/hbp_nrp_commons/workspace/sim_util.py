@@ -30,6 +30,7 @@ import errno
 import shutil
 import logging
 import tempfile
+import threading
 from typing import List, Optional
 
 from hbp_nrp_backend import NRPServicesGeneralException
@@ -45,6 +46,9 @@ class SimUtil:
     Utility methods for a simulation
     """
 
+    # serializes the changes to Settings.sim_dir_symlink
+    __symlink_lock = threading.Lock()
+
     @staticmethod
     def makedirs(directory: str) -> None:
         """
@@ -92,6 +96,11 @@ class SimUtil:
         """
         Creates a temporary directory and links it to Settings.sim_dir_symlink
 
+        Several simulations may run at the same time, each one in its own directory:
+        Settings.sim_dir_symlink links the directory of the latest simulation and it's replaced
+        atomically. The directories of the other simulations are left untouched, except a dirty
+        one of the same simulation (possibly from some prior crashed simulation).
+
         :params sim_id: simulation ID of the simulation we're going to create a temp dir for
                         we embed the sim_id into simulation temp dir so the
                         delete_simulation_dir deletes correctly
@@ -104,12 +113,17 @@ class SimUtil:
 
         sim_dir_symlink = Settings.sim_dir_symlink
         try:
-            if os.path.exists(sim_dir_symlink):
-                # clean up dirty sim_dir (possibly from some prior crashed simulation)
-                shutil.rmtree(os.path.realpath(sim_dir_symlink))
-                os.unlink(sim_dir_symlink)
-
-            os.symlink(sim_dir, sim_dir_symlink)
+            with SimUtil.__symlink_lock:
+                linked_dir = os.path.realpath(sim_dir_symlink)
+                if os.path.exists(sim_dir_symlink) and \
+                        SimUtil.extract_sim_id(linked_dir) == str(sim_id):
+                    # clean up dirty sim_dir (possibly from some prior crashed simulation)
+                    shutil.rmtree(linked_dir)
+
+                # replace the symlink atomically
+                tmp_symlink = f"{sim_dir_symlink}.{os.path.basename(sim_dir)}"
+                os.symlink(sim_dir, tmp_symlink)
+                os.replace(tmp_symlink, sim_dir_symlink)
         except (IOError, OSError) as err:
             raise NRPServicesGeneralException(
                 "Could not create symlink to temp simulation folder. {err}".format(err=err),
@@ -120,17 +134,27 @@ class SimUtil:
     @staticmethod
     def delete_simulation_dir(sim_dir=None):
         """
-        Removes simulation directory.
+        Removes a simulation directory and Settings.sim_dir_symlink, if linking it.
+        A directory already removed is ignored.
 
-        Checks that you are deleting the right folder by checking the sim_id.
+        :param sim_dir: the simulation directory, the one linked by Settings.sim_dir_symlink
+                        if None
         """
+        sim_dir_symlink = Settings.sim_dir_symlink
         try:
-            if os.path.exists(Settings.sim_dir_symlink):
-                current_sim_id = SimUtil.extract_sim_id(os.path.realpath(Settings.sim_dir_symlink))
-                input_sim_id = SimUtil.extract_sim_id(sim_dir)
-                if (current_sim_id == input_sim_id) or (sim_dir is None):
-                    shutil.rmtree(os.path.realpath(Settings.sim_dir_symlink))
-                    os.unlink(Settings.sim_dir_symlink)
+            with SimUtil.__symlink_lock:
+                linked_dir = os.path.realpath(sim_dir_symlink) \
+                    if os.path.exists(sim_dir_symlink) else None
+                if sim_dir is None:
+                    sim_dir = linked_dir
+                if sim_dir is None:
+                    return
+
+                sim_dir = os.path.realpath(sim_dir)
+                if os.path.exists(sim_dir):
+                    shutil.rmtree(sim_dir)
+                if linked_dir == sim_dir:
+                    os.unlink(sim_dir_symlink)
         except (IOError, OSError) as error:
             raise NRPServicesGeneralException(
                 "Could not access symlink to temp simulation folder. {err}".format(err=error),
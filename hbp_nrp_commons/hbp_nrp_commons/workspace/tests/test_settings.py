@@ -55,7 +55,33 @@ class TestSimConfig(unittest.TestCase):
             'NRP_MQTT_BROKER_ADDRESS' : "mqtt:6000",
             'NRP_MQTT_PREFIX' : "mqtt_prefix",
             "STORAGE_ADDRESS": "localhost",
-            "STORAGE_PORT": 99
+            "STORAGE_PORT": 99,
+            "NRP_STORAGE_POOL_SIZE": "42",
+            "NRP_STORAGE_CLONE_WORKERS": "3",
+            "NRP_STORAGE_CLONE_MODE": "archive",
+            "NRP_EXPERIMENT_CACHE_DIR": "/cache/dir",
+            "NRP_EXPERIMENT_CACHE_SIZE": "0",
+            "NRP_AUTH_CACHE_SIZE": "64",
+            "NRP_AUTH_CACHE_TTL": "60",
+            "NRP_AUTH_CACHE_NEGATIVE_TTL": "0",
+            "NRP_AUTH_MODE": "jwks",
+            "NRP_AUTH_JWKS_FILE": "/jwks.json",
+            "NRP_AUTH_USER_ID_CLAIM": "preferred_username",
+            "NRP_AUTH_JWT_ISSUER": "https://issuer",
+            "NRP_SIMULATION_CREATION_MODE": "async",
+            "NRP_SIMULATION_INIT_WORKERS": "4",
+            "NRP_TEARDOWN_WORKERS": "5",
+            "NRP_TEARDOWN_ATTEMPTS": "1",
+            "NRP_SIMULATION_QUEUE_DEPTH": "8",
+            "NRP_MAX_SIMULATIONS": "4",
+            "NRP_SIMULATION_CORES": "2",
+            "NRP_SIMULATION_MEMORY": "0",
+            "NRP_SIMULATION_DISK": "256",
+            "NRP_SIMULATION_SERVER_POOL_SIZE": "2",
+            "NRP_SIMULATION_SERVER_LAUNCHER": "zygote",
+            "NRP_STANDBY_EXPERIMENTS": "demo_0, teaching_1,",
+            "NRP_STANDBY_CAPACITY": "2",
+            "NRP_STANDBY_IDLE_TIMEOUT": "0"
         }
 
         #Clear the Singleton instance (if exists), and force a new copy
@@ -75,7 +101,269 @@ class TestSimConfig(unittest.TestCase):
         self.assertEqual(settings.mqtt_topics_prefix, "mqtt_prefix")
 
         self.assertEqual("http://localhost:99/storage", settings.storage_uri)
+        self.assertEqual(settings.storage_pool_size, 42)
+        self.assertEqual(settings.storage_clone_workers, 3)
+        self.assertEqual(settings.storage_clone_mode, "archive")
+        self.assertEqual(settings.experiment_cache_dir, "/cache/dir")
+        self.assertEqual(settings.experiment_cache_size, 0)
+        self.assertEqual(settings.auth_cache_size, 64)
+        self.assertEqual(settings.auth_cache_ttl, 60)
+        self.assertEqual(settings.auth_cache_negative_ttl, 0)
+        self.assertEqual(settings.auth_mode, "jwks")
+        self.assertEqual(settings.auth_jwks_file, "/jwks.json")
+        self.assertEqual(settings.auth_user_id_claim, "preferred_username")
+        self.assertEqual(settings.auth_jwt_issuer, "https://issuer")
+        self.assertEqual(settings.simulation_creation_mode, "async")
+        self.assertEqual(settings.simulation_init_workers, 4)
+        self.assertEqual(settings.teardown_workers, 5)
+        self.assertEqual(settings.teardown_attempts, 1)
+        self.assertEqual(settings.simulation_queue_depth, 8)
+        self.assertEqual(settings.max_simulations, 4)
+        self.assertEqual(settings.simulation_cores, 2)
+        self.assertEqual(settings.simulation_memory, 0)
+        self.assertEqual(settings.simulation_disk, 256)
+        self.assertEqual(settings.simulation_server_pool_size, 2)
+        self.assertEqual(settings.simulation_server_launcher, "zygote")
+        self.assertEqual(settings.standby_experiments, ("demo_0", "teaching_1"))
+        self.assertEqual(settings.standby_capacity, 2)
+        self.assertEqual(settings.standby_idle_timeout, 0)
+
+    def test_default_storage_pool_size(self):
+        del self.os_mock.environ["NRP_STORAGE_POOL_SIZE"]
+
+        settings = _Settings()
+        self.assertEqual(settings.storage_pool_size, _Settings.DEFAULT_STORAGE_POOL_SIZE)
+
+    def test_malformed_storage_pool_size(self):
+        for v in ["", "many", "0", "-3"]:
+            self.os_mock.environ["NRP_STORAGE_POOL_SIZE"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.storage_pool_size, _Settings.DEFAULT_STORAGE_POOL_SIZE)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_storage_clone_workers(self):
+        del self.os_mock.environ["NRP_STORAGE_CLONE_WORKERS"]
+
+        settings = _Settings()
+        self.assertEqual(settings.storage_clone_workers, _Settings.DEFAULT_STORAGE_CLONE_WORKERS)
+
+    def test_malformed_storage_clone_workers(self):
+        for v in ["", "all", "0"]:
+            self.os_mock.environ["NRP_STORAGE_CLONE_WORKERS"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.storage_clone_workers,
+                             _Settings.DEFAULT_STORAGE_CLONE_WORKERS)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_malformed_storage_clone_mode(self):
+        for v in ["", "zip"]:
+            self.os_mock.environ["NRP_STORAGE_CLONE_MODE"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.storage_clone_mode, _Settings.DEFAULT_STORAGE_CLONE_MODE)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_experiment_cache(self):
+        del self.os_mock.environ["NRP_EXPERIMENT_CACHE_DIR"]
+        del self.os_mock.environ["NRP_EXPERIMENT_CACHE_SIZE"]
+
+        settings = _Settings()
+        self.assertEqual(settings.experiment_cache_dir, _Settings.DEFAULT_EXPERIMENT_CACHE_DIR)
+        self.assertEqual(settings.experiment_cache_size, _Settings.DEFAULT_EXPERIMENT_CACHE_SIZE)
+
+    def test_default_auth_cache(self):
+        for v in ["NRP_AUTH_CACHE_SIZE", "NRP_AUTH_CACHE_TTL", "NRP_AUTH_CACHE_NEGATIVE_TTL"]:
+            del self.os_mock.environ[v]
+
+        settings = _Settings()
+        self.assertEqual(settings.auth_cache_size, _Settings.DEFAULT_AUTH_CACHE_SIZE)
+        self.assertEqual(settings.auth_cache_ttl, _Settings.DEFAULT_AUTH_CACHE_TTL)
+        self.assertEqual(settings.auth_cache_negative_ttl,
+                         _Settings.DEFAULT_AUTH_CACHE_NEGATIVE_TTL)
+
+    def test_malformed_auth_cache(self):
+        for v in ["", "forever", "-1"]:
+            self.os_mock.environ["NRP_AUTH_CACHE_TTL"] = v
+            self.os_mock.environ["NRP_AUTH_CACHE_SIZE"] = "0"
+
+            settings = _Settings()
+            self.assertEqual(settings.auth_cache_ttl, _Settings.DEFAULT_AUTH_CACHE_TTL)
+            self.assertEqual(settings.auth_cache_size, _Settings.DEFAULT_AUTH_CACHE_SIZE)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
     
+    def test_default_auth_mode(self):
+        for v in ["NRP_AUTH_MODE", "NRP_AUTH_JWKS_FILE", "NRP_AUTH_USER_ID_CLAIM",
+                  "NRP_AUTH_JWT_ISSUER"]:
+            del self.os_mock.environ[v]
+
+        settings = _Settings()
+        self.assertEqual(settings.auth_mode, _Settings.DEFAULT_AUTH_MODE)
+        self.assertIsNone(settings.auth_jwks_file)
+        self.assertEqual(settings.auth_user_id_claim, _Settings.DEFAULT_AUTH_USER_ID_CLAIM)
+        self.assertIsNone(settings.auth_jwt_issuer)
+
+    def test_malformed_auth_mode(self):
+        self.os_mock.environ["NRP_AUTH_MODE"] = "offline"
+        settings = _Settings()
+        self.assertEqual(settings.auth_mode, _Settings.DEFAULT_AUTH_MODE)
+
+        #Clear the Singleton instance (if exists), and force a new copy
+        _Settings._Settings__instance = None
+
+        # a JWKS file is required
+        self.os_mock.environ["NRP_AUTH_MODE"] = "jwks"
+        del self.os_mock.environ["NRP_AUTH_JWKS_FILE"]
+        settings = _Settings()
+        self.assertEqual(settings.auth_mode, _Settings.DEFAULT_AUTH_MODE)
+
+    def test_default_simulation_creation(self):
+        del self.os_mock.environ["NRP_SIMULATION_CREATION_MODE"]
+        del self.os_mock.environ["NRP_SIMULATION_INIT_WORKERS"]
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_creation_mode,
+                         _Settings.DEFAULT_SIMULATION_CREATION_MODE)
+        self.assertEqual(settings.simulation_init_workers,
+                         _Settings.DEFAULT_SIMULATION_INIT_WORKERS)
+
+    def test_malformed_simulation_creation(self):
+        self.os_mock.environ["NRP_SIMULATION_CREATION_MODE"] = "later"
+        self.os_mock.environ["NRP_SIMULATION_INIT_WORKERS"] = "0"
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_creation_mode,
+                         _Settings.DEFAULT_SIMULATION_CREATION_MODE)
+        self.assertEqual(settings.simulation_init_workers,
+                         _Settings.DEFAULT_SIMULATION_INIT_WORKERS)
+
+    def test_default_teardown(self):
+        del self.os_mock.environ["NRP_TEARDOWN_WORKERS"]
+        del self.os_mock.environ["NRP_TEARDOWN_ATTEMPTS"]
+
+        settings = _Settings()
+        self.assertEqual(settings.teardown_workers, _Settings.DEFAULT_TEARDOWN_WORKERS)
+        self.assertEqual(settings.teardown_attempts, _Settings.DEFAULT_TEARDOWN_ATTEMPTS)
+
+    def test_malformed_teardown(self):
+        for v in ["", "twice", "0"]:
+            self.os_mock.environ["NRP_TEARDOWN_WORKERS"] = v
+            self.os_mock.environ["NRP_TEARDOWN_ATTEMPTS"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.teardown_workers, _Settings.DEFAULT_TEARDOWN_WORKERS)
+            self.assertEqual(settings.teardown_attempts, _Settings.DEFAULT_TEARDOWN_ATTEMPTS)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_simulation_queue_depth(self):
+        del self.os_mock.environ["NRP_SIMULATION_QUEUE_DEPTH"]
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_queue_depth, _Settings.DEFAULT_SIMULATION_QUEUE_DEPTH)
+
+    def test_malformed_simulation_queue_depth(self):
+        for v in ["", "deep", "-1"]:
+            self.os_mock.environ["NRP_SIMULATION_QUEUE_DEPTH"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.simulation_queue_depth,
+                             _Settings.DEFAULT_SIMULATION_QUEUE_DEPTH)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_concurrent_simulations(self):
+        for var in ("NRP_MAX_SIMULATIONS", "NRP_SIMULATION_CORES", "NRP_SIMULATION_MEMORY",
+                    "NRP_SIMULATION_DISK"):
+            del self.os_mock.environ[var]
+
+        settings = _Settings()
+        self.assertEqual(settings.max_simulations, _Settings.DEFAULT_MAX_SIMULATIONS)
+        self.assertEqual(settings.simulation_cores, _Settings.DEFAULT_SIMULATION_CORES)
+        self.assertEqual(settings.simulation_memory, _Settings.DEFAULT_SIMULATION_MEMORY)
+        self.assertEqual(settings.simulation_disk, _Settings.DEFAULT_SIMULATION_DISK)
+
+    def test_malformed_concurrent_simulations(self):
+        for v in ["", "many", "-1"]:
+            for var in ("NRP_MAX_SIMULATIONS", "NRP_SIMULATION_CORES", "NRP_SIMULATION_MEMORY",
+                        "NRP_SIMULATION_DISK"):
+                self.os_mock.environ[var] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.max_simulations, _Settings.DEFAULT_MAX_SIMULATIONS)
+            self.assertEqual(settings.simulation_cores, _Settings.DEFAULT_SIMULATION_CORES)
+            self.assertEqual(settings.simulation_memory, _Settings.DEFAULT_SIMULATION_MEMORY)
+            self.assertEqual(settings.simulation_disk, _Settings.DEFAULT_SIMULATION_DISK)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_simulation_server_pool_size(self):
+        del self.os_mock.environ["NRP_SIMULATION_SERVER_POOL_SIZE"]
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_server_pool_size,
+                         _Settings.DEFAULT_SIMULATION_SERVER_POOL_SIZE)
+
+    def test_malformed_simulation_server_pool_size(self):
+        for v in ["", "some", "-1"]:
+            self.os_mock.environ["NRP_SIMULATION_SERVER_POOL_SIZE"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.simulation_server_pool_size,
+                             _Settings.DEFAULT_SIMULATION_SERVER_POOL_SIZE)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
+    def test_default_simulation_server_launcher(self):
+        del self.os_mock.environ["NRP_SIMULATION_SERVER_LAUNCHER"]
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_server_launcher,
+                         _Settings.DEFAULT_SIMULATION_SERVER_LAUNCHER)
+
+    def test_malformed_simulation_server_launcher(self):
+        self.os_mock.environ["NRP_SIMULATION_SERVER_LAUNCHER"] = "fork"
+
+        settings = _Settings()
+        self.assertEqual(settings.simulation_server_launcher,
+                         _Settings.DEFAULT_SIMULATION_SERVER_LAUNCHER)
+
+    def test_default_standby(self):
+        del self.os_mock.environ["NRP_STANDBY_EXPERIMENTS"]
+        del self.os_mock.environ["NRP_STANDBY_CAPACITY"]
+        del self.os_mock.environ["NRP_STANDBY_IDLE_TIMEOUT"]
+
+        settings = _Settings()
+        self.assertEqual(settings.standby_experiments, ())
+        self.assertEqual(settings.standby_capacity, _Settings.DEFAULT_STANDBY_CAPACITY)
+        self.assertEqual(settings.standby_idle_timeout, _Settings.DEFAULT_STANDBY_IDLE_TIMEOUT)
+
+    def test_malformed_standby(self):
+        for v in ["", "few", "-1"]:
+            self.os_mock.environ["NRP_STANDBY_CAPACITY"] = v
+            self.os_mock.environ["NRP_STANDBY_IDLE_TIMEOUT"] = v
+
+            settings = _Settings()
+            self.assertEqual(settings.standby_capacity, _Settings.DEFAULT_STANDBY_CAPACITY)
+            self.assertEqual(settings.standby_idle_timeout,
+                             _Settings.DEFAULT_STANDBY_IDLE_TIMEOUT)
+
+            #Clear the Singleton instance (if exists), and force a new copy
+            _Settings._Settings__instance = None
+
     def test_default_mqtt_broker(self):
         del self.os_mock.environ["NRP_MQTT_BROKER_ADDRESS"]
 
@@ -27,6 +27,8 @@ Unit tests for the sim config model
 
 import unittest
 import os
+import shutil
+import tempfile
 from unittest.mock import patch, MagicMock
 
 from hbp_nrp_commons.workspace.sim_util import SimUtil
@@ -96,5 +98,53 @@ class TestSimConfig(unittest.TestCase):
         self.os_mock.unlink.assert_called_once()
 
 
+class TestSimulationDirs(unittest.TestCase):
+    """
+    The simulation directories of concurrent simulations, on the actual file system
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.symlink = os.path.join(self.tmp_dir, "nrp-simulation-dir")
+
+        settings_patcher = patch(f'{_base_path}.Settings')
+        settings_patcher.start().sim_dir_symlink = self.symlink
+        self.addCleanup(settings_patcher.stop)
+
+        tempfile_patcher = patch(f'{_base_path}.tempfile.tempdir', self.tmp_dir)
+        tempfile_patcher.start()
+        self.addCleanup(tempfile_patcher.stop)
+
+    def test_concurrent_simulations(self):
+        first = SimUtil.init_simulation_dir("1")
+        second = SimUtil.init_simulation_dir("2")
+
+        # the symlink links the latest simulation, the other directories are left untouched
+        self.assertTrue(os.path.isdir(first))
+        self.assertEqual(os.path.realpath(self.symlink), os.path.realpath(second))
+
+        SimUtil.delete_simulation_dir(first)
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.isdir(second))
+        self.assertEqual(os.path.realpath(self.symlink), os.path.realpath(second))
+
+        SimUtil.delete_simulation_dir(second)
+        self.assertFalse(os.path.exists(second))
+        self.assertFalse(os.path.lexists(self.symlink))
+
+        # already deleted
+        SimUtil.delete_simulation_dir(second)
+
+    def test_dirty_simulation_dir(self):
+        dirty = SimUtil.init_simulation_dir("1")
+        other = SimUtil.init_simulation_dir("2")
+        SimUtil.init_simulation_dir("2")
+
+        # the dirty directory of the same simulation is removed
+        self.assertFalse(os.path.exists(other))
+        self.assertTrue(os.path.isdir(dirty))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -28,9 +28,14 @@ This module provides helper functions to handle zip
 __author__ = 'NRP software team, Hossain Mahmud'
 
 import os
+import queue
+import struct
+import threading
+import uuid
 import zipfile
+import zlib
 import logging
-from typing import Union, IO, Iterable, Optional
+from typing import Callable, Union, IO, Iterable, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +110,333 @@ def create_from_filelist(file_list: Iterable[Union[str, os.PathLike]],
                 zf.write(filename=file,
                          arcname=os.path.basename(file) if not preserve_path else None)
 
+
+class _ChunksWriter:
+    """
+    A write-only, unseekable, file object handing the written bytes to a bounded queue,
+    in chunks of chunk_size bytes.
+    Writing blocks while the queue is full and raises once cancel_event is set.
+    """
+
+    def __init__(self, chunks_queue: queue.Queue, chunk_size: int,
+                 cancel_event: threading.Event):
+        self.__queue = chunks_queue
+        self.__chunk_size = chunk_size
+        self.__cancel_event = cancel_event
+        self.__buffer = bytearray()
+
+    def write(self, data) -> int:
+        """
+        Buffers data, handing the buffer to the queue once a chunk is full
+
+        :return: the number of bytes written
+        """
+        self.__buffer += data
+        if len(self.__buffer) >= self.__chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        """
+        Hands the buffered bytes, if any, to the queue
+        """
+        if self.__buffer:
+            self.put(bytes(self.__buffer))
+            self.__buffer.clear()
+
+    def put(self, item):
+        """
+        Puts item in the queue, waiting for room
+
+        :raise IOError: if cancel_event is set meanwhile
+        """
+        while True:
+            if self.__cancel_event.is_set():
+                raise IOError("Zip stream consumer has gone away")
+            try:
+                self.__queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+def stream_from_filelist(file_list: Iterable[Union[str, os.PathLike]],
+                         preserve_path: bool = True,
+                         chunk_size: int = 64 * 1024,
+                         max_buffered_chunks: int = 8) -> Iterator[bytes]:
+    """
+    Create a zip from file_list, as a stream of chunks.
+
+    The archive is compressed by a background thread while the returned iterator is consumed,
+    e.g. as the body of a chunked HTTP request. No more than max_buffered_chunks are held in
+    memory, and nothing is written to disk.
+    Compression errors are raised by the iterator; closing the iterator stops the compression.
+
+    :param file_list: the list of files to be compressed
+    :param preserve_path: the file paths will be preserved in the archive.
+    :param chunk_size: the size, in bytes, of the yielded chunks (but the last one)
+    :param max_buffered_chunks: the maximum number of compressed chunks waiting to be consumed
+    :return: an iterator over the bytes of the zip archive
+    """
+    chunks_queue = queue.Queue(maxsize=max_buffered_chunks)
+    cancel_event = threading.Event()
+    writer = _ChunksWriter(chunks_queue, chunk_size, cancel_event)
+    end_of_stream = object()
+
+    def compress():
+        result = end_of_stream
+        try:
+            with zipfile.ZipFile(writer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for file in file_list:
+                    zf.write(filename=file,
+                             arcname=os.path.basename(file) if not preserve_path else None)
+            writer.flush()
+        except Exception as ex:  # pylint: disable=broad-except
+            result = ex
+        try:
+            writer.put(result)
+        except IOError:
+            pass  # cancelled
+
+    producer = threading.Thread(target=compress, name="ZipStreamProducer", daemon=True)
+    producer.start()
+
+    try:
+        while (item := chunks_queue.get()) is not end_of_stream:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancel_event.set()
+        producer.join()
+
+
+# zip format records, see https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT
+_LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_FILE_SIGNATURE = b"PK\003\004"
+_CENTRAL_DIRECTORY_SIGNATURE = b"PK\001\002"
+_END_OF_CENTRAL_DIRECTORY_SIGNATURE = b"PK\005\006"
+_DATA_DESCRIPTOR_SIGNATURE = b"PK\007\010"
+_ZIP64_EXTRA_ID = 0x0001
+_ZIP64_SIZE_MARKER = 0xFFFFFFFF
+
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8
+_FLAG_UTF8 = 0x800
+
+_STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class _ChunksReader:
+    """
+    Reads an iterable of bytes chunks as a stream
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.__chunks = iter(chunks)
+        self.__buffer = bytearray()
+
+    def read(self, size: int) -> bytes:
+        """
+        :return: exactly size bytes
+        :raise zipfile.BadZipFile: if the stream ends before
+        """
+        while len(self.__buffer) < size:
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                raise zipfile.BadZipFile("Truncated zip stream")
+            self.__buffer += chunk
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    def read_some(self, max_size: int) -> bytes:
+        """
+        :return: at most max_size bytes, an empty bytes at the end of the stream
+        """
+        if not self.__buffer:
+            self.__buffer += next(self.__chunks, b"")
+        data = bytes(self.__buffer[:max_size])
+        del self.__buffer[:max_size]
+        return data
+
+    def unread(self, data: bytes):
+        """
+        Pushes data back, to be read again first
+        """
+        self.__buffer[:0] = data
+
+    def drain(self):
+        """
+        Reads and discards the rest of the stream
+        """
+        self.__buffer.clear()
+        for _ in self.__chunks:
+            pass
+
+
+def checked_relpath(path: str) -> str:
+    """
+    Checks that a path received from outside (e.g. an archive member or a storage listing entry)
+    stays inside the directory it is relative to
+
+    :param path: the relative path
+    :return: the normalized path
+    :raise ValueError: if the path is absolute or leads out of its directory
+    """
+    rel_path = os.path.normpath(path)
+    if os.path.isabs(rel_path) or rel_path == ".." or rel_path.startswith(".." + os.sep):
+        raise ValueError(f"Illegal path: {path}")
+    return rel_path
+
+
+def _member_path(extract_to: str, name: str) -> str:
+    """
+    :return: the path the member name has to be extracted to
+    :raise zipfile.BadZipFile: if the member would be extracted outside extract_to
+    """
+    try:
+        return os.path.join(extract_to, checked_relpath(name))
+    except ValueError as e:
+        raise zipfile.BadZipFile(f"Illegal path in zip stream: {name}") from e
+
+
+def _zip64_sizes(extra: bytes, file_size: int, compress_size: int):
+    """
+    :return: the (file size, compressed size, whether a zip64 extra field is present) of an entry
+    """
+    while len(extra) >= 4:
+        field_id, field_size = struct.unpack("<HH", extra[:4])
+        if field_id == _ZIP64_EXTRA_ID:
+            values = list(struct.unpack(f"<{field_size // 8}Q", extra[4:4 + field_size // 8 * 8]))
+            if file_size == _ZIP64_SIZE_MARKER:
+                file_size = values.pop(0)
+            if compress_size == _ZIP64_SIZE_MARKER:
+                compress_size = values.pop(0)
+            return file_size, compress_size, True
+        extra = extra[4 + field_size:]
+    return file_size, compress_size, False
+
+
+def extract_stream(chunks: Iterable[bytes],
+                   extract_to: Union[str, os.PathLike],
+                   member_filter: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """
+    Extract a zip while it is being received, e.g. as an HTTP response body.
+
+    Unlike zipfile, which needs the central directory at the end of the archive, the entries are
+    read from their local headers, hence in a single pass and with a bounded memory usage.
+    Stored and deflated entries are supported. Deflated entries may be followed by a data
+    descriptor, as written by streaming zip producers (e.g. stream_from_filelist).
+    Every file is written to a temporary file, renamed once its CRC has been checked.
+    The whole stream is consumed, the central directory being read and discarded.
+
+    :param chunks: the bytes of the zip archive
+    :param extract_to: absolute path to the folder where to unzip
+    :param member_filter: a function returning False for the member names not to be extracted
+    :return: the paths of the extracted files
+    :raise zipfile.BadZipFile: if the archive is malformed or a member would be extracted
+                               outside extract_to
+    :raise NotImplementedError: if an entry is encrypted or uses an unsupported compression
+    """
+    reader = _ChunksReader(chunks)
+    extract_to = os.path.abspath(extract_to)
+    extracted = []
+
+    while True:
+        signature = reader.read(4)
+        if signature in (_CENTRAL_DIRECTORY_SIGNATURE, _END_OF_CENTRAL_DIRECTORY_SIGNATURE):
+            # no more entries, the central directory is of no use
+            reader.drain()
+            break
+        if signature != _LOCAL_FILE_SIGNATURE:
+            raise zipfile.BadZipFile("Bad local file header signature in zip stream")
+
+        (_, _, _, flags, method, _, _, crc, compress_size, file_size, name_length,
+         extra_length) = _LOCAL_FILE_HEADER.unpack(
+             signature + reader.read(_LOCAL_FILE_HEADER.size - 4))
+        name = reader.read(name_length).decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+        file_size, compress_size, zip64 = _zip64_sizes(reader.read(extra_length),
+                                                        file_size, compress_size)
+
+        if flags & _FLAG_ENCRYPTED:
+            raise NotImplementedError(f"Encrypted zip entries are not supported: {name}")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"Unsupported compression method {method}: {name}")
+        has_descriptor = bool(flags & _FLAG_DATA_DESCRIPTOR)
+        if has_descriptor and method == zipfile.ZIP_STORED:
+            raise NotImplementedError(f"Stored entries of unknown size can't be streamed: {name}")
+
+        dest_path = _member_path(extract_to, name)
+        is_dir = name.endswith("/")
+        keep = member_filter is None or member_filter(name)
+
+        part_path = None
+        dest_file = None
+        if keep and is_dir:
+            os.makedirs(dest_path, exist_ok=True)
+        elif keep:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            part_path = os.path.join(os.path.dirname(dest_path),
+                                     f".{os.path.basename(dest_path)}.{uuid.uuid4().hex}.part")
+            dest_file = open(part_path, "xb")  # pylint: disable=consider-using-with
+
+        try:
+            actual_crc, actual_size = 0, 0
+
+            def output(data):
+                nonlocal actual_crc, actual_size
+                actual_crc = zlib.crc32(data, actual_crc)
+                actual_size += len(data)
+                if dest_file is not None:
+                    dest_file.write(data)
+
+            if method == zipfile.ZIP_STORED:
+                remaining = compress_size
+                while remaining:
+                    data = reader.read_some(min(remaining, _STREAM_BLOCK_SIZE))
+                    if not data:
+                        raise zipfile.BadZipFile("Truncated zip stream")
+                    output(data)
+                    remaining -= len(data)
+            else:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                remaining = None if has_descriptor else compress_size
+                while not decompressor.eof and remaining != 0:
+                    data = reader.read_some(_STREAM_BLOCK_SIZE if remaining is None
+                                            else min(remaining, _STREAM_BLOCK_SIZE))
+                    if not data:
+                        raise zipfile.BadZipFile("Truncated zip stream")
+                    if remaining is not None:
+                        remaining -= len(data)
+                    output(decompressor.decompress(data))
+                output(decompressor.flush())
+                reader.unread(decompressor.unused_data)
+
+            if has_descriptor:
+                crc = reader.read(4)
+                if crc == _DATA_DESCRIPTOR_SIGNATURE:
+                    crc = reader.read(4)
+                crc, = struct.unpack("<L", crc)
+                _, file_size = struct.unpack("<QQ" if zip64 else "<LL",
+                                             reader.read(16 if zip64 else 8))
+
+            if actual_crc != crc or actual_size != file_size:
+                raise zipfile.BadZipFile(f"Bad CRC-32 or size for zip entry {name}")
+
+            if dest_file is not None:
+                dest_file.close()
+                os.replace(part_path, dest_path)
+                extracted.append(dest_path)
+        finally:
+            if dest_file is not None:
+                dest_file.close()
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+
+    return extracted
+
+
 def get_rootname(zip_abs_path: Union[str, os.PathLike, IO[bytes]]) -> Optional[str]: # pragma: no cover
     """
     Gets the root folder name inside a zip
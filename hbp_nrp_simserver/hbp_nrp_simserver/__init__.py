@@ -1,7 +1,17 @@
 """
 This package contains a server to run nrp_client-based scripts
 """
-from .version import VERSION as __version__  # pylint: disable=W0611
 
 __author__ = "Ugo Albanese"
 
+
+def __getattr__(name):
+    """
+    Computes __version__ on first use, rather than on import
+    """
+    if name == "__version__":
+        # pylint: disable=import-outside-toplevel
+        from .version import VERSION
+        globals()[name] = VERSION
+        return VERSION
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -44,9 +44,6 @@ import pytz
 
 timezone = pytz.timezone('Europe/Zurich')
 
-# import nrp_core python client class client
-from nrp_client import NrpCore as NrpCoreClientClass  # nrp-core python client
-
 MQTT_SIMSERVER_TOPIC_PREFIX = 'nrp_simulation'
 
 # TODO use protobuf as message format instead of JSON
@@ -91,3 +88,16 @@ class ServerProcessExitCodes(IntEnum):
     SHUTDOWN_ERROR = 2
     RUNNING_ERROR = 3
 
+
+def __getattr__(name):
+    """
+    Imports the nrp-core python client class, exposed as NrpCoreClientClass, on first use.
+    The client pulls in gRPC and protobuf, which are slow to import and unused by the processes,
+    e.g. the backend, that import this package only to manage simulation servers.
+    """
+    if name == "NrpCoreClientClass":
+        # pylint: disable=import-outside-toplevel
+        from nrp_client import NrpCore as NrpCoreClientClass  # nrp-core python client
+        globals()[name] = NrpCoreClientClass
+        return NrpCoreClientClass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
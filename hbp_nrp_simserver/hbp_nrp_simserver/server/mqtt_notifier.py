@@ -50,14 +50,15 @@ class MQTTNotifier:
                  sim_id: int,
                  broker_hostname: str = Settings.DEFAULT_MQTT_BROKER_HOST, broker_port: int = Settings.DEFAULT_MQTT_BROKER_PORT,
                  topics_prefix: str = Settings.DEFAULT_MQTT_TOPICS_PREFIX,
-                 client_id: Optional[str] = DEFAULT_MQTT_CLIENT_ID):
+                 client_id: Optional[str] = None):
 
         self.sim_id: int = sim_id
         self.mqtt_broker_hostname: str = broker_hostname
         self.mqtt_broker_port: str = broker_port
         self.mqtt_topics_prefix: str = topics_prefix
 
-        self.mqtt_client_id: str = client_id
+        # the client ids of the simulations running side by side differ
+        self.mqtt_client_id: str = client_id or f"{self.DEFAULT_MQTT_CLIENT_ID}_{sim_id}"
 
         self.status_topic: str = TOPIC_STATUS(self.sim_id)
         self.error_topic: str = TOPIC_ERROR(self.sim_id)
@@ -65,8 +66,7 @@ class MQTTNotifier:
         if self.mqtt_topics_prefix:
             self.status_topic = f"{self.mqtt_topics_prefix}/{self.status_topic}"
             self.error_topic = f"{self.mqtt_topics_prefix}/{self.error_topic}"
-            # prefix mqtt_client_id with mqtt_topics_prefix
-            # TODO it should be prefixed by a globally unique sim_id (NRRPLT-8917)
+            # prefix mqtt_client_id with mqtt_topics_prefix, i.e. scope it to this backend
             self.mqtt_client_id = f"{self.mqtt_topics_prefix}_{self.mqtt_client_id}"
 
         # task specific bookkeeping
@@ -94,8 +94,10 @@ class MQTTNotifier:
         Shutdown all publishers, notification will no longer function after called.
         """
         logger.info('Shutting down MQTT notifier')
-        self.__mqtt_client.loop_stop()
+        # the network thread sends the pending messages (e.g. the last status update)
+        # before the disconnection request, then exits: joining it waits for them to be sent
         self.__mqtt_client.disconnect()
+        self.__mqtt_client.loop_stop()
         self.__mqtt_client = None
 
     def publish_status(self, msg):
@@ -26,7 +26,10 @@ A Wrapper for NrpCore clients instances making it amenable to be controlled inte
 It adds cooperative execution via thread synchronization and checks on simulation timeouts
 """
 
+from __future__ import annotations
+
 import logging
+import socket
 import threading
 from time import time_ns as now_ns
 from typing import List, Optional, Type
@@ -41,7 +44,8 @@ logger = logging.getLogger(__name__)
 
 class NrpCoreWrapper:
 
-    NRP_CORE_DEFAULT_ADDRESS_PORT = 'localhost:5345'  # TODO from some configuration instead?
+    # the host nrp-core listens on, on a free port allocated to each simulation
+    NRP_CORE_HOST = 'localhost'
 
     def __init__(self,
                  nrp_core_class: Type[simserver.NrpCoreClientClass],
@@ -76,6 +80,9 @@ class NrpCoreWrapper:
 
         self.is_running: bool = False
 
+        # several simulations may run on the host, each nrp-core listens on its own port
+        self.nrp_core_address: str = self.allocate_address(self.NRP_CORE_HOST)
+
         # datatransfer_engine's needs sim_id to use in topics' naming.
         # We pass "sim_id" overriding its "simulationID" parameter in its configuration
         # But we need to find the position of its configuration in the exp_config.EngineConfigs list
@@ -101,19 +108,32 @@ class NrpCoreWrapper:
         nrp_core_args_str = " ".join(nrp_core_args)
 
         # Configurations Assumptions:
-        # - address is 'localhost:5345'
         # - current directory is the experiment directory
         logger.debug("Instantiating nrp-core client: "
                      "%s(%s, config_file=%s, args=%s) ",
                      nrp_core_class.__name__,
-                     self.NRP_CORE_DEFAULT_ADDRESS_PORT,
+                     self.nrp_core_address,
                      self.__exp_config_file, nrp_core_args_str)
 
         # NOTE Change here when NrpCore API changes
-        self.__nrp_core_client_instance = nrp_core_class(self.NRP_CORE_DEFAULT_ADDRESS_PORT,
+        self.__nrp_core_client_instance = nrp_core_class(self.nrp_core_address,
                                                          config_file=self.__exp_config_file,
                                                          args=nrp_core_args_str)
 
+    @staticmethod
+    def allocate_address(host: str) -> str:
+        """
+        Allocates a free TCP port on host, asking the OS for one.
+        The port is released right away for nrp-core to bind it. The OS picks it at a varying
+        offset in the ephemeral ports range, concurrent allocations are unlikely to collide.
+
+        :param host: The host name
+        :return: The address, i.e. "host:port"
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((host, 0))
+            return f"{host}:{sock.getsockname()[1]}"
+
     def _initialize(self):
         self.__nrp_core_client_instance.initialize()
 
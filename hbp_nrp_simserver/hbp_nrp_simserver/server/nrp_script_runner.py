@@ -248,8 +248,10 @@ class NRPScriptRunner:
             logger.exception("%s. Simulation ID '%s'", str(e), self.sim_id)
             self._publish_error(msg=str(e), error_type="Runtime")
         finally:
-            # main script execution completed
-            completed_callback()
+            # main script execution completed, unless stopped: the lifecycle, stopping, joins
+            # this thread and would block the completed callback until it times out
+            if not self.__exec_stopped_event.is_set():
+                completed_callback()
 
     def start(self, completed_callback: Callable[[], None] = lambda: None) -> None:
         """
@@ -292,6 +294,8 @@ class NRPScriptRunner:
         if self.__exec_thread is not None:
 
             self.__exec_stopped_event.set()
+            # wake up the script if paused, run_loop raises NRPStopExecution
+            self.__exec_started_event.set()
 
             logger.debug("Waiting main script thread. Simulation ID '%s'", self.sim_id)
 
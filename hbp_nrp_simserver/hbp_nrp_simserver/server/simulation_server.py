@@ -36,10 +36,10 @@ import os
 import signal
 import sys
 import threading
-import time
 from typing import List, Optional
 
 import hbp_nrp_commons.timer as timer
+from hbp_nrp_commons.stage_timer import StageTimer
 import hbp_nrp_simserver.server as simserver
 import hbp_nrp_simserver.server.experiment_configuration as exp_conf_utils
 import hbp_nrp_simserver.server.simulation_server_lifecycle as simserver_lifecycle
@@ -47,6 +47,8 @@ from hbp_nrp_commons.workspace.settings import Settings
 from hbp_nrp_commons.simulation_lifecycle import SimulationLifecycle
 from hbp_nrp_simserver.server.mqtt_notifier import MQTTNotifier
 from hbp_nrp_simserver.server.nrp_script_runner import NRPScriptRunner
+from hbp_nrp_simserver.server.simulation_server_pool import SimulationServerPool
+from hbp_nrp_simserver.server.simulation_server_zygote import SimulationServerZygote
 
 from hbp_nrp_commons import set_up_logger
 
@@ -68,6 +70,8 @@ def __except_hook(ex_type, value, ex_traceback):
 
 class SimulationServer:
     STATUS_UPDATE_INTERVAL = 1.0
+    # maximum waiting time in secs for the lifecycle to be done, once requested to stop
+    MAX_STOP_TIMEOUT = 10.
 
     def __init__(self, sim_settings: simserver.SimulationSettings):
         """
@@ -77,6 +81,8 @@ class SimulationServer:
         """
 
         self.simulation_settings = sim_settings
+        # the duration of the startup stages, the initialization of nrp-core included
+        self.stage_timer = StageTimer()
 
         # set during initialization
         self.exp_config: Optional[exp_conf_utils.type_class] = None
@@ -151,6 +157,10 @@ class SimulationServer:
 
         :param except_hook: A handler method for critical exceptions
         """
+        with self.stage_timer.stage("warm-up"):
+            self.__initialize(except_hook)
+
+    def __initialize(self, except_hook):
         # the exception will be caught and logged by the caller
         self.exp_config = exp_conf_utils.validate(
             exp_conf_utils.parse(self.simulation_settings.exp_config_file))
@@ -247,11 +257,15 @@ class SimulationServer:
                     logger.debug("Waiting for lifecycle to stop. "
                                  "Simulation ID '%s'", self.simulation_id)
 
-                    # TODO timeout and handle it
-                    self.__lifecycle.done_event.wait(10.)  # NOTE Waiting point
-
-                    logger.debug("Lifecycle has stopped. "
-                                 "Simulation ID '%s'", self.simulation_id)
+                    # set once the lifecycle has shut down, i.e. nrp-core included
+                    # NOTE Waiting point
+                    if self.__lifecycle.done_event.wait(self.MAX_STOP_TIMEOUT):
+                        logger.debug("Lifecycle has stopped. "
+                                     "Simulation ID '%s'", self.simulation_id)
+                    else:
+                        logger.warning("Lifecycle not stopped after %s secs. "
+                                       "Simulation ID '%s'", self.MAX_STOP_TIMEOUT,
+                                       self.simulation_id)
                 finally:
                     self.exit_state = self.__lifecycle.state
                     self.__lifecycle = None
@@ -276,8 +290,8 @@ class SimulationServer:
         """
         self.__lifecycle.done_event.wait()  # NOTE Waiting point
 
-        self.publish_state_update()  # broadcast last status update before exiting
-        time.sleep(1.0)
+        # broadcast last status update before exiting, the notifier sends it before shutting down
+        self.publish_state_update()
         logger.info(
             "Simulation Server main loop completed. Simulation ID '%s'", self.simulation_id)
 
@@ -307,10 +321,54 @@ class SimulationServer:
                            " Simulation ID:' %s': '%s'", self.simulation_id, json_str)
 
 
-def main():  # pragma: no cover
+def _import_nrp_client() -> None:  # pragma: no cover
+    """
+    Imports the nrp-core python client, otherwise imported on first use, ahead of the simulation,
+    so that the processes waiting for a simulation don't have to import it once it's requested.
+    """
+    _ = simserver.NrpCoreClientClass
+
+
+def _wait_in_standby() -> Optional[List[str]]:  # pragma: no cover
+    """
+    Waits, warmed up, for the simulation to run: tells the SimulationServerPool it's ready on
+    stdout, then reads from stdin a JSON object with the command line arguments ("args") and
+    the file to redirect stdout and stderr to ("output").
+
+    :return: The command line arguments, None if stdin has been closed (i.e. pool shutdown)
+    """
+    print(SimulationServerPool.READY, flush=True)
+
+    request = sys.stdin.readline()  # NOTE Waiting point
+    if not request:
+        return None
+    request = json.loads(request)
+
+    output_fd = os.open(request["output"], os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    os.dup2(output_fd, sys.stdout.fileno())
+    os.dup2(output_fd, sys.stderr.fileno())
+    os.close(output_fd)
+
+    return request["args"]
+
+
+def main(argv: Optional[List[str]] = None):  # pragma: no cover
 
     sys.excepthook = __except_hook
 
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == [SimulationServerZygote.ZYGOTE_ARG]:
+        # started by a SimulationServerZygote, the forked children run main with their arguments
+        _import_nrp_client()
+        return SimulationServerZygote.serve(main)
+
+    if argv == [SimulationServerPool.STANDBY_ARG]:
+        # started ahead of the simulation by a SimulationServerPool
+        _import_nrp_client()
+        argv = _wait_in_standby()
+        if argv is None:
+            return simserver.ServerProcessExitCodes.NO_ERROR.value
+
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-d", "--dir", dest="sim_dir",
@@ -331,7 +389,7 @@ def main():  # pragma: no cover
                         default=False,
                         action="store_true")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Initialize root logger, any logger in this process will inherit the settings
     set_up_logger(name=None, logfile_name=args.logfile,
@@ -29,12 +29,16 @@ import os
 import signal
 import subprocess
 import threading
-from typing import Optional, Tuple, IO, Union
+import time
+from typing import List, Optional, Tuple, IO, Union
 
 import hbp_nrp_commons.simulation_lifecycle as simulation_lifecycle
 import hbp_nrp_simserver.server as sim_server
 
 from hbp_nrp_commons import get_python_interpreter
+from hbp_nrp_simserver.server.simulation_server_pool import SimulationServerPool
+from hbp_nrp_simserver.server.simulation_server_zygote import (SimulationServerZygote,
+                                                               ZygoteChildProcess)
 
 __author__ = 'NRP software team, Ugo Albanese, Sebastian Krach, Georg Hinkel'
 
@@ -55,6 +59,13 @@ class SimulationServerInstance:
     # (possibly) lenghty shutdown process before sending to it a SIGKILL
     MAX_STOP_TIMEOUT: float = 30.
 
+    # the idle simulation server processes the simulations run in, if any.
+    # Without an idle process, a simulation server process is spawned.
+    pool: Optional[SimulationServerPool] = None
+    # the zygote forking the simulation server processes not taken from the pool, if any.
+    # Without a zygote, a simulation server process is spawned.
+    zygote: Optional[SimulationServerZygote] = None
+
     def __init__(self,
                  lifecycle: simulation_lifecycle.SimulationLifecycle,
                  sim_id: int,  # NOTE change here when new sim_id type
@@ -78,13 +89,45 @@ class SimulationServerInstance:
         self.main_script_path = main_script_path
         self.exp_config_path = exp_config_path
 
-        self.__sim_process: Optional[subprocess.Popen] = None
+        self.__sim_process: Optional[Union[subprocess.Popen, ZygoteChildProcess]] = None
         self.__sim_process_monitoring_thread: Optional[threading.Thread] = None
         self.__sim_process_logfile: Optional[IO] = None
 
         # set when the __sim_process is being terminated
         self.__terminating_process_event: threading.Event = threading.Event()
 
+    @classmethod
+    def start_pool(cls, size: int) -> None:
+        """
+        Starts the pool of idle simulation server processes the simulations run in
+
+        :param size: The number of idle processes
+        """
+        cls.pool = SimulationServerPool(size, cls._sim_server_command())
+        cls.pool.start()
+        logger.info("Starting %s idle simulation server processes", size)
+
+    @classmethod
+    def start_zygote(cls) -> None:
+        """
+        Starts the zygote forking the simulation server processes.
+        When the zygote fails to start, it's started again by the next simulation.
+        """
+        cls.zygote = SimulationServerZygote(cls._sim_server_command())
+        try:
+            cls.zygote.start()
+        except OSError as e:
+            logger.error("Simulation server zygote could not be started: %s", e)
+
+    @staticmethod
+    def _sim_server_command() -> List[str]:
+        """
+        :return: The command running a simulation server, without arguments
+        """
+        # NOTE simulation server executable script
+        sim_server_path = os.path.join(os.path.dirname(__file__), "simulation_server.py")
+        return [python_interpreter, sim_server_path]
+
     @property
     def is_running(self) -> bool:
         """
@@ -92,13 +135,17 @@ class SimulationServerInstance:
 
         :return: True if the simulation process is running, False otherwise.
         """
-        return (self.__sim_process is not None) and (self.__sim_process.poll() is None)
+        # shutdown may reset __sim_process concurrently
+        sim_process = self.__sim_process
+        return (sim_process is not None) and (sim_process.poll() is None)
 
     def initialize(self) -> None:
         """
         Initialize the simulation server:
 
         Run :code:`simulation_server.py` in a subprocess, spawning a thread that monitors its execution.
+        The subprocess is taken from the pool, if an idle one is available, forked by the zygote,
+        if any, spawned otherwise.
         The stdout of the child process is redirected to a file named :code:`simulation_{self.sim_id}.log`
 
         """
@@ -115,11 +162,7 @@ class SimulationServerInstance:
 
         logger.debug("Starting simulation process. Simulation ID '%s'", self.sim_id)
 
-        # NOTE simulation server executable script
-        sim_server_path = os.path.join(os.path.dirname(__file__), "simulation_server.py")
-
-        args = [python_interpreter, sim_server_path,
-                "--dir", str(self.sim_dir),
+        args = ["--dir", str(self.sim_dir),
                 "--id", str(self.sim_id),
                 "--script", str(self.main_script_path),
                 "--config", self.exp_config_path]
@@ -133,20 +176,47 @@ class SimulationServerInstance:
         # env_sim['PATH'] = resource_path + env_sim['PATH']
         # env_sim['PYTHONPATH'] = resource_path + env_sim['PYTHONPATH']
 
-        self.__sim_process = subprocess.Popen(
-            args,
-            stdout=self.__sim_process_logfile, stderr=subprocess.STDOUT,
-            close_fds=True,  # close inherited file descriptors
-            env=env_sim
-        )
-
-        self.__sim_process_monitoring_thread = threading.Thread(target=self._monitor_sim_process,
-                                                                daemon=True,
-                                                                name="SimulationServerProcessMonitor")
+        start = time.monotonic()
+        pooled_process = self.pool.acquire() if self.pool is not None else None
+        if pooled_process is not None:
+            try:
+                # already warmed up, the process redirects its output to the log file
+                SimulationServerPool.run(pooled_process, args, logfile_path)
+            except OSError as e:  # e.g. the process has just exited
+                logger.warning("Pooled simulation server process unavailable: %s. "
+                               "Simulation ID: '%s'", e, self.sim_id)
+                pooled_process.kill()
+                pooled_process = None
+
+        launch = "taken from the pool"
+        sim_process = pooled_process
+        if sim_process is None and self.zygote is not None:
+            launch = "forked by the zygote"
+            try:
+                # the forked process redirects its output to the log file
+                sim_process = self.zygote.fork(args, logfile_path)
+            except OSError as e:
+                logger.warning("Simulation server zygote unavailable: %s. "
+                               "Simulation ID: '%s'", e, self.sim_id)
+
+        if sim_process is None:
+            launch = "spawned"
+            sim_process = subprocess.Popen(
+                self._sim_server_command() + args,
+                stdout=self.__sim_process_logfile, stderr=subprocess.STDOUT,
+                close_fds=True,  # close inherited file descriptors
+                env=env_sim
+            )
+        self.__sim_process = sim_process
+
+        self.__sim_process_monitoring_thread = threading.Thread(
+            target=self._monitor_sim_process,
+            daemon=True,
+            name=f"SimulationServerProcessMonitor-{self.sim_id}")
         self.__sim_process_monitoring_thread.start()
 
-        logger.debug("Simulation server process started. "
-                     "Simulation ID: '%s'", self.sim_id)
+        logger.info("Simulation server process %s in %.3f s. Simulation ID: '%s'",
+                    launch, time.monotonic() - start, self.sim_id)
 
     def shutdown(self) -> None:
         """
@@ -167,6 +237,8 @@ class SimulationServerInstance:
         """
         Monitor simulation process for termination and perform cleanup.
         """
+        # shutdown may reset __sim_process concurrently
+        sim_process, logfile = self.__sim_process, self.__sim_process_logfile
 
         if not self.is_running:
             logger.debug("Simulation Server is not running. Nothing to monitor."
@@ -180,7 +252,7 @@ class SimulationServerInstance:
             return self.__terminating_process_event.is_set() and (recv_signal in sent_by_us)
 
         # blocks until process termination
-        return_code: int = self.__sim_process.wait()
+        return_code: int = sim_process.wait()
 
         # terminated by a signal not sent by us in wait_terminate (i.e. SIGTERM, SIGKILL)
         # signals are returned by wait as negative integers, ignore the ones sent by us
@@ -210,7 +282,7 @@ class SimulationServerInstance:
             logger.debug("Simulation Server has exited with code: '%s'. Simulation ID: '%s'",
                          return_code_name, self.sim_id)
             # clean up sim process
-            self.__sim_process_logfile.close()
+            logfile.close()
 
     def _blocking_termination(self, timeout: float = MAX_STOP_TIMEOUT) -> None:
         """
@@ -232,18 +304,53 @@ class SimulationServerInstance:
             return
 
         if self.__sim_process_monitoring_thread.is_alive():
-            logger.debug("Simulation process still alive - Sending SIGTERM. "
+            self.terminate()
+            self.wait_termination(timeout)  # NOTE Waiting point
+
+    def terminate(self) -> None:
+        """
+        Requests the simulation server process to terminate, i.e. sends it a SIGTERM,
+        without waiting for it to finish. See wait_termination.
+        """
+        # shutdown may reset __sim_process concurrently
+        sim_process = self.__sim_process
+        if sim_process is None or not self.is_running:
+            logger.debug("Terminating an already terminated simulation. "
+                         "Simulation ID: '%s'", self.sim_id)
+            return
+
+        logger.debug("Simulation process still alive - Sending SIGTERM. "
+                     "Simulation ID: '%s'", self.sim_id)
+        # the monitoring thread must not fail the simulation on our own signals
+        self.__terminating_process_event.set()
+        try:
+            sim_process.terminate()
+        except ProcessLookupError:
+            logger.debug("Simulation process not found while sending signal - Ignore."
+                         "Simulation ID: '%s'", self.sim_id)
+
+    def wait_termination(self, timeout: float = MAX_STOP_TIMEOUT) -> None:
+        """
+        Blocks until the simulation server process, requested to terminate, has finished
+        and its monitoring thread has completed the cleanup.
+        The process is killed, i.e. sent a SIGKILL, if it is still running after timeout seconds.
+
+        :param timeout: Maximum waiting time in seconds, before and after killing the process
+        """
+        monitoring_thread = self.__sim_process_monitoring_thread
+        if monitoring_thread is None or monitoring_thread is threading.current_thread():
+            return
+        sim_process = self.__sim_process
+
+        monitoring_thread.join(timeout)  # NOTE Waiting point
+
+        if monitoring_thread.is_alive() and sim_process is not None:
+            logger.debug("Killing the simulation process - Sending SIGKILL. "
+                         "Some child processes could still be running."
                          "Simulation ID: '%s'", self.sim_id)
             try:
-                self.__sim_process.terminate()
-                self.__sim_process_monitoring_thread.join(timeout)  # NOTE Waiting point
-
-                if self.__sim_process_monitoring_thread.is_alive():
-                    logger.debug("Killing the simulation process - Sending SIGKILL. "
-                                 "Some child processes could still be running."
-                                 "Simulation ID: '%s'", self.sim_id)
-                    self.__sim_process.kill()
-                    self.__sim_process_monitoring_thread.join(timeout)  # NOTE Waiting point
+                sim_process.kill()
             except ProcessLookupError:
                 logger.debug("Simulation process not found while sending signal - Ignore."
                              "Simulation ID: '%s'", self.sim_id)
+            monitoring_thread.join(timeout)  # NOTE Waiting point
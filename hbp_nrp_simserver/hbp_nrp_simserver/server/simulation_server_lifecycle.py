@@ -70,7 +70,8 @@ class SimulationServerLifecycle(simulation_lifecycle.SimulationLifecycle):
 
         super().__init__(simserver.TOPIC_LIFECYCLE(sim_server.simulation_id),
                          propagated_destinations=SimulationServerLifecycle.propagated_destinations,
-                         mqtt_client_id=self.DEFAULT_MQTT_CLIENT_ID,
+                         mqtt_client_id=f"{self.DEFAULT_MQTT_CLIENT_ID}_"
+                                        f"{sim_server.simulation_id}",
                          mqtt_topics_prefix=sim_server.mqtt_topics_prefix)
 
 
@@ -107,12 +108,19 @@ class SimulationServerLifecycle(simulation_lifecycle.SimulationLifecycle):
         :param _state_change: The state change that caused the simulation to initialize
         """
         if self.__nrp_script_runner is not None and not self.__nrp_script_runner.is_initialized:
+            # the backend requests the initialization once the experiment files are available
+            timer = self.__server.stage_timer
+            timer.record_since("files wait", "warm-up")
             try:
-                self.__nrp_script_runner.initialize()
+                with timer.stage("nrp-core initialization"):
+                    self.__nrp_script_runner.initialize()
             finally:
                 # consume the initialization event, clear the topic
                 self._clear_synchronization_topic()
 
+            logger.info("Simulation server initialized: %s. Simulation ID: '%s'",
+                        timer.report(), self.__server.simulation_id)
+
     def start(self, _state_change):
         """
         Starts the simulation
@@ -0,0 +1,187 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module implements a pool of simulation server processes started ahead of the simulations
+"""
+
+import collections
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import Deque, List, Optional
+
+__author__ = 'NRP software team'
+
+# hbp_nrp_backend as name prefix so to use its logger
+logger = logging.getLogger(f"hbp_nrp_backend.{__name__.split('.')[-1]}")
+
+
+class SimulationServerPool:
+    """
+    Keeps up to size idle simulation server processes, started in standby: each one has imported
+    the modules of the simulation server and waits, on its stdin, for the arguments of the
+    simulation to run (see simulation_server.main).
+
+    A simulation takes an idle process, if any, and the pool starts a new one in the background.
+    """
+
+    # the argument starting a simulation server in standby
+    STANDBY_ARG = "--standby"
+    # printed on stdout by a simulation server in standby, once warmed up
+    READY = "ready"
+
+    # seconds before starting a process again after a failed start
+    RESPAWN_DELAY = 5.
+    # seconds given to an idle process to exit on shutdown, before killing it
+    SHUTDOWN_TIMEOUT = 5.
+
+    def __init__(self, size: int, command: List[str]):
+        """
+        :param size: The number of idle processes
+        :param command: The command starting a simulation server, without arguments
+        """
+        self.size = size
+        self.__command = command
+
+        self.__lock = threading.Lock()
+        self.__idle: Deque[subprocess.Popen] = collections.deque()
+        self.__refill_event = threading.Event()
+        self.__stopped_event = threading.Event()
+        self.__refill_thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__idle)
+
+    def start(self) -> None:
+        """
+        Starts the idle processes, in the background
+        """
+        self.__refill_thread = threading.Thread(target=self.__refill, daemon=True,
+                                                name="SimulationServerPoolRefill")
+        self.__refill_event.set()
+        self.__refill_thread.start()
+
+    def acquire(self) -> Optional[subprocess.Popen]:
+        """
+        Takes an idle process out of the pool, see run
+
+        :return: The process, None if no process is idle
+        """
+        process = None
+        with self.__lock:
+            while self.__idle and process is None:
+                process = self.__idle.popleft()
+                if process.poll() is not None:
+                    logger.warning("Idle simulation server process exited with code '%s'",
+                                   process.returncode)
+                    process = None
+
+        self.__refill_event.set()
+        return process
+
+    @staticmethod
+    def run(process: subprocess.Popen, args: List[str], output_path: str) -> None:
+        """
+        Makes a process taken out of the pool run a simulation
+
+        :param process: The process, see acquire
+        :param args: The command line arguments of the simulation server
+        :param output_path: The file the process redirects its stdout and stderr to
+        """
+        process.stdin.write(json.dumps({"args": args, "output": output_path}) + "\n")
+        process.stdin.close()
+
+    def shutdown(self) -> None:
+        """
+        Stops refilling the pool and terminates the idle processes
+        """
+        self.__stopped_event.set()
+        self.__refill_event.set()
+        if self.__refill_thread is not None:
+            self.__refill_thread.join(self.SHUTDOWN_TIMEOUT)
+
+        with self.__lock:
+            idle, self.__idle = list(self.__idle), collections.deque()
+
+        for process in idle:
+            # a simulation server in standby exits once its stdin is closed
+            process.stdin.close()
+        for process in idle:
+            try:
+                process.wait(self.SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def __refill(self) -> None:
+        while not self.__stopped_event.is_set():
+            self.__refill_event.wait()  # NOTE Waiting point
+            self.__refill_event.clear()
+
+            while not self.__stopped_event.is_set() and len(self) < self.size:
+                process = self.__spawn()
+                if process is None:
+                    self.__stopped_event.wait(self.RESPAWN_DELAY)
+                    continue
+
+                with self.__lock:
+                    if not self.__stopped_event.is_set():
+                        self.__idle.append(process)
+                        process = None
+                if process is not None:
+                    process.stdin.close()
+
+    def __spawn(self) -> Optional[subprocess.Popen]:
+        """
+        Starts a simulation server in standby and waits for it to be warmed up
+
+        :return: The process, None if it failed to start
+        """
+        start = time.monotonic()
+        try:
+            process = subprocess.Popen(self.__command + [self.STANDBY_ARG],
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       close_fds=True, env=os.environ.copy(), text=True)
+        except OSError as e:
+            logger.error("Simulation server process could not be started: %s", e)
+            return None
+
+        # the process doesn't write on this pipe once ready, its output is redirected by run
+        with process.stdout:
+            ready = process.stdout.readline().strip() == self.READY  # NOTE Waiting point
+
+        if not ready:
+            if process.poll() is None:
+                process.kill()
+            logger.error("Simulation server process failed to warm up, exit code: '%s'",
+                         process.wait())
+            return None
+
+        logger.debug("Simulation server process warmed up in %.2f s, %s processes idle",
+                     time.monotonic() - start, len(self) + 1)
+        return process
@@ -0,0 +1,376 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+This module implements a zygote, i.e. a process that has imported the modules of the simulation
+server once and forks a simulation server process for each simulation
+"""
+
+import json
+import logging
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+__author__ = 'NRP software team'
+
+# hbp_nrp_backend as name prefix so to use its logger
+logger = logging.getLogger(f"hbp_nrp_backend.{__name__.split('.')[-1]}")
+
+
+class ZygoteChildProcess:
+    """
+    A simulation server process forked by the zygote.
+
+    It mimics the subset of subprocess.Popen used to manage the simulation server processes:
+    its exit code, reported by the zygote, is the one subprocess.Popen would return,
+    i.e. negative when the process is terminated by a signal.
+    """
+
+    def __init__(self, pid: int, args: List[str]):
+        """
+        :param pid: The process id
+        :param args: The command line arguments of the simulation server
+        """
+        self.pid = pid
+        self.args = args
+        self.returncode: Optional[int] = None
+        self.__exited_event = threading.Event()
+
+    def poll(self) -> Optional[int]:
+        """
+        :return: The exit code of the process, None if it's still running
+        """
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """
+        Waits for the process to exit
+
+        :param timeout: Maximum waiting time in seconds, unbounded if None
+        :return: The exit code of the process
+        :raise subprocess.TimeoutExpired: When the process is still running after timeout
+        """
+        if not self.__exited_event.wait(timeout):  # NOTE Waiting point
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig: int) -> None:
+        """
+        Sends sig to the process, unless it has exited
+
+        :param sig: The signal
+        """
+        if self.returncode is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self) -> None:
+        """
+        Sends a SIGTERM to the process
+        """
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """
+        Sends a SIGKILL to the process
+        """
+        self.send_signal(signal.SIGKILL)
+
+    def _exited(self, returncode: int) -> None:
+        """
+        Records the exit code of the process and wakes up its waiters
+
+        :param returncode: The exit code
+        """
+        self.returncode = returncode
+        self.__exited_event.set()
+
+
+class SimulationServerZygote:
+    """
+    Forks the simulation server processes from a zygote process, so that a simulation doesn't
+    pay for the start of the interpreter and for the import of the simulation server modules.
+
+    The zygote is a simulation server started with ZYGOTE_ARG (see simulation_server.main and
+    serve). It's started on start or, lazily, by the first fork; it's started again by the next
+    fork when it has exited.
+
+    The backend talks to the zygote on its stdin and stdout, one JSON object per line:
+    the fork requests carry the command line arguments of the simulation server ("args") and the
+    file to redirect its stdout and stderr to ("output"); the zygote replies with the process id
+    of the forked child ("pid"), or with an "error", and tells when a child has exited
+    ("exited", "returncode").
+    """
+
+    # the argument starting a simulation server as a zygote
+    ZYGOTE_ARG = "--zygote"
+    # printed on stdout by the zygote, once warmed up
+    READY = "ready"
+
+    # seconds given to the zygote to reply to a fork request
+    FORK_TIMEOUT = 10.
+    # seconds given to the zygote to exit on shutdown, before killing it
+    SHUTDOWN_TIMEOUT = 5.
+
+    def __init__(self, command: List[str]):
+        """
+        :param command: The command starting a simulation server, without arguments
+        """
+        self.__command = command
+
+        # serializes the fork requests, a request being followed by its reply
+        self.__lock = threading.Lock()
+        self.__process: Optional[subprocess.Popen] = None
+        self.__replies: "queue.Queue" = queue.Queue()
+
+    @property
+    def is_running(self) -> bool:
+        """
+        :return: True if the zygote process is running, False otherwise
+        """
+        process = self.__process
+        return process is not None and process.poll() is None
+
+    def start(self) -> None:
+        """
+        Starts the zygote process and waits for it to be warmed up
+
+        :raise OSError: When the zygote could not be started
+        """
+        with self.__lock:
+            self.__start()
+
+    def fork(self, args: List[str], output_path: str) -> ZygoteChildProcess:
+        """
+        Forks a simulation server process from the zygote
+
+        :param args: The command line arguments of the simulation server
+        :param output_path: The file the process redirects its stdout and stderr to
+        :return: The forked process
+        :raise OSError: When the zygote could not fork the process
+        """
+        with self.__lock:
+            if not self.is_running:
+                self.__start()
+
+            self.__process.stdin.write(json.dumps({"args": args, "output": output_path}) + "\n")
+            self.__process.stdin.flush()
+            try:
+                reply = self.__replies.get(timeout=self.FORK_TIMEOUT)  # NOTE Waiting point
+            except queue.Empty as e:
+                # a late reply would be taken as the one of the next request
+                self.__process.kill()
+                raise OSError("The simulation server zygote didn't reply") from e
+
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def shutdown(self) -> None:
+        """
+        Terminates the zygote process.
+        The processes it has forked keep running, unsupervised.
+        """
+        with self.__lock:
+            process, self.__process = self.__process, None
+        if process is None:
+            return
+
+        # the zygote exits once its stdin is closed
+        process.stdin.close()
+        try:
+            process.wait(self.SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    @classmethod
+    def serve(cls, main: Callable[[List[str]], int]) -> int:  # pragma: no cover
+        """
+        Runs the zygote, i.e. forks a child running main for each fork request read from stdin.
+        The zygote forks from its main thread, it mustn't start any other thread.
+
+        The child redirects its stdout and stderr to the requested file and returns what main
+        returns, i.e. the exit code of the simulation server; its exceptions are not caught.
+        The zygote returns 0 once stdin has been closed.
+
+        :param main: The main function of the simulation server, called with its command line
+                     arguments
+        :return: The exit code, in the zygote and in the forked children
+        """
+        requests_fd = sys.stdin.fileno()
+        # SIGCHLD wakes up the zygote, through a pipe, to reap the exited children
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_write, False)
+        previous_sigchld_handler = signal.signal(signal.SIGCHLD, lambda *_: None)
+        signal.set_wakeup_fd(wakeup_write)
+
+        print(cls.READY, flush=True)
+
+        pending = b""
+        while True:
+            readable, _, _ = select.select([requests_fd, wakeup_read], [], [])  # NOTE Waiting point
+            if wakeup_read in readable:
+                os.read(wakeup_read, 4096)
+                cls.__reap_children()
+            if requests_fd not in readable:
+                continue
+
+            data = os.read(requests_fd, 65536)
+            if not data:
+                break
+            *requests, pending = (pending + data).split(b"\n")
+
+            for request in map(json.loads, requests):
+                try:
+                    pid = os.fork()
+                except OSError as e:
+                    cls.__reply({"error": str(e)})
+                    continue
+
+                if pid == 0:
+                    # the child process, it runs the simulation server
+                    signal.set_wakeup_fd(-1)
+                    signal.signal(signal.SIGCHLD, previous_sigchld_handler)
+                    os.close(wakeup_read)
+                    os.close(wakeup_write)
+                    cls.__redirect_output(request["output"])
+                    return main(request["args"])
+
+                cls.__reply({"pid": pid})
+
+        signal.set_wakeup_fd(-1)
+        os.close(wakeup_read)
+        os.close(wakeup_write)
+        return 0
+
+    def __start(self) -> None:
+        """
+        Starts the zygote process and its reader thread. The lock has to be held by the caller.
+
+        :raise OSError: When the zygote could not be started
+        """
+        start = time.monotonic()
+        process = subprocess.Popen(self.__command + [self.ZYGOTE_ARG],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   close_fds=True, env=os.environ.copy(), text=True)
+
+        if process.stdout.readline().strip() != self.READY:  # NOTE Waiting point
+            if process.poll() is None:
+                process.kill()
+            raise OSError("The simulation server zygote failed to warm up, "
+                          f"exit code: '{process.wait()}'")
+
+        # the replies of a previous zygote are stale
+        self.__replies = queue.Queue()
+        self.__process = process
+        threading.Thread(target=self.__read_replies, args=(process, self.__replies),
+                         daemon=True, name="SimulationServerZygoteReader").start()
+
+        logger.info("Simulation server zygote warmed up in %.2f s", time.monotonic() - start)
+
+    def __read_replies(self, process: subprocess.Popen, replies: "queue.Queue") -> None:
+        """
+        Dispatches the replies of a zygote process: the forked children go to replies, the exit
+        codes to the children.
+
+        :param process: The zygote process
+        :param replies: The queue of the replies to the fork requests
+        """
+        children: Dict[int, ZygoteChildProcess] = {}
+        for line in process.stdout:  # NOTE Waiting point
+            message = json.loads(line)
+            if "exited" in message:
+                child = children.pop(message["exited"], None)
+                if child is not None:
+                    child._exited(message["returncode"])  # pylint: disable=protected-access
+            elif "pid" in message:
+                # registered before the fork request returns, the child could exit right away
+                children[message["pid"]] = ZygoteChildProcess(message["pid"], process.args)
+                replies.put(children[message["pid"]])
+            else:
+                replies.put(OSError(message["error"]))
+
+        process.stdout.close()
+        replies.put(OSError(f"The simulation server zygote exited with code '{process.wait()}'"))
+
+        # shutdown closes stdin, leaving the running children unsupervised
+        if children and not process.stdin.closed:
+            # the exit codes of its children are lost with the zygote: kill them rather than
+            # leaving their simulations running unsupervised
+            logger.error("Simulation server zygote exited, killing %s simulation server processes",
+                         len(children))
+            for child in children.values():
+                try:
+                    child.kill()
+                except ProcessLookupError:
+                    pass
+                child._exited(-signal.SIGKILL)  # pylint: disable=protected-access
+
+    @staticmethod
+    def __reply(message: dict) -> None:  # pragma: no cover
+        """
+        Writes a message of the zygote to the backend, on stdout
+
+        :param message: The message
+        """
+        print(json.dumps(message), flush=True)
+
+    @classmethod
+    def __reap_children(cls) -> None:  # pragma: no cover
+        """
+        Reaps the exited children of the zygote and reports their exit codes
+        """
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            # as returned by subprocess.Popen: negative when terminated by a signal
+            returncode = (-os.WTERMSIG(status) if os.WIFSIGNALED(status)
+                          else os.WEXITSTATUS(status))
+            cls.__reply({"exited": pid, "returncode": returncode})
+
+    @staticmethod
+    def __redirect_output(output_path: str) -> None:  # pragma: no cover
+        """
+        Redirects stdout and stderr to output_path, stdin to /dev/null
+
+        :param output_path: The file
+        """
+        null_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null_fd, sys.stdin.fileno())
+        os.close(null_fd)
+
+        output_fd = os.open(output_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        os.dup2(output_fd, sys.stdout.fileno())
+        os.dup2(output_fd, sys.stderr.fileno())
+        os.close(output_fd)
@@ -0,0 +1,170 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Several simulation servers started at the same time on the same host: nrp-core and the MQTT
+broker are replaced by fakes that, as the actual ones, reject a taken port and kick a client
+off when another one connects with the same id
+"""
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import hbp_nrp_simserver.server as sim_server
+from hbp_nrp_simserver.server.simulation_server import SimulationServer
+
+
+class FakeMqttBroker:
+    """
+    Records the connected clients by id, a client connecting with the id of a connected one
+    kicks it off
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connected = {}
+        self.kicked_off = []
+
+    def Client(self, client_id, clean_session=True):  # pylint: disable=invalid-name
+        broker = self
+
+        class FakeMqttClient(mock.MagicMock):
+            def connect(self, host, port):
+                with broker.lock:
+                    if client_id in broker.connected:
+                        broker.kicked_off.append(client_id)
+                    broker.connected[client_id] = self
+
+            def disconnect(self):
+                with broker.lock:
+                    if broker.connected.get(client_id) is self:
+                        del broker.connected[client_id]
+
+        return FakeMqttClient()
+
+
+class FakeNrpCore:
+    """
+    Listens on its address, as the gRPC server of nrp-core
+    """
+
+    def __init__(self, address, config_file, args):
+        host, port = address.split(":")
+        self.address = address
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # raises if the port is taken
+        self.socket.bind((host, int(port)))
+        self.socket.listen()
+
+    def initialize(self):
+        pass
+
+    def shutdown(self):
+        self.socket.close()
+
+
+class TestConcurrentSimulationServers(unittest.TestCase):
+
+    SERVERS = 4
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+        self.broker = FakeMqttBroker()
+        self.nrp_cores = []
+
+        def nrp_core(*args, **kwargs):
+            instance = FakeNrpCore(*args, **kwargs)
+            self.nrp_cores.append(instance)
+            return instance
+
+        for target, new in (
+                ('hbp_nrp_commons.simulation_lifecycle.mqtt', self.broker),
+                ('hbp_nrp_simserver.server.mqtt_notifier.mqtt', self.broker),
+                ('hbp_nrp_simserver.server.NrpCoreClientClass', nrp_core),
+                ('hbp_nrp_simserver.server.nrp_script_runner.set_up_logger', mock.MagicMock()),
+                ('hbp_nrp_simserver.server.simulation_server.timer', mock.MagicMock())):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_server(self, sim_id):
+        sim_dir = os.path.join(self.tmp_dir, str(sim_id))
+        os.mkdir(sim_dir)
+        exp_config_file = os.path.join(sim_dir, "simulation_config.json")
+        with open(exp_config_file, "w", encoding="utf-8") as f:
+            json.dump({"SimulationTimeout": 1, "SimulationTimestep": 0.01,
+                       "EngineConfigs": [{"EngineType": "datatransfer_grpc_engine"}]}, f)
+        main_script_file = os.path.join(sim_dir, "main_script.py")
+        with open(main_script_file, "w", encoding="utf-8") as f:
+            f.write("pass\n")
+
+        return SimulationServer(sim_server.SimulationSettings(sim_id=str(sim_id),
+                                                              sim_dir=sim_dir,
+                                                              exp_config_file=exp_config_file,
+                                                              main_script_file=main_script_file))
+
+    def test_concurrent_servers(self):
+        servers = [self.create_server(sim_id) for sim_id in range(self.SERVERS)]
+        errors = []
+        barrier = threading.Barrier(self.SERVERS)
+
+        def start(server):
+            try:
+                barrier.wait()
+                server.initialize()
+                server.lifecycle.initialized()  # initializes nrp-core
+            except Exception as e:  # pylint: disable=broad-except
+                errors.append(e)
+
+        threads = [threading.Thread(target=start, args=(server,)) for server in servers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(all(server.lifecycle.state == 'paused' for server in servers))
+
+        # each nrp-core listens on its own port
+        addresses = {nrp_core.address for nrp_core in self.nrp_cores}
+        self.assertEqual(len(addresses), self.SERVERS)
+
+        # the lifecycle and the notifier of each server have their own MQTT client
+        self.assertEqual(self.broker.kicked_off, [])
+        self.assertEqual(len(self.broker.connected), 2 * self.SERVERS)
+
+        for server in servers:
+            server.shutdown()
+        self.assertEqual(self.broker.connected, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+Lazy imports of hbp_nrp_simserver.server unit test
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import hbp_nrp_simserver.server as simserver
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def imported_modules(self, statement, modules):
+        """
+        :return: Which of modules are loaded by a new interpreter running statement
+        """
+        with mock.patch.dict(os.environ, {"PYTHONPATH": os.pathsep.join(sys.path)}):
+            output = subprocess.run(
+                [sys.executable, "-c",
+                 f"import sys; {statement}; print(' '.join(m for m in {modules!r} "
+                 f"if m in sys.modules))"],
+                stdout=subprocess.PIPE, check=True, timeout=60).stdout.decode()
+        return output.split()
+
+    def test_import_server(self):
+        modules = ('nrp_client', 'hbp_nrp_simserver.version', 'hbp_nrp_commons.version')
+
+        self.assertEqual(self.imported_modules(
+            "import hbp_nrp_simserver.server.simulation_server_instance", modules), [])
+        self.assertEqual(self.imported_modules(
+            "import hbp_nrp_simserver.server.simulation_server", modules), [])
+
+    def test_nrp_client_first_use(self):
+        self.assertEqual(self.imported_modules(
+            "import hbp_nrp_simserver.server as s; s.NrpCoreClientClass", ('nrp_client',)),
+            ['nrp_client'])
+
+    def test_nrp_core_client_class(self):
+        # pylint: disable=import-outside-toplevel
+        from nrp_client import NrpCore
+
+        self.assertIs(simserver.NrpCoreClientClass, NrpCore)
+        self.assertIs(simserver.__dict__["NrpCoreClientClass"], NrpCore)
+
+    def test_missing_attribute(self):
+        self.assertRaises(AttributeError, getattr, simserver, "missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -48,7 +48,7 @@ class TestMQTTNotifier(unittest.TestCase):
         DEFAULT_MQTT_BROKER_HOST ="home"
         DEFAULT_MQTT_BROKER_PORT = 42
 
-        new_defaults = (DEFAULT_MQTT_BROKER_HOST, DEFAULT_MQTT_BROKER_PORT, "","mqtt_notifier")
+        new_defaults = (DEFAULT_MQTT_BROKER_HOST, DEFAULT_MQTT_BROKER_PORT, "", None)
 
         # self.addCleanup(patcher_settings.stop)
 
@@ -57,7 +57,7 @@ class TestMQTTNotifier(unittest.TestCase):
             self.__mqtt_notifier: MQTTNotifier = MQTTNotifier(sim_id=self.sim_id)
 
     def test_mqtt_node_init(self):
-        self.mqtt_client_class_mock.assert_called_with(MQTTNotifier.DEFAULT_MQTT_CLIENT_ID,
+        self.mqtt_client_class_mock.assert_called_with(f"{MQTTNotifier.DEFAULT_MQTT_CLIENT_ID}_0",
                                                        clean_session=True)
         
         self.mqtt_client_mock.connect.assert_called_with(host="home",
@@ -81,8 +81,10 @@ class TestMQTTNotifier(unittest.TestCase):
 
     def test_shutdown(self):
         self.__mqtt_notifier.shutdown()
-        self.mqtt_client_mock.loop_stop.assert_called()
-        self.mqtt_client_mock.disconnect.assert_called()
+        # the network thread sends the pending messages before exiting, once disconnected
+        self.assertEqual([c[0] for c in self.mqtt_client_mock.method_calls
+                          if c[0] in ("disconnect", "loop_stop")],
+                         ["disconnect", "loop_stop"])
         # no publishing after shutdown
         self.assertFalse(self.mqtt_client_publish_mock.called)
 
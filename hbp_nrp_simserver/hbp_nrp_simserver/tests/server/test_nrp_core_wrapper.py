@@ -103,10 +103,24 @@ class TestNrpCoreWrapper(unittest.TestCase):
         args_to_override_str = " ".join([f"{engine_param_override_arg} {field_sep.join([engine_configs_arg, sim_id, args_to_override_mapping])}" 
                                          for args_to_override_mapping in args_to_override_mappings])
 
-        self.nrp_core_class_mock.assert_called_with(NrpCoreWrapper.NRP_CORE_DEFAULT_ADDRESS_PORT,
+        self.nrp_core_class_mock.assert_called_with(self.nrp_core_wrapper.nrp_core_address,
                                                     config_file=self.exp_config_file,
                                                     args=args_to_override_str)
 
+    def test_init_nrp_core_address(self):
+        other_wrapper = NrpCoreWrapper(self.nrp_core_class_mock,
+                                       sim_id="43",
+                                       exp_config_file=self.exp_config_file,
+                                       exp_config=self.exp_config_mock,
+                                       paused_event=self.paused_event_mock,
+                                       stopped_event=self.stopped_event_mock)
+
+        host, port = self.nrp_core_wrapper.nrp_core_address.split(":")
+        self.assertEqual(host, NrpCoreWrapper.NRP_CORE_HOST)
+        self.assertGreater(int(port), 0)
+        # each simulation has its own nrp-core port
+        self.assertNotEqual(other_wrapper.nrp_core_address, self.nrp_core_wrapper.nrp_core_address)
+
     def test_init_topics_prefix(self):
 
         self.settings_mock.mqtt_topics_prefix = "mqtt_prefix"
@@ -25,10 +25,17 @@
 NRPScriptRunner unit test
 """
 
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from unittest import mock
 
 import hbp_nrp_simserver.server as sim_server
+import hbp_nrp_simserver.server.experiment_configuration as exp_conf
 from hbp_nrp_commons.tests import utilities_test
 from hbp_nrp_simserver.server.nrp_script_runner import NRPScriptRunner
 
@@ -77,6 +84,8 @@ class TestNRPScriptRunner(unittest.TestCase):
         threading_mock = patcher_threading.start()
         self.thread_mock = threading_mock.Thread
         self.event_mock = threading_mock.Event
+        # the execution isn't stopped
+        self.event_mock.return_value.is_set.return_value = False
         self.addCleanup(patcher_threading.stop)
 
         # NRPScriptRunner
@@ -195,6 +204,8 @@ class TestNRPScriptRunner(unittest.TestCase):
                 self.nrp_script_runner.stop()
 
                 stopped_event_mock.set.assert_called()
+                # should wake up the paused script
+                self.event_mock.return_value.set.assert_called()
                 exec_thread_mock.join.assert_called_with(
                     sim_server.nrp_script_runner.MAX_STOP_TIMEOUT)
 
@@ -296,14 +307,18 @@ class TestNRPScriptRunner(unittest.TestCase):
 
         self.exec_mock.side_effect = sim_server.nrp_core_wrapper.NRPStopExecution
 
-        with mock.patch.object(self.nrp_script_runner, "_hide_modules"):
+        with mock.patch.object(self.nrp_script_runner, "_hide_modules"), \
+                mock.patch.object(self.nrp_script_runner,
+                                  "_NRPScriptRunner__exec_stopped_event") as stopped_event_mock:
+            stopped_event_mock.is_set.return_value = True
+
             self.nrp_script_runner._NRPScriptRunner__execute_script(complete_callback_mock)
 
             # should log the event
             self.logger_mock.info.assert_called()
 
-            # should call complete_callback 
-            complete_callback_mock.assert_called()
+            # should not call complete_callback, the script has been stopped
+            complete_callback_mock.assert_not_called()
 
     def test_execute_nrp_sim_timeout_exception(self):
         complete_callback_mock = mock.MagicMock()
@@ -378,5 +393,78 @@ class TestNRPScriptRunner(unittest.TestCase):
                 raise ValueError
 
 
+class FakeNrpCore:
+    def __init__(self, address, config_file, args):
+        pass
+
+    def initialize(self):
+        pass
+
+    def run_loop(self, num_iterations, json_data=None):
+        time.sleep(0.001 * num_iterations)
+
+    def shutdown(self):
+        pass
+
+
+class TestNRPScriptRunnerStop(unittest.TestCase):
+    """
+    Stops the main script, run by its thread, with a fake nrp-core
+    """
+    # the script thread is joined for this long at most
+    MAX_STOP_TIMEOUT = 5.
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        exp_config_file = os.path.join(self.tmp_dir, "simulation_config.json")
+        with open(exp_config_file, "w", encoding="utf-8") as f:
+            json.dump({"SimulationTimeout": 3600, "SimulationTimestep": 0.01,
+                       "EngineConfigs": [{"EngineType": "datatransfer_grpc_engine"}]}, f)
+        main_script_file = os.path.join(self.tmp_dir, "main_script.py")
+        with open(main_script_file, "w", encoding="utf-8") as f:
+            f.write("while True:\n    nrp.run_loop(1)\n")
+
+        base_path = "hbp_nrp_simserver.server.nrp_script_runner"
+        for target, new in ((f"{base_path}.set_up_logger", mock.MagicMock()),
+                            (f"{base_path}.MAX_STOP_TIMEOUT", self.MAX_STOP_TIMEOUT),
+                            ("hbp_nrp_simserver.server.NrpCoreClientClass", FakeNrpCore)):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        settings = sim_server.SimulationSettings(sim_id="42", sim_dir=self.tmp_dir,
+                                                 exp_config_file=exp_config_file,
+                                                 main_script_file=main_script_file)
+        self.runner = NRPScriptRunner(settings,
+                                      exp_conf.validate(exp_conf.parse(exp_config_file)),
+                                      mock.MagicMock())
+        self.runner.initialize()
+        self.completed = threading.Event()
+
+    def assert_stops(self):
+        start = time.monotonic()
+        self.runner.stop()
+
+        # the script thread exits as soon as it's requested to stop
+        self.assertLess(time.monotonic() - start, self.MAX_STOP_TIMEOUT / 2)
+        # stopped, the script hasn't completed
+        self.assertFalse(self.completed.is_set())
+
+    def test_stop_running(self):
+        self.runner.start(completed_callback=self.completed.set)
+        time.sleep(0.05)
+
+        self.assert_stops()
+
+    def test_stop_paused(self):
+        self.runner.start(completed_callback=self.completed.set)
+        time.sleep(0.05)
+        self.runner.pause()
+        time.sleep(0.05)
+
+        self.assert_stops()
+
+
 if __name__ == '__main__':
     unittest.main()
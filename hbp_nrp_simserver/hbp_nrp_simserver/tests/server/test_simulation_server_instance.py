@@ -108,6 +108,70 @@ class TestSimulationServerInstance(unittest.TestCase):
             self.assertTrue(self.thread_mock.called)
             self.assertTrue(self.thread_mock.return_value.start.called)
 
+    @mock.patch(f"{base_path}.SimulationServerPool")
+    def test_initialize_pooled(self, pool_class_mock):
+        pool_mock = mock.MagicMock()
+        with mock.patch.object(SimulationServerInstance, "pool", pool_mock), \
+                mock.patch(f"{self.base_path}.os") as mock_os:
+            mock_os.path.join.side_effect = os.path.join
+
+            self.ssi.initialize()
+
+            # the idle process runs the simulation, no process is spawned
+            process = pool_mock.acquire.return_value
+            pool_class_mock.run.assert_called_once()
+            run_args = pool_class_mock.run.call_args.args
+            self.assertIs(run_args[0], process)
+            self.assertEqual(run_args[1][:4], ["--dir", "/tmp/sim_dir", "--id", "42"])
+            self.assertEqual(run_args[2], '/tmp/sim_dir/simulation_42.log')
+            self.popen_mock.assert_not_called()
+            self.assertTrue(self.thread_mock.return_value.start.called)
+
+    @mock.patch(f"{base_path}.SimulationServerPool")
+    def test_initialize_pool_unavailable(self, pool_class_mock):
+        pool_mock = mock.MagicMock()
+        with mock.patch.object(SimulationServerInstance, "pool", pool_mock), \
+                mock.patch(f"{self.base_path}.os"):
+            # no idle process
+            pool_mock.acquire.return_value = None
+            self.ssi.initialize()
+            pool_class_mock.run.assert_not_called()
+            self.assertTrue(self.popen_mock.called)
+
+            # the idle process has just exited
+            self.popen_mock.reset_mock()
+            pool_mock.acquire.return_value = mock.MagicMock()
+            pool_class_mock.run.side_effect = BrokenPipeError
+            self.ssi.initialize()
+            pool_mock.acquire.return_value.kill.assert_called_once()
+            self.assertTrue(self.popen_mock.called)
+
+    def test_initialize_zygote(self):
+        zygote_mock = mock.MagicMock()
+        with mock.patch.object(SimulationServerInstance, "zygote", zygote_mock), \
+                mock.patch(f"{self.base_path}.os") as mock_os:
+            mock_os.path.join.side_effect = os.path.join
+
+            self.ssi.initialize()
+
+            # the zygote forks the simulation server process, no process is spawned
+            zygote_mock.fork.assert_called_once()
+            fork_args = zygote_mock.fork.call_args.args
+            self.assertEqual(fork_args[0][:4], ["--dir", "/tmp/sim_dir", "--id", "42"])
+            self.assertEqual(fork_args[1], '/tmp/sim_dir/simulation_42.log')
+            self.popen_mock.assert_not_called()
+            self.assertTrue(self.thread_mock.return_value.start.called)
+
+    def test_initialize_zygote_unavailable(self):
+        zygote_mock = mock.MagicMock()
+        zygote_mock.fork.side_effect = OSError("The simulation server zygote didn't reply")
+        with mock.patch.object(SimulationServerInstance, "zygote", zygote_mock), \
+                mock.patch(f"{self.base_path}.os"):
+            self.ssi.initialize()
+
+            zygote_mock.fork.assert_called_once()
+            self.assertTrue(self.popen_mock.called)
+
     def _monitor_thread_test(self, fail_cause, event_is_set):
         wait_event = threading.Event()
 
@@ -199,6 +263,47 @@ class TestSimulationServerInstance(unittest.TestCase):
         self.assertTrue(sim_process.kill.called)
         self.assertEqual(monitor_thread.join.call_count, 2)
 
+    def test_terminate(self):
+        sim_process = self.popen_mock.return_value
+        monitor_thread = self.thread_mock.return_value
+
+        self.ssi.initialize()
+        self.is_running_mock.return_value = True
+
+        self.ssi.terminate()
+
+        # the monitoring thread ignores the signals we send
+        self.assertTrue(self.event_mock.return_value.set.called)
+        self.assertTrue(sim_process.terminate.called)
+        self.assertFalse(monitor_thread.join.called)
+
+    def test_terminate_not_running(self):
+        sim_process = self.popen_mock.return_value
+
+        self.ssi.initialize()
+        self.is_running_mock.return_value = False
+
+        self.ssi.terminate()
+
+        self.assertFalse(sim_process.terminate.called)
+
+    def test_wait_termination_not_initialized(self):
+        self.ssi.wait_termination()
+
+        self.assertFalse(self.thread_mock.return_value.join.called)
+
+    def test_wait_termination(self):
+        sim_process = self.popen_mock.return_value
+        monitor_thread = self.thread_mock.return_value
+
+        self.ssi.initialize()
+        monitor_thread.is_alive.return_value = False
+
+        self.ssi.wait_termination(timeout=1)
+
+        monitor_thread.join.assert_called_once_with(1)
+        self.assertFalse(sim_process.kill.called)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -29,6 +29,7 @@ import unittest
 from unittest import mock
 from unittest.mock import patch, MagicMock
 
+from hbp_nrp_commons.stage_timer import StageTimer
 from hbp_nrp_simserver.server import TOPIC_LIFECYCLE
 
 from hbp_nrp_simserver.server.simulation_server_lifecycle import SimulationServerLifecycle
@@ -48,11 +49,6 @@ class TestSimulationServerLifecycle(unittest.TestCase):
         self.publish_mock = self.mqtt_client_mock.return_value.publish
         self.addCleanup(patcher_mqtt_client.stop)
 
-        # time
-        patcher_time = patch("hbp_nrp_commons.simulation_lifecycle.time")
-        self.time_mock = patcher_time.start()
-        self.addCleanup(patcher_time.stop)
-
         # Patch simulation_server_lifecycle
         # threading.Event
         patcher_threading_event = patch(f"{self.base_path}.threading.Event")
@@ -73,7 +69,7 @@ class TestSimulationServerLifecycle(unittest.TestCase):
 
     def test_init(self):
         self.assertIn(self.ssl.synchronization_topic, TOPIC_LIFECYCLE(self.sim_server_mock.simulation_id))
-        self.assertEqual(self.ssl.mqtt_client_id, self.ssl.DEFAULT_MQTT_CLIENT_ID)
+        self.assertEqual(self.ssl.mqtt_client_id, f"{self.ssl.DEFAULT_MQTT_CLIENT_ID}_42")
         self.assertEqual(self.ssl.propagated_destinations, SimulationServerLifecycle.propagated_destinations)
 
     def test_start(self):
@@ -139,12 +135,17 @@ class TestSimulationServerLifecycle(unittest.TestCase):
 
     def test_initialize(self):
         self.sim_server_mock.nrp_script_runner.is_initialized = False
+        self.sim_server_mock.stage_timer = StageTimer()
 
         with patch.object(self.ssl, "_clear_synchronization_topic") as cst_mock:
             self.ssl.initialize(mock.sentinel.event)
             self.sim_server_mock.nrp_script_runner.initialize.assert_called()
             cst_mock.assert_called()
 
+        # the wait for the experiment files and the initialization of nrp-core are timed
+        self.assertEqual(list(self.sim_server_mock.stage_timer.durations()),
+                         ["files wait", "nrp-core initialization"])
+
     def test_initialize_exception(self):
         self.sim_server_mock.nrp_script_runner.is_initialized = False
         self.sim_server_mock.nrp_script_runner.initialize.side_effect = Exception
@@ -0,0 +1,131 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+SimulationServerPool unit test
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from hbp_nrp_simserver.server.simulation_server_pool import SimulationServerPool
+
+# a simulation server in standby, as in simulation_server.main, writing its arguments
+FAKE_SIMULATION_SERVER = """
+import json, os, sys
+assert sys.argv[1:] == ["--standby"]
+print("ready", flush=True)
+request = sys.stdin.readline()
+if not request:
+    sys.exit(0)
+request = json.loads(request)
+output_fd = os.open(request["output"], os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+os.dup2(output_fd, sys.stdout.fileno())
+print(" ".join(request["args"]), flush=True)
+"""
+
+
+class TestSimulationServerPool(unittest.TestCase):
+    base_path = "hbp_nrp_simserver.server.simulation_server_pool"
+    TIMEOUT = 10.
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        script = os.path.join(self.tmp_dir, "simulation_server.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(FAKE_SIMULATION_SERVER)
+
+        self.pool = SimulationServerPool(2, [sys.executable, script])
+        self.addCleanup(self.pool.shutdown)
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + self.TIMEOUT
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.01)
+
+    def test_acquire_not_started(self):
+        self.assertIsNone(self.pool.acquire())
+
+    def test_acquire_and_run(self):
+        self.pool.start()
+        self.wait_until(lambda: len(self.pool) == 2)
+
+        process = self.pool.acquire()
+        self.assertIsNone(process.poll())
+        output = os.path.join(self.tmp_dir, "simulation_42.log")
+        SimulationServerPool.run(process, ["--id", "42"], output)
+
+        self.assertEqual(process.wait(self.TIMEOUT), 0)
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "--id 42\n")
+
+        # the pool is refilled in the background
+        self.wait_until(lambda: len(self.pool) == 2)
+
+    def test_acquire_skips_exited(self):
+        self.pool.start()
+        self.wait_until(lambda: len(self.pool) == 2)
+
+        first = self.pool.acquire()
+        first.kill()
+        first.wait()
+        self.pool._SimulationServerPool__idle.appendleft(first)
+
+        process = self.pool.acquire()
+        self.assertIsNot(process, first)
+        self.assertIsNone(process.poll())
+        process.kill()
+        process.wait()
+
+    def test_shutdown(self):
+        self.pool.start()
+        self.wait_until(lambda: len(self.pool) == 2)
+        idle = list(self.pool._SimulationServerPool__idle)
+
+        self.pool.shutdown()
+
+        # the processes in standby exit once their stdin is closed
+        self.assertEqual([process.returncode for process in idle], [0, 0])
+        self.assertEqual(len(self.pool), 0)
+        self.assertIsNone(self.pool.acquire())
+
+    @mock.patch(f"{base_path}.SimulationServerPool.RESPAWN_DELAY", 0.01)
+    def test_warm_up_failure(self):
+        pool = SimulationServerPool(1, [sys.executable, "-c", "import sys; sys.exit(3)"])
+        with mock.patch(f"{self.base_path}.logger") as logger_mock:
+            pool.start()
+            self.wait_until(lambda: logger_mock.error.call_count >= 2)
+            pool.shutdown()
+
+        self.assertEqual(len(pool), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
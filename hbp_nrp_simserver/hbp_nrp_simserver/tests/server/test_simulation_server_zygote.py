@@ -0,0 +1,166 @@
+# ---LICENSE-BEGIN - DO NOT CHANGE OR MOVE THIS HEADER
+# This file is part of the Neurorobotics Platform software
+# Copyright (C) 2014,2015,2016,2017 Human Brain Project
+# https://www.humanbrainproject.eu
+#
+# The Human Brain Project is a European Commission funded project
+# in the frame of the Horizon2020 FET Flagship plan.
+# http://ec.europa.eu/programmes/horizon2020/en/h2020-section/fet-flagships
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# ---LICENSE-END
+"""
+SimulationServerZygote unit test
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from hbp_nrp_simserver.server.simulation_server_zygote import SimulationServerZygote
+
+# a zygote, as in simulation_server.main, whose children write their arguments and exit
+# with the code given by the first one, or sleep until terminated with "sleep"
+FAKE_SIMULATION_SERVER = """
+import sys, time
+from hbp_nrp_simserver.server.simulation_server_zygote import SimulationServerZygote
+
+def main(argv):
+    if argv == ["--zygote"]:
+        return SimulationServerZygote.serve(main)
+    print(" ".join(argv), flush=True)
+    if argv[0] == "sleep":
+        time.sleep(60)
+    if argv[0] == "raise":
+        raise RuntimeError("failed")
+    return int(argv[0])
+
+sys.exit(main(sys.argv[1:]))
+"""
+
+
+class TestSimulationServerZygote(unittest.TestCase):
+    TIMEOUT = 10.
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        script = os.path.join(self.tmp_dir, "simulation_server.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(FAKE_SIMULATION_SERVER)
+
+        self.env_patcher = mock.patch.dict(os.environ, {"PYTHONPATH": os.pathsep.join(sys.path)})
+        self.env_patcher.start()
+        self.addCleanup(self.env_patcher.stop)
+
+        self.zygote = SimulationServerZygote([sys.executable, script])
+        self.addCleanup(self.zygote.shutdown)
+
+    def output(self, name):
+        return os.path.join(self.tmp_dir, f"{name}.log")
+
+    def read_output(self, name):
+        with open(self.output(name), encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def is_alive(pid):
+        # the killed orphan could be a zombie, not reaped yet by init
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except FileNotFoundError:
+            return False
+
+    def test_fork(self):
+        self.zygote.start()
+        self.assertTrue(self.zygote.is_running)
+
+        processes = [self.zygote.fork([str(code), "--id", str(code)], self.output(code))
+                     for code in (0, 3)]
+
+        self.assertEqual([process.wait(self.TIMEOUT) for process in processes], [0, 3])
+        self.assertEqual([process.poll() for process in processes], [0, 3])
+        self.assertEqual(self.read_output(0), "0 --id 0\n")
+        self.assertEqual(self.read_output(3), "3 --id 3\n")
+        self.assertNotEqual(processes[0].pid, processes[1].pid)
+
+    def test_fork_starts_zygote(self):
+        self.assertFalse(self.zygote.is_running)
+
+        process = self.zygote.fork(["0"], self.output("lazy"))
+
+        self.assertEqual(process.wait(self.TIMEOUT), 0)
+        self.assertTrue(self.zygote.is_running)
+
+    def test_uncaught_exception(self):
+        process = self.zygote.fork(["raise"], self.output("raise"))
+
+        # as the interpreter does, the traceback is printed and the exit code is 1
+        self.assertEqual(process.wait(self.TIMEOUT), 1)
+        self.assertIn("RuntimeError: failed", self.read_output("raise"))
+
+    def test_terminate(self):
+        process = self.zygote.fork(["sleep"], self.output("sleep"))
+
+        self.assertRaises(subprocess.TimeoutExpired, process.wait, 0.1)
+        self.assertIsNone(process.poll())
+
+        process.terminate()
+        # terminated by a signal, as returned by subprocess.Popen
+        self.assertEqual(process.wait(self.TIMEOUT), -signal.SIGTERM)
+        # no signal is sent once exited
+        process.kill()
+
+    def test_zygote_exits(self):
+        process = self.zygote.fork(["sleep"], self.output("sleep"))
+        os.kill(self.zygote._SimulationServerZygote__process.pid, signal.SIGKILL)
+
+        # the unsupervised children are killed
+        self.assertEqual(process.wait(self.TIMEOUT), -signal.SIGKILL)
+        deadline = time.monotonic() + self.TIMEOUT
+        while self.is_alive(process.pid):
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.01)
+
+        # a new zygote is started
+        self.assertEqual(self.zygote.fork(["0"], self.output("0")).wait(self.TIMEOUT), 0)
+
+    def test_shutdown(self):
+        self.zygote.start()
+        zygote_process = self.zygote._SimulationServerZygote__process
+
+        self.zygote.shutdown()
+
+        # the zygote exits once its stdin is closed
+        self.assertEqual(zygote_process.returncode, 0)
+        self.assertFalse(self.zygote.is_running)
+
+    def test_warm_up_failure(self):
+        zygote = SimulationServerZygote([sys.executable, "-c", "import sys; sys.exit(3)"])
+
+        self.assertRaises(OSError, zygote.start)
+        self.assertRaises(OSError, zygote.fork, ["0"], self.output("0"))
+        self.assertFalse(zygote.is_running)
+
+
+if __name__ == '__main__':
+    unittest.main()